@@ -8,7 +8,9 @@ from sqlalchemy import engine_from_config, pool
 
 import apps.api.src.api.v1.models.access_log as _models_access_log
 import apps.api.src.api.v1.models.authorized_plate as _models_authorized_plate
+import apps.api.src.api.v1.models.image_blob as _models_image_blob
 import apps.api.src.api.v1.models.user as _models_user
+import apps.api.src.api.v1.models.whitelist_change as _models_whitelist_change
 from apps.api.src.api.v1.db.base import Base
 
 # Objeto de configuração do Alembic; provê acesso aos valores do .ini
@@ -30,7 +32,13 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 # Referências para evitar remoção por linters e assegurar import dos modelos
-_ = (_models_user, _models_authorized_plate, _models_access_log)
+_ = (
+    _models_user,
+    _models_authorized_plate,
+    _models_access_log,
+    _models_whitelist_change,
+    _models_image_blob,
+)
 
 
 def run_migrations_offline() -> None:
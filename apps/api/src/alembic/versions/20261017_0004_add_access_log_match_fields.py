@@ -0,0 +1,27 @@
+"""add match_type and match_distance to access_logs
+
+Revision ID: 20261017_0004
+Revises: 20260405_0003
+Create Date: 2026-10-17
+
+Registra como a placa lida foi associada à whitelist (exata ou tolerante a erros
+de OCR) e a distância de edição da correspondência.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0004"
+down_revision = "20260405_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("access_logs", sa.Column("match_type", sa.String(16), nullable=True))
+    op.add_column("access_logs", sa.Column("match_distance", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("access_logs", "match_distance")
+    op.drop_column("access_logs", "match_type")
@@ -0,0 +1,53 @@
+"""add whitelist_changes (versioned whitelist history)
+
+Revision ID: 20261017_0005
+Revises: 20261017_0004
+Create Date: 2026-10-17
+
+Histórico de versões da whitelist para a sincronização incremental dos dispositivos
+de borda (`GET /whitelist/changes?since=`). As placas já existentes entram como
+`upsert` para que a primeira carga com `since=0` devolva a whitelist completa.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "20261017_0005"
+down_revision = "20261017_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+    uuid_type = postgresql.UUID(as_uuid=True) if is_postgresql else sa.String(36)
+
+    op.create_table(
+        "whitelist_changes",
+        sa.Column(
+            "version",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            primary_key=True,
+            autoincrement=True,
+        ),
+        sa.Column("op", sa.String(16), nullable=False),
+        sa.Column("normalized_plate", sa.String(), nullable=False),
+        sa.Column("plate_id", uuid_type, nullable=False),
+        sa.Column(
+            "changed_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        "INSERT INTO whitelist_changes (op, normalized_plate, plate_id, changed_at) "
+        "SELECT 'upsert', normalized_plate, id, CURRENT_TIMESTAMP "
+        "FROM authorized_plates ORDER BY normalized_plate"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("whitelist_changes")
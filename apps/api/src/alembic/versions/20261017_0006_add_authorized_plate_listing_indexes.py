@@ -0,0 +1,39 @@
+"""add authorized_plates listing indexes (keyset pagination and prefix search)
+
+Revision ID: 20261017_0006
+Revises: 20261017_0005
+Create Date: 2026-10-17
+
+- `(created_at, id)` para a paginação por cursor ordenada por data de criação
+  (a ordenação por `normalized_plate` usa o índice único já existente);
+- em PostgreSQL, `normalized_plate text_pattern_ops` para que `LIKE 'ABC%'` use
+  índice mesmo com collations que não sejam `C`.
+"""
+
+from alembic import op
+
+revision = "20261017_0006"
+down_revision = "20261017_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_authorized_plates_created_at_id", "authorized_plates", ["created_at", "id"]
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index(
+            "ix_authorized_plates_normalized_plate_pattern",
+            "authorized_plates",
+            ["normalized_plate"],
+            postgresql_ops={"normalized_plate": "text_pattern_ops"},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index(
+            "ix_authorized_plates_normalized_plate_pattern", table_name="authorized_plates"
+        )
+    op.drop_index("ix_authorized_plates_created_at_id", table_name="authorized_plates")
@@ -0,0 +1,37 @@
+"""add authorized_plates validity window (valid_from/valid_until, weekdays, daily hours)
+
+Revision ID: 20261017_0007
+Revises: 20261017_0006
+Create Date: 2026-10-17
+
+Colunas nulas não restringem: as entradas existentes continuam permanentes. O índice
+em `valid_until` serve a remoção periódica das entradas expiradas.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0007"
+down_revision = "20261017_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("authorized_plates") as batch_op:
+        batch_op.add_column(sa.Column("valid_from", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("valid_until", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("allowed_weekdays", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("daily_start", sa.Time(), nullable=True))
+        batch_op.add_column(sa.Column("daily_end", sa.Time(), nullable=True))
+    op.create_index("ix_authorized_plates_valid_until", "authorized_plates", ["valid_until"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_authorized_plates_valid_until", table_name="authorized_plates")
+    with op.batch_alter_table("authorized_plates") as batch_op:
+        batch_op.drop_column("daily_end")
+        batch_op.drop_column("daily_start")
+        batch_op.drop_column("allowed_weekdays")
+        batch_op.drop_column("valid_until")
+        batch_op.drop_column("valid_from")
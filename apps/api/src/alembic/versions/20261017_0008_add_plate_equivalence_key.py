@@ -0,0 +1,59 @@
+"""add plate_key (legacy/Mercosul equivalence key) to authorized_plates and access_logs
+
+Revision ID: 20261017_0008
+Revises: 20261017_0007
+Create Date: 2026-10-17
+
+A chave é a de `plate_equivalence_key` (dígito da 5.ª posição → letra), de modo que
+`ABC1234` e `ABC1C34` partilham a mesma chave. O preenchimento das linhas existentes
+é feito uma vez por valor distinto da placa.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0008"
+down_revision = "20261017_0007"
+branch_labels = None
+depends_on = None
+
+_DIGIT_TO_LETTER = str.maketrans("0123456789", "ABCDEFGHIJ")
+
+
+def _equivalence_key(plate: str) -> str:
+    # Cópia de normalize_plate + plate_equivalence_key no momento desta migração
+    normalized = "".join(c for c in plate if c.isalnum()).upper()
+    if len(normalized) != 7:  # noqa: PLR2004
+        return normalized
+    return normalized[:4] + normalized[4].translate(_DIGIT_TO_LETTER) + normalized[5:]
+
+
+def _backfill(table: str, source: str) -> None:
+    bind = op.get_bind()
+    values = bind.execute(sa.text(f"SELECT DISTINCT {source} FROM {table}")).scalars().all()
+    params = [{"value": value, "key": _equivalence_key(value)} for value in values]
+    if params:
+        bind.execute(
+            sa.text(f"UPDATE {table} SET plate_key = :key WHERE {source} = :value"),
+            params,
+        )
+
+
+def upgrade() -> None:
+    op.add_column("authorized_plates", sa.Column("plate_key", sa.String(), nullable=True))
+    op.add_column("access_logs", sa.Column("plate_key", sa.String(), nullable=True))
+    _backfill("authorized_plates", "normalized_plate")
+    _backfill("access_logs", "plate_string_detected")
+    with op.batch_alter_table("authorized_plates") as batch_op:
+        batch_op.alter_column("plate_key", existing_type=sa.String(), nullable=False)
+    op.create_index("ix_authorized_plates_plate_key", "authorized_plates", ["plate_key"])
+    op.create_index("ix_access_logs_plate_key", "access_logs", ["plate_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_access_logs_plate_key", table_name="access_logs")
+    op.drop_index("ix_authorized_plates_plate_key", table_name="authorized_plates")
+    with op.batch_alter_table("access_logs") as batch_op:
+        batch_op.drop_column("plate_key")
+    with op.batch_alter_table("authorized_plates") as batch_op:
+        batch_op.drop_column("plate_key")
@@ -0,0 +1,29 @@
+"""add event_id (client idempotency key) to access_logs
+
+Revision ID: 20261017_0009
+Revises: 20261017_0008
+Create Date: 2026-10-17
+
+Chave enviada pelo dispositivo (`Idempotency-Key` / `event_id`) para que os reenvios
+de um mesmo evento devolvam o registro original. O índice é único; valores NULL não
+colidem entre si (PostgreSQL e SQLite), por isso os logs sem chave não são afetados.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0009"
+down_revision = "20261017_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("access_logs", sa.Column("event_id", sa.String(128), nullable=True))
+    op.create_index("ix_access_logs_event_id", "access_logs", ["event_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_access_logs_event_id", table_name="access_logs")
+    with op.batch_alter_table("access_logs") as batch_op:
+        batch_op.drop_column("event_id")
@@ -0,0 +1,35 @@
+"""add device_id, read_count and last_seen_at to access_logs
+
+Revision ID: 20261017_0010
+Revises: 20261017_0009
+Create Date: 2026-10-17
+
+Leituras repetidas da mesma placa pela mesma câmera passam a ser agregadas ao evento
+existente: `read_count` conta as leituras e `last_seen_at` regista a última.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0010"
+down_revision = "20261017_0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("access_logs", sa.Column("device_id", sa.String(64), nullable=True))
+    op.add_column(
+        "access_logs",
+        sa.Column("read_count", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "access_logs", sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("access_logs") as batch_op:
+        batch_op.drop_column("last_seen_at")
+        batch_op.drop_column("read_count")
+        batch_op.drop_column("device_id")
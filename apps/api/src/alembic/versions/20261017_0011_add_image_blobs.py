@@ -0,0 +1,37 @@
+"""add image_blobs (reference counts of content-addressed images)
+
+Revision ID: 20261017_0011
+Revises: 20261017_0010
+Create Date: 2026-10-17
+
+Imagens guardadas pelo hash do conteúdo (`ab/cd/<sha256><ext>`) podem ser partilhadas
+por vários logs de acesso; `image_blobs.ref_count` conta essas referências. Chaves
+antigas (`<UPLOAD_DIR>/<uuid4><ext>`) não entram na tabela até serem migradas com
+`scripts/migrate_image_storage.py`.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0011"
+down_revision = "20261017_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_blobs",
+        sa.Column("storage_key", sa.String(255), primary_key=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("image_blobs")
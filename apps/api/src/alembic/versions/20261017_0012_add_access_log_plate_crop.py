@@ -0,0 +1,29 @@
+"""add plate_crop_key and image_storage_key index to access_logs
+
+Revision ID: 20261017_0012
+Revises: 20261017_0011
+Create Date: 2026-10-17
+
+`plate_crop_key` guarda o recorte da placa gerado depois da ingestão. O índice em
+`image_storage_key` permite trocar a chave de todos os logs de uma imagem (imagem
+recomprimida) sem percorrer a tabela.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0012"
+down_revision = "20261017_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("access_logs", sa.Column("plate_crop_key", sa.String(255), nullable=True))
+    op.create_index("ix_access_logs_image_storage_key", "access_logs", ["image_storage_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_access_logs_image_storage_key", table_name="access_logs")
+    with op.batch_alter_table("access_logs") as batch_op:
+        batch_op.drop_column("plate_crop_key")
@@ -0,0 +1,32 @@
+"""allow access logs without image and index access_logs.timestamp
+
+Revision ID: 20261017_0013
+Revises: 20261017_0012
+Create Date: 2026-10-17
+
+A retenção de imagens apaga (ou arquiva) as imagens antigas e deixa o log com
+`image_storage_key` nulo. O índice em `timestamp` permite percorrer os logs expirados
+por data sem varrer a tabela (e serve também a listagem, ordenada por data).
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261017_0013"
+down_revision = "20261017_0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("access_logs") as batch_op:
+        batch_op.alter_column("image_storage_key", existing_type=sa.Text(), nullable=True)
+    op.create_index("ix_access_logs_timestamp", "access_logs", ["timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_access_logs_timestamp", table_name="access_logs")
+    # Logs cuja imagem já expirou ficam com uma chave vazia
+    op.execute("UPDATE access_logs SET image_storage_key = '' WHERE image_storage_key IS NULL")
+    with op.batch_alter_table("access_logs") as batch_op:
+        batch_op.alter_column("image_storage_key", existing_type=sa.Text(), nullable=False)
@@ -0,0 +1,42 @@
+"""add access_log_events (idempotency keys of coalesced repeat reads)
+
+Revision ID: 20261018_0014
+Revises: 20261017_0013
+Create Date: 2026-10-18
+
+Uma leitura repetida agregada a um log existente não cria registro, mas a sua chave
+de idempotência tem de continuar a apontar para o log agregado: sem isto, um reenvio
+depois de a cache em memória a esquecer (ou de um reinício) criaria um log novo.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "20261018_0014"
+down_revision = "20261017_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+    uuid_type = postgresql.UUID(as_uuid=True) if is_postgresql else sa.String(36)
+
+    op.create_table(
+        "access_log_events",
+        sa.Column("event_id", sa.String(128), primary_key=True),
+        sa.Column(
+            "access_log_id",
+            uuid_type,
+            sa.ForeignKey("access_logs.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_access_log_events_access_log_id", "access_log_events", ["access_log_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_access_log_events_access_log_id", table_name="access_log_events")
+    op.drop_table("access_log_events")
@@ -1,118 +1,808 @@
 """Controller para lógica de negócio de logs de acesso veicular."""
 
+import asyncio
+import csv
+import io
 import logging
+import os
+import re
+import tarfile
+import tempfile
+import time
 import uuid
-from datetime import datetime
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
+from typing import Any, BinaryIO
+from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from apps.api.src.api.v1.core.access_log_writer import get_access_log_writer
 from apps.api.src.api.v1.core.config import get_settings
-from apps.api.src.api.v1.models.authorized_plate import AuthorizedPlate
+from apps.api.src.api.v1.core.idempotency import clean_event_id, get_recent_event_cache
+from apps.api.src.api.v1.core.image_derivatives import DerivativeSpec, get_image_derivatives
+from apps.api.src.api.v1.core.image_postprocess import get_image_postprocessor
+from apps.api.src.api.v1.core.image_store import ImageStore, StoredImage, get_image_store
+from apps.api.src.api.v1.core.ingest_journal import (
+    DATABASE_UNAVAILABLE_ERRORS,
+    JournalRecord,
+    get_ingest_journal,
+)
+from apps.api.src.api.v1.core.read_suppression import RecentRead, get_recent_read_window
+from apps.api.src.api.v1.core.security import sign_image_url, verify_image_signature
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
 from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
 from apps.api.src.api.v1.repositories.authorized_plate_repository import (
     AuthorizedPlateRepository,
 )
-from apps.api.src.api.v1.schemas.access_log import AccessLogRead, AccessStatus
-from apps.api.src.api.v1.utils.plate import normalize_plate
+from apps.api.src.api.v1.schemas.access_log import (
+    AccessLogAccepted,
+    AccessLogBatchItem,
+    AccessLogBatchResult,
+    AccessLogRead,
+    AccessStatus,
+    ArchiveFormat,
+    BatchItemStatus,
+)
+from apps.api.src.api.v1.storage import StoredObject
+from apps.api.src.api.v1.utils.archive_stream import ARCHIVE_FORMATS
+from apps.api.src.api.v1.utils.file_placement import UploadTooLargeError
+from apps.api.src.api.v1.utils.image_transcode import PlateBox, transcode_available
+from apps.api.src.api.v1.utils.ingest_bundle import (
+    ArchiveTooLargeError,
+    ManifestEntry,
+    ManifestTooLargeError,
+    is_image_name,
+    iter_tar_images,
+    parse_manifest,
+)
+from apps.api.src.api.v1.utils.plate import normalize_plate, plate_equivalence_key
+from apps.api.src.api.v1.utils.sharpness import image_sharpness
 
 logger = logging.getLogger(__name__)
 
+# Threads que colocam em paralelo as imagens de um lote multipart
+_BATCH_STORE_WORKERS = 8
+# Tolerância para relógios de dispositivos adiantados
+_MAX_CLOCK_SKEW = timedelta(minutes=5)
+# Manifesto da exportação mantido em memória até este tamanho (depois vai para disco)
+_EXPORT_MANIFEST_MEMORY_BYTES = 1024 * 1024
+_EXPORT_MANIFEST_COLUMNS = (
+    "id",
+    "timestamp",
+    "plate",
+    "status",
+    "device_id",
+    "image_file",
+    "image_status",
+    "plate_crop_file",
+)
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9-]+")
+
+
+def _export_stem(log_id: uuid.UUID, timestamp: datetime, plate: str) -> str:
+    """Nome (sem extensão) dos arquivos de um log na exportação."""
+    instant = timestamp.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+    plate = _UNSAFE_NAME_CHARS.sub("", plate) or "unknown"
+    return f"{instant}_{plate}_{log_id}"
+
+
+@dataclass(slots=True)
+class _BatchEvent:
+    """Estado de um evento do manifesto durante o processamento do lote."""
+
+    entry: ManifestEntry
+    error: str | None = None
+    event_id: str | None = None
+    image: StoredImage | None = None
+    # Registro original de um evento já registrado (mesmo `event_id`)
+    original: AccessLogRead | None = None
+
+    @property
+    def pending(self) -> bool:
+        """True se o evento ainda tiver de ser gravado."""
+        return self.error is None and self.original is None
+
 
 class AccessLogController:
     """Controller para operações de logs de acesso veicular."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, image_store: ImageStore | None = None):
         """
         Inicializa o controller com uma sessão do banco de dados.
 
         Args:
             db: Sessão do banco de dados
+            image_store: Armazenamento das imagens (padrão: o do processo)
         """
         self.db = db
         self.access_log_repository = AccessLogRepository
         self.plate_repository = AuthorizedPlateRepository
+        self.whitelist_cache = get_whitelist_cache()
+        self.recent_events = get_recent_event_cache()
+        self.recent_reads = get_recent_read_window()
         self.settings = get_settings()
+        self.image_store = image_store or get_image_store()
 
-    def create_access_log(self, plate: str, file: UploadFile) -> AccessLogRead:
+    def create_access_log(
+        self,
+        plate: str,
+        file: UploadFile,
+        event_id: str | None = None,
+        device_id: str | None = None,
+        plate_box: PlateBox | None = None,
+    ) -> AccessLogRead | AccessLogAccepted:
         """
         Cria um novo registro de log de acesso veicular.
 
         Processa a imagem, normaliza a placa, verifica se está na whitelist
-        e cria o registro de log com o status apropriado.
+        e cria o registro de log com o status apropriado. A imagem é colocada no
+        destino a partir do arquivo temporário do upload (`sendfile` ou cópia em
+        blocos; ver `place_upload`), sem carregá-la inteira em memória.
+
+        Com `event_id`, um reenvio do mesmo evento devolve o registro original: os
+        reenvios recentes são respondidos pelo cache em memória, antes de gravar a
+        imagem; os restantes são detetados pelo índice único.
+
+        Com `device_id` e `INGEST_DEDUP_WINDOW_SECONDS` > 0, uma leitura repetida da
+        mesma placa pela mesma câmera dentro da janela é agregada ao evento existente
+        (ver `read_suppression`).
+
+        Com `INGEST_JOURNAL_ENABLED`, se o banco estiver indisponível o evento é guardado
+        no diário local e devolvido como `AccessLogAccepted` (ver `ingest_journal`).
+
+        Com `IMAGE_POSTPROCESS_ENABLED`, a imagem do log gravado é recomprimida (e a placa
+        recortada, com `plate_box`) em segundo plano (ver `image_postprocess`).
+
+        Args:
+            plate: String da placa detectada pelo OCR
+            file: Arquivo de imagem do veículo
+            event_id: Chave de idempotência enviada pelo dispositivo, se houver
+            device_id: Identificador da câmera, se houver
+            plate_box: Região da placa no quadro, se o dispositivo a enviar
+
+        Returns:
+            AccessLogRead: Registro de acesso criado (ou o existente, num reenvio ou
+            numa leitura agregada); `AccessLogAccepted` se tiver ficado no diário
+
+        Raises:
+            HTTPException: Se o arquivo for inválido ou muito grande
+        """
+        self._validate_image(file)
+        replayed = self.recent_events.get(event_id)
+        if replayed is None and self._may_coalesce(device_id):
+            replayed = self._coalesced_event(event_id)
+        if replayed is not None:
+            return replayed
+        if self._may_coalesce(device_id):
+            coalesced = self._coalesce_repeat_read(plate, file, device_id, event_id, plate_box)
+            if coalesced is not None:
+                return coalesced
+        image = self._store_image(file)
+        return self._record_access(plate, image, event_id, device_id, plate_box)
+
+    async def create_access_log_async(
+        self,
+        plate: str,
+        file: UploadFile,
+        event_id: str | None = None,
+        device_id: str | None = None,
+        plate_box: PlateBox | None = None,
+    ) -> AccessLogRead | AccessLogAccepted:
+        """
+        Versão assíncrona de `create_access_log`, usada pelo endpoint de ingestão.
+
+        A colocação da imagem (cópia no kernel com `sendfile`) e o trabalho de banco
+        correm no threadpool, de modo que o event loop não bloqueia e a memória por
+        requisição não depende do tamanho da imagem. Com o escritor agrupado ativo
+        (`ACCESS_LOG_BATCH_ENABLED`), a requisição espera o commit do lote do seu log
+        sem ocupar uma thread.
 
         Args:
             plate: String da placa detectada pelo OCR
             file: Arquivo de imagem do veículo
+            event_id: Chave de idempotência enviada pelo dispositivo, se houver
+            device_id: Identificador da câmera, se houver
+            plate_box: Região da placa no quadro, se o dispositivo a enviar
 
         Returns:
-            AccessLogRead: Registro de acesso criado
+            AccessLogRead: Registro de acesso criado (ou o existente, num reenvio ou
+            numa leitura agregada); `AccessLogAccepted` se tiver ficado no diário
 
         Raises:
             HTTPException: Se o arquivo for inválido ou muito grande
         """
-        # Validar arquivo
+        self._validate_image(file)
+        replayed = self.recent_events.get(event_id)
+        if replayed is None and self._may_coalesce(device_id):
+            replayed = await run_in_threadpool(self._coalesced_event, event_id)
+        if replayed is not None:
+            return replayed
+        if self._may_coalesce(device_id):
+            coalesced = await run_in_threadpool(
+                self._coalesce_repeat_read, plate, file, device_id, event_id, plate_box
+            )
+            if coalesced is not None:
+                return coalesced
+        image = await run_in_threadpool(self._store_image, file)
+        writer = get_access_log_writer()
+        if writer is None:
+            return await run_in_threadpool(
+                self._record_access, plate, image, event_id, device_id, plate_box
+            )
+        try:
+            values = await run_in_threadpool(self._access_values, plate, image, event_id, device_id)
+            access_log = await asyncio.wrap_future(writer.submit(**values))
+        except IntegrityError:
+            await run_in_threadpool(self._discard_image, image)
+            original = await run_in_threadpool(self._original_event, event_id)
+            if original is None:
+                raise
+            return original
+        except DATABASE_UNAVAILABLE_ERRORS:
+            journaled = await run_in_threadpool(
+                self._journal_access, plate, image, event_id, device_id
+            )
+            if journaled is None:
+                await run_in_threadpool(self._discard_image, image)
+                raise
+            return journaled
+        except Exception:
+            await run_in_threadpool(self._discard_image, image)
+            raise
+        if image.pinned:
+            await run_in_threadpool(self.image_store.unpin, self.db, [image])
+        self.recent_events.put(access_log)
+        self._remember_read(access_log)
+        self._postprocess(access_log, plate_box)
+        return access_log
+
+    def _may_coalesce(self, device_id: str | None) -> bool:
+        return device_id is not None and self.recent_reads.enabled
+
+    def _coalesce_repeat_read(
+        self,
+        plate: str,
+        file: UploadFile,
+        device_id: str,
+        event_id: str | None,
+        plate_box: PlateBox | None = None,
+    ) -> AccessLogRead | None:
+        """Agrega a leitura ao evento recente da mesma placa e câmera, se houver."""
+        plate_key = plate_equivalence_key(normalize_plate(plate))
+        recent = self.recent_reads.lookup(device_id, plate_key)
+        if recent is None:
+            return None
+        replacement, sharpness = self._sharper_image(file, recent)
+        try:
+            updated = self.access_log_repository.register_repeat_read(
+                self.db,
+                recent.log_id,
+                seen_at=datetime.now(UTC),
+                image_storage_key=replacement.key if replacement else None,
+                replaces=recent.image_key,
+                event_id=event_id,
+            )
+        except Exception as e:
+            if replacement is not None:
+                self._discard_image(replacement)
+            if isinstance(e, DATABASE_UNAVAILABLE_ERRORS) and get_ingest_journal() is not None:
+                # Sem banco: registrar como novo evento, que vai para o diário
+                return None
+            if isinstance(e, IntegrityError):
+                # Reenvio concorrente da mesma leitura: devolver o evento já agregado
+                original = self._original_event(event_id)
+                if original is not None:
+                    return original
+            raise
+        if updated is None:
+            # O evento foi removido entretanto: registrar a leitura como um novo evento
+            if replacement is not None:
+                self._discard_image(replacement)
+            self.recent_reads.forget(device_id, plate_key)
+            return None
+        if replacement is not None:
+            if updated.image_storage_key == replacement.key:
+                self.image_store.unpin(self.db, [replacement])
+                self.image_store.release(self.db, [recent.image_key])
+            else:
+                # A imagem do evento mudou entretanto (ex.: recomprimida): fica a atual
+                self._discard_image(replacement)
+                replacement = None
+        self.recent_reads.remember(
+            device_id, plate_key, updated.id, updated.image_storage_key, sharpness
+        )
+        access_log = AccessLogRead.model_validate(updated)
+        self.recent_events.put(access_log, event_id)
+        if replacement is not None:
+            self._postprocess(access_log, plate_box)
+        logger.debug(
+            "Repeat read of %s by %s coalesced into %s (%d reads)",
+            plate_key,
+            device_id,
+            access_log.id,
+            access_log.read_count,
+        )
+        return access_log
+
+    def _coalesced_event(self, event_id: str | None) -> AccessLogRead | None:
+        """
+        Log ao qual já foi agregada a leitura com esta chave, se a cache a esqueceu.
+
+        Só as leituras agregadas precisam desta consulta: a chave de um log novo é
+        protegida pelo índice único de `access_logs.event_id`.
+        """
+        if event_id is None:
+            return None
+        try:
+            access_log = self.access_log_repository.get_by_coalesced_event_id(self.db, event_id)
+        except DATABASE_UNAVAILABLE_ERRORS:
+            # Sem banco a leitura segue para o diário, que deteta os reenvios ao drenar
+            self.db.rollback()
+            return None
+        if access_log is None:
+            return None
+        original = AccessLogRead.model_validate(access_log)
+        self.recent_events.put(original, event_id)
+        return original
+
+    def _sharper_image(
+        self, file: UploadFile, recent: RecentRead
+    ) -> tuple[StoredImage | None, float | None]:
+        """Grava a imagem da leitura repetida só se for mais nítida que a do evento."""
+        if not self.settings.ingest_dedup_replace_sharper:
+            return None, recent.sharpness
+        current = recent.sharpness
+        if current is None:
+            try:
+                with self.image_store.fetch(recent.image_key) as path:
+                    current = image_sharpness(path)
+            except OSError:
+                current = float("-inf")
+        candidate = self._store_image(file)
+        with self.image_store.fetch(candidate.key) as path:
+            sharpness = image_sharpness(path)
+        if sharpness > current:
+            return candidate, sharpness
+        self._discard_image(candidate)
+        return None, current
+
+    def _remember_read(self, access_log: AccessLogRead) -> None:
+        """Abre a janela de agregação das próximas leituras deste evento."""
+        if not self._may_coalesce(access_log.device_id):
+            return
+        self.recent_reads.remember(
+            access_log.device_id,
+            plate_equivalence_key(normalize_plate(access_log.plate_string_detected)),
+            access_log.id,
+            access_log.image_storage_key,
+        )
+
+    def _validate_image(self, file: UploadFile) -> None:
+        """Valida o tipo e, quando já conhecido, o tamanho do upload."""
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Arquivo deve ser uma imagem",
             )
+        if file.size is not None:
+            self._check_size(file.size)
 
-        # Ler conteúdo do arquivo
-        file_content = file.file.read()
-        max_size_bytes = self.settings.max_file_size_mb * 1024 * 1024
-        if len(file_content) > max_size_bytes:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"Arquivo muito grande. Máximo: {self.settings.max_file_size_mb}MB",
+    def _max_file_size_bytes(self) -> int:
+        return self.settings.max_file_size_mb * 1024 * 1024
+
+    def _file_too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Arquivo muito grande. Máximo: {self.settings.max_file_size_mb}MB",
+        )
+
+    def _check_size(self, size: int) -> None:
+        if size > self._max_file_size_bytes():
+            raise self._file_too_large()
+
+    def _store_image(self, file: UploadFile) -> StoredImage:
+        """Coloca a imagem do upload no armazenamento (ver `image_store`)."""
+        try:
+            return self.image_store.put(
+                file.file, file.filename, self._max_file_size_bytes(), db=self.db
             )
+        except UploadTooLargeError as e:
+            raise self._file_too_large() from e
+
+    def _discard_image(self, image: StoredImage) -> None:
+        """Apaga a imagem de um evento que não foi gravado (se não for partilhada)."""
+        if image.created or image.pinned:
+            self.image_store.discard(self.db, image.key, pinned=image.pinned)
 
+    def _access_values(
+        self,
+        plate: str,
+        image: StoredImage,
+        event_id: str | None = None,
+        device_id: str | None = None,
+    ) -> dict[str, Any]:
+        """Verifica a placa na whitelist e monta os valores do log de acesso."""
         # Normalizar placa
         normalized_plate = normalize_plate(plate)
 
-        # Verificar se a placa está na whitelist
-        authorized_plate: AuthorizedPlate | None = self.plate_repository.get_by_normalized_plate(
-            self.db, normalized_plate
-        )
+        # Verificar se a placa está na whitelist (cache em memória quando ativo)
+        match = self.whitelist_cache.match(self.db, normalized_plate)
 
         # Determinar status
-        access_status = AccessStatus.Authorized if authorized_plate else AccessStatus.Denied
-        authorized_plate_id = authorized_plate.id if authorized_plate else None
+        access_status = AccessStatus.Authorized if match else AccessStatus.Denied
 
-        # Salvar arquivo
-        upload_dir = Path(self.settings.upload_dir)
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        return {
+            "plate_string_detected": plate,
+            "status": access_status,
+            "image_storage_key": image.key,
+            "authorized_plate_id": match.plate_id if match else None,
+            "match_type": match.match_type if match else None,
+            "match_distance": match.distance if match else None,
+            "event_id": event_id,
+            "device_id": device_id,
+        }
 
-        # Gerar nome único para o arquivo
-        file_extension = Path(file.filename).suffix if file.filename else ".jpg"
-        image_filename = f"{uuid.uuid4()}{file_extension}"
-        image_path = upload_dir / image_filename
-
-        # Salvar arquivo
-        with image_path.open("wb") as f:
-            f.write(file_content)
+    def _record_access(
+        self,
+        plate: str,
+        image: StoredImage,
+        event_id: str | None = None,
+        device_id: str | None = None,
+        plate_box: PlateBox | None = None,
+    ) -> AccessLogRead | AccessLogAccepted:
+        """Grava o log de acesso da imagem já armazenada (em lote, se o escritor estiver ativo)."""
+        writer = get_access_log_writer()
 
         # Criar registro de log
-        access_log = self.access_log_repository.create(
-            db=self.db,
+        try:
+            values = self._access_values(plate, image, event_id, device_id)
+            if writer is not None:
+                access_log = writer.submit(**values).result()
+            else:
+                access_log = AccessLogRead.model_validate(
+                    self.access_log_repository.create(db=self.db, **values)
+                )
+        except IntegrityError:
+            self._discard_image(image)
+            # Reenvio concorrente (ou não presente no cache): devolver o registro original
+            original = self._original_event(event_id)
+            if original is None:
+                raise
+            return original
+        except DATABASE_UNAVAILABLE_ERRORS:
+            journaled = self._journal_access(plate, image, event_id, device_id)
+            if journaled is None:
+                self._discard_image(image)
+                raise
+            return journaled
+        except Exception:
+            self._discard_image(image)
+            raise
+
+        self.image_store.unpin(self.db, [image])
+        self.recent_events.put(access_log)
+        self._remember_read(access_log)
+        self._postprocess(access_log, plate_box)
+        return access_log
+
+    @staticmethod
+    def _postprocess(access_log: AccessLogRead, plate_box: PlateBox | None = None) -> None:
+        """Enfileira a recompressão da imagem de um log gravado, se estiver ativa."""
+        postprocessor = get_image_postprocessor()
+        if postprocessor is not None:
+            postprocessor.submit(access_log.id, access_log.image_storage_key, plate_box)
+
+    def _journal_access(
+        self,
+        plate: str,
+        image: StoredImage,
+        event_id: str | None = None,
+        device_id: str | None = None,
+    ) -> AccessLogAccepted | None:
+        """Guarda no diário local um evento que o banco não pôde gravar (None se desligado)."""
+        journal = get_ingest_journal()
+        if journal is None:
+            return None
+        timestamp = datetime.now(UTC)
+        decision = None
+        if self.whitelist_cache.loaded:
+            # Decisão com o último snapshot em memória, mantida quando o log for gravado
+            match = self.whitelist_cache.match_snapshot(normalize_plate(plate), timestamp)
+            decision = AccessStatus.Authorized if match else AccessStatus.Denied
+        record = JournalRecord(
+            id=uuid.uuid4(),
+            timestamp=timestamp,
             plate_string_detected=plate,
-            status=access_status,
-            image_storage_key=str(image_path),
-            authorized_plate_id=authorized_plate_id,
+            image_storage_key=image.key,
+            event_id=event_id,
+            device_id=device_id,
+            image_pinned=image.pinned,
+            status=decision,
+        )
+        journal.append(record)
+        logger.warning("Database unavailable; access event %s written to ingest journal", record.id)
+        return AccessLogAccepted(**record._asdict())
+
+    def _original_event(self, event_id: str | None) -> AccessLogRead | None:
+        """Log já registrado com a chave de idempotência, se existir."""
+        if event_id is None:
+            return None
+        access_log = self.access_log_repository.get_by_event_id(self.db, event_id)
+        if access_log is None:
+            return None
+        original = AccessLogRead.model_validate(access_log)
+        self.recent_events.put(original, event_id)
+        return original
+
+    def create_access_logs_batch(
+        self,
+        manifest: UploadFile,
+        files: list[UploadFile],
+        archive: UploadFile | None = None,
+    ) -> AccessLogBatchResult:
+        """
+        Regista de uma só vez os eventos acumulados por um dispositivo sem ligação.
+
+        O manifesto NDJSON indica, por evento, a imagem, a placa e o instante de captura
+        no dispositivo (usado como `timestamp` do log e para avaliar as janelas de
+        validade da whitelist). As imagens chegam como partes `files` do multipart,
+        colocadas em paralelo, ou dentro de um único `archive` tar, lido em sequência.
+        Todas as placas são resolvidas numa única consulta à whitelist e todos os logs
+        são gravados numa única transação. Eventos inválidos são rejeitados
+        individualmente, sem impedir a gravação dos restantes; eventos com um
+        `event_id` já registrado devolvem o registro original.
+
+        Args:
+            manifest: Manifesto NDJSON (`file`, `plate`, `captured_at` por linha)
+            files: Imagens enviadas como partes do multipart
+            archive: Arquivo tar com as imagens (alternativa a `files`)
+
+        Returns:
+            AccessLogBatchResult com o resultado de cada evento
+
+        Raises:
+            HTTPException: Se o manifesto ou o arquivo tar forem inválidos, se forem
+                enviados `files` e `archive` ao mesmo tempo, se o mesmo nome de imagem
+                vier em duas partes `files` ou se o lote (ou o tar descomprimido) for
+                grande demais
+        """
+        if archive is not None and files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Envie as imagens em 'files' ou num único 'archive', não ambos",
+            )
+        tz = ZoneInfo(self.settings.whitelist_timezone)
+        try:
+            entries = parse_manifest(manifest.file, tz, self.settings.ingest_batch_max_items)
+        except ManifestTooLargeError as e:
+            raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(e)) from e
+        if not entries:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Manifesto sem eventos"
+            )
+
+        events = [_BatchEvent(entry, error=entry.error) for entry in entries]
+        self._reject_invalid_events(events)
+        self._resolve_replayed_events(events)
+        try:
+            if archive is not None:
+                self._store_archive_images(events, archive.file)
+            else:
+                self._store_uploaded_images(events, files)
+            accepted = [event for event in events if event.pending]
+            logs = iter(self._insert_batch(accepted))
+        except BaseException:
+            for event in events:
+                if event.image is not None:
+                    self._discard_image(event.image)
+            raise
+
+        result = AccessLogBatchResult()
+        for event in events:
+            if event.original is not None:
+                result.duplicates += 1
+                result.items.append(
+                    AccessLogBatchItem(
+                        line=event.entry.line,
+                        file=event.entry.file,
+                        status=BatchItemStatus.duplicate,
+                        access_log=event.original,
+                    )
+                )
+            elif event.error is None:
+                result.created += 1
+                result.items.append(
+                    AccessLogBatchItem(
+                        line=event.entry.line,
+                        file=event.entry.file,
+                        status=BatchItemStatus.created,
+                        access_log=next(logs),
+                    )
+                )
+            else:
+                result.rejected += 1
+                result.items.append(
+                    AccessLogBatchItem(
+                        line=event.entry.line,
+                        file=event.entry.file,
+                        status=BatchItemStatus.rejected,
+                        detail=event.error,
+                    )
+                )
+        logger.info(
+            "Access log batch ingested: %d created, %d duplicates, %d rejected",
+            result.created,
+            result.duplicates,
+            result.rejected,
         )
+        return result
+
+    def _reject_invalid_events(self, events: list[_BatchEvent]) -> None:
+        """Rejeita eventos do futuro, chaves inválidas e imagens ou chaves repetidas no lote."""
+        latest = datetime.now(UTC) + _MAX_CLOCK_SKEW
+        seen_files: set[str] = set()
+        seen_event_ids: set[str] = set()
+        for event in events:
+            if event.error is not None:
+                continue
+            try:
+                event.event_id = clean_event_id(event.entry.event_id)
+            except ValueError as e:
+                event.error = str(e)
+                continue
+            if event.entry.captured_at > latest:
+                event.error = "'captured_at' no futuro"
+            elif event.entry.file in seen_files:
+                event.error = "Imagem já referenciada por outro evento do lote"
+            elif event.event_id is not None and event.event_id in seen_event_ids:
+                event.error = "event_id repetido no lote"
+            else:
+                seen_files.add(event.entry.file)
+                if event.event_id is not None:
+                    seen_event_ids.add(event.event_id)
+
+    def _resolve_replayed_events(self, events: list[_BatchEvent]) -> None:
+        """Associa aos eventos já registrados o registro original (cache, depois uma consulta)."""
+        unresolved: dict[str, _BatchEvent] = {}
+        for event in events:
+            if not event.pending or event.event_id is None:
+                continue
+            event.original = self.recent_events.get(event.event_id)
+            if event.original is None:
+                unresolved[event.event_id] = event
+        if not unresolved:
+            return
+        found = self.access_log_repository.get_by_event_ids(self.db, unresolved.keys())
+        for event_id, access_log in found.items():
+            original = AccessLogRead.model_validate(access_log)
+            unresolved[event_id].original = original
+            self.recent_events.put(original, event_id)
+
+    def _store_event_image(self, event: _BatchEvent, fileobj: BinaryIO, filename: str) -> None:
+        try:
+            event.image = self.image_store.put(
+                fileobj, filename, self._max_file_size_bytes(), db=self.db
+            )
+        except UploadTooLargeError:
+            event.error = self._file_too_large().detail
+
+    def _store_uploaded_images(self, events: list[_BatchEvent], files: list[UploadFile]) -> None:
+        """Coloca em paralelo as imagens enviadas como partes do multipart."""
+        uploads: dict[str, UploadFile] = {}
+        for file in files:
+            if not file.filename:
+                continue
+            name = Path(file.filename).name
+            if name in uploads:
+                # Qual das partes seria gravada dependeria da ordem do multipart
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Imagem '{name}' enviada mais de uma vez",
+                )
+            uploads[name] = file
+        pending: list[tuple[_BatchEvent, UploadFile]] = []
+        for event in events:
+            if not event.pending:
+                continue
+            upload = uploads.get(event.entry.file)
+            if upload is None:
+                event.error = "Imagem não enviada"
+            elif not upload.content_type or not upload.content_type.startswith("image/"):
+                event.error = "Arquivo deve ser uma imagem"
+            else:
+                pending.append((event, upload))
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(_BATCH_STORE_WORKERS, len(pending))) as pool:
+            stored = pool.map(
+                lambda item: self._store_event_image(item[0], item[1].file, item[0].entry.file),
+                pending,
+            )
+            # Consumir o iterador propaga a primeira exceção de E/S
+            list(stored)
 
-        return AccessLogRead.model_validate(access_log)
+    def _store_archive_images(self, events: list[_BatchEvent], archive: BinaryIO) -> None:
+        """Coloca as imagens lidas de um arquivo tar, membro a membro."""
+        wanted = {event.entry.file: event for event in events if event.pending}
+        max_bytes = self.settings.ingest_batch_max_body_mb * 1024 * 1024
+        # Folga para diretórios e membros não referenciados no manifesto
+        max_members = 2 * self.settings.ingest_batch_max_items
+        try:
+            for name, size, content in iter_tar_images(
+                archive, wanted.keys(), max_bytes, max_members
+            ):
+                event = wanted.pop(name, None)
+                if event is None:
+                    continue
+                if not is_image_name(name):
+                    event.error = "Arquivo deve ser uma imagem"
+                elif size > self._max_file_size_bytes():
+                    event.error = self._file_too_large().detail
+                else:
+                    self._store_event_image(event, content, name)
+        except tarfile.TarError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo tar inválido"
+            ) from e
+        except ArchiveTooLargeError as e:
+            raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(e)) from e
+        for event in wanted.values():
+            event.error = "Imagem não encontrada no arquivo tar"
+
+    def _insert_batch(self, events: list[_BatchEvent]) -> list[AccessLogRead]:
+        """Autoriza todas as placas numa consulta e grava os logs numa única transação."""
+        if not events:
+            return []
+        matches = self.whitelist_cache.match_events(
+            self.db,
+            [(normalize_plate(event.entry.plate), event.entry.captured_at) for event in events],
+        )
+        rows = [
+            self.access_log_repository.new_row(
+                plate_string_detected=event.entry.plate,
+                status=AccessStatus.Authorized if match else AccessStatus.Denied,
+                image_storage_key=event.image.key,
+                authorized_plate_id=match.plate_id if match else None,
+                match_type=match.match_type if match else None,
+                match_distance=match.distance if match else None,
+                timestamp=event.entry.captured_at.astimezone(UTC),
+                event_id=event.event_id,
+            )
+            for event, match in zip(events, matches, strict=True)
+        ]
+        try:
+            logs = self.access_log_repository.create_many(self.db, rows)
+        except IntegrityError as e:
+            # Outro pedido registrou em simultâneo um dos `event_id` do lote; um novo
+            # envio devolve esses eventos como `duplicate`
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Eventos do lote registrados em simultâneo por outro pedido; reenviar",
+            ) from e
+        self.image_store.unpin(self.db, [event.image for event in events])
+        access_logs = [AccessLogRead.model_validate(log) for log in logs]
+        for access_log in access_logs:
+            self.recent_events.put(access_log)
+            self._postprocess(access_log)
+        return access_logs
 
-    def get_image_path(self, image_filename: str) -> Path:
+    def get_image(self, image_filename: str) -> StoredObject:
         """
-        Retorna o caminho completo de uma imagem armazenada.
+        Localiza uma imagem armazenada.
 
         Args:
             image_filename: Nome do arquivo de imagem
 
         Returns:
-            Path: Caminho completo do arquivo
+            StoredObject: Chave, tamanho e, se houver cópia neste nó, o caminho local
 
         Raises:
             HTTPException: Se o arquivo não for encontrado ou houver tentativa de path traversal
@@ -124,16 +814,161 @@ class AccessLogController:
                 detail="Nome de arquivo inválido",
             )
 
-        upload_dir = Path(self.settings.upload_dir)
-        image_path = upload_dir / image_filename
+        image = self.image_store.head(self.image_store.locate(image_filename))
+
+        if image is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Imagem não encontrada",
+            )
+
+        return image
+
+    def image_cache_headers(
+        self, image: StoredObject, spec: DerivativeSpec | None = None
+    ) -> dict[str, str]:
+        """
+        Cabeçalhos de cache HTTP de uma imagem.
+
+        Args:
+            image: Imagem localizada
+            spec: Parâmetros da versão redimensionada, se pedida
+
+        Returns:
+            `ETag` forte e `Cache-Control` (privado: as imagens exigem autenticação)
+        """
+        etag = self.image_store.etag(image)
+        if spec is not None:
+            # Uma ETag por derivada: `"<etag da original>-<parâmetros>"`
+            etag = f'{etag[:-1]}-{spec.tag()}"'
+        max_age = self.settings.image_cache_max_age_seconds
+        cache_control = f"private, max-age={max_age}, immutable" if max_age else "private, no-cache"
+        return {"ETag": etag, "Cache-Control": cache_control}
+
+    def get_image_derivative(self, image: StoredObject, spec: DerivativeSpec) -> Path:
+        """
+        Versão redimensionada de uma imagem, do cache ou gerada agora.
+
+        Args:
+            image: Imagem localizada
+            spec: Dimensões máximas e formato
+
+        Returns:
+            Path: Arquivo da derivada no cache
 
-        if not image_path.exists() or not image_path.is_file():
+        Raises:
+            HTTPException: Se Pillow/OpenCV não estiverem instalados, a conversão
+                demorar demasiado ou a imagem não puder ser descodificada
+        """
+        if not transcode_available():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Redimensionamento de imagens indisponível neste servidor",
+            )
+        try:
+            return get_image_derivatives().get(
+                self.image_store.etag(image).strip('"'),
+                Path(image.key).suffix,
+                spec,
+                lambda: self.image_store.fetch(image.key),
+            )
+        except TimeoutError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Redimensionamento da imagem demorou demasiado; tentar novamente",
+            ) from e
+        except FileNotFoundError as e:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Imagem não encontrada",
+            ) from e
+        except OSError as e:
+            logger.warning("Could not resize image %s: %s", image.key, e)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Não foi possível redimensionar a imagem",
+            ) from e
+
+    def image_url_params(self, image_storage_key: str) -> dict[str, str] | None:
+        """
+        Parâmetros da URL assinada de uma imagem (`expires` e `signature`).
+
+        Args:
+            image_storage_key: Chave da imagem do log
+
+        Returns:
+            Parâmetros da query, ou None se as URLs assinadas estiverem desligadas
+        """
+        ttl = self.settings.image_signed_url_ttl_seconds
+        if not ttl:
+            return None
+        expires, signature = sign_image_url(Path(image_storage_key).name, ttl)
+        return {"expires": str(expires), "signature": signature}
+
+    def verify_image_url(self, image_filename: str, expires: int, signature: str) -> None:
+        """
+        Valida uma URL assinada de imagem (sem consultar o banco).
+
+        Args:
+            image_filename: Nome do arquivo de imagem
+            expires: Instante de expiração da URL (Unix)
+            signature: Assinatura HMAC da URL
+
+        Raises:
+            HTTPException: Se as URLs assinadas estiverem desligadas, a assinatura for
+                inválida ou a URL tiver expirado
+        """
+        if not self.settings.image_signed_url_ttl_seconds or not verify_image_signature(
+            image_filename, expires, signature
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="URL de imagem inválida ou expirada",
             )
 
-        return image_path
+    def image_offload_headers(self, image: StoredObject) -> dict[str, str] | None:
+        """
+        Cabeçalhos para o proxy reverso enviar a imagem (`IMAGE_DELIVERY_MODE`).
+
+        Args:
+            image: Imagem localizada
+
+        Returns:
+            `X-Accel-Redirect` ou `X-Sendfile`, ou None se a API deve enviar os bytes
+            (modo `app` ou imagem sem cópia local)
+        """
+        mode = self.settings.image_delivery_mode
+        if image.local_path is None or mode == "app":
+            return None
+        if mode == "x-sendfile":
+            return {"X-Sendfile": str(image.local_path.resolve())}
+        try:
+            relative = image.local_path.relative_to(self.image_store.root)
+        except ValueError:
+            return None
+        prefix = self.settings.image_accel_redirect_prefix.rstrip("/")
+        return {"X-Accel-Redirect": f"{prefix}/{relative.as_posix()}"}
+
+    def open_image(self, image: StoredObject) -> BinaryIO:
+        """
+        Abre uma imagem devolvida por `get_image` para leitura em fluxo.
+
+        Args:
+            image: Imagem localizada
+
+        Returns:
+            BinaryIO: Conteúdo da imagem (a fechar pelo chamador)
+
+        Raises:
+            HTTPException: Se a imagem tiver sido apagada entretanto
+        """
+        try:
+            return self.image_store.open(image.key)
+        except FileNotFoundError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Imagem não encontrada",
+            ) from e
 
     def get_all(
         self,
@@ -150,7 +985,8 @@ class AccessLogController:
         Args:
             skip: Número de registros a pular (paginação)
             limit: Número máximo de registros a retornar
-            plate_filter: Filtrar por placa (busca parcial, case-insensitive)
+            plate_filter: Filtrar por placa (uma placa completa casa exatamente com os formatos
+                antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
             status_filter: Filtrar por status de acesso
             start_date: Data inicial para filtrar (inclusive)
             end_date: Data final para filtrar (inclusive)
@@ -170,6 +1006,107 @@ class AccessLogController:
 
         return [AccessLogRead.model_validate(log) for log in access_logs]
 
+    def export_images(
+        self,
+        archive_format: ArchiveFormat,
+        plate_filter: str | None = None,
+        status_filter: AccessStatus | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Gera em fluxo um arquivo com as imagens dos logs filtrados e um manifesto CSV.
+
+        Os logs vêm de um cursor do lado do servidor e cada imagem é lida e enviada em
+        blocos, por isso a memória não depende do número de logs. Membros:
+        `images/AAAA-MM-DD/<instante>_<placa>_<id><ext>`, `crops/...` para os recortes da
+        placa e, no fim, `manifest.csv` com uma linha por log (`image_status`: `ok`,
+        `expired` se a imagem já saiu pela retenção, `missing` se não for encontrada).
+
+        Args:
+            archive_format: `tar` ou `zip`
+            plate_filter: Filtrar por placa (uma placa completa casa exatamente com os formatos
+                antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
+            status_filter: Filtrar por status de acesso
+            start_date: Data inicial para filtrar (inclusive)
+            end_date: Data final para filtrar (inclusive)
+
+        Returns:
+            Iterador dos bytes do arquivo
+        """
+        archive = ARCHIVE_FORMATS[archive_format.value]()
+        logs = self.access_log_repository.iter_for_export(
+            self.db,
+            plate_filter=plate_filter,
+            status_filter=status_filter,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        exported = images = 0
+        with tempfile.SpooledTemporaryFile(max_size=_EXPORT_MANIFEST_MEMORY_BYTES) as manifest:
+            line = io.StringIO()
+            writer = csv.writer(line)
+            writer.writerow(_EXPORT_MANIFEST_COLUMNS)
+            for log in logs:
+                timestamp = (
+                    log.timestamp if log.timestamp.tzinfo else log.timestamp.replace(tzinfo=UTC)
+                )
+                stem = _export_stem(log.id, timestamp, log.plate_string_detected)
+                day = timestamp.astimezone(UTC).date().isoformat()
+                files = {}
+                for folder, key in (
+                    ("images", log.image_storage_key),
+                    ("crops", log.plate_crop_key),
+                ):
+                    if key is None:
+                        files[folder] = (None, "expired")
+                        continue
+                    name = f"{folder}/{day}/{stem}{Path(key).suffix}"
+                    with ExitStack() as stack:
+                        # Só a abertura pode virar `missing`: depois do cabeçalho do membro
+                        # já ter saído, uma falha de leitura corrompe o arquivo e tem de
+                        # abortar a exportação.
+                        try:
+                            source, size = self._open_export_image(stack, key)
+                        except OSError:
+                            logger.warning("Image %s of log %s not exported", key, log.id)
+                            files[folder] = (None, "missing")
+                            continue
+                        yield from archive.add(name, source, size, timestamp.timestamp())
+                    files[folder] = (name, "ok")
+                    images += 1
+                image_file, image_status = files["images"]
+                crop_file, _ = files["crops"]
+                writer.writerow(
+                    [
+                        log.id,
+                        timestamp.isoformat(),
+                        log.plate_string_detected,
+                        log.status.value,
+                        log.device_id or "",
+                        image_file or "",
+                        image_status,
+                        crop_file or "",
+                    ]
+                )
+                manifest.write(line.getvalue().encode())
+                line.seek(0)
+                line.truncate()
+                exported += 1
+            size = manifest.tell()
+            manifest.seek(0)
+            yield from archive.add("manifest.csv", manifest, size, time.time())
+        yield from archive.finish()
+        logger.info(
+            "Exported %d access logs (%d images) as %s", exported, images, archive_format.value
+        )
+
+    def _open_export_image(self, stack: ExitStack, key: str) -> tuple[BinaryIO, int]:
+        """Abre uma imagem a exportar (fechada com `stack`) e devolve-a com o tamanho."""
+        path = stack.enter_context(self.image_store.fetch(key))
+        source = stack.enter_context(path.open("rb"))
+        return source, os.fstat(source.fileno()).st_size
+
     def count(
         self,
         plate_filter: str | None = None,
@@ -181,7 +1118,8 @@ class AccessLogController:
         Conta o total de registros de acesso com filtros opcionais.
 
         Args:
-            plate_filter: Filtrar por placa (busca parcial, case-insensitive)
+            plate_filter: Filtrar por placa (uma placa completa casa exatamente com os formatos
+                antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
             status_filter: Filtrar por status de acesso
             start_date: Data inicial para filtrar (inclusive)
             end_date: Data final para filtrar (inclusive)
@@ -1,23 +1,85 @@
 """Controller para lógica de negócio de placas autorizadas."""
 
 import logging
+from collections.abc import AsyncIterable
+from datetime import UTC, datetime
+from pathlib import Path
 from uuid import UUID
+from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
+from apps.api.src.api.v1.core.whitelist_snapshot import ensure_whitelist_snapshot
 from apps.api.src.api.v1.repositories.authorized_plate_repository import (
     AuthorizedPlateRepository,
 )
+from apps.api.src.api.v1.repositories.whitelist_change_repository import (
+    WhitelistChangeRepository,
+)
 from apps.api.src.api.v1.schemas.authorized_plate import (
+    AuthorizedPlateBase,
     AuthorizedPlateCreate,
     AuthorizedPlateRead,
+    WhitelistBulkImportResult,
+    WhitelistBulkImportRowError,
+    WhitelistCheckResult,
+    WhitelistSort,
+    WhitelistSyncRequest,
+    WhitelistSyncResult,
+)
+from apps.api.src.api.v1.schemas.whitelist_change import (
+    WhitelistChangeOp,
+    WhitelistChangeRead,
+    WhitelistChangesPage,
+)
+from apps.api.src.api.v1.utils.cursor import decode_cursor, encode_cursor
+from apps.api.src.api.v1.utils.plate import (
+    normalize_plate,
+    plate_equivalence_key,
+    validate_brazilian_plate,
+)
+from apps.api.src.api.v1.utils.plate_snapshot import SnapshotInfo
+from apps.api.src.api.v1.utils.validity import (
+    ValidityWindow,
+    mask_to_weekdays,
+    weekdays_to_mask,
 )
-from apps.api.src.api.v1.utils.plate import normalize_plate, validate_brazilian_plate
+from apps.api.src.api.v1.utils.whitelist_import import ImportRow
 
 logger = logging.getLogger(__name__)
 
+
+def _validity_from(plate_data: AuthorizedPlateBase) -> ValidityWindow | None:
+    """Monta a janela de validade de uma entrada (datas sem fuso em `WHITELIST_TIMEZONE`)."""
+    tz = ZoneInfo(get_settings().whitelist_timezone)
+
+    def to_utc(moment: datetime | None) -> datetime | None:
+        if moment is None:
+            return None
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=tz)
+        return moment.astimezone(UTC)
+
+    window = ValidityWindow(
+        valid_from=to_utc(plate_data.valid_from),
+        valid_until=to_utc(plate_data.valid_until),
+        allowed_weekdays=weekdays_to_mask(plate_data.weekdays),
+        daily_start=plate_data.daily_start,
+        daily_end=plate_data.daily_end,
+    )
+    return None if window.is_unrestricted else window
+
+
 _PLATE_NOT_FOUND_DETAIL = "Plate not found"
+_PLATE_EXISTS_DETAIL = "Plate already exists in whitelist"
+
+# Linhas por instrução de inserção na importação em massa
+_BULK_IMPORT_CHUNK_SIZE = 1000
 
 
 class PlateController:
@@ -33,6 +95,8 @@ class PlateController:
         self.db = db
         # Repositories são classes com métodos estáticos, não requerem instanciação
         self.plate_repository = AuthorizedPlateRepository
+        self.change_repository = WhitelistChangeRepository
+        self.whitelist_cache = get_whitelist_cache()
 
     def get_by_id(self, plate_id: UUID) -> AuthorizedPlateRead:
         """
@@ -68,6 +132,74 @@ class PlateController:
         plates = self.plate_repository.get_all(self.db, skip=skip, limit=limit)
         return [AuthorizedPlateRead.model_validate(plate) for plate in plates]
 
+    def get_page(
+        self,
+        limit: int = 100,
+        skip: int = 0,
+        plate_prefix: str | None = None,
+        description: str | None = None,
+        sort: WhitelistSort = WhitelistSort.plate,
+        cursor: str | None = None,
+    ) -> tuple[list[AuthorizedPlateRead], str | None]:
+        """
+        Lista uma página da whitelist com busca e paginação por cursor.
+
+        Args:
+            limit: Número máximo de registros a retornar
+            skip: Registros a pular (ignorado quando há `cursor`)
+            plate_prefix: Prefixo da placa (normalizado antes da busca)
+            description: Filtro parcial e case-insensitive sobre a descrição
+            sort: Ordenação
+            cursor: Cursor devolvido pela página anterior
+
+        Returns:
+            Tupla (placas da página, cursor da próxima página ou None se for a última)
+
+        Raises:
+            HTTPException: Se o cursor for inválido ou de outra ordenação
+        """
+        after = None
+        if cursor:
+            after = self._parse_page_cursor(cursor, sort)
+            if after is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor inválido para esta listagem",
+                )
+        plates = self.plate_repository.get_all(
+            self.db,
+            skip=0 if after else skip,
+            limit=limit + 1,
+            plate_prefix=normalize_plate(plate_prefix) if plate_prefix else None,
+            description_filter=description,
+            sort=sort,
+            after=after,
+        )
+        next_cursor = None
+        if len(plates) > limit:
+            plates = plates[:limit]
+            value, plate_id = self.plate_repository.sort_key(plates[-1], sort)
+            key_value = value.isoformat() if isinstance(value, datetime) else value
+            next_cursor = encode_cursor({"sort": sort.value, "key": [key_value, str(plate_id)]})
+        return [AuthorizedPlateRead.model_validate(plate) for plate in plates], next_cursor
+
+    @staticmethod
+    def _parse_page_cursor(cursor: str, sort: WhitelistSort) -> tuple | None:
+        """Converte o cursor na chave de ordenação; None se inválido ou de outra ordenação."""
+        payload = decode_cursor(cursor)
+        if payload is None or payload.get("sort") != sort.value:
+            return None
+        try:
+            value, plate_id = payload["key"]
+            plate_uuid = UUID(plate_id)
+            if sort is not WhitelistSort.plate:
+                value = datetime.fromisoformat(value)
+        except (ValueError, TypeError, KeyError):
+            return None
+        if not isinstance(value, str | datetime):
+            return None
+        return value, plate_uuid
+
     def create(self, plate_data: AuthorizedPlateCreate) -> AuthorizedPlateRead:
         """
         Cria uma nova placa autorizada.
@@ -100,18 +232,21 @@ class PlateController:
             logger.warning("Duplicate plate creation attempt: %s", normalized)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail="Plate already exists in whitelist",
+                detail=_PLATE_EXISTS_DETAIL,
             )
 
         # Criar placa
+        validity = _validity_from(plate_data)
         try:
             plate = self.plate_repository.create(
                 self.db,
                 plate=plate_data.plate,
                 normalized_plate=normalized,
                 description=plate_data.description,
+                validity=validity,
             )
             logger.info("Authorized plate created: %s (ID: %s)", normalized, plate.id)
+            self.whitelist_cache.upsert(normalized, plate.id, window=validity)
             return AuthorizedPlateRead.model_validate(plate)
         except Exception as e:
             logger.exception("Error creating authorized plate")
@@ -156,16 +291,22 @@ class PlateController:
         if existing and existing.id != plate_id:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail="Plate already exists in whitelist",
+                detail=_PLATE_EXISTS_DETAIL,
             )
 
         # Atualizar placa
+        previous_normalized = plate.normalized_plate
+        validity = _validity_from(plate_data)
         updated_plate = self.plate_repository.update(
             self.db,
             plate=plate,
             plate_value=plate_data.plate,
             normalized_plate=normalized,
             description=plate_data.description,
+            validity=validity,
+        )
+        self.whitelist_cache.upsert(
+            normalized, updated_plate.id, previous_normalized, window=validity
         )
         return AuthorizedPlateRead.model_validate(updated_plate)
 
@@ -187,8 +328,214 @@ class PlateController:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=_PLATE_NOT_FOUND_DETAIL
             )
+        removed = AuthorizedPlateRead.model_validate(plate)
         self.plate_repository.delete(self.db, plate_id)
-        return AuthorizedPlateRead.model_validate(plate)
+        self.whitelist_cache.discard(removed.normalized_plate, removed.id)
+        return removed
+
+    async def bulk_import(self, rows: AsyncIterable[ImportRow]) -> WhitelistBulkImportResult:
+        """
+        Importa placas em massa a partir de um fluxo de linhas.
+
+        Cada linha é validada com `validate_brazilian_plate`; as válidas são agrupadas
+        em lotes de `_BULK_IMPORT_CHUNK_SIZE`, com uma verificação de duplicados e uma
+        inserção multi-linha (COPY em PostgreSQL) por lote. O trabalho de banco corre
+        fora do event loop.
+
+        Args:
+            rows: Linhas lidas do arquivo de importação
+
+        Returns:
+            WhitelistBulkImportResult com totais e erros por linha
+        """
+        result = WhitelistBulkImportResult()
+        seen: set[str] = set()
+        chunk: list[tuple[int, str, str, str | None]] = []
+        async for row in rows:
+            result.total_rows += 1
+            normalized, error = self._validate_import_row(row, seen)
+            if error is not None:
+                result.errors.append(
+                    WhitelistBulkImportRowError(line=row.line, plate=row.plate, error=error)
+                )
+                continue
+            seen.add(plate_equivalence_key(normalized))
+            chunk.append((row.line, row.plate, normalized, row.description))
+            if len(chunk) >= _BULK_IMPORT_CHUNK_SIZE:
+                await run_in_threadpool(self._import_chunk, chunk, result)
+                chunk = []
+        if chunk:
+            await run_in_threadpool(self._import_chunk, chunk, result)
+
+        logger.info(
+            "Bulk whitelist import: %d rows, %d created, %d rejected",
+            result.total_rows,
+            result.created,
+            len(result.errors),
+        )
+        return result
+
+    @staticmethod
+    def _validate_import_row(row: ImportRow, seen: set[str]) -> tuple[str, str | None]:
+        """Valida uma linha importada; devolve (placa normalizada, erro ou None)."""
+        if row.error is not None:
+            return "", row.error
+        if not row.plate:
+            return "", "Campo 'plate' ausente"
+        is_valid, error_message = validate_brazilian_plate(row.plate)
+        if not is_valid:
+            return "", error_message
+        normalized = normalize_plate(row.plate)
+        if plate_equivalence_key(normalized) in seen:
+            return normalized, "Placa duplicada no arquivo"
+        return normalized, None
+
+    def _import_chunk(
+        self,
+        chunk: list[tuple[int, str, str, str | None]],
+        result: WhitelistBulkImportResult,
+    ) -> None:
+        existing = self.plate_repository.get_existing_keys(
+            self.db, [plate_equivalence_key(normalized) for _, _, normalized, _ in chunk]
+        )
+        to_create = []
+        for line, plate, normalized, description in chunk:
+            if plate_equivalence_key(normalized) in existing:
+                result.errors.append(
+                    WhitelistBulkImportRowError(line=line, plate=plate, error=_PLATE_EXISTS_DETAIL)
+                )
+            else:
+                to_create.append((line, plate, normalized, description))
+
+        try:
+            created = self.plate_repository.bulk_create(
+                self.db,
+                [
+                    (plate, normalized, description)
+                    for _, plate, normalized, description in to_create
+                ],
+            )
+        except SQLAlchemyError:
+            logger.exception("Error inserting bulk import chunk")
+            result.errors.extend(
+                WhitelistBulkImportRowError(
+                    line=line, plate=plate, error="Erro interno ao inserir o lote"
+                )
+                for line, plate, _, _ in to_create
+            )
+            return
+
+        result.created += len(created)
+        for normalized, plate_id in created:
+            self.whitelist_cache.upsert(normalized, plate_id)
+
+    def sync(self, sync_data: WhitelistSyncRequest) -> WhitelistSyncResult:
+        """
+        Sincroniza a whitelist com um conjunto completo vindo de um sistema externo.
+
+        A diferença é calculada por operações de conjunto sobre `normalized_plate`:
+        entram as placas novas, saem as ausentes do conjunto e são atualizadas apenas
+        as que mudaram `plate`, `description` ou a janela de validade. Tudo é aplicado
+        numa única transação; linhas inalteradas não são escritas (mantêm `updated_at`).
+        Os formatos antigo e Mercosul da mesma placa contam como repetição.
+
+        Args:
+            sync_data: Conjunto desejado e opção de simulação (`dry_run`)
+
+        Returns:
+            WhitelistSyncResult com as contagens de cada operação
+
+        Raises:
+            HTTPException: Se o conjunto estiver vazio (sem `allow_empty`), não tiver
+                `expected_count` placas ou contiver a mesma placa mais de uma vez
+        """
+        # Um conjunto vazio ou truncado removeria a whitelist (ou parte dela) inteira
+        if not sync_data.plates and not sync_data.allow_empty:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Conjunto vazio: use allow_empty para remover toda a whitelist",
+            )
+        if sync_data.expected_count is not None and sync_data.expected_count != len(
+            sync_data.plates
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Conjunto truncado: {len(sync_data.plates)} placas recebidas, "
+                    f"{sync_data.expected_count} esperadas"
+                ),
+            )
+        desired: dict[str, tuple[str, str | None, ValidityWindow | None]] = {}
+        keys: set[str] = set()
+        duplicates: list[str] = []
+        for item in sync_data.plates:
+            normalized = normalize_plate(item.plate)
+            key = plate_equivalence_key(normalized)
+            if key in keys:
+                duplicates.append(normalized)
+            keys.add(key)
+            desired[normalized] = (item.plate, item.description, _validity_from(item))
+        if duplicates:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Placas repetidas no conjunto: {', '.join(sorted(set(duplicates)))}",
+            )
+
+        current = {
+            normalized: (plate_id, plate, description, window)
+            for plate_id, normalized, plate, description, window in (
+                self.plate_repository.get_all_for_sync(self.db)
+            )
+        }
+        to_create = desired.keys() - current.keys()
+        to_delete = current.keys() - desired.keys()
+        to_update = [
+            normalized
+            for normalized in desired.keys() & current.keys()
+            if desired[normalized] != current[normalized][1:]
+        ]
+        result = WhitelistSyncResult(
+            created=len(to_create),
+            updated=len(to_update),
+            deleted=len(to_delete),
+            unchanged=len(desired) - len(to_create) - len(to_update),
+            dry_run=sync_data.dry_run,
+        )
+        if sync_data.dry_run or not (to_create or to_update or to_delete):
+            return result
+
+        try:
+            created = self.plate_repository.apply_sync(
+                self.db,
+                creates=[
+                    (desired[n][0], n, desired[n][1], desired[n][2]) for n in sorted(to_create)
+                ],
+                updates=[(current[n][0], n, *desired[n]) for n in to_update],
+                deletes=[(current[n][0], n) for n in to_delete],
+            )
+        except SQLAlchemyError as e:
+            logger.exception("Error applying whitelist sync")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro interno ao sincronizar a whitelist",
+            ) from e
+
+        for normalized, plate_id in created:
+            self.whitelist_cache.upsert(normalized, plate_id, window=desired[normalized][2])
+        for normalized in to_update:
+            self.whitelist_cache.upsert(
+                normalized, current[normalized][0], window=desired[normalized][2]
+            )
+        for normalized in to_delete:
+            self.whitelist_cache.discard(normalized, current[normalized][0])
+        logger.info(
+            "Whitelist sync: %d created, %d updated, %d deleted, %d unchanged",
+            result.created,
+            result.updated,
+            result.deleted,
+            result.unchanged,
+        )
+        return result
 
     def check_authorization(self, plate: str) -> tuple[bool, UUID | None]:
         """
@@ -203,12 +550,121 @@ class PlateController:
             - authorized_plate_id: ID da placa autorizada se encontrada, None caso contrário
         """
         normalized = normalize_plate(plate)
-        authorized_plate = self.plate_repository.get_by_normalized_plate(self.db, normalized)
+        authorized_plate_id = self.whitelist_cache.get_plate_id(self.db, normalized)
 
-        if authorized_plate:
-            return True, authorized_plate.id
+        if authorized_plate_id:
+            return True, authorized_plate_id
         return False, None
 
+    def check_authorization_batch(self, plates: list[str]) -> list[WhitelistCheckResult]:
+        """
+        Verifica várias placas de uma vez.
+
+        Normaliza todas as placas e resolve-as numa única consulta `IN (...)` (ou no
+        snapshot em memória, quando ativo), em vez de uma ida ao banco por placa.
+
+        Args:
+            plates: Placas a verificar (serão normalizadas automaticamente)
+
+        Returns:
+            Lista de resultados, na mesma ordem das placas recebidas
+        """
+        normalized_plates = [normalize_plate(plate) for plate in plates]
+        matches = self.whitelist_cache.match_many(self.db, set(normalized_plates))
+        results = []
+        for plate, normalized in zip(plates, normalized_plates, strict=True):
+            match = matches.get(normalized)
+            results.append(
+                WhitelistCheckResult(
+                    plate=plate,
+                    normalized_plate=normalized,
+                    authorized=match is not None,
+                    authorized_plate_id=match.plate_id if match else None,
+                    match_type=match.match_type if match else None,
+                    match_distance=match.distance if match else None,
+                )
+            )
+        return results
+
+    def get_version(self) -> int:
+        """
+        Retorna a versão atual da whitelist.
+
+        Returns:
+            Maior versão registrada no histórico (0 se vazio)
+        """
+        return self.change_repository.get_current_version(self.db)
+
+    def get_changes(self, since: int, limit: int, version: int) -> WhitelistChangesPage:
+        """
+        Lista as alterações da whitelist posteriores a uma versão.
+
+        Cada `upsert` traz a janela de validade atual da entrada, que o dispositivo deve
+        aplicar localmente (o feed não omite entradas fora da janela).
+
+        Args:
+            since: Versão já conhecida pelo dispositivo
+            limit: Número máximo de alterações a retornar
+            version: Versão atual da whitelist (ver `get_version`)
+
+        Returns:
+            WhitelistChangesPage com as alterações e o cursor da próxima consulta
+
+        Raises:
+            HTTPException: Se `since` for posterior à versão atual (ex.: banco restaurado);
+                o dispositivo deve refazer a sincronização completa com `since=0`
+        """
+        if since > version:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Versão desconhecida; sincronizar de novo com since=0",
+            )
+        changes = self.change_repository.get_changes_since(self.db, since, limit=limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        upserted = [change.plate_id for change in changes if change.op is WhitelistChangeOp.upsert]
+        windows = self.plate_repository.get_validity_windows(self.db, upserted) if upserted else {}
+        items = []
+        for change in changes:
+            item = WhitelistChangeRead.model_validate(change)
+            window = windows.get(change.plate_id) if change.op is WhitelistChangeOp.upsert else None
+            if window is not None:
+                item.valid_from = window.valid_from
+                item.valid_until = window.valid_until
+                item.weekdays = mask_to_weekdays(window.allowed_weekdays)
+                item.daily_start = window.daily_start
+                item.daily_end = window.daily_end
+            items.append(item)
+        return WhitelistChangesPage(
+            since=since,
+            version=changes[-1].version if has_more else version,
+            has_more=has_more,
+            changes=items,
+        )
+
+    def get_snapshot(self, version: int) -> tuple[Path, SnapshotInfo]:
+        """
+        Retorna o snapshot binário da whitelist, regerando-o se estiver desatualizado
+        ou expirado.
+
+        Args:
+            version: Versão atual da whitelist (ver `get_version`)
+
+        Returns:
+            Caminho do arquivo do snapshot e o seu cabeçalho (versão e validade)
+
+        Raises:
+            HTTPException: Se não for possível gravar o snapshot
+        """
+        try:
+            return ensure_whitelist_snapshot(self.db, version)
+        except OSError as e:
+            logger.exception("Error writing whitelist snapshot")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro interno ao gerar o snapshot da whitelist",
+            ) from e
+
     def count(self) -> int:
         """
         Conta o total de placas autorizadas no banco de dados.
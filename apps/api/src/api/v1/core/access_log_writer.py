@@ -0,0 +1,205 @@
+"""Gravação agrupada (group commit) dos logs de acesso.
+
+Com `ACCESS_LOG_BATCH_ENABLED`, cada evento de ingestão deixa de fazer o seu próprio
+`commit()`: os valores do log são postos numa fila e uma thread dedicada grava-os em
+lotes, com um único INSERT multi-linha (`RETURNING`) por transação, assim que houver
+`ACCESS_LOG_BATCH_MAX_ROWS` eventos ou passarem `ACCESS_LOG_BATCH_MAX_DELAY_MS` desde o
+primeiro evento do lote. Cada requisição espera pelo `Future` do seu próprio log, que só
+é resolvido depois do commit; o contrato da API não muda.
+
+Se o lote falhar, as linhas são regravadas uma a uma, para que um evento inválido não
+faça falhar os outros do mesmo lote.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.schemas.access_log import AccessLogRead
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _PendingLog:
+    row: dict[str, Any]
+    future: Future[AccessLogRead] = field(default_factory=Future)
+
+
+# Sinaliza à thread que deve gravar o que resta na fila e terminar
+_STOP = object()
+
+
+class AccessLogBatchWriter:
+    """Fila de logs de acesso gravada em lotes por uma thread dedicada."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_rows: int,
+        max_delay_ms: int,
+    ) -> None:
+        """
+        Args:
+            session_factory: Fábrica de sessões do banco
+            max_rows: Número máximo de logs por transação
+            max_delay_ms: Espera máxima por mais logs depois do primeiro do lote
+        """
+        self._session_factory = session_factory
+        self._max_rows = max_rows
+        self._max_delay = max_delay_ms / 1000
+        self._queue: queue.SimpleQueue[_PendingLog | object] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def running(self) -> bool:
+        """True enquanto o escritor aceita novos logs."""
+        return self._thread is not None and not self._closed
+
+    def start(self) -> None:
+        """Inicia a thread de gravação."""
+        self._thread = threading.Thread(
+            target=self._run, name="access-log-batch-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Deixa de aceitar logs, grava os pendentes e espera o término da thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, **values: Any) -> "Future[AccessLogRead]":
+        """
+        Enfileira um log de acesso para gravação.
+
+        Args:
+            **values: Argumentos de `AccessLogRepository.new_row`
+
+        Returns:
+            Future resolvido com o log gravado depois do commit do seu lote
+
+        Raises:
+            RuntimeError: Se o escritor já tiver sido parado
+        """
+        pending = _PendingLog(AccessLogRepository.new_row(**values))
+        with self._lock:
+            if self._closed:
+                msg = "Access log batch writer is stopped"
+                raise RuntimeError(msg)
+            self._queue.put(pending)
+        return pending.future
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self) -> tuple[list[_PendingLog], bool]:
+        """Espera o primeiro log e junta outros até ao limite de linhas ou de tempo."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self._max_delay
+        while len(batch) < self._max_rows:
+            remaining = max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, batch: list[_PendingLog]) -> None:
+        try:
+            results = self._insert([pending.row for pending in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            logger.warning("Access log batch of %d failed; retrying rows one by one", len(batch))
+            for pending in batch:
+                self._flush([pending])
+            return
+        for pending, result in zip(batch, results, strict=True):
+            pending.future.set_result(result)
+
+    def _insert(self, rows: list[dict[str, Any]]) -> list[AccessLogRead]:
+        db = self._session_factory()
+        try:
+            logs = AccessLogRepository.create_many(db, rows)
+            # Os valores vêm do RETURNING; ler antes de fechar a sessão
+            return [AccessLogRead.model_validate(log) for log in logs]
+        finally:
+            db.close()
+
+
+_writer: AccessLogBatchWriter | None = None
+
+
+def get_access_log_writer() -> AccessLogBatchWriter | None:
+    """Escritor agrupado em execução neste processo, ou None se estiver desligado."""
+    if _writer is None or not _writer.running:
+        return None
+    return _writer
+
+
+def start_access_log_writer(
+    session_factory: Callable[[], Session],
+) -> AccessLogBatchWriter | None:
+    """
+    Inicia o escritor agrupado de logs de acesso, se estiver ativo.
+
+    Args:
+        session_factory: Fábrica de sessões do banco
+
+    Returns:
+        Escritor em execução, ou None se `ACCESS_LOG_BATCH_ENABLED` estiver desligado
+    """
+    global _writer  # noqa: PLW0603
+    settings = get_settings()
+    if not settings.access_log_batch_enabled:
+        return None
+    _writer = AccessLogBatchWriter(
+        session_factory,
+        max_rows=settings.access_log_batch_max_rows,
+        max_delay_ms=settings.access_log_batch_max_delay_ms,
+    )
+    _writer.start()
+    logger.info(
+        "Access log batch writer started (max %d rows, %d ms)",
+        settings.access_log_batch_max_rows,
+        settings.access_log_batch_max_delay_ms,
+    )
+    return _writer
+
+
+async def stop_access_log_writer(writer: AccessLogBatchWriter | None) -> None:
+    """Para o escritor agrupado, gravando os logs ainda na fila."""
+    global _writer  # noqa: PLW0603
+    if writer is None:
+        return
+    await run_in_threadpool(writer.stop)
+    if _writer is writer:
+        _writer = None
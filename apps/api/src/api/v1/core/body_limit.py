@@ -0,0 +1,109 @@
+"""Limite do tamanho do corpo das requisições de ingestão.
+
+O FastAPI lê e faz o parsing do multipart inteiro antes de chamar o endpoint, por
+isso a verificação de `MAX_FILE_SIZE_MB` no controller só acontece depois de o
+upload ter sido recebido. Este middleware ASGI rejeita mais cedo:
+
+- pelo `Content-Length`, antes de ler qualquer byte do corpo;
+- pela contagem dos bytes recebidos, quando o cliente não envia `Content-Length`
+  (chunked) ou envia um valor menor do que o corpo real.
+
+Os lotes de reenvio (`batch_paths`) têm um limite próprio, `INGEST_BATCH_MAX_BODY_MB`.
+"""
+
+from collections.abc import Collection
+
+from fastapi import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from apps.api.src.api.v1.core.config import get_settings
+
+# Margem para os campos de formulário e delimitadores do multipart
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def max_ingest_body_bytes() -> int:
+    """Tamanho máximo do corpo de uma requisição de ingestão, em bytes."""
+    return get_settings().max_file_size_mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+
+
+def max_batch_body_bytes() -> int:
+    """Tamanho máximo do corpo de um lote de ingestão, em bytes."""
+    return get_settings().ingest_batch_max_body_mb * 1024 * 1024
+
+
+def _too_large_response(batch: bool) -> JSONResponse:
+    settings = get_settings()
+    detail = (
+        f"Lote muito grande. Máximo: {settings.ingest_batch_max_body_mb}MB"
+        if batch
+        else f"Arquivo muito grande. Máximo: {settings.max_file_size_mb}MB"
+    )
+    return JSONResponse({"detail": detail}, status_code=status.HTTP_413_CONTENT_TOO_LARGE)
+
+
+class IngestBodyLimitMiddleware:
+    """Rejeita com 413 requisições `POST` cujo corpo exceda o limite de ingestão."""
+
+    def __init__(
+        self, app: ASGIApp, paths: Collection[str], batch_paths: Collection[str] = ()
+    ) -> None:
+        """
+        Args:
+            app: Aplicação ASGI envolvida
+            paths: Caminhos (exatos) de ingestão de um único evento
+            batch_paths: Caminhos (exatos) de ingestão em lote
+        """
+        self.app = app
+        self.paths = frozenset(paths)
+        self.batch_paths = frozenset(batch_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        batch = scope["path"] in self.batch_paths
+        if not batch and scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        limit = max_batch_body_bytes() if batch else max_ingest_body_bytes()
+        too_large = _too_large_response(batch)
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Interromper a leitura como se o cliente tivesse desconectado; a
+                    # resposta de erro da aplicação é trocada por 413 em `limited_send`
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded:
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await too_large(scope, receive, send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, limited_send)
+        if exceeded and not response_started:
+            await too_large(scope, receive, send)
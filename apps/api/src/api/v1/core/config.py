@@ -18,6 +18,7 @@ fallback de desenvolvimento sem alterar código.
 import logging
 import os
 from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from pydantic import BaseModel, Field
 
@@ -59,10 +60,283 @@ def _read_upload_dir() -> str:
     return os.getenv("UPLOAD_DIR", "uploads")
 
 
+def _read_image_storage_layout() -> str:
+    """`flat` (`<uuid4><ext>` em UPLOAD_DIR) ou `content` (`ab/cd/<sha256><ext>`, deduplicado)."""
+    layout = (os.getenv("IMAGE_STORAGE_LAYOUT") or "flat").strip().lower()
+    return layout if layout in ("flat", "content") else "flat"
+
+
+def _read_image_storage_backend() -> str:
+    """`local` (UPLOAD_DIR) ou `s3` (bucket S3/MinIO partilhado pelos nós; requer boto3)."""
+    backend = (os.getenv("IMAGE_STORAGE_BACKEND") or "local").strip().lower()
+    return backend if backend in ("local", "s3") else "local"
+
+
+def _read_image_s3_bucket() -> str | None:
+    v = (os.getenv("IMAGE_S3_BUCKET") or "").strip()
+    return v if v else None
+
+
+def _read_image_s3_prefix() -> str:
+    return (os.getenv("IMAGE_S3_PREFIX") or "").strip()
+
+
+def _read_image_s3_endpoint_url() -> str | None:
+    """Endpoint de um serviço compatível (ex.: MinIO); vazio para a AWS."""
+    v = (os.getenv("IMAGE_S3_ENDPOINT_URL") or "").strip()
+    return v if v else None
+
+
+def _read_image_s3_region() -> str | None:
+    v = (os.getenv("IMAGE_S3_REGION") or "").strip()
+    return v if v else None
+
+
+def _read_image_s3_max_connections() -> int:
+    """Ligações HTTP do pool do cliente S3 (partilhado pelo processo)."""
+    return _read_int_env("IMAGE_S3_MAX_CONNECTIONS", 10, 1, 256)
+
+
+def _read_image_storage_write_through() -> bool:
+    """Cópia local imediata e envio para o backend remoto em segundo plano."""
+    return _read_bool_env("IMAGE_STORAGE_WRITE_THROUGH", False)
+
+
+def _read_image_storage_upload_workers() -> int:
+    """Envios simultâneos para o backend remoto no modo write-through."""
+    return _read_int_env("IMAGE_STORAGE_UPLOAD_WORKERS", 4, 1, 64)
+
+
+def _read_image_storage_local_max_mb() -> int:
+    """Limite da cópia local no modo write-through (0 = sem limite)."""
+    return _read_int_env("IMAGE_STORAGE_LOCAL_MAX_MB", 10240, 0, 1024 * 1024)
+
+
+def _read_image_cache_max_age_seconds() -> int:
+    """`max-age` das imagens no navegador (0 = revalidar sempre com If-None-Match)."""
+    return _read_int_env("IMAGE_CACHE_MAX_AGE_SECONDS", 86400, 0, 31536000)
+
+
+def _read_image_signed_url_ttl_seconds() -> int:
+    """Validade das URLs assinadas de imagens na listagem de logs (0 desliga)."""
+    return _read_int_env("IMAGE_SIGNED_URL_TTL_SECONDS", 600, 0, 86400)
+
+
+def _read_image_delivery_mode() -> str:
+    """`app` (a API envia os bytes), `x-accel-redirect` (nginx) ou `x-sendfile`."""
+    mode = (os.getenv("IMAGE_DELIVERY_MODE") or "app").strip().lower()
+    return mode if mode in ("app", "x-accel-redirect", "x-sendfile") else "app"
+
+
+def _read_image_accel_redirect_prefix() -> str:
+    """Location `internal` do nginx que aponta para UPLOAD_DIR."""
+    return (os.getenv("IMAGE_ACCEL_REDIRECT_PREFIX") or "/protected-images/").strip()
+
+
+def _read_image_resize_cache_dir() -> str:
+    """Diretório das imagens redimensionadas (miniaturas) geradas a pedido."""
+    return os.getenv("IMAGE_RESIZE_CACHE_DIR", "data/image-cache")
+
+
+def _read_image_resize_cache_max_mb() -> int:
+    """Orçamento do cache de miniaturas; as menos usadas recentemente saem primeiro."""
+    return _read_int_env("IMAGE_RESIZE_CACHE_MAX_MB", 512, 1, 1024 * 1024)
+
+
+def _read_image_resize_workers() -> int:
+    """Processos que geram as miniaturas (Pillow ou OpenCV)."""
+    return _read_int_env("IMAGE_RESIZE_WORKERS", 2, 1, 64)
+
+
+def _read_image_postprocess_enabled() -> bool:
+    """Recomprimir as imagens (e recortar a placa) depois da ingestão, fora da requisição."""
+    return _read_bool_env("IMAGE_POSTPROCESS_ENABLED", False)
+
+
+def _read_image_postprocess_format() -> str:
+    """Formato das imagens recomprimidas: `jpeg` ou `webp`."""
+    fmt = (os.getenv("IMAGE_POSTPROCESS_FORMAT") or "jpeg").strip().lower()
+    return fmt if fmt in ("jpeg", "webp") else "jpeg"
+
+
+def _read_image_postprocess_quality() -> int:
+    return _read_int_env("IMAGE_POSTPROCESS_QUALITY", 80, 30, 95)
+
+
+def _read_image_postprocess_max_dimension() -> int:
+    """Maior lado das imagens recomprimidas, em pixels (0 mantém as dimensões)."""
+    return _read_int_env("IMAGE_POSTPROCESS_MAX_DIMENSION", 1920, 0, 16384)
+
+
+def _read_image_postprocess_workers() -> int:
+    """Processos que recomprimem as imagens (Pillow ou OpenCV)."""
+    return _read_int_env("IMAGE_POSTPROCESS_WORKERS", 1, 1, 64)
+
+
+def _read_image_retention_enabled() -> bool:
+    """Apagar (ou arquivar) periodicamente as imagens dos logs antigos."""
+    return _read_bool_env("IMAGE_RETENTION_ENABLED", False)
+
+
+def _read_image_retention_frame_days() -> int:
+    """Dias que os quadros completos são mantidos (0 = sempre)."""
+    return _read_int_env("IMAGE_RETENTION_FRAME_DAYS", 30, 0, 36500)
+
+
+def _read_image_retention_authorized_frame_days() -> int:
+    """Dias para os quadros de acessos `Authorized` (0 = como IMAGE_RETENTION_FRAME_DAYS)."""
+    return _read_int_env("IMAGE_RETENTION_AUTHORIZED_FRAME_DAYS", 7, 0, 36500)
+
+
+def _read_image_retention_crop_days() -> int:
+    """Dias que os recortes da placa são mantidos (0 = sempre)."""
+    return _read_int_env("IMAGE_RETENTION_CROP_DAYS", 365, 0, 36500)
+
+
+def _read_image_retention_interval_seconds() -> int:
+    return _read_int_env("IMAGE_RETENTION_INTERVAL_SECONDS", 3600, 60, 7 * 86400)
+
+
+def _read_image_retention_batch_size() -> int:
+    """Logs por transação da retenção."""
+    return _read_int_env("IMAGE_RETENTION_BATCH_SIZE", 200, 1, 10000)
+
+
+def _read_image_retention_max_files_per_second() -> int:
+    """Limite de arquivos lidos/apagados por segundo (E/S da retenção)."""
+    return _read_int_env("IMAGE_RETENTION_MAX_FILES_PER_SECOND", 20, 1, 10000)
+
+
+def _read_image_retention_archive_dir() -> str | None:
+    """Diretório dos arquivos diários (`.tar.gz`) das imagens expiradas; vazio apaga sem arquivar."""
+    v = (os.getenv("IMAGE_RETENTION_ARCHIVE_DIR") or "").strip()
+    return v if v else None
+
+
 def _read_max_file_size_mb() -> int:
     return int(os.getenv("MAX_FILE_SIZE_MB", "10"))
 
 
+def _read_bool_env(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _read_int_env(name: str, default: int, minimum: int, maximum: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        n = int(raw)
+    except ValueError:
+        logger.warning("Invalid %s=%r; using default %d", name, raw, default)
+        return default
+    return max(minimum, min(n, maximum))
+
+
+def _read_whitelist_cache_enabled() -> bool:
+    """Cache em memória da whitelist (desligado por padrão)."""
+    return _read_bool_env("WHITELIST_CACHE_ENABLED", False)
+
+
+def _read_whitelist_cache_ttl_seconds() -> int:
+    """Idade máxima do snapshot antes de recarregar do banco (convergência entre workers)."""
+    return _read_int_env("WHITELIST_CACHE_TTL_SECONDS", 30, 1, 86400)
+
+
+def _read_whitelist_fuzzy_match_enabled() -> bool:
+    """Autorização tolerante a erros de OCR (requer o snapshot em memória da whitelist)."""
+    return _read_bool_env("WHITELIST_FUZZY_MATCH_ENABLED", False)
+
+
+def _read_whitelist_fuzzy_max_distance() -> int:
+    """Distância de edição máxima, após mapear caracteres confundíveis (0 = só confundíveis)."""
+    return _read_int_env("WHITELIST_FUZZY_MAX_DISTANCE", 0, 0, 2)
+
+
+def _read_whitelist_timezone() -> str:
+    """Fuso em que dias da semana e faixas horárias da whitelist são avaliados."""
+    name = (os.getenv("WHITELIST_TIMEZONE") or "").strip() or "America/Sao_Paulo"
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Invalid WHITELIST_TIMEZONE=%r; using UTC", name)
+        return "UTC"
+    return name
+
+
+def _read_whitelist_sweep_interval_seconds() -> int:
+    """Intervalo da remoção de entradas expiradas da whitelist (0 desliga, padrão)."""
+    return _read_int_env("WHITELIST_SWEEP_INTERVAL_SECONDS", 0, 0, 86400)
+
+
+def _read_access_log_batch_enabled() -> bool:
+    """Gravação agrupada dos logs de acesso (desligada por padrão)."""
+    return _read_bool_env("ACCESS_LOG_BATCH_ENABLED", False)
+
+
+def _read_access_log_batch_max_rows() -> int:
+    """Número máximo de logs gravados por transação do escritor agrupado."""
+    return _read_int_env("ACCESS_LOG_BATCH_MAX_ROWS", 100, 1, 1000)
+
+
+def _read_access_log_batch_max_delay_ms() -> int:
+    """Espera máxima (ms) por mais logs antes de gravar um lote."""
+    return _read_int_env("ACCESS_LOG_BATCH_MAX_DELAY_MS", 5, 0, 1000)
+
+
+def _read_ingest_batch_max_items() -> int:
+    """Número máximo de eventos por lote em POST /access_logs/batch."""
+    return _read_int_env("INGEST_BATCH_MAX_ITEMS", 500, 1, 1000)
+
+
+def _read_ingest_batch_max_body_mb() -> int:
+    """Tamanho máximo do corpo de um lote de ingestão, em MB."""
+    return _read_int_env("INGEST_BATCH_MAX_BODY_MB", 200, 1, 4096)
+
+
+def _read_ingest_idempotency_cache_size() -> int:
+    """Eventos recentes mantidos em memória para responder a reenvios (0 desliga)."""
+    return _read_int_env("INGEST_IDEMPOTENCY_CACHE_SIZE", 10000, 0, 1_000_000)
+
+
+def _read_ingest_dedup_window_seconds() -> int:
+    """Janela de agregação das leituras repetidas por câmera e placa (0 desliga)."""
+    return _read_int_env("INGEST_DEDUP_WINDOW_SECONDS", 0, 0, 3600)
+
+
+def _read_ingest_dedup_max_entries() -> int:
+    """Pares (câmera, placa) mantidos em memória pela supressão de leituras repetidas."""
+    return _read_int_env("INGEST_DEDUP_MAX_ENTRIES", 10000, 1, 1_000_000)
+
+
+def _read_ingest_dedup_replace_sharper() -> bool:
+    """Substituir a imagem do evento quando uma leitura repetida for mais nítida."""
+    return _read_bool_env("INGEST_DEDUP_REPLACE_SHARPER", False)
+
+
+def _read_ingest_journal_enabled() -> bool:
+    """Guardar num diário local os eventos que não puderam ser gravados no banco."""
+    return _read_bool_env("INGEST_JOURNAL_ENABLED", False)
+
+
+def _read_ingest_journal_path() -> str:
+    """Arquivo NDJSON do diário de ingestão (um por host, partilhado pelos workers)."""
+    return os.getenv("INGEST_JOURNAL_PATH", "data/ingest-journal.ndjson")
+
+
+def _read_ingest_journal_drain_interval_seconds() -> int:
+    """Intervalo entre tentativas de reenviar o diário de ingestão para o banco."""
+    return _read_int_env("INGEST_JOURNAL_DRAIN_INTERVAL_SECONDS", 5, 1, 3600)
+
+
+def _read_whitelist_snapshot_path() -> str:
+    """Arquivo do snapshot binário da whitelist servido em GET /whitelist/snapshot."""
+    return os.getenv("WHITELIST_SNAPSHOT_PATH", "data/whitelist.snap")
+
+
 def _resolve_database_url() -> str:
     """Resolve a URL do banco de dados conforme prioridades documentadas.
 
@@ -171,8 +445,71 @@ class Settings(BaseModel):
         default_factory=_read_password_reset_expose_token_in_response
     )
     upload_dir: str = Field(default_factory=_read_upload_dir)
+    image_storage_layout: str = Field(default_factory=_read_image_storage_layout)
+    image_storage_backend: str = Field(default_factory=_read_image_storage_backend)
+    image_s3_bucket: str | None = Field(default_factory=_read_image_s3_bucket)
+    image_s3_prefix: str = Field(default_factory=_read_image_s3_prefix)
+    image_s3_endpoint_url: str | None = Field(default_factory=_read_image_s3_endpoint_url)
+    image_s3_region: str | None = Field(default_factory=_read_image_s3_region)
+    image_s3_max_connections: int = Field(default_factory=_read_image_s3_max_connections)
+    image_storage_write_through: bool = Field(default_factory=_read_image_storage_write_through)
+    image_storage_upload_workers: int = Field(default_factory=_read_image_storage_upload_workers)
+    image_storage_local_max_mb: int = Field(default_factory=_read_image_storage_local_max_mb)
+    image_cache_max_age_seconds: int = Field(default_factory=_read_image_cache_max_age_seconds)
+    image_signed_url_ttl_seconds: int = Field(default_factory=_read_image_signed_url_ttl_seconds)
+    image_delivery_mode: str = Field(default_factory=_read_image_delivery_mode)
+    image_accel_redirect_prefix: str = Field(default_factory=_read_image_accel_redirect_prefix)
+    image_resize_cache_dir: str = Field(default_factory=_read_image_resize_cache_dir)
+    image_resize_cache_max_mb: int = Field(default_factory=_read_image_resize_cache_max_mb)
+    image_resize_workers: int = Field(default_factory=_read_image_resize_workers)
+    image_postprocess_enabled: bool = Field(default_factory=_read_image_postprocess_enabled)
+    image_postprocess_format: str = Field(default_factory=_read_image_postprocess_format)
+    image_postprocess_quality: int = Field(default_factory=_read_image_postprocess_quality)
+    image_postprocess_max_dimension: int = Field(
+        default_factory=_read_image_postprocess_max_dimension
+    )
+    image_postprocess_workers: int = Field(default_factory=_read_image_postprocess_workers)
+    image_retention_enabled: bool = Field(default_factory=_read_image_retention_enabled)
+    image_retention_frame_days: int = Field(default_factory=_read_image_retention_frame_days)
+    image_retention_authorized_frame_days: int = Field(
+        default_factory=_read_image_retention_authorized_frame_days
+    )
+    image_retention_crop_days: int = Field(default_factory=_read_image_retention_crop_days)
+    image_retention_interval_seconds: int = Field(
+        default_factory=_read_image_retention_interval_seconds
+    )
+    image_retention_batch_size: int = Field(default_factory=_read_image_retention_batch_size)
+    image_retention_max_files_per_second: int = Field(
+        default_factory=_read_image_retention_max_files_per_second
+    )
+    image_retention_archive_dir: str | None = Field(
+        default_factory=_read_image_retention_archive_dir
+    )
     max_file_size_mb: int = Field(default_factory=_read_max_file_size_mb)
     vehicle_classifier_backend: str = Field(default_factory=_read_vehicle_classifier_backend)
+    whitelist_cache_enabled: bool = Field(default_factory=_read_whitelist_cache_enabled)
+    whitelist_cache_ttl_seconds: int = Field(default_factory=_read_whitelist_cache_ttl_seconds)
+    whitelist_fuzzy_match_enabled: bool = Field(default_factory=_read_whitelist_fuzzy_match_enabled)
+    whitelist_fuzzy_max_distance: int = Field(default_factory=_read_whitelist_fuzzy_max_distance)
+    whitelist_snapshot_path: str = Field(default_factory=_read_whitelist_snapshot_path)
+    whitelist_timezone: str = Field(default_factory=_read_whitelist_timezone)
+    whitelist_sweep_interval_seconds: int = Field(
+        default_factory=_read_whitelist_sweep_interval_seconds
+    )
+    access_log_batch_enabled: bool = Field(default_factory=_read_access_log_batch_enabled)
+    access_log_batch_max_rows: int = Field(default_factory=_read_access_log_batch_max_rows)
+    access_log_batch_max_delay_ms: int = Field(default_factory=_read_access_log_batch_max_delay_ms)
+    ingest_batch_max_items: int = Field(default_factory=_read_ingest_batch_max_items)
+    ingest_batch_max_body_mb: int = Field(default_factory=_read_ingest_batch_max_body_mb)
+    ingest_idempotency_cache_size: int = Field(default_factory=_read_ingest_idempotency_cache_size)
+    ingest_dedup_window_seconds: int = Field(default_factory=_read_ingest_dedup_window_seconds)
+    ingest_dedup_max_entries: int = Field(default_factory=_read_ingest_dedup_max_entries)
+    ingest_dedup_replace_sharper: bool = Field(default_factory=_read_ingest_dedup_replace_sharper)
+    ingest_journal_enabled: bool = Field(default_factory=_read_ingest_journal_enabled)
+    ingest_journal_path: str = Field(default_factory=_read_ingest_journal_path)
+    ingest_journal_drain_interval_seconds: int = Field(
+        default_factory=_read_ingest_journal_drain_interval_seconds
+    )
 
 
 @lru_cache
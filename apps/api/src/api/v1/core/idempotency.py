@@ -0,0 +1,106 @@
+"""Idempotência da ingestão de eventos de acesso.
+
+Os dispositivos reenviam um evento quando o pedido expira; sem uma chave estável, cada
+reenvio criava um novo log e uma nova imagem. Com `Idempotency-Key` (ou `event_id`)
+o log fica associado à chave, que tem índice único no banco: um reenvio devolve o
+registro original.
+
+Para que a maioria dos reenvios não chegue sequer a gravar a imagem ou a consultar o
+banco, cada processo guarda os eventos mais recentes num LRU em memória
+(`INGEST_IDEMPOTENCY_CACHE_SIZE`, 0 desliga). O índice único continua a ser a
+garantia: reenvios que não estejam no cache (outro worker, reinício) são detetados
+pela violação da restrição e resolvidos com uma consulta pela chave.
+"""
+
+import threading
+from collections import OrderedDict
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.schemas.access_log import AccessLogRead
+
+EVENT_ID_MAX_LENGTH = 128
+
+
+def clean_client_key(value: str | None, name: str, max_length: int) -> str | None:
+    """
+    Valida um identificador enviado pelo dispositivo (chave de evento, ID da câmera).
+
+    Args:
+        value: Valor recebido (espaços nas extremidades são ignorados)
+        name: Nome do campo, usado nas mensagens de erro
+        max_length: Comprimento máximo
+
+    Returns:
+        Valor limpo, ou None se não tiver sido enviado
+
+    Raises:
+        ValueError: Se o valor for longo demais ou tiver caracteres não imprimíveis
+    """
+    if value is None or not value.strip():
+        return None
+    key = value.strip()
+    if len(key) > max_length:
+        msg = f"{name} deve ter no máximo {max_length} caracteres"
+        raise ValueError(msg)
+    if not key.isascii() or not key.isprintable():
+        msg = f"{name} deve conter apenas caracteres ASCII imprimíveis"
+        raise ValueError(msg)
+    return key
+
+
+def clean_event_id(value: str | None) -> str | None:
+    """Valida uma chave de idempotência enviada pelo dispositivo (ver `clean_client_key`)."""
+    return clean_client_key(value, "event_id", EVENT_ID_MAX_LENGTH)
+
+
+class RecentEventCache:
+    """LRU `event_id -> AccessLogRead` dos eventos registrados recentemente."""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, AccessLogRead] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, event_id: str | None) -> AccessLogRead | None:
+        """Log registrado com a chave, se estiver no cache."""
+        if event_id is None:
+            return None
+        with self._lock:
+            log = self._entries.get(event_id)
+            if log is not None:
+                self._entries.move_to_end(event_id)
+                self.hits += 1
+            return log
+
+    def put(self, log: AccessLogRead, event_id: str | None = None) -> None:
+        """
+        Guarda um log com chave, descartando os mais antigos acima do limite.
+
+        Args:
+            log: Log registrado
+            event_id: Chave a associar (padrão: `log.event_id`), ex.: a de uma leitura
+                repetida agregada a um log existente
+        """
+        max_size = get_settings().ingest_idempotency_cache_size
+        event_id = event_id or log.event_id
+        if event_id is None or max_size <= 0:
+            return
+        with self._lock:
+            self._entries[event_id] = log
+            self._entries.move_to_end(event_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Esvazia o cache."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+
+
+_recent_events = RecentEventCache()
+
+
+def get_recent_event_cache() -> RecentEventCache:
+    """Instância do cache compartilhada pelo processo."""
+    return _recent_events
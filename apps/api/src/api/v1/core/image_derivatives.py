@@ -0,0 +1,272 @@
+"""Imagens redimensionadas (miniaturas) geradas a pedido, com cache em disco.
+
+`GET /access_logs/images/...?w=&h=&format=` devolve uma derivada da imagem original,
+reduzida para caber em `w` x `h` (sem ampliar e mantendo a proporção), opcionalmente
+noutro formato (ex.: WebP). A conversão (`image_transcode`, com Pillow ou OpenCV) corre
+num pool de processos de `IMAGE_RESIZE_WORKERS`: a descompressão de um quadro de vários
+MB não ocupa o GIL dos workers da API.
+
+As derivadas ficam em `IMAGE_RESIZE_CACHE_DIR`, com nome dado pela ETag da original e
+pelos parâmetros (as chaves das imagens nunca mudam de conteúdo, logo a derivada nunca
+fica desatualizada). Cada acerto atualiza o mtime do arquivo; quando o total passa de
+`IMAGE_RESIZE_CACHE_MAX_MB`, as derivadas usadas há mais tempo são apagadas (LRU).
+Vários workers podem partilhar o diretório: a escrita é atómica, a remoção tolera
+arquivos já apagados por outro processo e o total é relido do disco periodicamente e
+antes de qualquer remoção (a estimativa de cada worker só conta as suas escritas).
+Arquivos temporários deixados por conversões que excederam o tempo limite são apagados
+nessas releituras.
+"""
+
+import contextlib
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import NamedTuple
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.utils.image_transcode import FORMAT_SUFFIXES, SUFFIX_FORMATS, transcode
+
+logger = logging.getLogger(__name__)
+
+# Após exceder o orçamento, apagar até ficar abaixo desta fração (evita varrer a cada escrita)
+_EVICT_TO_FRACTION = 0.8
+# Reler o total do disco quando a estimativa local passar desta fração do orçamento
+_RESCAN_FRACTION = 0.9
+# ...ou quando a última releitura for mais antiga do que isto (escritas de outros workers)
+_RESCAN_INTERVAL_SECONDS = 60
+_RENDER_TIMEOUT_SECONDS = 30
+# Temporários mais antigos do que isto são de conversões abandonadas após o tempo limite
+_STALE_STAGED_SECONDS = 2 * _RENDER_TIMEOUT_SECONDS
+
+
+class DerivativeSpec(NamedTuple):
+    """Parâmetros de uma imagem derivada."""
+
+    width: int | None
+    height: int | None
+    # `jpeg`, `png` ou `webp`; None mantém o formato da original
+    format: str | None
+
+    def suffix(self, original_suffix: str) -> str:
+        """Extensão da derivada (a da original se o formato não mudar)."""
+        if self.format is None:
+            return original_suffix.lower() or ".jpg"
+        return FORMAT_SUFFIXES[self.format]
+
+    def tag(self) -> str:
+        """Parte do nome e da ETag que identifica os parâmetros."""
+        return f"{self.width or 0}x{self.height or 0}-{self.format or 'orig'}"
+
+
+def render_derivative(source: Path, dest: Path, spec: DerivativeSpec) -> None:
+    """
+    Gera a derivada de `source` em `dest` (corre no pool de processos).
+
+    Args:
+        source: Imagem original
+        dest: Arquivo a escrever
+        spec: Dimensões máximas e formato
+
+    Raises:
+        RuntimeError: Se nem Pillow nem OpenCV estiverem instalados
+        OSError: Se a imagem não puder ser lida ou escrita
+    """
+    fmt = spec.format or SUFFIX_FORMATS.get(dest.suffix, "jpeg")
+    transcode(source, dest, fmt, max_width=spec.width, max_height=spec.height)
+
+
+class ImageDerivatives:
+    """Cache em disco das derivadas, com geração num executor e remoção LRU."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int,
+        executor: Executor,
+        render: Callable[[Path, Path, DerivativeSpec], None] = render_derivative,
+    ) -> None:
+        """
+        Args:
+            cache_dir: Diretório das derivadas
+            max_bytes: Orçamento total do cache
+            executor: Onde correm as conversões (pool de processos)
+            render: Função de conversão (picklable, para o pool de processos)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._executor = executor
+        self._render = render
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future[None]] = {}
+        # Total aproximado em disco (None até à primeira varredura)
+        self._size: int | None = None
+        self._scanned_at = 0.0
+
+    def _path(self, name: str) -> Path:
+        return self.cache_dir / name[:2] / name
+
+    def get(
+        self,
+        source_etag: str,
+        source_suffix: str,
+        spec: DerivativeSpec,
+        source: Callable[[], AbstractContextManager[Path]],
+    ) -> Path:
+        """
+        Caminho da derivada, gerando-a se ainda não estiver no cache.
+
+        Pedidos simultâneos da mesma derivada esperam pela mesma conversão.
+
+        Args:
+            source_etag: ETag da imagem original (sem aspas)
+            source_suffix: Extensão da original
+            spec: Dimensões máximas e formato
+            source: Gestor de contexto que devolve um caminho local da original
+
+        Returns:
+            Caminho da derivada no cache
+
+        Raises:
+            OSError: Se a conversão falhar
+        """
+        digest = hashlib.sha256(f"{source_etag}|{spec.tag()}".encode()).hexdigest()[:40]
+        name = f"{digest}{spec.suffix(source_suffix)}"
+        path = self._path(name)
+        with contextlib.suppress(FileNotFoundError):
+            # Acerto: marcar como usada agora (ordem LRU entre processos)
+            os.utime(path)
+            return path
+
+        with self._lock:
+            future = self._pending.get(name)
+            if future is None and path.exists():
+                # Gerada por outra requisição entre o primeiro teste e o lock
+                return path
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[name] = future
+        if not owner:
+            future.result()
+            return path
+        try:
+            with source() as source_path:
+                self._create(source_path, path, spec)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(None)
+        finally:
+            with self._lock:
+                del self._pending[name]
+        return path
+
+    def _create(self, source_path: Path, path: Path, spec: DerivativeSpec) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staged = path.with_name(f".{uuid.uuid4()}{path.suffix}")
+        try:
+            self._executor.submit(self._render, source_path, staged, spec).result(
+                timeout=_RENDER_TIMEOUT_SECONDS
+            )
+            size = staged.stat().st_size
+            staged.replace(path)
+        finally:
+            staged.unlink(missing_ok=True)
+        self._account(size)
+
+    def _account(self, added: int) -> None:
+        """
+        Soma `added` ao total e remove as derivadas mais antigas se passar do orçamento.
+
+        Só uma releitura do disco decide a remoção: com vários workers, a estimativa
+        local ignora as escritas dos outros e deixaria o cache crescer várias vezes além
+        do orçamento.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._size is not None
+                and self._size + added <= self.max_bytes * _RESCAN_FRACTION
+                and now - self._scanned_at < _RESCAN_INTERVAL_SECONDS
+            ):
+                self._size += added
+                return
+            entries = sorted(self._scan(), key=lambda entry: entry[2])
+            self._scanned_at = now
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                self._size = total
+                return
+            target = self.max_bytes * _EVICT_TO_FRACTION
+            removed = 0
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self._size = total
+        logger.info("Image derivative cache: evicted %d files (%d bytes kept)", removed, total)
+
+    def _scan(self) -> list[tuple[Path, int, float]]:
+        """Derivadas em disco: caminho, tamanho e último uso (apaga temporários abandonados)."""
+        entries = []
+        stale_before = time.time() - _STALE_STAGED_SECONDS
+        for path in self.cache_dir.glob("*/*"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.name.startswith("."):
+                # Uma conversão que excede o tempo limite continua no worker e escreve o
+                # temporário depois de `_create` desistir dele
+                if st.st_mtime < stale_before:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def close(self) -> None:
+        """Termina o pool de conversão."""
+        self._executor.shutdown(wait=True)
+
+
+_derivatives: ImageDerivatives | None = None
+_derivatives_lock = threading.Lock()
+
+
+def get_image_derivatives() -> ImageDerivatives:
+    """Cache de derivadas do processo (o pool de processos é criado no primeiro uso)."""
+    global _derivatives  # noqa: PLW0603
+    with _derivatives_lock:
+        if _derivatives is None:
+            settings = get_settings()
+            _derivatives = ImageDerivatives(
+                Path(settings.image_resize_cache_dir),
+                settings.image_resize_cache_max_mb * 1024 * 1024,
+                # fork num processo com threads (uvicorn, pool do SQLAlchemy) pode herdar
+                # locks presos; o forkserver cria os workers a partir de um processo limpo
+                ProcessPoolExecutor(
+                    max_workers=settings.image_resize_workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                ),
+            )
+        return _derivatives
+
+
+def close_image_derivatives() -> None:
+    """Termina o pool de conversão, se tiver sido criado."""
+    global _derivatives  # noqa: PLW0603
+    with _derivatives_lock:
+        if _derivatives is not None:
+            _derivatives.close()
+        _derivatives = None
@@ -0,0 +1,279 @@
+"""Recompressão das imagens e recorte da placa depois da ingestão.
+
+Com `IMAGE_POSTPROCESS_ENABLED`, cada log gravado pela ingestão é posto numa fila: fora da
+requisição, a imagem é recodificada (`IMAGE_POSTPROCESS_FORMAT`, `_QUALITY`) e reduzida
+para caber em `IMAGE_POSTPROCESS_MAX_DIMENSION`, num pool de `IMAGE_POSTPROCESS_WORKERS`
+processos (ver `image_transcode`). A nova imagem só substitui a original se for menor;
+como as chaves por conteúdo são partilhadas, todos os logs com a mesma imagem passam a
+usar a nova, e a original é libertada (`ImageStore.release`).
+
+Quando a câmera envia a região da placa (`plate_box`), é guardado também um recorte,
+referenciado por `AccessLog.plate_crop_key`.
+
+A fila é limitada: sob carga, os logs acima do limite ficam com a imagem original.
+"""
+
+import logging
+import multiprocessing
+import tempfile
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_store import ImageStore, StoredImage, get_image_store
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.utils.image_transcode import (
+    FORMAT_SUFFIXES,
+    PlateBox,
+    transcode,
+    transcode_available,
+)
+
+logger = logging.getLogger(__name__)
+
+# Logs à espera de recompressão acima dos quais os novos são ignorados
+_MAX_PENDING = 1000
+_TRANSCODE_TIMEOUT_SECONDS = 60
+# Lado máximo do recorte da placa
+_CROP_MAX_DIMENSION = 640
+
+
+class ImagePostprocessor:
+    """Fila de recompressão: coordenação em threads, conversão num pool de processos."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        executor: Executor,
+        fmt: str,
+        quality: int,
+        max_dimension: int,
+        workers: int = 1,
+        store: Callable[[], ImageStore] = get_image_store,
+        convert: Callable[..., None] = transcode,
+    ) -> None:
+        """
+        Args:
+            session_factory: Fábrica de sessões do banco
+            executor: Onde correm as conversões (pool de processos)
+            fmt: Formato das imagens recomprimidas (`jpeg` ou `webp`)
+            quality: Qualidade JPEG/WebP
+            max_dimension: Maior lado, em pixels (0 mantém as dimensões)
+            workers: Imagens tratadas em simultâneo
+            store: Armazenamento das imagens
+            convert: Função de conversão (picklable, ver `transcode`)
+        """
+        self._session_factory = session_factory
+        self._executor = executor
+        self._dispatcher = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image-postprocess"
+        )
+        self._format = fmt
+        self._quality = quality
+        self._max_dimension = max_dimension or None
+        self._store = store
+        self._convert = convert
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(
+        self, log_id: UUID, image_key: str, plate_box: PlateBox | None = None
+    ) -> "Future[None] | None":
+        """
+        Enfileira a recompressão da imagem de um log (e o recorte da placa).
+
+        Args:
+            log_id: ID do log
+            image_key: Chave da imagem do log
+            plate_box: Região da placa no quadro, se conhecida
+
+        Returns:
+            Future resolvido no fim do tratamento, ou None se a fila estiver cheia
+        """
+        with self._lock:
+            if self._pending >= _MAX_PENDING:
+                logger.debug("Image post-processing queue full; skipping log %s", log_id)
+                return None
+            self._pending += 1
+        try:
+            return self._dispatcher.submit(self._run, log_id, image_key, plate_box)
+        except RuntimeError:
+            # Pool já terminado (encerramento da aplicação)
+            self._done()
+            return None
+
+    def _done(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, log_id: UUID, image_key: str, plate_box: PlateBox | None) -> None:
+        try:
+            self.process(log_id, image_key, plate_box)
+        except Exception:
+            logger.exception("Post-processing of image %s (log %s) failed", image_key, log_id)
+        finally:
+            self._done()
+
+    def process(self, log_id: UUID, image_key: str, plate_box: PlateBox | None = None) -> None:
+        """
+        Recomprime a imagem de um log e guarda o recorte da placa (na thread atual).
+
+        Args:
+            log_id: ID do log
+            image_key: Chave da imagem do log
+            plate_box: Região da placa no quadro, se conhecida
+        """
+        store = self._store()
+        suffix = FORMAT_SUFFIXES[self._format]
+        db = self._session_factory()
+        try:
+            try:
+                with store.fetch(image_key) as source, tempfile.TemporaryDirectory() as tmp:
+                    original_size = source.stat().st_size
+                    recompressed = Path(tmp) / f"image{suffix}"
+                    self._transcode(source, recompressed, self._max_dimension, None)
+                    new_size = recompressed.stat().st_size
+                    image = (
+                        store.put_file(recompressed, suffix, db)
+                        if new_size < original_size
+                        else None
+                    )
+                    crop = None
+                    if plate_box is not None:
+                        crop_path = Path(tmp) / f"crop{suffix}"
+                        self._transcode(source, crop_path, _CROP_MAX_DIMENSION, plate_box)
+                        crop = store.put_file(crop_path, suffix, db)
+            except FileNotFoundError:
+                # A imagem já foi substituída ou apagada (ex.: outro log com o mesmo conteúdo)
+                logger.debug("Image %s of log %s no longer exists", image_key, log_id)
+                return
+
+            if crop is not None:
+                self._attach_crop(db, store, log_id, crop)
+            if image is not None and image.key == image_key:
+                store.unpin(db, [image])
+            elif image is not None:
+                self._replace(db, store, image_key, image)
+                logger.info(
+                    "Recompressed image %s: %d -> %d bytes (%d saved)",
+                    image_key,
+                    original_size,
+                    new_size,
+                    original_size - new_size,
+                )
+        finally:
+            db.close()
+
+    def _transcode(
+        self, source: Path, dest: Path, max_dimension: int | None, box: PlateBox | None
+    ) -> None:
+        self._executor.submit(
+            self._convert,
+            source,
+            dest,
+            self._format,
+            quality=self._quality,
+            max_width=max_dimension,
+            max_height=max_dimension,
+            box=box,
+        ).result(timeout=_TRANSCODE_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _discard(db: Session, store: ImageStore, image: StoredImage) -> None:
+        if image.created or image.pinned:
+            store.discard(db, image.key, pinned=image.pinned)
+
+    @staticmethod
+    def _attach_crop(db: Session, store: ImageStore, log_id: UUID, crop: StoredImage) -> None:
+        try:
+            attached = AccessLogRepository.set_plate_crop(db, log_id, crop.key)
+        except Exception:
+            ImagePostprocessor._discard(db, store, crop)
+            raise
+        if attached:
+            store.unpin(db, [crop])
+        else:
+            ImagePostprocessor._discard(db, store, crop)
+
+    @staticmethod
+    def _replace(db: Session, store: ImageStore, old_key: str, image: StoredImage) -> None:
+        try:
+            replaced = AccessLogRepository.replace_image_key(db, old_key, image.key)
+        except Exception:
+            ImagePostprocessor._discard(db, store, image)
+            raise
+        if replaced:
+            store.unpin(db, [image])
+            store.release(db, [old_key] * replaced)
+        else:
+            ImagePostprocessor._discard(db, store, image)
+
+    def close(self) -> None:
+        """Espera pelas imagens em curso e termina os pools."""
+        self._dispatcher.shutdown(wait=True, cancel_futures=True)
+        self._executor.shutdown(wait=True)
+
+
+_postprocessor: ImagePostprocessor | None = None
+
+
+def get_image_postprocessor() -> ImagePostprocessor | None:
+    """Fila de recompressão em execução neste processo, ou None se estiver desligada."""
+    return _postprocessor
+
+
+def start_image_postprocessor(
+    session_factory: Callable[[], Session],
+) -> ImagePostprocessor | None:
+    """
+    Inicia a recompressão das imagens ingeridas, se estiver ativa.
+
+    Args:
+        session_factory: Fábrica de sessões do banco
+
+    Returns:
+        Fila em execução, ou None se `IMAGE_POSTPROCESS_ENABLED` estiver desligado ou
+        não houver Pillow nem OpenCV
+    """
+    global _postprocessor  # noqa: PLW0603
+    settings = get_settings()
+    if not settings.image_postprocess_enabled:
+        return None
+    if not transcode_available():
+        logger.warning("IMAGE_POSTPROCESS_ENABLED requires Pillow or OpenCV; disabled")
+        return None
+    _postprocessor = ImagePostprocessor(
+        session_factory,
+        # Como nas derivadas: workers a partir do forkserver, não de um fork do processo
+        # da API com threads em execução
+        ProcessPoolExecutor(
+            max_workers=settings.image_postprocess_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        ),
+        settings.image_postprocess_format,
+        settings.image_postprocess_quality,
+        settings.image_postprocess_max_dimension,
+        workers=settings.image_postprocess_workers,
+    )
+    logger.info(
+        "Image post-processing started (%s, quality %d, max %d px)",
+        settings.image_postprocess_format,
+        settings.image_postprocess_quality,
+        settings.image_postprocess_max_dimension,
+    )
+    return _postprocessor
+
+
+def stop_image_postprocessor(postprocessor: ImagePostprocessor | None) -> None:
+    """Termina a recompressão (as imagens em curso são concluídas)."""
+    global _postprocessor  # noqa: PLW0603
+    if postprocessor is None:
+        return
+    if _postprocessor is postprocessor:
+        _postprocessor = None
+    postprocessor.close()
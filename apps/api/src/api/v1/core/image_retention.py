@@ -0,0 +1,366 @@
+"""Retenção das imagens dos logs de acesso, com arquivo diário opcional.
+
+Com `IMAGE_RETENTION_ENABLED`, uma thread do processo da API percorre a cada
+`IMAGE_RETENTION_INTERVAL_SECONDS` os logs cujas imagens já expiraram e retira-as: o
+log fica (com `image_storage_key` ou `plate_crop_key` nulo) e a imagem é libertada
+(`ImageStore.release`), sendo apagada quando nenhum outro log a usar. Os prazos são:
+
+- quadros completos: `IMAGE_RETENTION_FRAME_DAYS`;
+- quadros de acessos `Authorized`: `IMAGE_RETENTION_AUTHORIZED_FRAME_DAYS` (tipicamente
+  menor; 0 usa o prazo geral);
+- recortes da placa: `IMAGE_RETENTION_CROP_DAYS`.
+
+O trabalho é feito em lotes de `IMAGE_RETENTION_BATCH_SIZE` logs, cada um numa transação
+curta, e a leitura/remoção de arquivos é limitada a `IMAGE_RETENTION_MAX_FILES_PER_SECOND`,
+para não competir com a ingestão pelo disco nem pelo banco.
+
+Com `IMAGE_RETENTION_ARCHIVE_DIR`, as imagens são antes acrescentadas a um arquivo por
+dia do log (`AAAA/MM/AAAA-MM-DD.tar.gz`). Cada lote acrescenta um segmento gzip com um tar
+completo (ler com `tar -xzif` ou `tarfile.open(..., ignore_zeros=True)`); o log só perde a
+imagem depois de o segmento estar gravado em disco.
+
+Os workers do mesmo host partilham um `flock`: só um executa de cada vez.
+"""
+
+import contextlib
+import logging
+import os
+import tarfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, date, datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_store import ImageStore, get_image_store
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.utils.host_lock import host_lock
+
+logger = logging.getLogger(__name__)
+
+FRAME_COLUMN = "image_storage_key"
+CROP_COLUMN = "plate_crop_key"
+# Espera antes da primeira execução (deixa o arranque da API terminar)
+_INITIAL_DELAY_SECONDS = 60
+_LOCK_FILE = ".retention.lock"
+
+
+class RetentionPolicy(NamedTuple):
+    """Prazos de retenção, em dias (0 = manter para sempre)."""
+
+    frame_days: int
+    authorized_frame_days: int
+    crop_days: int
+
+    def cutoffs(self, now: datetime) -> dict[str, tuple[datetime | None, datetime | None]]:
+        """Limites `(geral, Authorized)` por coluna de imagem."""
+
+        def before(days: int) -> datetime | None:
+            return now - timedelta(days=days) if days else None
+
+        frames = before(self.frame_days)
+        authorized = before(self.authorized_frame_days) if self.authorized_frame_days else frames
+        crops = before(self.crop_days)
+        return {FRAME_COLUMN: (frames, authorized), CROP_COLUMN: (crops, crops)}
+
+
+class RetentionReport(NamedTuple):
+    """Resultado de uma execução da retenção."""
+
+    frames: int
+    crops: int
+    archived: int
+
+
+class _Pacer:
+    """Limita o ritmo de E/S a `rate` arquivos por segundo."""
+
+    def __init__(self, rate: int, stop: threading.Event) -> None:
+        self._interval = 1 / rate
+        self._stop = stop
+        self._next = time.monotonic()
+
+    def wait(self, files: int = 1) -> bool:
+        """Espera pela vez de `files` arquivos; False se a retenção tiver sido parada."""
+        now = time.monotonic()
+        start = max(self._next, now)
+        self._next = start + files * self._interval
+        if start > now:
+            return not self._stop.wait(start - now)
+        return not self._stop.is_set()
+
+
+class ImageArchive:
+    """Arquivos diários (`.tar.gz` em segmentos) das imagens expiradas."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path(self, day: date) -> Path:
+        """Arquivo das imagens dos logs do dia `day` (UTC)."""
+        return self.root / f"{day:%Y}" / f"{day:%m}" / f"{day.isoformat()}.tar.gz"
+
+    @contextlib.contextmanager
+    def segment(self, day: date) -> Iterator[tarfile.TarFile]:
+        """
+        Acrescenta um segmento ao arquivo do dia; se algo falhar, o arquivo volta ao tamanho
+        anterior.
+        """
+        path = self.path(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("ab") as raw:
+            start = raw.tell()
+            try:
+                with tarfile.open(fileobj=raw, mode="w:gz", compresslevel=6) as tar:
+                    yield tar
+                # O segmento tem de estar em disco antes de os logs perderem a imagem
+                raw.flush()
+                os.fsync(raw.fileno())
+            except BaseException:
+                raw.truncate(start)
+                raise
+
+
+def _day(timestamp: datetime) -> date:
+    return (timestamp.astimezone(UTC) if timestamp.tzinfo else timestamp).date()
+
+
+class ImageRetention:
+    """Aplica a política de retenção em lotes, com E/S limitada."""
+
+    def __init__(
+        self,
+        policy: RetentionPolicy,
+        batch_size: int,
+        max_files_per_second: int,
+        archive: ImageArchive | None = None,
+        store: Callable[[], ImageStore] = get_image_store,
+    ) -> None:
+        """
+        Args:
+            policy: Prazos de retenção
+            batch_size: Logs por transação
+            max_files_per_second: Limite de arquivos lidos/apagados por segundo
+            archive: Arquivos diários (None apaga sem arquivar)
+            store: Armazenamento das imagens
+        """
+        self.policy = policy
+        self.batch_size = batch_size
+        self.max_files_per_second = max_files_per_second
+        self.archive = archive
+        self._store = store
+        # Interrompe a execução entre arquivos (encerramento da aplicação)
+        self.stop_event = threading.Event()
+
+    def run(self, db: Session, now: datetime | None = None) -> RetentionReport:
+        """
+        Retira as imagens expiradas de todos os logs.
+
+        Args:
+            db: Sessão do banco de dados
+            now: Instante de referência (padrão: agora, em UTC)
+
+        Returns:
+            Número de quadros e recortes retirados e de imagens arquivadas
+        """
+        now = now or datetime.now(UTC)
+        store = self._store()
+        pacer = _Pacer(self.max_files_per_second, self.stop_event)
+        removed: dict[str, int] = {}
+        archived = 0
+        for column, (cutoff, authorized_cutoff) in self.policy.cutoffs(now).items():
+            removed[column] = 0
+            after = None
+            while not self.stop_event.is_set():
+                page = AccessLogRepository.get_expired_images(
+                    db, column, cutoff, authorized_cutoff, after, self.batch_size
+                )
+                if not page:
+                    break
+                last_id, last_timestamp, _ = page[-1]
+                after = (last_timestamp, last_id)
+                ready, count = self._archive(store, column, page, pacer)
+                archived += count
+                keys = AccessLogRepository.clear_images(db, column, ready)
+                if keys:
+                    pacer.wait(len(keys))
+                    # Depois do commit: os logs já não usam estas imagens
+                    store.release(db, keys)
+                removed[column] += len(keys)
+        report = RetentionReport(removed[FRAME_COLUMN], removed[CROP_COLUMN], archived)
+        if report.frames or report.crops:
+            logger.info(
+                "Image retention: %d frames and %d plate crops removed (%d archived)",
+                report.frames,
+                report.crops,
+                report.archived,
+            )
+        return report
+
+    def _archive(
+        self,
+        store: ImageStore,
+        column: str,
+        page: list[tuple[UUID, datetime, str]],
+        pacer: _Pacer,
+    ) -> tuple[list[tuple[UUID, str]], int]:
+        """
+        Acrescenta as imagens da página aos arquivos diários (se ativos).
+
+        Returns:
+            Pares `(id, chave)` que podem perder a imagem e número de imagens arquivadas
+        """
+        if self.archive is None:
+            return [(log_id, key) for log_id, _, key in page], 0
+        ready: list[tuple[UUID, str]] = []
+        archived = 0
+        suffix = "-plate" if column == CROP_COLUMN else ""
+        for day, rows in groupby(page, key=lambda row: _day(row[1])):
+            if self.stop_event.is_set():
+                break
+            with self.archive.segment(day) as tar:
+                for log_id, _, key in rows:
+                    if not pacer.wait():
+                        break
+                    with contextlib.ExitStack() as stack:
+                        try:
+                            source = stack.enter_context(store.fetch(key))
+                        except FileNotFoundError:
+                            logger.warning(
+                                "Image %s of log %s is missing; not archived", key, log_id
+                            )
+                            ready.append((log_id, key))
+                            continue
+                        except OSError:
+                            logger.warning("Could not read image %s; kept for the next run", key)
+                            continue
+                        tar.add(source, arcname=f"{log_id}{suffix}{Path(key).suffix}")
+                    archived += 1
+                    ready.append((log_id, key))
+        return ready, archived
+
+
+class ImageRetentionJob:
+    """Thread que executa a retenção periodicamente."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        retention: ImageRetention,
+        interval: int,
+        lock_path: Path,
+    ) -> None:
+        """
+        Args:
+            session_factory: Fábrica de sessões do banco
+            retention: Política e limites da retenção
+            interval: Segundos entre execuções
+            lock_path: Arquivo de `flock` partilhado pelos workers do host
+        """
+        self._session_factory = session_factory
+        self.retention = retention
+        self.interval = interval
+        self.lock_path = lock_path
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Inicia a thread (a primeira execução é adiada até o arranque terminar)."""
+        self._thread = threading.Thread(target=self._run, name="image-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Interrompe a execução em curso (entre arquivos) e espera o término da thread."""
+        self.retention.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> RetentionReport | None:
+        """
+        Executa a retenção, se nenhum outro worker do host a estiver a executar.
+
+        Returns:
+            Resultado da execução, ou None se não tiver corrido ou tiver falhado
+        """
+        with host_lock(self.lock_path) as acquired:
+            if not acquired:
+                return None
+            db = self._session_factory()
+            try:
+                return self.retention.run(db)
+            except (SQLAlchemyError, OSError):
+                logger.exception("Image retention failed; retrying on the next run")
+                return None
+            finally:
+                db.close()
+
+    def _run(self) -> None:
+        stop = self.retention.stop_event
+        if stop.wait(_INITIAL_DELAY_SECONDS):
+            return
+        while not stop.is_set():
+            self.run_once()
+            stop.wait(self.interval)
+
+
+def build_image_retention() -> ImageRetention:
+    """Retenção segundo `IMAGE_RETENTION_*`."""
+    settings = get_settings()
+    archive_dir = settings.image_retention_archive_dir
+    return ImageRetention(
+        RetentionPolicy(
+            settings.image_retention_frame_days,
+            settings.image_retention_authorized_frame_days,
+            settings.image_retention_crop_days,
+        ),
+        settings.image_retention_batch_size,
+        settings.image_retention_max_files_per_second,
+        ImageArchive(Path(archive_dir)) if archive_dir else None,
+    )
+
+
+def retention_lock_path() -> Path:
+    """Arquivo de `flock` que impede execuções simultâneas no mesmo host."""
+    return Path(get_settings().upload_dir) / _LOCK_FILE
+
+
+def start_image_retention(session_factory: Callable[[], Session]) -> ImageRetentionJob | None:
+    """
+    Inicia a retenção periódica das imagens, se estiver ativa.
+
+    Args:
+        session_factory: Fábrica de sessões do banco
+
+    Returns:
+        Tarefa em execução, ou None se `IMAGE_RETENTION_ENABLED` estiver desligado
+    """
+    settings = get_settings()
+    if not settings.image_retention_enabled:
+        return None
+    job = ImageRetentionJob(
+        session_factory,
+        build_image_retention(),
+        settings.image_retention_interval_seconds,
+        retention_lock_path(),
+    )
+    job.start()
+    logger.info(
+        "Image retention started (frames %d d, authorized %d d, crops %d d, every %d s)",
+        settings.image_retention_frame_days,
+        settings.image_retention_authorized_frame_days,
+        settings.image_retention_crop_days,
+        settings.image_retention_interval_seconds,
+    )
+    return job
+
+
+def stop_image_retention(job: ImageRetentionJob | None) -> None:
+    """Para a retenção periódica."""
+    if job is not None:
+        job.stop(timeout=30)
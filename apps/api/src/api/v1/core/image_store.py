@@ -0,0 +1,472 @@
+"""Armazenamento das imagens dos eventos de acesso em `UPLOAD_DIR`.
+
+Dois layouts, escolhidos por `IMAGE_STORAGE_LAYOUT`:
+
+- `flat` (padrão, o comportamento original): cada imagem é um arquivo
+  `<UPLOAD_DIR>/<uuid4><ext>` e a chave guardada no log é esse caminho;
+- `content`: a imagem é guardada pelo SHA-256 do conteúdo em `ab/cd/<sha256><ext>`
+  (ver `image_keys`). Diretórios pequenos mantêm rápidas as operações de diretório e
+  reenvios com os mesmos bytes partilham um único arquivo. A tabela `image_blobs` conta
+  os logs que referenciam cada imagem; o arquivo só é apagado quando a contagem chega a
+  zero.
+
+As imagens por conteúdo ficam no backend de `IMAGE_STORAGE_BACKEND` (ver `storage`):
+`UPLOAD_DIR` no disco local ou um bucket S3 partilhado pelos nós, que implica o layout por
+conteúdo. Os uploads são sempre recebidos em `UPLOAD_DIR/.incoming`.
+
+As chaves antigas continuam a ser servidas nos dois layouts; a migração para o layout
+por conteúdo é feita com `migrate_legacy_images` (`scripts/migrate_image_storage.py`).
+
+A referência é somada na mesma transação que grava o log (nunca fica por baixo). A
+libertação é feita depois, em transação própria: uma falha deixa, no pior caso, um
+arquivo sem referências no disco, nunca um log sem imagem.
+
+Um upload com conteúdo já existente não volta a escrever o arquivo. Para que uma
+libertação concorrente não o apague antes de o novo log ser gravado, `put` toma uma
+referência provisória (`StoredImage.pinned`) antes de verificar se a imagem existe, e a
+remoção de imagens sem uso é feita com as linhas de `image_blobs` bloqueadas. Quem
+guarda a imagem retira essa referência depois de gravar o log (`unpin`) ou, se o log não
+for gravado, com `discard`.
+"""
+
+import contextlib
+import hashlib
+import logging
+import shutil
+import tempfile
+import threading
+import uuid
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.storage import (
+    ImageBackend,
+    LocalImageBackend,
+    S3ImageBackend,
+    StoredObject,
+    WriteThroughBackend,
+    s3_available,
+)
+from apps.api.src.api.v1.storage.local import INCOMING_DIR
+from apps.api.src.api.v1.storage.s3 import create_s3_client
+from apps.api.src.api.v1.utils.file_placement import place_upload
+from apps.api.src.api.v1.utils.image_keys import (
+    content_key,
+    content_key_for_name,
+    image_suffix,
+    is_content_key,
+)
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_FLAT = "flat"
+LAYOUT_CONTENT = "content"
+BACKEND_LOCAL = "local"
+BACKEND_S3 = "s3"
+
+
+class StoredImage(NamedTuple):
+    """Imagem colocada no armazenamento."""
+
+    # Valor a guardar em `image_storage_key`
+    key: str
+    # Cópia local neste nó (None se a imagem só existir no backend remoto)
+    path: Path | None
+    # False se o conteúdo já existia (imagem deduplicada, partilhada com outros logs)
+    created: bool
+    # True se `put` tomou uma referência provisória (a retirar com `unpin` ou `discard`)
+    pinned: bool = False
+
+
+class LegacyMigrationReport(NamedTuple):
+    """Resultado da migração das chaves antigas para o layout por conteúdo."""
+
+    migrated: int
+    missing: int
+
+
+def _sha256(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ImageStore:
+    """Imagens dos eventos, no layout antigo ou endereçadas pelo conteúdo."""
+
+    def __init__(
+        self, root: Path, layout: str = LAYOUT_FLAT, backend: ImageBackend | None = None
+    ) -> None:
+        """
+        Args:
+            root: Diretório base (`UPLOAD_DIR`), também usado para a receção dos uploads
+            layout: `flat` ou `content`
+            backend: Onde ficam as imagens por conteúdo (padrão: `root` no disco local)
+        """
+        self.root = root
+        self.layout = layout
+        self.backend = backend or LocalImageBackend(root)
+
+    def put(
+        self,
+        fileobj: BinaryIO,
+        filename: str | None,
+        max_bytes: int,
+        db: Session | None = None,
+    ) -> StoredImage:
+        """
+        Guarda o conteúdo de um upload.
+
+        Args:
+            fileobj: Conteúdo da imagem (ex.: `UploadFile.file`)
+            filename: Nome original, de onde vem a extensão
+            max_bytes: Tamanho máximo aceito
+            db: Sessão de onde vem a ligação da referência provisória (sem ela, a
+                imagem não fica protegida até o log ser gravado)
+
+        Returns:
+            Imagem guardada
+
+        Raises:
+            UploadTooLargeError: Se o upload exceder `max_bytes`
+        """
+        suffix = image_suffix(filename)
+        if self.layout != LAYOUT_CONTENT:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self.root / f"{uuid.uuid4()}{suffix}"
+            place_upload(fileobj, path, max_bytes)
+            return StoredImage(str(path), path, created=True)
+
+        staged = self._incoming_dir() / f"{uuid.uuid4()}{suffix}"
+        place_upload(fileobj, staged, max_bytes)
+        try:
+            return self._adopt(staged, suffix, db)
+        finally:
+            staged.unlink(missing_ok=True)
+
+    def put_file(self, source: Path, suffix: str, db: Session | None = None) -> StoredImage:
+        """
+        Guarda uma imagem gerada pela API (ex.: recompressão), sem apagar `source`.
+
+        Args:
+            source: Arquivo local da imagem
+            suffix: Extensão da imagem (ex.: `.webp`)
+            db: Sessão de onde vem a ligação da referência provisória (ver `put`)
+
+        Returns:
+            Imagem guardada
+        """
+        if self.layout == LAYOUT_CONTENT:
+            return self._adopt(source, suffix, db)
+        with source.open("rb") as fileobj:
+            return self.put(fileobj, f"image{suffix}", source.stat().st_size)
+
+    def _incoming_dir(self) -> Path:
+        """Área de receção no mesmo sistema de arquivos que `root` (colocação por link)."""
+        incoming = self.root / INCOMING_DIR
+        incoming.mkdir(parents=True, exist_ok=True)
+        return incoming
+
+    def _adopt(self, source: Path, suffix: str, db: Session | None = None) -> StoredImage:
+        """Guarda `source` no backend com a sua chave de conteúdo (sem apagar `source`)."""
+        key = content_key(_sha256(source), suffix)
+        # A referência tem de existir antes de `store` concluir que o arquivo já existe
+        pinned = db is not None and self._pin(db, key)
+        try:
+            created = self.backend.store(key, source)
+        except BaseException:
+            if pinned:
+                with Session(bind=db.get_bind()) as pin_db:
+                    self.discard(pin_db, key, pinned=True)
+            raise
+        return StoredImage(key, self.backend.local_path(key), created, pinned)
+
+    @staticmethod
+    def _pin(db: Session, key: str) -> bool:
+        """Toma a referência provisória numa sessão própria (não toca na transação de `db`)."""
+        pin_db = Session(bind=db.get_bind())
+        try:
+            ImageBlobRepository.pin(pin_db, key)
+        except SQLAlchemyError:
+            # Banco indisponível: também nenhuma libertação pode apagar a imagem agora
+            logger.warning("Could not reference image %s before storing it", key)
+            return False
+        finally:
+            pin_db.close()
+        return True
+
+    def local_path(self, key: str) -> Path | None:
+        """Caminho no disco deste nó da imagem com a chave `key`, se existir."""
+        if is_content_key(key):
+            return self.backend.local_path(key)
+        path = Path(key)
+        return path if path.is_file() else None
+
+    def head(self, key: str) -> StoredObject | None:
+        """
+        Metadados da imagem com a chave `key`.
+
+        Args:
+            key: Chave da imagem (por conteúdo ou caminho antigo)
+
+        Returns:
+            Imagem encontrada, ou None se não existir
+        """
+        if is_content_key(key):
+            return self.backend.head(key)
+        path = self.local_path(key)
+        if path is None:
+            return None
+        return StoredObject(key, path.stat().st_size, path)
+
+    def open(self, key: str) -> BinaryIO:
+        """Abre a imagem para leitura (FileNotFoundError se não existir)."""
+        if is_content_key(key):
+            return self.backend.open(key)
+        return Path(key).open("rb")
+
+    @contextlib.contextmanager
+    def fetch(self, key: str) -> Iterator[Path]:
+        """
+        Caminho local com o conteúdo da imagem, descarregado se preciso.
+
+        Args:
+            key: Chave da imagem
+
+        Yields:
+            Caminho da cópia local ou de um arquivo temporário (apagado no fim)
+
+        Raises:
+            FileNotFoundError: Se a imagem não existir
+        """
+        path = self.local_path(key)
+        if path is not None:
+            yield path
+            return
+        with (
+            self.open(key) as source,
+            tempfile.NamedTemporaryFile(dir=self._incoming_dir(), suffix=Path(key).suffix) as f,
+        ):
+            shutil.copyfileobj(source, f)
+            f.flush()
+            yield Path(f.name)
+
+    def etag(self, image: StoredObject) -> str:
+        """
+        ETag forte de uma imagem (as chaves nunca são reutilizadas para outro conteúdo).
+
+        Args:
+            image: Imagem devolvida por `head`
+
+        Returns:
+            SHA-256 do conteúdo (chaves por conteúdo) ou hash de tamanho, mtime e inode do
+            arquivo (chaves antigas), com aspas
+        """
+        if is_content_key(image.key):
+            return f'"{Path(image.key).stem}"'
+        st = image.local_path.stat() if image.local_path else None
+        base = f"{image.key}:{image.size}:{st.st_mtime_ns}:{st.st_ino}" if st else image.key
+        return f'"{hashlib.sha256(base.encode()).hexdigest()[:32]}"'
+
+    def locate(self, filename: str) -> str:
+        """
+        Chave de uma imagem pelo nome do arquivo (último componente da chave).
+
+        Args:
+            filename: `<sha256><ext>` ou o nome antigo `<uuid4><ext>`, já validado
+
+        Returns:
+            Chave esperada da imagem (pode não existir)
+        """
+        return content_key_for_name(filename) or str(self.root / filename)
+
+    def _delete(self, key: str) -> None:
+        if is_content_key(key):
+            self.backend.delete(key)
+        else:
+            Path(key).unlink(missing_ok=True)
+
+    def discard(self, db: Session, key: str, pinned: bool = False) -> None:
+        """
+        Apaga uma imagem que não chegou a ser referenciada por nenhum log gravado.
+
+        Imagens por conteúdo só são apagadas se continuarem sem referências (o mesmo
+        conteúdo pode ter sido gravado por outro log entretanto).
+
+        Args:
+            db: Sessão do banco de dados
+            key: Chave da imagem
+            pinned: Se `put` tomou uma referência provisória (é retirada)
+        """
+        if not is_content_key(key):
+            self._delete(key)
+            return
+        try:
+            if pinned:
+                ImageBlobRepository.release(db, [key], self._delete)
+            else:
+                ImageBlobRepository.delete_if_unused(db, key, self._delete)
+        except SQLAlchemyError:
+            # Sem confirmar que não é usada, a imagem fica (no pior caso, sem referências)
+            logger.warning("Could not check references of image %s; keeping it", key)
+
+    def unpin(self, db: Session, images: Iterable[StoredImage]) -> None:
+        """
+        Retira as referências provisórias de imagens já referenciadas pelos seus logs.
+
+        Args:
+            db: Sessão do banco de dados
+            images: Imagens devolvidas por `put`, com os logs já gravados
+        """
+        keys = [image.key for image in images if image.pinned]
+        if not keys:
+            return
+        try:
+            self.release(db, keys)
+        except SQLAlchemyError:
+            # A referência a mais só impede que o arquivo seja apagado
+            logger.warning("Could not drop the provisional reference of %d images", len(keys))
+
+    def release(self, db: Session, keys: list[str]) -> None:
+        """
+        Retira a referência de logs às suas imagens e apaga as que ficaram sem uso.
+
+        Args:
+            db: Sessão do banco de dados
+            keys: Chaves de imagens que deixaram de ser usadas por um log cada
+        """
+        ImageBlobRepository.release(db, keys, self._delete)
+        for key in keys:
+            if not is_content_key(key):
+                self._delete(key)
+
+    def migrate_legacy_images(self, db: Session, batch_size: int = 500) -> LegacyMigrationReport:
+        """
+        Move as imagens com chaves antigas para o layout por conteúdo.
+
+        Percorre os logs por páginas; cada imagem antiga é guardada no backend com a
+        chave `ab/cd/<sha256><ext>`, a chave do log é atualizada e a referência registrada na
+        mesma transação. Os arquivos antigos só são apagados depois do commit. Imagens
+        em falta no disco mantêm a chave antiga. Pode ser interrompida e repetida.
+
+        Args:
+            db: Sessão do banco de dados
+            batch_size: Logs por transação
+
+        Returns:
+            Contagem de imagens migradas e de imagens em falta
+        """
+        migrated = missing = 0
+        after = None
+        while page := AccessLogRepository.iter_image_keys(db, after=after, limit=batch_size):
+            after = page[-1][0]
+            new_keys: dict[uuid.UUID, str] = {}
+            stored_images: list[StoredImage] = []
+            old_paths: list[Path] = []
+            for log_id, key in page:
+                if is_content_key(key):
+                    continue
+                old_path = Path(key)
+                if not old_path.is_file():
+                    missing += 1
+                    continue
+                stored = self._adopt(old_path, image_suffix(old_path.name, default=""), db)
+                new_keys[log_id] = stored.key
+                stored_images.append(stored)
+                old_paths.append(old_path)
+            AccessLogRepository.replace_image_keys(db, new_keys)
+            self.unpin(db, stored_images)
+            for old_path in old_paths:
+                old_path.unlink(missing_ok=True)
+            migrated += len(new_keys)
+            logger.info("Image storage migration: %d images migrated so far", migrated)
+        return LegacyMigrationReport(migrated, missing)
+
+
+_store: ImageStore | None = None
+_store_config: tuple | None = None
+_store_lock = threading.Lock()
+
+
+def _build_backend(root: Path) -> ImageBackend:
+    """Backend segundo `IMAGE_STORAGE_BACKEND` (e `IMAGE_STORAGE_WRITE_THROUGH`)."""
+    settings = get_settings()
+    local = LocalImageBackend(root)
+    if settings.image_storage_backend != BACKEND_S3:
+        return local
+    if not s3_available():
+        msg = "IMAGE_STORAGE_BACKEND=s3 requer o pacote boto3 (pip install boto3)"
+        raise RuntimeError(msg)
+    if not settings.image_s3_bucket:
+        msg = "IMAGE_STORAGE_BACKEND=s3 requer IMAGE_S3_BUCKET"
+        raise RuntimeError(msg)
+    client = create_s3_client(
+        settings.image_s3_endpoint_url,
+        settings.image_s3_region,
+        settings.image_s3_max_connections,
+    )
+    remote = S3ImageBackend(client, settings.image_s3_bucket, settings.image_s3_prefix)
+    if settings.image_storage_write_through:
+        return WriteThroughBackend(
+            local,
+            remote,
+            settings.image_storage_upload_workers,
+            settings.image_storage_local_max_mb * 1024 * 1024,
+        )
+    return remote
+
+
+def get_image_store() -> ImageStore:
+    """
+    Armazenamento de imagens do processo, segundo `UPLOAD_DIR` e `IMAGE_STORAGE_*`.
+
+    O backend (e o seu pool de ligações) é criado uma vez e reutilizado; é recriado se a
+    configuração mudar.
+
+    Raises:
+        RuntimeError: Se o backend `s3` estiver configurado sem boto3 ou sem bucket
+    """
+    global _store, _store_config
+    settings = get_settings()
+    config = (
+        settings.upload_dir,
+        settings.image_storage_layout,
+        settings.image_storage_backend,
+        settings.image_s3_bucket,
+        settings.image_s3_prefix,
+        settings.image_s3_endpoint_url,
+        settings.image_s3_region,
+        settings.image_s3_max_connections,
+        settings.image_storage_write_through,
+        settings.image_storage_upload_workers,
+        settings.image_storage_local_max_mb,
+    )
+    with _store_lock:
+        if _store is None or _store_config != config:
+            root = Path(settings.upload_dir)
+            backend = _build_backend(root)
+            # Num bucket só há chaves por conteúdo (os caminhos antigos são locais)
+            layout = (
+                settings.image_storage_layout
+                if isinstance(backend, LocalImageBackend)
+                else LAYOUT_CONTENT
+            )
+            if _store is not None:
+                _store.backend.close()
+            _store, _store_config = ImageStore(root, layout, backend), config
+        return _store
+
+
+def close_image_store() -> None:
+    """Termina o armazenamento do processo (espera pelos envios em segundo plano)."""
+    global _store, _store_config  # noqa: PLW0603
+    with _store_lock:
+        if _store is not None:
+            _store.backend.close()
+        _store = _store_config = None
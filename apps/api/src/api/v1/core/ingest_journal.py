@@ -0,0 +1,348 @@
+"""Diário local (store-and-forward) da ingestão durante falhas do banco.
+
+Quando o PostgreSQL está indisponível (failover, manutenção), gravar o log de acesso
+falha depois de a imagem já estar em `UPLOAD_DIR`. Com `INGEST_JOURNAL_ENABLED`, o
+evento é então acrescentado a um arquivo NDJSON local (`INGEST_JOURNAL_PATH`), com
+`fsync` por registro, e o dispositivo recebe logo `202 Accepted` com um ID provisório
+(o mesmo que o log terá no banco).
+
+Se o snapshot da whitelist estiver carregado em memória, a resposta já traz a decisão
+(provisória, com o snapshot possivelmente expirado), e esta fica no registro.
+
+Uma tarefa em segundo plano (`INGEST_JOURNAL_DRAIN_INTERVAL_SECONDS`) reenvia o
+diário para o banco em lotes quando este volta a responder. O log mantém a decisão já
+devolvida ao dispositivo; sem ela, a autorização é decidida nesse momento, com as
+janelas de validade avaliadas no instante original do evento.
+O reenvio é idempotente: registros cujo ID (ou `event_id`) já exista no banco são
+ignorados, por isso uma drenagem interrompida pode ser repetida.
+
+O arquivo é partilhado pelos workers do mesmo host. Cada escrita e a rotação para
+`<arquivo>.draining` são serializadas com `flock`; um escritor que encontre o arquivo
+rodado reabre-o no caminho original.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_store import get_image_store
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.utils.host_lock import host_lock
+from apps.api.src.api.v1.utils.plate import normalize_plate
+
+logger = logging.getLogger(__name__)
+
+# Registros reenviados por transação
+DRAIN_BATCH_SIZE = 500
+# Falhas de ligação ao banco (não de dados) que levam o evento para o diário
+DATABASE_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+
+class JournalRecord(NamedTuple):
+    """Evento de ingestão guardado no diário enquanto o banco está indisponível."""
+
+    id: UUID
+    timestamp: datetime
+    plate_string_detected: str
+    image_storage_key: str
+    event_id: str | None = None
+    device_id: str | None = None
+    # A imagem tem uma referência provisória, retirada depois de o log ser gravado
+    image_pinned: bool = False
+    # Decisão devolvida ao dispositivo (None se a whitelist não estava em memória)
+    status: AccessStatus | None = None
+
+    def to_json(self) -> str:
+        """Linha NDJSON do registro."""
+        return json.dumps(
+            {
+                "id": str(self.id),
+                "timestamp": self.timestamp.isoformat(),
+                "plate_string_detected": self.plate_string_detected,
+                "image_storage_key": self.image_storage_key,
+                "event_id": self.event_id,
+                "device_id": self.device_id,
+                "image_pinned": self.image_pinned,
+                "status": self.status.value if self.status else None,
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "JournalRecord":
+        """Lê um registro de uma linha NDJSON."""
+        item = json.loads(line)
+        return cls(
+            id=UUID(item["id"]),
+            timestamp=datetime.fromisoformat(item["timestamp"]),
+            plate_string_detected=item["plate_string_detected"],
+            image_storage_key=item["image_storage_key"],
+            event_id=item.get("event_id"),
+            device_id=item.get("device_id"),
+            image_pinned=item.get("image_pinned", False),
+            status=AccessStatus(item["status"]) if item.get("status") else None,
+        )
+
+
+class IngestJournal:
+    """Diário NDJSON só de acréscimo, partilhado pelos processos do host."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Args:
+            path: Arquivo do diário (o diretório é criado se não existir)
+        """
+        self.path = path
+        self.draining_path = path.with_name(f"{path.name}.draining")
+        self._lock_path = path.with_name(f"{path.name}.lock")
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+
+    def _open(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+
+    def _is_current(self, fd: int) -> bool:
+        """True se o descritor ainda apontar para o arquivo no caminho do diário."""
+        try:
+            return os.path.samestat(os.fstat(fd), self.path.stat())
+        except FileNotFoundError:
+            return False
+
+    def append(self, record: JournalRecord) -> None:
+        """
+        Acrescenta um registro ao diário e só retorna depois do `fsync`.
+
+        Args:
+            record: Evento a guardar
+        """
+        data = (record.to_json() + "\n").encode()
+        with self._lock:
+            if self._fd is None:
+                self._fd = self._open()
+            while True:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                if self._is_current(self._fd):
+                    break
+                # O arquivo foi rodado para drenagem: continuar num arquivo novo
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = self._open()
+            try:
+                os.write(self._fd, data)
+                os.fsync(self._fd)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        """Fecha o descritor de escrita deste processo."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _rotate(self) -> bool:
+        """Move o diário ativo para `.draining`; False se não houver nada a drenar."""
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == 0:
+                return False
+            self.path.rename(self.draining_path)
+            return True
+        finally:
+            os.close(fd)
+
+    def _read(self, path: Path) -> Iterator[JournalRecord]:
+        with path.open(encoding="utf-8") as journal:
+            for line_number, line in enumerate(journal, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield JournalRecord.from_json(line)
+                except (ValueError, KeyError, TypeError):
+                    # Tipicamente a última linha, se o processo caiu a meio da escrita
+                    logger.warning("Skipping unreadable journal line %d in %s", line_number, path)
+
+    def pending(self) -> bool:
+        """True se houver registros por drenar."""
+        return self.draining_path.exists() or (self.path.exists() and self.path.stat().st_size > 0)
+
+    def drain(self, db: Session) -> int:
+        """
+        Reenvia para o banco os registros do diário, em lotes de `DRAIN_BATCH_SIZE`.
+
+        Se o banco falhar a meio, o arquivo `.draining` é mantido e a próxima drenagem
+        recomeça por ele (os lotes já gravados são ignorados pelo ID).
+
+        Args:
+            db: Sessão do banco de dados
+
+        Returns:
+            Número de logs gravados (0 se outro processo estiver a drenar)
+        """
+        with host_lock(self._lock_path) as acquired:
+            if not acquired:
+                return 0
+            if not self.draining_path.exists() and not self._rotate():
+                return 0
+            inserted = 0
+            chunk: list[JournalRecord] = []
+            for record in self._read(self.draining_path):
+                chunk.append(record)
+                if len(chunk) >= DRAIN_BATCH_SIZE:
+                    inserted += _replay(db, chunk)
+                    chunk = []
+            if chunk:
+                inserted += _replay(db, chunk)
+            self.draining_path.unlink()
+        if inserted:
+            logger.info("Ingest journal drained: %d access logs recovered", inserted)
+        return inserted
+
+
+def _replay(db: Session, records: list[JournalRecord]) -> int:
+    """Grava um lote de registros do diário, ignorando os que já estejam no banco."""
+    existing_ids = AccessLogRepository.get_existing_ids(db, [record.id for record in records])
+    event_logs = AccessLogRepository.get_by_event_ids(
+        db, {record.event_id for record in records if record.event_id}
+    )
+    fresh: list[JournalRecord] = []
+    replayed: list[JournalRecord] = []
+    seen_event_ids: set[str] = set()
+    for record in records:
+        if record.id in existing_ids:
+            continue
+        if record.event_id and (record.event_id in event_logs or record.event_id in seen_event_ids):
+            # Reenvio do mesmo evento durante a falha: manter só o primeiro registro
+            replayed.append(record)
+            continue
+        if record.event_id:
+            seen_event_ids.add(record.event_id)
+        fresh.append(record)
+    if fresh:
+        _insert_records(db, fresh)
+    # Só depois da gravação: a imagem pode ser partilhada com um registro gravado agora
+    image_store = get_image_store()
+    pinned = [record.image_storage_key for record in fresh if record.image_pinned]
+    if pinned:
+        image_store.release(db, pinned)
+    for record in replayed:
+        image_store.discard(db, record.image_storage_key, pinned=record.image_pinned)
+    return len(fresh)
+
+
+def _insert_records(db: Session, fresh: list[JournalRecord]) -> None:
+    """Autoriza as placas no instante original de cada evento e grava os logs."""
+    matches = get_whitelist_cache().match_events(
+        db,
+        [(normalize_plate(record.plate_string_detected), record.timestamp) for record in fresh],
+    )
+    rows = []
+    for record, found in zip(fresh, matches, strict=True):
+        access_status = AccessStatus.Authorized if found else AccessStatus.Denied
+        match = found
+        if record.status is not None and record.status is not access_status:
+            # A whitelist mudou desde a resposta: o log regista o que o dispositivo fez
+            access_status, match = record.status, None
+        row = AccessLogRepository.new_row(
+            plate_string_detected=record.plate_string_detected,
+            status=access_status,
+            image_storage_key=record.image_storage_key,
+            authorized_plate_id=match.plate_id if match else None,
+            match_type=match.match_type if match else None,
+            match_distance=match.distance if match else None,
+            timestamp=record.timestamp,
+            event_id=record.event_id,
+            device_id=record.device_id,
+        )
+        # Manter o ID provisório devolvido ao dispositivo
+        row["id"] = record.id
+        rows.append(row)
+    AccessLogRepository.create_many(db, rows)
+
+
+_journal: IngestJournal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_ingest_journal() -> IngestJournal | None:
+    """Diário deste processo, ou None se `INGEST_JOURNAL_ENABLED` estiver desligado."""
+    global _journal  # noqa: PLW0603
+    settings = get_settings()
+    if not settings.ingest_journal_enabled:
+        return None
+    path = Path(settings.ingest_journal_path)
+    with _journal_lock:
+        if _journal is None or _journal.path != path:
+            _journal = IngestJournal(path)
+        return _journal
+
+
+def _drain_once(journal: IngestJournal, session_factory: Callable[[], Session]) -> None:
+    if not journal.pending():
+        return
+    db = session_factory()
+    try:
+        journal.drain(db)
+    except SQLAlchemyError:
+        logger.warning("Ingest journal drain failed; retrying later", exc_info=True)
+    finally:
+        db.close()
+
+
+async def _drain_loop(
+    journal: IngestJournal, session_factory: Callable[[], Session], interval: int
+) -> None:
+    while True:
+        await run_in_threadpool(_drain_once, journal, session_factory)
+        await asyncio.sleep(interval)
+
+
+def start_journal_drainer(session_factory: Callable[[], Session]) -> asyncio.Task | None:
+    """
+    Inicia a drenagem periódica do diário, se estiver ativo.
+
+    Args:
+        session_factory: Fábrica de sessões do banco
+
+    Returns:
+        Tarefa asyncio em execução, ou None se `INGEST_JOURNAL_ENABLED` estiver desligado
+    """
+    journal = get_ingest_journal()
+    if journal is None:
+        return None
+    interval = get_settings().ingest_journal_drain_interval_seconds
+    logger.info("Ingest journal drainer started (%s, every %d s)", journal.path, interval)
+    return asyncio.create_task(_drain_loop(journal, session_factory, interval))
+
+
+async def stop_journal_drainer(task: asyncio.Task | None) -> None:
+    """Cancela a drenagem periódica e fecha o diário deste processo."""
+    if task is None:
+        return
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    journal = get_ingest_journal()
+    if journal is not None:
+        journal.close()
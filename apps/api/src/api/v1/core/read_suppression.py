@@ -0,0 +1,120 @@
+"""Supressão de leituras repetidas da mesma placa pela mesma câmera.
+
+Uma câmera apontada para uma fila lê a mesma placa muitas vezes enquanto o veículo
+espera. Com `INGEST_DEDUP_WINDOW_SECONDS` > 0, as leituras de um dispositivo
+identificado (`device_id`) são agregadas ao último evento da mesma placa (pela chave
+de equivalência) enquanto chegarem com menos de N segundos de intervalo: o evento
+existente tem `read_count` incrementado e `last_seen_at` atualizado, em vez de um novo
+registro e uma nova imagem. A janela é deslizante: cada leitura repetida prolonga-a.
+
+O estado fica em memória, em cada worker, num `OrderedDict` ordenado pela última
+leitura e limitado a `INGEST_DEDUP_MAX_ENTRIES` pares (dispositivo, placa); as entradas
+expiradas são descartadas pela frente à medida que chegam novas leituras. Leituras
+sem `device_id` nunca são agregadas.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from apps.api.src.api.v1.core.config import get_settings
+
+DEVICE_ID_MAX_LENGTH = 64
+
+
+@dataclass(slots=True)
+class RecentRead:
+    """Último evento registrado para um par (dispositivo, placa)."""
+
+    log_id: UUID
+    # `image_storage_key` da imagem atual do evento
+    image_key: str
+    last_seen: float
+    # Calculada só quando chega a primeira leitura repetida (ver `image_sharpness`)
+    sharpness: float | None = None
+
+
+class RecentReadWindow:
+    """Janela deslizante `(device_id, plate_key) -> RecentRead` com memória limitada."""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[tuple[str, str], RecentRead] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """True se a supressão estiver ativa."""
+        return get_settings().ingest_dedup_window_seconds > 0
+
+    def _purge_expired(self, now: float) -> None:
+        window = get_settings().ingest_dedup_window_seconds
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if now - oldest.last_seen < window:
+                break
+            self._entries.popitem(last=False)
+
+    def lookup(self, device_id: str, plate_key: str) -> RecentRead | None:
+        """
+        Evento recente da mesma placa no mesmo dispositivo, se ainda estiver na janela.
+
+        Args:
+            device_id: Identificador do dispositivo
+            plate_key: Chave de equivalência da placa
+
+        Returns:
+            RecentRead, ou None se não houver leitura dentro da janela
+        """
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return self._entries.get((device_id, plate_key))
+
+    def remember(
+        self,
+        device_id: str,
+        plate_key: str,
+        log_id: UUID,
+        image_key: str,
+        sharpness: float | None = None,
+    ) -> None:
+        """
+        Regista (ou prolonga) a janela de um par (dispositivo, placa).
+
+        Args:
+            device_id: Identificador do dispositivo
+            plate_key: Chave de equivalência da placa
+            log_id: ID do evento ao qual as próximas leituras serão agregadas
+            image_key: Chave da imagem atual do evento
+            sharpness: Nitidez da imagem atual, se já calculada
+        """
+        now = time.monotonic()
+        with self._lock:
+            key = (device_id, plate_key)
+            self._entries[key] = RecentRead(log_id, image_key, now, sharpness)
+            self._entries.move_to_end(key)
+            self._purge_expired(now)
+            while len(self._entries) > get_settings().ingest_dedup_max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, device_id: str, plate_key: str) -> None:
+        """Descarta a janela de um par (ex.: o evento deixou de existir)."""
+        with self._lock:
+            self._entries.pop((device_id, plate_key), None)
+
+    def clear(self) -> None:
+        """Descarta todas as janelas."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_recent_reads = RecentReadWindow()
+
+
+def get_recent_read_window() -> RecentReadWindow:
+    """Instância da janela compartilhada pelo processo."""
+    return _recent_reads
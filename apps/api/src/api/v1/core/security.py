@@ -1,3 +1,6 @@
+import hashlib
+import hmac
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -49,6 +52,37 @@ def create_refresh_token(subject: str | Any, expires_delta: timedelta | None = N
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
+def _image_signature(filename: str, expires: int) -> str:
+    # Prefixo próprio: a assinatura não serve para nenhum outro uso da SECRET_KEY
+    message = f"access-log-image\n{filename}\n{expires}".encode()
+    return hmac.new(settings.secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_image_url(filename: str, ttl_seconds: int) -> tuple[int, str]:
+    """Assina o acesso a uma imagem por tempo limitado.
+
+    A expiração é alinhada a múltiplos de `ttl_seconds` (validade entre uma e duas vezes
+    o TTL), para que a URL de uma imagem se mantenha igual durante uma janela e o
+    navegador possa reutilizar a cópia em cache.
+
+    Args:
+        filename: Nome do arquivo da imagem
+        ttl_seconds: Validade mínima da assinatura
+
+    Returns:
+        Instante de expiração (Unix) e assinatura HMAC-SHA256 em hexadecimal
+    """
+    expires = (int(time.time()) // ttl_seconds + 2) * ttl_seconds
+    return expires, _image_signature(filename, expires)
+
+
+def verify_image_signature(filename: str, expires: int, signature: str) -> bool:
+    """Verifica uma assinatura de `sign_image_url` (sem acesso ao banco)."""
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_image_signature(filename, expires), signature)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -0,0 +1,453 @@
+"""Cache em memória da whitelist para o caminho de autorização da ingestão.
+
+Mantém um snapshot `plate_key -> {placa normalizada: id}` carregado do banco (a chave
+de equivalência faz coincidir o formato antigo e o Mercosul da mesma placa; dados
+anteriores à migração podem ter os dois formatos cadastrados), para que
+`POST /api/v1/access_logs/` e `PlateController.check_authorization` respondam sem
+uma ida ao banco por evento. Cada worker uvicorn tem o seu próprio snapshot: as
+alterações feitas pelo próprio processo são aplicadas de imediato e o TTL
+(`WHITELIST_CACHE_TTL_SECONDS`) garante que os restantes workers convergem. Ao
+expirar, o snapshot não é recarregado por inteiro: aplicam-se apenas as alterações
+registradas no histórico de versões (`whitelist_changes`) desde a última carga.
+
+Com `WHITELIST_FUZZY_MATCH_ENABLED=true`, o snapshot mantém também um
+`FuzzyPlateIndex` sobre as placas, consultado quando não há correspondência exata,
+para tolerar confusões típicas do OCR (O/0, I/1, B/8, S/5). O índice usa a placa na
+forma cadastrada, não a chave de equivalência: esta troca o dígito do quinto
+caractere por uma letra e desfaria as confusões nessa posição. O modo tolerante usa
+sempre o snapshot em memória, mesmo que `WHITELIST_CACHE_ENABLED` esteja desligado.
+
+Entradas com janela de validade (`valid_from`/`valid_until`, dias da semana, faixa
+horária) têm a janela guardada no snapshot, indexada pelo ID: a avaliação é feita em
+memória a cada consulta, sem consultas adicionais ao banco.
+
+Desligado por padrão: sem nenhuma das duas opções as consultas continuam a ir ao
+banco, exatamente como antes.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Collection, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.repositories.authorized_plate_repository import (
+    AuthorizedPlateRepository,
+)
+from apps.api.src.api.v1.repositories.whitelist_change_repository import (
+    WhitelistChangeRepository,
+)
+from apps.api.src.api.v1.schemas.access_log import PlateMatchType
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangeOp
+from apps.api.src.api.v1.utils.plate import plate_equivalence_key
+from apps.api.src.api.v1.utils.plate_index import FuzzyPlateIndex
+from apps.api.src.api.v1.utils.validity import ValidityWindow
+
+logger = logging.getLogger(__name__)
+
+
+def _window_allows(window: ValidityWindow | None, moment: datetime) -> bool:
+    if window is None:
+        return True
+    return window.allows(moment, ZoneInfo(get_settings().whitelist_timezone))
+
+
+@dataclass(frozen=True, slots=True)
+class WhitelistMatch:
+    """Resultado de uma correspondência com a whitelist."""
+
+    plate_id: UUID
+    match_type: PlateMatchType
+    distance: int
+
+
+class WhitelistCache:
+    """Snapshot em memória de `plate_key -> {placa normalizada: id}` com renovação por TTL.
+
+    Contadores:
+    - `hits`: consultas respondidas pelo snapshot em memória;
+    - `misses`: consultas que encontraram o snapshot ausente/expirado e o renovaram;
+    - `reloads`: cargas completas a partir do banco;
+    - `delta_syncs`: renovações feitas só com as alterações desde a última versão.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._entries: dict[str, dict[str, UUID]] = {}
+        self._windows: dict[UUID, ValidityWindow] = {}
+        self._fuzzy_index: FuzzyPlateIndex | None = None
+        self._loaded_at: float | None = None
+        self._version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.delta_syncs = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True quando o snapshot em memória deve ser usado (cache ou modo tolerante)."""
+        settings = get_settings()
+        return settings.whitelist_cache_enabled or settings.whitelist_fuzzy_match_enabled
+
+    @property
+    def size(self) -> int:
+        """Número de placas no snapshot atual."""
+        return sum(len(plates) for plates in self._entries.values())
+
+    @property
+    def loaded(self) -> bool:
+        """True se o snapshot estiver ativo e já tiver sido carregado (mesmo que expirado)."""
+        return self.enabled and self._loaded_at is not None
+
+    def _is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            return True
+        return time.monotonic() - loaded_at >= get_settings().whitelist_cache_ttl_seconds
+
+    def load(self, db: Session) -> int:
+        """
+        Recarrega o snapshot completo a partir do banco.
+
+        Args:
+            db: Sessão do banco de dados
+
+        Returns:
+            Número de placas carregadas
+        """
+        # Versão lida antes das placas: alterações concorrentes serão reaplicadas depois
+        version = WhitelistChangeRepository.get_current_version(db)
+        entries: dict[str, dict[str, UUID]] = {}
+        for normalized, plate_id in AuthorizedPlateRepository.get_all_normalized(db):
+            entries.setdefault(plate_equivalence_key(normalized), {})[normalized] = plate_id
+        windows = AuthorizedPlateRepository.get_validity_windows(db)
+        fuzzy_index = self._build_fuzzy_index(entries)
+        with self._lock:
+            self._entries = entries
+            self._windows = windows
+            self._fuzzy_index = fuzzy_index
+            self._loaded_at = time.monotonic()
+            self._version = version
+            self.reloads += 1
+        count = sum(len(plates) for plates in entries.values())
+        logger.debug("Whitelist cache loaded: %d plates", count)
+        return count
+
+    def _apply_changes(self, db: Session) -> int:
+        """Aplica ao snapshot as alterações posteriores à versão carregada."""
+        changes = WhitelistChangeRepository.get_changes_since(db, self._version)
+        upserted = [change.plate_id for change in changes if change.op is WhitelistChangeOp.upsert]
+        windows = AuthorizedPlateRepository.get_validity_windows(db, upserted) if upserted else {}
+        for change in changes:
+            if change.op is WhitelistChangeOp.delete:
+                self.discard(change.normalized_plate, change.plate_id)
+            else:
+                self.upsert(
+                    change.normalized_plate, change.plate_id, window=windows.get(change.plate_id)
+                )
+        with self._lock:
+            if changes:
+                self._version = changes[-1].version
+            self._loaded_at = time.monotonic()
+            self.delta_syncs += 1
+        logger.debug("Whitelist cache applied %d changes", len(changes))
+        return len(changes)
+
+    @staticmethod
+    def _build_fuzzy_index(entries: dict[str, dict[str, UUID]]) -> FuzzyPlateIndex | None:
+        settings = get_settings()
+        if not settings.whitelist_fuzzy_match_enabled:
+            return None
+        index = FuzzyPlateIndex(settings.whitelist_fuzzy_max_distance)
+        for plates in entries.values():
+            for normalized_plate, plate_id in plates.items():
+                index.add(normalized_plate, plate_id)
+        return index
+
+    def _current_fuzzy_index(self) -> FuzzyPlateIndex | None:
+        settings = get_settings()
+        if not settings.whitelist_fuzzy_match_enabled:
+            return None
+        index = self._fuzzy_index
+        if index is None or index.max_distance != settings.whitelist_fuzzy_max_distance:
+            # Configuração alterada desde a última carga: reconstruir a partir do snapshot
+            with self._lock:
+                index = self._fuzzy_index = self._build_fuzzy_index(self._entries)
+        return index
+
+    def _ensure_fresh(self, db: Session) -> None:
+        if not self._is_stale():
+            with self._lock:
+                self.hits += 1
+            return
+        with self._reload_lock:
+            # Outro thread pode ter recarregado enquanto esperávamos o lock
+            if not self._is_stale():
+                with self._lock:
+                    self.hits += 1
+                return
+            with self._lock:
+                self.misses += 1
+            try:
+                if self._version is None:
+                    self.load(db)
+                else:
+                    self._apply_changes(db)
+            except SQLAlchemyError:
+                if self._loaded_at is None:
+                    raise
+                # Banco indisponível: servir o snapshot anterior em vez de falhar
+                logger.warning("Whitelist cache reload failed; serving stale snapshot")
+
+    def match(self, db: Session, normalized_plate: str) -> WhitelistMatch | None:
+        """
+        Associa uma placa normalizada a uma entrada da whitelist.
+
+        Tenta primeiro a correspondência exata; no modo tolerante, recorre ao índice
+        por distância de edição. Com o snapshot desligado, consulta o banco diretamente.
+        Entradas fora da sua janela de validade não correspondem.
+
+        Args:
+            db: Sessão do banco de dados (usada para consulta ou recarga)
+            normalized_plate: Placa normalizada
+
+        Returns:
+            WhitelistMatch, ou None se a placa não estiver na whitelist
+        """
+        if not self.enabled:
+            plate = AuthorizedPlateRepository.get_by_normalized_plate(db, normalized_plate)
+            if plate is None or not _window_allows(
+                ValidityWindow.from_plate(plate), datetime.now(UTC)
+            ):
+                return None
+            return WhitelistMatch(plate.id, PlateMatchType.exact, 0)
+
+        self._ensure_fresh(db)
+        return self._match_in_memory(normalized_plate, datetime.now(UTC))
+
+    def match_snapshot(self, normalized_plate: str, moment: datetime) -> WhitelistMatch | None:
+        """
+        Associa uma placa usando só o snapshot em memória, sem consultar nem recarregar.
+
+        Para decidir enquanto o banco está indisponível: o snapshot pode estar expirado.
+        Só faz sentido com `loaded` verdadeiro.
+
+        Args:
+            normalized_plate: Placa normalizada
+            moment: Instante em que as janelas de validade são avaliadas
+
+        Returns:
+            WhitelistMatch, ou None se a placa não estiver no snapshot
+        """
+        return self._match_in_memory(normalized_plate, moment)
+
+    def _match_in_memory(self, normalized_plate: str, moment: datetime) -> WhitelistMatch | None:
+        fuzzy_index = self._current_fuzzy_index()
+        # `upsert`/`discard` alteram as entradas e o índice no lugar, sob este lock
+        with self._lock:
+            match_type, distance = PlateMatchType.exact, 0
+            plates = self._entries.get(plate_equivalence_key(normalized_plate), {})
+            # Com os dois formatos cadastrados, a mesma forma da leitura vem primeiro
+            candidates = sorted(plates.items(), key=lambda item: item[0] != normalized_plate)
+            plate_ids = [plate_id for _, plate_id in candidates]
+            if not plate_ids and fuzzy_index is not None:
+                found = fuzzy_index.lookup(normalized_plate)
+                if found is not None:
+                    plate_ids, distance = [found[0]], found[1]
+                    match_type = PlateMatchType.fuzzy
+            windows = [(plate_id, self._windows.get(plate_id)) for plate_id in plate_ids]
+        if not windows:
+            return None
+        plate_id = next((pid for pid, window in windows if _window_allows(window, moment)), None)
+        if plate_id is None:
+            logger.info("Whitelist entry %s outside its validity window", normalized_plate)
+            return None
+        if match_type is PlateMatchType.fuzzy:
+            logger.info("Fuzzy whitelist match for %s (distance %d)", normalized_plate, distance)
+        return WhitelistMatch(plate_id, match_type, distance)
+
+    def match_many(
+        self, db: Session, normalized_plates: Collection[str]
+    ) -> dict[str, WhitelistMatch]:
+        """
+        Associa várias placas normalizadas de uma só vez.
+
+        Com o snapshot ativo, resolve tudo em memória (uma única verificação de
+        validade do snapshot); caso contrário, faz uma única consulta `IN (...)`.
+
+        Args:
+            db: Sessão do banco de dados
+            normalized_plates: Placas normalizadas
+
+        Returns:
+            Dicionário `normalized_plate -> WhitelistMatch` apenas com as encontradas
+        """
+        plates = list(normalized_plates)
+        now = datetime.now(UTC)
+        found = self.match_events(db, [(normalized, now) for normalized in plates])
+        return {
+            normalized: match
+            for normalized, match in zip(plates, found, strict=True)
+            if match is not None
+        }
+
+    def match_events(
+        self, db: Session, events: Sequence[tuple[str, datetime]]
+    ) -> list[WhitelistMatch | None]:
+        """
+        Associa vários eventos (placa normalizada, instante) de uma só vez.
+
+        As janelas de validade são avaliadas no instante de cada evento, o que permite
+        autorizar eventos capturados antes de chegarem à API (ex.: reenvio de backlog).
+        Faz no máximo uma consulta `IN (...)` ao banco, ou nenhuma com o snapshot ativo.
+
+        Args:
+            db: Sessão do banco de dados
+            events: Pares `(placa normalizada, instante com fuso)`
+
+        Returns:
+            WhitelistMatch (ou None) de cada evento, na mesma ordem
+        """
+        if not self.enabled:
+            keys = [plate_equivalence_key(normalized) for normalized, _ in events]
+            plates = AuthorizedPlateRepository.get_by_plate_keys(db, set(keys))
+            matches: list[WhitelistMatch | None] = []
+            for key, (_, moment) in zip(keys, events, strict=True):
+                plate = plates.get(key)
+                if plate is None or not _window_allows(ValidityWindow.from_plate(plate), moment):
+                    matches.append(None)
+                else:
+                    matches.append(WhitelistMatch(plate.id, PlateMatchType.exact, 0))
+            return matches
+        self._ensure_fresh(db)
+        return [self._match_in_memory(normalized, moment) for normalized, moment in events]
+
+    def get_plate_id(self, db: Session, normalized_plate: str) -> UUID | None:
+        """
+        Resolve o ID da placa autorizada para uma placa normalizada.
+
+        Args:
+            db: Sessão do banco de dados (usada para consulta ou recarga)
+            normalized_plate: Placa normalizada
+
+        Returns:
+            ID da placa autorizada, ou None se não estiver na whitelist
+        """
+        found = self.match(db, normalized_plate)
+        return found.plate_id if found else None
+
+    def upsert(
+        self,
+        normalized_plate: str,
+        plate_id: UUID,
+        previous_normalized: str | None = None,
+        window: ValidityWindow | None = None,
+    ) -> None:
+        """
+        Aplica ao snapshot uma criação ou atualização feita por este processo.
+
+        Args:
+            normalized_plate: Placa normalizada atual
+            plate_id: ID da placa autorizada
+            previous_normalized: Placa normalizada anterior, quando foi alterada
+            window: Janela de validade da entrada (None se não tiver restrições)
+        """
+        with self._lock:
+            if previous_normalized:
+                self._discard_plate(previous_normalized, plate_id)
+            if window is None:
+                self._windows.pop(plate_id, None)
+            else:
+                self._windows[plate_id] = window
+            self._entries.setdefault(plate_equivalence_key(normalized_plate), {})[
+                normalized_plate
+            ] = plate_id
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.add(normalized_plate, plate_id)
+
+    def discard(self, normalized_plate: str, plate_id: UUID | None = None) -> None:
+        """
+        Remove uma placa do snapshot (após exclusão).
+
+        Args:
+            normalized_plate: Placa normalizada removida
+            plate_id: ID da entrada removida; se informado e a placa estiver agora
+                associada a outra entrada, o snapshot não é alterado
+        """
+        with self._lock:
+            self._discard_plate(normalized_plate, plate_id)
+
+    def _discard_plate(self, normalized_plate: str, plate_id: UUID | None) -> None:
+        key = plate_equivalence_key(normalized_plate)
+        plates = self._entries.get(key, {})
+        current = plates.get(normalized_plate)
+        if current is None or (plate_id is not None and current != plate_id):
+            return
+        del plates[normalized_plate]
+        if not plates:
+            del self._entries[key]
+        self._windows.pop(current, None)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.remove(normalized_plate)
+
+    def mark_stale(self) -> None:
+        """Força a aplicação das alterações pendentes na próxima consulta."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._loaded_at = float("-inf")
+
+    def invalidate(self) -> None:
+        """Descarta o snapshot; a próxima consulta recarrega do banco."""
+        with self._lock:
+            self._entries = {}
+            self._windows = {}
+            self._fuzzy_index = None
+            self._loaded_at = None
+            self._version = None
+
+    def stats(self) -> dict[str, int | float | bool | None]:
+        """Estado e contadores do cache, para diagnóstico."""
+        loaded_at = self._loaded_at
+        return {
+            "enabled": self.enabled,
+            "fuzzy_enabled": get_settings().whitelist_fuzzy_match_enabled,
+            "size": self.size,
+            "ttl_seconds": get_settings().whitelist_cache_ttl_seconds,
+            "age_seconds": None if loaded_at is None else time.monotonic() - loaded_at,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "delta_syncs": self.delta_syncs,
+            "version": self._version,
+        }
+
+
+_whitelist_cache = WhitelistCache()
+
+
+def get_whitelist_cache() -> WhitelistCache:
+    """Instância do cache compartilhada pelo processo."""
+    return _whitelist_cache
+
+
+def warm_up_whitelist_cache(session_factory: Callable[[], Session]) -> None:
+    """Carrega o snapshot no arranque da aplicação, quando o cache está ativo."""
+    cache = get_whitelist_cache()
+    if not cache.enabled:
+        return
+    db = session_factory()
+    try:
+        count = cache.load(db)
+        logger.info("Whitelist cache warmed up with %d plates", count)
+    except SQLAlchemyError:
+        logger.warning("Whitelist cache warm-up failed; will load on first lookup")
+    finally:
+        db.close()
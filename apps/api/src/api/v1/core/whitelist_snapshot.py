@@ -0,0 +1,92 @@
+"""Snapshot binário da whitelist para download pelos dispositivos de borda.
+
+O arquivo (`WHITELIST_SNAPSHOT_PATH`, formato em `utils.plate_snapshot`) é regerado
+sob demanda: a cada pedido compara-se o cabeçalho com a versão atual do histórico da
+whitelist e só se reescreve quando esta mudou ou quando o arquivo expirou. A gravação
+é atômica, pelo que downloads em curso do arquivo anterior não são afetados.
+
+O formato só tem placas, sem janelas de validade: entradas já expiradas quando o
+arquivo é gerado ficam de fora e o arquivo expira no primeiro `valid_until` das que
+ficam, sem depender de uma alteração da whitelist (nem do `whitelist_sweeper`). As
+restantes restrições (início futuro, dias, horas) não são levadas; dispositivos que
+precisem delas usam o feed `GET /whitelist/changes`, que as traz.
+"""
+
+import logging
+import math
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.repositories.authorized_plate_repository import (
+    AuthorizedPlateRepository,
+)
+from apps.api.src.api.v1.utils.plate_snapshot import (
+    SnapshotInfo,
+    read_snapshot_info,
+    write_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+_rebuild_lock = threading.Lock()
+
+
+def get_whitelist_snapshot_path() -> Path:
+    """Caminho configurado do snapshot."""
+    return Path(get_settings().whitelist_snapshot_path)
+
+
+def snapshot_etag(info: SnapshotInfo) -> str:
+    """ETag de um snapshot: muda com a versão da whitelist e a cada expiração."""
+    return f'"{info.version}-{info.expires_at}"'
+
+
+def _is_current(info: SnapshotInfo | None, version: int) -> bool:
+    if info is None or info.version != version:
+        return False
+    return info.expires_at == 0 or datetime.now(UTC).timestamp() < info.expires_at
+
+
+def ensure_whitelist_snapshot(db: Session, version: int) -> tuple[Path, SnapshotInfo]:
+    """
+    Garante que o snapshot em disco corresponde a uma versão da whitelist e não expirou.
+
+    Args:
+        db: Sessão do banco de dados (usada apenas se for preciso regerar)
+        version: Versão atual da whitelist
+
+    Returns:
+        Caminho do snapshot atualizado e o seu cabeçalho (ver `snapshot_etag`)
+    """
+    path = get_whitelist_snapshot_path()
+    info = read_snapshot_info(path)
+    if _is_current(info, version):
+        return path, info
+    with _rebuild_lock:
+        # Outro thread pode ter regerado enquanto esperávamos o lock
+        info = read_snapshot_info(path)
+        if _is_current(info, version):
+            return path, info
+        now = datetime.now(UTC)
+        expired = set()
+        expiries = []
+        for plate_id, window in AuthorizedPlateRepository.get_validity_windows(db).items():
+            if window.valid_until is None:
+                continue
+            if window.valid_until <= now:
+                expired.add(plate_id)
+            else:
+                expiries.append(window.valid_until)
+        plates = (
+            normalized
+            for normalized, plate_id in AuthorizedPlateRepository.get_all_normalized(db)
+            if plate_id not in expired
+        )
+        info = SnapshotInfo(version, math.ceil(min(expiries).timestamp()) if expiries else 0)
+        count = write_snapshot(path, plates, info.version, info.expires_at)
+    logger.info("Whitelist snapshot rebuilt: version %d, %d plates", version, count)
+    return path, info
@@ -0,0 +1,104 @@
+"""Remoção periódica das entradas expiradas da whitelist.
+
+Entradas com `valid_until` no passado já não autorizam nada (a janela é avaliada a
+cada consulta), mas continuariam a ocupar o snapshot, o histórico de versões e os
+dispositivos de borda. A tarefa corre no processo da API a cada
+`WHITELIST_SWEEP_INTERVAL_SECONDS` (0 desliga, padrão) e remove-as em lotes; cada
+remoção gera uma alteração `delete` no histórico, por isso os outros workers e os
+dispositivos convergem pelo mesmo caminho das exclusões manuais. Como na retenção de
+imagens, um `flock` em `UPLOAD_DIR` garante que só um worker do host varre de cada vez.
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
+from apps.api.src.api.v1.repositories.authorized_plate_repository import (
+    AuthorizedPlateRepository,
+)
+from apps.api.src.api.v1.utils.host_lock import host_lock
+
+logger = logging.getLogger(__name__)
+
+# Entradas removidas por transação
+SWEEP_BATCH_SIZE = 1000
+_LOCK_FILE = ".whitelist-sweep.lock"
+
+
+def sweep_expired_plates(db: Session, now: datetime | None = None) -> int:
+    """
+    Remove todas as entradas da whitelist cujo `valid_until` já passou.
+
+    Args:
+        db: Sessão do banco de dados
+        now: Instante de referência (padrão: agora, em UTC)
+
+    Returns:
+        Número de entradas removidas
+    """
+    now = now or datetime.now(UTC)
+    total = 0
+    while True:
+        removed = AuthorizedPlateRepository.delete_expired(db, now, SWEEP_BATCH_SIZE)
+        total += removed
+        if removed < SWEEP_BATCH_SIZE:
+            break
+    if total:
+        # Aplicar já os tombstones ao snapshot deste processo
+        get_whitelist_cache().mark_stale()
+        logger.info("Whitelist sweep removed %d expired entries", total)
+    return total
+
+
+def _sweep_once(session_factory: Callable[[], Session]) -> None:
+    with host_lock(Path(get_settings().upload_dir) / _LOCK_FILE) as acquired:
+        if not acquired:
+            return
+        db = session_factory()
+        try:
+            sweep_expired_plates(db)
+        except SQLAlchemyError:
+            logger.exception("Whitelist sweep failed")
+        finally:
+            db.close()
+
+
+async def _sweep_loop(session_factory: Callable[[], Session], interval: int) -> None:
+    while True:
+        await run_in_threadpool(_sweep_once, session_factory)
+        await asyncio.sleep(interval)
+
+
+def start_whitelist_sweeper(session_factory: Callable[[], Session]) -> asyncio.Task | None:
+    """
+    Inicia a remoção periódica em segundo plano, se estiver ativa.
+
+    Args:
+        session_factory: Fábrica de sessões do banco
+
+    Returns:
+        Tarefa asyncio em execução, ou None se `WHITELIST_SWEEP_INTERVAL_SECONDS=0`
+    """
+    interval = get_settings().whitelist_sweep_interval_seconds
+    if interval <= 0:
+        return None
+    logger.info("Whitelist sweeper started (every %d s)", interval)
+    return asyncio.create_task(_sweep_loop(session_factory, interval))
+
+
+async def stop_whitelist_sweeper(task: asyncio.Task | None) -> None:
+    """Cancela a tarefa de remoção periódica e espera o seu término."""
+    if task is None:
+        return
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
@@ -9,7 +9,7 @@ import secrets as std_secrets
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, Security, status
+from fastapi import Depends, Form, Header, HTTPException, Query, Security, status
 from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
@@ -21,11 +21,16 @@ from apps.api.src.api.v1.controllers.device_controller import DeviceController
 from apps.api.src.api.v1.controllers.gate_controller import GateController
 from apps.api.src.api.v1.controllers.plate_controller import PlateController
 from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.idempotency import clean_client_key, clean_event_id
+from apps.api.src.api.v1.core.image_derivatives import DerivativeSpec
+from apps.api.src.api.v1.core.read_suppression import DEVICE_ID_MAX_LENGTH
 from apps.api.src.api.v1.db.session import get_db
 from apps.api.src.api.v1.ml.classifier import VehicleClassifier, get_vehicle_classifier
 from apps.api.src.api.v1.models.user import User
 from apps.api.src.api.v1.repositories.user_repository import UserRepository
+from apps.api.src.api.v1.schemas.access_log import ImageFormat
 from apps.api.src.api.v1.schemas.token import TokenPayload
+from apps.api.src.api.v1.utils.image_transcode import PlateBox
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +76,86 @@ def verify_device_ingest_key(
     )
 
 
+def get_ingest_event_id(
+    idempotency_key: Annotated[str | None, Header(alias="Idempotency-Key")] = None,
+    event_id: Annotated[str | None, Form()] = None,
+) -> str | None:
+    """
+    Chave de idempotência de um evento de ingestão (cabeçalho ou campo do formulário).
+
+    Args:
+        idempotency_key: Cabeçalho `Idempotency-Key`
+        event_id: Campo `event_id` do multipart
+
+    Returns:
+        Chave validada, ou None se nenhuma tiver sido enviada
+
+    Raises:
+        HTTPException: Se a chave for inválida ou o cabeçalho e o campo diferirem
+    """
+    try:
+        from_header = clean_event_id(idempotency_key)
+        from_form = clean_event_id(event_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    if from_header and from_form and from_header != from_form:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key e event_id diferentes",
+        )
+    return from_header or from_form
+
+
+def get_ingest_device_id(
+    x_device_id: Annotated[str | None, Header(alias="X-Device-Id")] = None,
+    device_id: Annotated[str | None, Form()] = None,
+) -> str | None:
+    """
+    Identificador da câmera que enviou o evento (cabeçalho ou campo do formulário).
+
+    Args:
+        x_device_id: Cabeçalho `X-Device-Id`
+        device_id: Campo `device_id` do multipart
+
+    Returns:
+        Identificador validado, ou None se nenhum tiver sido enviado
+
+    Raises:
+        HTTPException: Se o identificador for inválido ou o cabeçalho e o campo diferirem
+    """
+    try:
+        from_header = clean_client_key(x_device_id, "device_id", DEVICE_ID_MAX_LENGTH)
+        from_form = clean_client_key(device_id, "device_id", DEVICE_ID_MAX_LENGTH)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    if from_header and from_form and from_header != from_form:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="X-Device-Id e device_id diferentes",
+        )
+    return from_header or from_form
+
+
+def get_ingest_plate_box(
+    plate_box: Annotated[
+        str | None,
+        Form(description="Região da placa no quadro: `x,y,largura,altura` (px)."),
+    ] = None,
+) -> PlateBox | None:
+    """
+    Região da placa enviada pelo dispositivo (para o recorte guardado com o log).
+
+    Raises:
+        HTTPException: Se a região for inválida
+    """
+    if not plate_box:
+        return None
+    try:
+        return PlateBox.parse(plate_box)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
 def get_current_user(
     token: Annotated[str, Depends(reusable_oauth2)],
     db: Annotated[Session, Depends(get_db)],
@@ -245,3 +330,20 @@ def get_device_controller() -> DeviceController:
         DeviceController: Instância do controller de dispositivos
     """
     return DeviceController()
+
+
+def get_image_derivative_spec(
+    w: Annotated[
+        int | None, Query(ge=1, le=4096, description="Largura máxima da imagem (px).")
+    ] = None,
+    h: Annotated[
+        int | None, Query(ge=1, le=4096, description="Altura máxima da imagem (px).")
+    ] = None,
+    image_format: Annotated[
+        ImageFormat | None, Query(alias="format", description="Formato de saída.")
+    ] = None,
+) -> DerivativeSpec | None:
+    """Parâmetros da versão redimensionada de uma imagem (None para a original)."""
+    if w is None and h is None and image_format is None:
+        return None
+    return DerivativeSpec(w, h, image_format.value if image_format else None)
@@ -1,37 +1,99 @@
 """Endpoints para gerenciamento de logs de acesso veicular."""
 
-from datetime import datetime
-from typing import Annotated
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Annotated, BinaryIO
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, File, Form, Query, Response, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Header,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 
 from apps.api.src.api.v1.controllers.access_log_controller import AccessLogController
+from apps.api.src.api.v1.core.image_derivatives import DerivativeSpec
 from apps.api.src.api.v1.deps import (
     get_access_log_controller,
     get_current_admin_user,
     get_current_user,
+    get_image_derivative_spec,
+    get_ingest_device_id,
+    get_ingest_event_id,
+    get_ingest_plate_box,
     verify_device_ingest_key,
 )
 from apps.api.src.api.v1.models.user import User
-from apps.api.src.api.v1.schemas.access_log import AccessLogRead, AccessStatus
+from apps.api.src.api.v1.schemas.access_log import (
+    AccessLogAccepted,
+    AccessLogBatchResult,
+    AccessLogRead,
+    AccessStatus,
+    ArchiveFormat,
+)
+from apps.api.src.api.v1.utils.archive_stream import ARCHIVE_FORMATS
+from apps.api.src.api.v1.utils.http import etag_matches
+from apps.api.src.api.v1.utils.image_transcode import PlateBox
 
 router = APIRouter()
 
 
-@router.post("/", response_model=AccessLogRead)
-def create_access_log(
+@router.post(
+    "/",
+    response_model=AccessLogRead,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": AccessLogAccepted,
+            "description": "Banco indisponível: evento guardado no diário local.",
+        }
+    },
+)
+async def create_access_log(
     file: Annotated[UploadFile, File()],
     plate: Annotated[str, Form()],
     access_log_controller: Annotated[AccessLogController, Depends(get_access_log_controller)],
     _device_auth: Annotated[None, Depends(verify_device_ingest_key)],
-) -> AccessLogRead:
+    event_id: Annotated[str | None, Depends(get_ingest_event_id)],
+    device_id: Annotated[str | None, Depends(get_ingest_device_id)],
+    plate_box: Annotated[PlateBox | None, Depends(get_ingest_plate_box)],
+) -> AccessLogRead | JSONResponse:
     """
     Registrar acesso veicular.
 
     Requer cabeçalho **`X-Device-Key`** com o valor de `DEVICE_INGEST_KEY` quando esta
     variável está definida (ingestão apenas de dispositivos confiáveis).
 
-    Recebe a imagem e a placa detectada pelo dispositivo IoT.
+    Recebe a imagem e a placa detectada pelo dispositivo IoT. Corpos acima de
+    `MAX_FILE_SIZE_MB` são rejeitados com 413 logo pelo `Content-Length` (ou durante
+    a receção); a imagem é gravada em blocos, sem bloquear o event loop.
+
+    Idempotência: com o cabeçalho **`Idempotency-Key`** (ou o campo `event_id`), um
+    reenvio do mesmo evento devolve o registro original, sem criar outro log nem gravar
+    outra imagem.
+
+    Leituras repetidas: com **`X-Device-Id`** (ou o campo `device_id`) e
+    `INGEST_DEDUP_WINDOW_SECONDS` > 0, leituras da mesma placa pela mesma câmera dentro
+    da janela devolvem o evento existente com `read_count` incrementado, sem novo
+    registro nem nova imagem.
+
+    Banco indisponível: com `INGEST_JOURNAL_ENABLED`, o evento é guardado num diário
+    local e a resposta é **202** com um `id` provisório (o mesmo que o log terá) e
+    `provisional: true`. Com a whitelist em memória, `status` traz já a decisão (mantida
+    no log); caso contrário vem `null` e é decidido quando o diário for reenviado.
+
+    Recompressão: com `IMAGE_POSTPROCESS_ENABLED`, a imagem é recomprimida depois da
+    resposta (o `image_storage_key` do log pode mudar); com o campo `plate_box`
+    (`x,y,largura,altura`, em pixels), é guardado também o recorte da placa
+    (`plate_crop_key`).
     1. Valida o arquivo de imagem.
     2. Normaliza a placa.
     3. Verifica se a placa está na whitelist.
@@ -42,22 +104,96 @@ def create_access_log(
         file: Arquivo de imagem do veículo
         plate: String da placa detectada pelo OCR
         access_log_controller: Controller de logs de acesso injetado via dependency injection
+        event_id: Chave de idempotência do evento, se enviada
+        device_id: Identificador da câmera, se enviado
+        plate_box: Região da placa no quadro, se enviada
 
     Returns:
         Corpo JSON alinhado com **`AccessLogRead`**: `id`, `timestamp`,
-        `plate_string_detected`, `status`, `image_storage_key`, `authorized_plate_id`.
+        `plate_string_detected`, `status`, `image_storage_key`, `authorized_plate_id`,
+        `event_id`, `device_id`, `read_count`, `last_seen_at`, `plate_crop_key`.
 
     Raises:
         HTTPException: Se o arquivo for inválido ou muito grande
     """
-    return access_log_controller.create_access_log(plate=plate, file=file)
+    access_log = await access_log_controller.create_access_log_async(
+        plate=plate, file=file, event_id=event_id, device_id=device_id, plate_box=plate_box
+    )
+    if isinstance(access_log, AccessLogAccepted):
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content=access_log.model_dump(mode="json")
+        )
+    return access_log
+
+
+@router.post("/batch", response_model=AccessLogBatchResult)
+def create_access_logs_batch(
+    manifest: Annotated[
+        UploadFile,
+        File(description="Manifesto NDJSON: `file`, `plate` e `captured_at` por linha."),
+    ],
+    access_log_controller: Annotated[AccessLogController, Depends(get_access_log_controller)],
+    _device_auth: Annotated[None, Depends(verify_device_ingest_key)],
+    files: Annotated[
+        list[UploadFile] | None,
+        File(description="Imagens referenciadas no manifesto (pelo nome do arquivo)."),
+    ] = None,
+    archive: Annotated[
+        UploadFile | None,
+        File(description="Alternativa a `files`: arquivo tar (ou .tar.gz) com as imagens."),
+    ] = None,
+) -> AccessLogBatchResult:
+    """
+    Registrar em lote os eventos acumulados por um dispositivo.
+
+    Requer cabeçalho **`X-Device-Key`**, como a ingestão de um único evento. Destinado
+    ao reenvio do backlog de um dispositivo que esteve sem ligação: o manifesto NDJSON
+    traz um evento por linha, por exemplo
+    `{"file": "0001.jpg", "plate": "ABC1D23", "captured_at": "2026-10-17T08:15:02-03:00"}`,
+    e as imagens chegam como partes `files` ou num único `archive` tar.
+
+    Cada linha pode trazer também um `event_id`: eventos já registrados voltam como
+    `duplicate`, com o registro original, sem gravar de novo a imagem.
+
+    O `captured_at` do dispositivo passa a ser o `timestamp` do log e é o instante em que
+    as janelas de validade da whitelist são avaliadas. Todas as placas são verificadas de
+    uma vez e os logs são gravados numa única transação. Eventos inválidos (imagem em
+    falta ou grande demais, campos ausentes, `captured_at` no futuro) são rejeitados
+    individualmente. Até `INGEST_BATCH_MAX_ITEMS` eventos e `INGEST_BATCH_MAX_BODY_MB`
+    por pedido (413 acima disso).
+
+    Args:
+        manifest: Manifesto NDJSON dos eventos
+        access_log_controller: Controller de logs de acesso injetado via dependency injection
+        files: Imagens enviadas como partes do multipart
+        archive: Arquivo tar com as imagens
+
+    Returns:
+        Contagens de eventos criados e rejeitados e o resultado de cada linha do manifesto
+
+    Raises:
+        HTTPException: Se o manifesto ou o arquivo tar forem inválidos ou o lote exceder
+            os limites
+    """
+    return access_log_controller.create_access_logs_batch(
+        manifest=manifest, files=files or [], archive=archive
+    )
 
 
-@router.get("/images/{image_filename}")
+@router.get(
+    "/images/{image_filename}",
+    response_class=FileResponse,
+    responses={
+        206: {"description": "Parte da imagem pedida com `Range`."},
+        304: {"description": "O cliente já tem esta imagem (ETag igual)."},
+    },
+)
 def get_access_log_image(
     image_filename: str,
     access_log_controller: Annotated[AccessLogController, Depends(get_access_log_controller)],
     _current_user: Annotated[User, Depends(get_current_admin_user)],
+    spec: Annotated[DerivativeSpec | None, Depends(get_image_derivative_spec)],
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> Response:
     """
     Servir imagem de acesso veicular.
@@ -67,10 +203,20 @@ def get_access_log_image(
 
     Este endpoint serve as imagens capturadas pelos dispositivos IoT.
 
+    A resposta tem `ETag` forte e `Cache-Control` (`IMAGE_CACHE_MAX_AGE_SECONDS`); com
+    `If-None-Match` igual, a API responde **304** sem ler a imagem. Imagens com cópia
+    local são enviadas diretamente do arquivo e aceitam `Range` (**206**).
+
+    Com `w`, `h` e/ou `format` (`jpeg`, `png`, `webp`), devolve uma versão reduzida para
+    caber nessas dimensões (sem ampliar), gerada uma vez e guardada em cache. Requer
+    Pillow ou OpenCV no servidor (**503** sem eles).
+
     Args:
         image_filename: Nome do arquivo de imagem
         access_log_controller: Controller de logs de acesso injetado via dependency injection
         current_user: Administrador autenticado
+        spec: Dimensões máximas e formato da versão redimensionada (`w`, `h`, `format`)
+        if_none_match: ETag da cópia em cache do cliente
 
     Returns:
         Response: Arquivo de imagem com Content-Type apropriado
@@ -78,7 +224,65 @@ def get_access_log_image(
     Raises:
         HTTPException: Se a imagem não for encontrada ou acesso negado
     """
-    image_path = access_log_controller.get_image_path(image_filename)
+    return _image_response(access_log_controller, image_filename, spec, if_none_match)
+
+
+@router.get(
+    "/signed-images/{image_filename}",
+    response_class=FileResponse,
+    responses={
+        206: {"description": "Parte da imagem pedida com `Range`."},
+        304: {"description": "O cliente já tem esta imagem (ETag igual)."},
+        403: {"description": "Assinatura inválida ou URL expirada."},
+    },
+)
+def get_signed_access_log_image(
+    image_filename: str,
+    expires: Annotated[int, Query(description="Expiração da URL (Unix).")],
+    signature: Annotated[str, Query(description="Assinatura HMAC da URL.")],
+    access_log_controller: Annotated[AccessLogController, Depends(get_access_log_controller)],
+    spec: Annotated[DerivativeSpec | None, Depends(get_image_derivative_spec)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Servir imagem de acesso veicular por URL assinada.
+
+    As URLs vêm no campo `image_url` da listagem de logs (só para administradores) e
+    valem por `IMAGE_SIGNED_URL_TTL_SECONDS`. A assinatura é validada sem JWT nem
+    consulta ao banco: a autorização é feita uma vez, na listagem. Com
+    `IMAGE_DELIVERY_MODE=x-accel-redirect` (ou `x-sendfile`), os bytes são enviados
+    pelo proxy reverso. Aceita os mesmos `w`, `h` e `format` de
+    **GET /access_logs/images/{image_filename}**.
+
+    Args:
+        image_filename: Nome do arquivo de imagem
+        expires: Instante de expiração da URL
+        signature: Assinatura da URL
+        access_log_controller: Controller de logs de acesso injetado via dependency injection
+        spec: Dimensões máximas e formato da versão redimensionada (`w`, `h`, `format`)
+        if_none_match: ETag da cópia em cache do cliente
+
+    Returns:
+        Response: Arquivo de imagem com Content-Type apropriado
+
+    Raises:
+        HTTPException: Se a assinatura for inválida ou a imagem não for encontrada
+    """
+    access_log_controller.verify_image_url(image_filename, expires, signature)
+    return _image_response(access_log_controller, image_filename, spec, if_none_match)
+
+
+def _image_response(
+    access_log_controller: AccessLogController,
+    image_filename: str,
+    spec: DerivativeSpec | None,
+    if_none_match: str | None,
+) -> Response:
+    """Resposta com a imagem, 304 ou o redirecionamento interno para o proxy."""
+    image = access_log_controller.get_image(image_filename)
+    headers = access_log_controller.image_cache_headers(image, spec)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
     # Determinar Content-Type baseado na extensão
     content_type_map = {
@@ -87,27 +291,57 @@ def get_access_log_image(
         ".png": "image/png",
         ".webp": "image/webp",
     }
-    content_type = content_type_map.get(image_path.suffix.lower(), "application/octet-stream")
 
-    # Ler e retornar o arquivo
-    with image_path.open("rb") as f:
-        image_data = f.read()
+    # Versão redimensionada: servida do cache de derivadas
+    if spec is not None:
+        path = access_log_controller.get_image_derivative(image, spec)
+        content_type = content_type_map.get(path.suffix, "application/octet-stream")
+        return FileResponse(path, media_type=content_type, headers=headers)
+
+    content_type = content_type_map.get(Path(image.key).suffix.lower(), "application/octet-stream")
+
+    # O proxy reverso envia o arquivo; a API só autoriza
+    offload = access_log_controller.image_offload_headers(image)
+    if offload is not None:
+        return Response(media_type=content_type, headers={**headers, **offload})
 
-    return Response(content=image_data, media_type=content_type)
+    # Imagem só no backend remoto (ex.: recebida por outro nó): enviar em fluxo
+    if image.local_path is None:
+        stream = access_log_controller.open_image(image)
+        return StreamingResponse(
+            _iter_chunks(stream),
+            media_type=content_type,
+            headers={**headers, "Content-Length": str(image.size)},
+        )
+
+    # Envio direto do arquivo (sem o carregar em memória), com suporte a Range
+    return FileResponse(image.local_path, media_type=content_type, headers=headers)
+
+
+def _iter_chunks(stream: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Lê `stream` por blocos e fecha-o no fim (ou se o cliente desligar)."""
+    try:
+        while chunk := stream.read(chunk_size):
+            yield chunk
+    finally:
+        stream.close()
 
 
 @router.get("/", response_model=list[AccessLogRead])
 def list_access_logs(
+    request: Request,
     access_log_controller: Annotated[AccessLogController, Depends(get_access_log_controller)],
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
     skip: Annotated[int, Query(ge=0, description="Registros a pular (paginação).")] = 0,
     limit: Annotated[int, Query(ge=1, le=100, description="Máximo de registros (1-100).")] = 100,
     plate: Annotated[
         str | None,
         Query(
             description=(
-                "Filtro parcial e case-insensitive sobre `plate_string_detected` "
-                "(corresponde a `ILIKE %valor%` no repositório)."
+                "Filtro por placa. Uma placa completa (antiga ou Mercosul) casa exatamente "
+                "com os dois formatos (`ABC1234` encontra também `ABC1C34`); outro valor "
+                "é um filtro parcial e case-insensitive sobre `plate_string_detected` "
+                "(`ILIKE %valor%`)."
             ),
         ),
     ] = None,
@@ -143,12 +377,17 @@ def list_access_logs(
 
     **Ordenação padrão:** mais recente primeiro (`timestamp DESC`).
 
+    Para administradores, cada log traz `image_url`: URL assinada e temporária da imagem
+    (**GET /access_logs/signed-images/...**), que não precisa de JWT.
+
     Args:
+        request: Requisição (para montar as URLs das imagens)
         access_log_controller: Controller de logs de acesso injetado via dependency injection
         current_user: Usuário autenticado (requerido)
         skip: Número de registros a pular para paginação
         limit: Número máximo de registros a retornar (máximo 100)
-        plate: Filtrar por placa (busca parcial, case-insensitive)
+        plate: Filtrar por placa (uma placa completa casa exatamente com os formatos
+            antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
         status: Filtrar por status de acesso (Authorized/Denied)
         start_date: Data inicial para filtrar (formato ISO 8601)
         end_date: Data final para filtrar (formato ISO 8601)
@@ -160,7 +399,7 @@ def list_access_logs(
         GET /api/v1/access_logs/?limit=10&status=Authorized
         GET /api/v1/access_logs/?plate=ABC1234
     """
-    return access_log_controller.get_all(
+    access_logs = access_log_controller.get_all(
         skip=skip,
         limit=limit,
         plate_filter=plate,
@@ -168,3 +407,93 @@ def list_access_logs(
         start_date=start_date,
         end_date=end_date,
     )
+    if not current_user.is_admin:
+        return access_logs
+    # Imagens só para administradores: a autorização desta página vale para as suas imagens
+    for access_log in access_logs:
+        if access_log.image_storage_key is None:
+            continue
+        params = access_log_controller.image_url_params(access_log.image_storage_key)
+        if params is not None:
+            path = request.app.url_path_for(
+                "get_signed_access_log_image",
+                image_filename=Path(access_log.image_storage_key).name,
+            )
+            access_log.image_url = f"{request.scope.get('root_path', '')}{path}?{urlencode(params)}"
+    return access_logs
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-tar": {}, "application/zip": {}}}},
+)
+def export_access_log_images(
+    access_log_controller: Annotated[AccessLogController, Depends(get_access_log_controller)],
+    _current_user: Annotated[User, Depends(get_current_admin_user)],
+    archive_format: Annotated[
+        ArchiveFormat, Query(alias="format", description="Formato do arquivo (`tar` ou `zip`).")
+    ] = ArchiveFormat.tar,
+    plate: Annotated[
+        str | None,
+        Query(
+            description=(
+                "Filtro por placa: uma placa completa casa exatamente com os formatos "
+                "antigo e Mercosul; outro valor é uma busca parcial e case-insensitive."
+            )
+        ),
+    ] = None,
+    status: Annotated[
+        AccessStatus | None,
+        Query(description="Filtrar por status de acesso (Authorized / Denied)."),
+    ] = None,
+    start_date: Annotated[
+        datetime | None,
+        Query(description="Limite inferior **inclusivo** do `timestamp` (ISO 8601)."),
+    ] = None,
+    end_date: Annotated[
+        datetime | None,
+        Query(description="Limite superior **inclusivo** do `timestamp` (ISO 8601)."),
+    ] = None,
+) -> StreamingResponse:
+    """
+    Exportar as imagens dos logs de um período num único arquivo.
+
+    **Apenas administradores.** Aceita os mesmos filtros que **GET /access_logs/**, mas
+    sem paginação: devolve em fluxo um `tar` (padrão) ou `zip` com as imagens
+    (`images/AAAA-MM-DD/...`), os recortes da placa (`crops/...`) e um `manifest.csv`
+    com uma linha por log, em ordem cronológica.
+
+    Os logs são lidos do banco em lotes e as imagens em blocos, à medida que a resposta
+    é enviada: a memória usada não cresce com o período exportado (no `zip`, apenas um
+    pequeno registro por arquivo, exigido pelo diretório central do formato).
+
+    Args:
+        access_log_controller: Controller de logs de acesso injetado via dependency injection
+        current_user: Administrador autenticado
+        archive_format: Formato do arquivo (`tar` ou `zip`)
+        plate: Filtrar por placa (uma placa completa casa exatamente com os formatos
+            antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
+        status: Filtrar por status de acesso (Authorized/Denied)
+        start_date: Data inicial para filtrar (formato ISO 8601)
+        end_date: Data final para filtrar (formato ISO 8601)
+
+    Returns:
+        StreamingResponse: Arquivo para download
+
+    Example:
+        GET /api/v1/access_logs/export?format=zip&start_date=2026-10-01T00:00:00Z
+    """
+    archive = ARCHIVE_FORMATS[archive_format.value]
+    filename = f"access-logs-{datetime.now(UTC):%Y%m%dT%H%M%SZ}{archive.suffix}"
+    return StreamingResponse(
+        access_log_controller.export_images(
+            archive_format,
+            plate_filter=plate,
+            status_filter=status,
+            start_date=start_date,
+            end_date=end_date,
+        ),
+        media_type=archive.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -3,28 +3,50 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
 
 from apps.api.src.api.v1.controllers.plate_controller import PlateController
-from apps.api.src.api.v1.deps import get_current_user, get_plate_controller
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
+from apps.api.src.api.v1.core.whitelist_snapshot import snapshot_etag
+from apps.api.src.api.v1.deps import (
+    get_current_admin_user,
+    get_current_user,
+    get_plate_controller,
+    verify_device_ingest_key,
+)
 from apps.api.src.api.v1.models.user import User
 from apps.api.src.api.v1.schemas.authorized_plate import (
     AuthorizedPlateCreate,
     AuthorizedPlateRead,
+    WhitelistBulkImportResult,
+    WhitelistCacheStats,
+    WhitelistCheckRequest,
+    WhitelistCheckResult,
+    WhitelistSort,
+    WhitelistSyncRequest,
+    WhitelistSyncResult,
 )
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangesPage
+from apps.api.src.api.v1.utils.http import etag_matches
+from apps.api.src.api.v1.utils.whitelist_import import detect_import_format, iter_import_rows
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[AuthorizedPlateRead])
 def read_authorized_plates(
+    response: Response,
     plate_controller: Annotated[PlateController, Depends(get_plate_controller)],
     _current_user: Annotated[User, Depends(get_current_user)],
     skip: Annotated[
         int,
         Query(
             ge=0,
-            description="Registros a pular (paginação). Padrão 0; mínimo 0.",
+            description=(
+                "Registros a pular (paginação). Padrão 0; mínimo 0. Ignorado com `cursor`; "
+                "para listas grandes, preferir `cursor`."
+            ),
         ),
     ] = 0,
     limit: Annotated[
@@ -35,16 +57,59 @@ def read_authorized_plates(
             description="Máximo de registros retornados. Padrão 100; entre 1 e 100.",
         ),
     ] = 100,
+    plate: Annotated[
+        str | None,
+        Query(
+            description=(
+                "Prefixo da placa (normalizado; `ABC-1` → `normalized_plate LIKE 'ABC1%'`, "
+                "indexado)."
+            ),
+        ),
+    ] = None,
+    description: Annotated[
+        str | None,
+        Query(description="Filtro parcial e case-insensitive sobre `description`."),
+    ] = None,
+    sort: Annotated[
+        WhitelistSort,
+        Query(
+            description=(
+                "Ordenação: `plate` (`normalized_plate`), `created_at` ou `-created_at` "
+                "(mais recentes primeiro). Padrão `plate`."
+            ),
+        ),
+    ] = WhitelistSort.plate,
+    cursor: Annotated[
+        str | None,
+        Query(description="Cursor da página seguinte (cabeçalho `X-Next-Cursor`)."),
+    ] = None,
 ) -> list[AuthorizedPlateRead]:
     """
     Listar placas autorizadas.
 
     Requer `Authorization: Bearer` com JWT de utilizador autenticado.
 
-    Retorna uma lista paginada de placas cadastradas na whitelist.
-    **Paginação:** `skip` ≥ 0 (padrão 0), `limit` entre 1 e 100 (padrão 100).
+    Retorna uma lista paginada de placas cadastradas na whitelist, em ordem estável
+    (`sort`, com `id` como desempate), com busca por prefixo da placa (`plate`) e
+    filtro por descrição (`description`).
+
+    **Paginação por cursor:** quando há mais resultados, a resposta traz o cabeçalho
+    **`X-Next-Cursor`**; repetir o pedido com `cursor=<valor>` (mesmos filtros e `sort`)
+    para obter a página seguinte. O custo é constante em qualquer página. A paginação
+    por `skip` continua disponível (padrão 0), mas degrada em páginas profundas.
+    Cursor inválido ou de outra ordenação → **400**.
     """
-    return plate_controller.get_all(skip=skip, limit=limit)
+    plates, next_cursor = plate_controller.get_page(
+        limit=limit,
+        skip=skip,
+        plate_prefix=plate,
+        description=description,
+        sort=sort,
+        cursor=cursor,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return plates
 
 
 @router.post("/", response_model=AuthorizedPlateRead)
@@ -68,6 +133,215 @@ def create_authorized_plate(
     return plate_controller.create(plate_in)
 
 
+@router.post(
+    "/bulk",
+    response_model=WhitelistBulkImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_import_authorized_plates(
+    request: Request,
+    plate_controller: Annotated[PlateController, Depends(get_plate_controller)],
+    _current_user: Annotated[User, Depends(get_current_user)],
+) -> WhitelistBulkImportResult:
+    """
+    Importar placas autorizadas em massa.
+
+    Requer `Authorization: Bearer` com JWT de utilizador autenticado.
+
+    O corpo é lido em streaming, conforme o `Content-Type`:
+    - **`text/csv`**: colunas `plate,description` (cabeçalho opcional);
+    - **`application/x-ndjson`**: um objeto `{"plate": ..., "description": ...}` por linha.
+
+    Cada linha é validada como em **POST /** (`validate_brazilian_plate`). As linhas
+    válidas são inseridas em lotes multi-linha (COPY em PostgreSQL). Linhas inválidas,
+    repetidas no arquivo ou já existentes na whitelist não interrompem a importação:
+    aparecem em `errors` com o número da linha e o motivo.
+
+    Tipo de conteúdo não suportado → **415**.
+    """
+    import_format = detect_import_format(request.headers.get("content-type"))
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type deve ser text/csv ou application/x-ndjson",
+        )
+    return await plate_controller.bulk_import(iter_import_rows(request.stream(), import_format))
+
+
+@router.put("/sync", response_model=WhitelistSyncResult)
+def sync_authorized_plates(
+    sync_in: WhitelistSyncRequest,
+    plate_controller: Annotated[PlateController, Depends(get_plate_controller)],
+    _current_user: Annotated[User, Depends(get_current_admin_user)],
+) -> WhitelistSyncResult:
+    """
+    Sincronizar a whitelist com um conjunto completo (fonte externa de verdade).
+
+    **Apenas administradores.** O corpo traz **todas** as placas que devem existir
+    (ex.: exportação noturna do sistema de RH ou da administradora). A API compara
+    por `normalized_plate` e aplica, numa única transação, apenas o mínimo necessário:
+
+    - insere placas novas;
+    - atualiza as que mudaram `plate` ou `description`;
+    - **remove** as placas que não constam do conjunto.
+
+    Placas inalteradas não são escritas. Com `dry_run: true`, só devolve as contagens.
+    Os logs de acesso das placas removidas são mantidos, sem o vínculo com a placa.
+
+    Para não apagar a whitelist por engano, um conjunto vazio só é aceito com
+    `allow_empty: true`, e com `expected_count` o conjunto é recusado se não tiver esse
+    número de placas (exportação truncada). A mesma placa repetida no conjunto, um
+    conjunto vazio ou truncado → **400**.
+    """
+    return plate_controller.sync(sync_in)
+
+
+@router.post("/check", response_model=list[WhitelistCheckResult])
+def check_authorized_plates(
+    check_in: WhitelistCheckRequest,
+    plate_controller: Annotated[PlateController, Depends(get_plate_controller)],
+    _current_user: Annotated[User, Depends(get_current_user)],
+) -> list[WhitelistCheckResult]:
+    """
+    Verificar várias placas candidatas de uma vez.
+
+    Requer `Authorization: Bearer` com JWT de utilizador autenticado.
+
+    Útil quando o OCR devolve várias leituras possíveis para o mesmo veículo. As
+    placas são normalizadas e resolvidas numa única consulta (ou no cache em memória,
+    quando ativo). A resposta segue a ordem do pedido, com `authorized`,
+    `authorized_plate_id` e o tipo de correspondência de cada placa.
+    """
+    return plate_controller.check_authorization_batch(check_in.plates)
+
+
+@router.get(
+    "/changes",
+    response_model=WhitelistChangesPage,
+    responses={
+        304: {"description": "Sem alterações desde a última consulta (ETag igual)."},
+        410: {"description": "`since` posterior à versão atual; refazer com `since=0`."},
+    },
+)
+def read_whitelist_changes(
+    response: Response,
+    plate_controller: Annotated[PlateController, Depends(get_plate_controller)],
+    _device_auth: Annotated[None, Depends(verify_device_ingest_key)],
+    since: Annotated[
+        int,
+        Query(ge=0, description="Última versão conhecida pelo dispositivo (0 = tudo)."),
+    ] = 0,
+    limit: Annotated[
+        int,
+        Query(ge=1, le=10000, description="Máximo de alterações. Padrão 1000."),
+    ] = 1000,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> WhitelistChangesPage | Response:
+    """
+    Sincronização incremental da whitelist para dispositivos de borda.
+
+    Requer `X-Device-Key` (mesma chave da ingestão de access logs).
+
+    Cada alteração da whitelist recebe uma versão crescente; remoções ficam
+    registradas como tombstones (`op: delete`). A resposta traz apenas a **última**
+    alteração de cada placa desde `since`, por ordem de versão. Fluxo do dispositivo:
+
+    1. primeira carga com `since=0` (repetir enquanto `has_more`);
+    2. guardar `version` e consultar periodicamente com `since=<version>`;
+    3. aplicar `upsert` / `delete` à cópia local da whitelist, respeitando as janelas
+       de validade de cada `upsert` (`valid_from`, `valid_until`, `weekdays`,
+       `daily_start`, `daily_end`) — a placa só vale dentro delas.
+
+    A cópia local deve ser indexada por `plate_key` (chave de equivalência, igual para
+    `ABC1234` e `ABC1C34`) e cada leitura procurada com a mesma transformação: quinto
+    caractere dígito → letra, 0 → A … 9 → J.
+
+    A resposta tem `ETag` (versão atual, `since` e `limit`: cada página tem a sua); com
+    `If-None-Match` igual, a API responde **304** sem consultar as alterações. `since`
+    maior que a versão atual → **410**.
+    """
+    version = plate_controller.get_version()
+    etag = f'"{version}-{since}-{limit}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    page = plate_controller.get_changes(since, limit, version)
+    response.headers["ETag"] = etag
+    return page
+
+
+@router.get(
+    "/snapshot",
+    response_class=FileResponse,
+    responses={
+        200: {
+            "content": {"application/octet-stream": {}},
+            "description": "Snapshot binário da whitelist.",
+        },
+        304: {"description": "O dispositivo já tem esta versão (ETag igual)."},
+    },
+)
+def download_whitelist_snapshot(
+    plate_controller: Annotated[PlateController, Depends(get_plate_controller)],
+    _device_auth: Annotated[None, Depends(verify_device_ingest_key)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """
+    Baixar o snapshot binário compacto da whitelist.
+
+    Requer `X-Device-Key` (mesma chave da ingestão de access logs).
+
+    Formato (little-endian): cabeçalho de 32 bytes — magic `SWLS`, versão do formato
+    (u16), tamanho do registro (u16 = 7), versão da whitelist (u64), validade (i64,
+    segundos Unix; 0 = sem fim), número de registros (u32), CRC-32 dos registros
+    (u32) — seguido dos registros de 7 bytes (`plate_key` em ASCII, a chave de
+    equivalência entre o formato antigo e o Mercosul), ordenados por bytes. O dispositivo
+    pode mapeá-lo com `mmap` e procurar por busca binária, sem parsing, desde que aplique
+    à placa lida a mesma transformação (quinto caractere dígito → letra, 0 → A … 9 → J).
+
+    Placas já expiradas (`valid_until` no passado) ficam de fora e o snapshot expira no
+    primeiro `valid_until` das restantes: passado esse instante, o dispositivo deve
+    baixá-lo de novo, mesmo sem alterações na whitelist. As demais restrições de
+    horário não são levadas no formato: quem precisa delas usa o feed de alterações.
+
+    O snapshot é regerado quando a versão da whitelist muda ou quando expira. `ETag` =
+    versão e validade; com `If-None-Match` igual, a API responde **304** lendo só o
+    cabeçalho do arquivo. Para aplicar alterações entre snapshots, usar
+    **GET /whitelist/changes?since=<versão>**.
+    """
+    version = plate_controller.get_version()
+    path, info = plate_controller.get_snapshot(version)
+    etag = snapshot_etag(info)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"whitelist-{version}.snap",
+        headers={"ETag": etag, "X-Whitelist-Version": str(version)},
+    )
+
+
+@router.get("/cache/stats", response_model=WhitelistCacheStats)
+def read_whitelist_cache_stats(
+    _current_user: Annotated[User, Depends(get_current_admin_user)],
+) -> WhitelistCacheStats:
+    """
+    Estado do cache em memória da whitelist.
+
+    **Apenas administradores.** Devolve tamanho, idade do snapshot e contadores de
+    hits/misses do processo (worker) que atendeu a requisição.
+    """
+    return WhitelistCacheStats.model_validate(get_whitelist_cache().stats())
+
+
 @router.get("/{id}", response_model=AuthorizedPlateRead)
 def read_authorized_plate(
     id: UUID,
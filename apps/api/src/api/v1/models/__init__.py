@@ -3,12 +3,17 @@
 Este módulo contém os modelos ORM que representam as tabelas do banco de dados.
 """
 
-from apps.api.src.api.v1.models.access_log import AccessLog
+from apps.api.src.api.v1.models.access_log import AccessLog, AccessLogEvent
 from apps.api.src.api.v1.models.authorized_plate import AuthorizedPlate
+from apps.api.src.api.v1.models.image_blob import ImageBlob
 from apps.api.src.api.v1.models.user import User
+from apps.api.src.api.v1.models.whitelist_change import WhitelistChange
 
 __all__ = [
     "AccessLog",
+    "AccessLogEvent",
     "AuthorizedPlate",
+    "ImageBlob",
     "User",
+    "WhitelistChange",
 ]
@@ -1,25 +1,59 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, Integer, String
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column
 
 from apps.api.src.api.v1.db.base import GUID, Base
-from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.schemas.access_log import AccessStatus, PlateMatchType
 
 
 class AccessLog(Base):
     __tablename__ = "access_logs"
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
-    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, nullable=False)
     plate_string_detected: Mapped[str] = mapped_column(String, nullable=False)
+    # Chave de equivalência da placa lida (formato antigo e Mercosul coincidem)
+    plate_key: Mapped[str | None] = mapped_column(String, index=True, nullable=True)
     status: Mapped[AccessStatus] = mapped_column(
         SAEnum(AccessStatus, name="access_status", create_constraint=True),
         nullable=False,
     )
-    image_storage_key: Mapped[str] = mapped_column(String, nullable=False)
+    # Nulo depois de a imagem expirar (ver `image_retention`)
+    image_storage_key: Mapped[str | None] = mapped_column(String, index=True, nullable=True)
+    # Recorte da região da placa, guardado ao lado do quadro (ver `image_postprocess`)
+    plate_crop_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
     authorized_plate_id: Mapped[uuid.UUID | None] = mapped_column(
         GUID(), ForeignKey("authorized_plates.id"), nullable=True
     )
+    match_type: Mapped[PlateMatchType | None] = mapped_column(
+        SAEnum(PlateMatchType, name="plate_match_type", native_enum=False, length=16),
+        nullable=True,
+    )
+    match_distance: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Câmera que fez a leitura e leituras repetidas agregadas a este evento
+    device_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    read_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Chave de idempotência enviada pelo dispositivo (reenvios devolvem este registro)
+    event_id: Mapped[str | None] = mapped_column(
+        String(128), unique=True, index=True, nullable=True
+    )
+
+
+class AccessLogEvent(Base):
+    """Chave de idempotência de uma leitura repetida agregada a um log existente.
+
+    O log guarda apenas a chave do primeiro evento (`AccessLog.event_id`); as das
+    leituras agregadas ficam aqui, para que os reenvios devolvam o mesmo registro
+    mesmo depois de a cache em memória os esquecer.
+    """
+
+    __tablename__ = "access_log_events"
+
+    event_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    access_log_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("access_logs.id", ondelete="CASCADE"), index=True, nullable=False
+    )
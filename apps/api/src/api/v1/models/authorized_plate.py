@@ -1,10 +1,11 @@
 import uuid
-from datetime import UTC, datetime
+from datetime import UTC, datetime, time
 
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DateTime, Index, Integer, String, Time, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from apps.api.src.api.v1.db.base import GUID, Base
+from apps.api.src.api.v1.utils.validity import mask_to_weekdays
 
 
 def _utc_now() -> datetime:
@@ -13,10 +14,24 @@ def _utc_now() -> datetime:
 
 class AuthorizedPlate(Base):
     __tablename__ = "authorized_plates"
+    __table_args__ = (
+        # Paginação por cursor ordenada por (created_at, id)
+        Index("ix_authorized_plates_created_at_id", "created_at", "id"),
+        # Busca por prefixo (LIKE 'ABC%') independente da collation do banco
+        Index(
+            "ix_authorized_plates_normalized_plate_pattern",
+            "normalized_plate",
+            postgresql_ops={"normalized_plate": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Remoção periódica das entradas expiradas
+        Index("ix_authorized_plates_valid_until", "valid_until"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
     plate: Mapped[str] = mapped_column(String, nullable=False)
     normalized_plate: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    # Chave comum ao formato antigo e ao Mercosul da mesma placa (ver plate_equivalence_key)
+    plate_key: Mapped[str] = mapped_column(String, index=True, nullable=False)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -31,3 +46,15 @@ class AuthorizedPlate(Base):
         onupdate=_utc_now,
         server_default=func.now(),
     )
+    # Janela de validade (visitantes/prestadores); colunas nulas não restringem
+    valid_from: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    valid_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Máscara de bits dos dias da semana (bit 0 = segunda … bit 6 = domingo)
+    allowed_weekdays: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    daily_start: Mapped[time | None] = mapped_column(Time, nullable=True)
+    daily_end: Mapped[time | None] = mapped_column(Time, nullable=True)
+
+    @property
+    def weekdays(self) -> list[int] | None:
+        """Dias da semana permitidos (0 = segunda … 6 = domingo), ou None para todos."""
+        return mask_to_weekdays(self.allowed_weekdays)
@@ -0,0 +1,30 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from apps.api.src.api.v1.db.base import Base
+
+
+def _utc_now() -> datetime:
+    return datetime.now(UTC)
+
+
+class ImageBlob(Base):
+    """Contagem de referências de uma imagem endereçada pelo conteúdo.
+
+    Imagens idênticas são guardadas uma única vez (`ab/cd/<sha256><ext>`); `ref_count`
+    conta os logs de acesso que apontam para a imagem, que só é apagada do disco
+    quando a contagem chega a zero.
+    """
+
+    __tablename__ = "image_blobs"
+
+    storage_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=_utc_now,
+        server_default=func.now(),
+    )
@@ -0,0 +1,40 @@
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from apps.api.src.api.v1.db.base import GUID, Base
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangeOp
+
+
+def _utc_now() -> datetime:
+    return datetime.now(UTC)
+
+
+class WhitelistChange(Base):
+    """Histórico de versões da whitelist (inserções e tombstones de remoções).
+
+    `version` é monotonicamente crescente e serve de cursor para a sincronização
+    incremental dos dispositivos de borda (`GET /whitelist/changes?since=`).
+    """
+
+    __tablename__ = "whitelist_changes"
+
+    version: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    op: Mapped[WhitelistChangeOp] = mapped_column(
+        SAEnum(WhitelistChangeOp, name="whitelist_change_op", native_enum=False, length=16),
+        nullable=False,
+    )
+    normalized_plate: Mapped[str] = mapped_column(String, nullable=False)
+    # Sem FK: o tombstone sobrevive à remoção da placa
+    plate_id: Mapped[uuid.UUID] = mapped_column(GUID(), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=_utc_now,
+        server_default=func.now(),
+    )
@@ -8,10 +8,16 @@ from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepo
 from apps.api.src.api.v1.repositories.authorized_plate_repository import (
     AuthorizedPlateRepository,
 )
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
 from apps.api.src.api.v1.repositories.user_repository import UserRepository
+from apps.api.src.api.v1.repositories.whitelist_change_repository import (
+    WhitelistChangeRepository,
+)
 
 __all__ = [
     "AccessLogRepository",
     "AuthorizedPlateRepository",
+    "ImageBlobRepository",
     "UserRepository",
+    "WhitelistChangeRepository",
 ]
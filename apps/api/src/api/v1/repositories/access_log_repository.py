@@ -1,13 +1,55 @@
 """Repository para operações de acesso a dados de logs de acesso."""
 
+import uuid
+from collections.abc import Collection, Iterator, Sequence
 from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import ColumnElement, Row, and_, case, func, insert, or_, select, update
 from sqlalchemy.orm import Session
 
-from apps.api.src.api.v1.models.access_log import AccessLog
-from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.models.access_log import AccessLog, AccessLogEvent
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.schemas.access_log import AccessStatus, PlateMatchType
+from apps.api.src.api.v1.utils.plate import (
+    normalize_plate,
+    plate_equivalence_key,
+    validate_brazilian_plate,
+)
+
+# Colunas com imagens sujeitas à retenção: quadro completo e recorte da placa
+_IMAGE_COLUMNS = {
+    "image_storage_key": AccessLog.image_storage_key,
+    "plate_crop_key": AccessLog.plate_crop_key,
+}
+
+
+def _plate_condition(plate_filter: str) -> ColumnElement[bool]:
+    """Placa completa: igualdade na chave de equivalência (indexada); senão, busca parcial."""
+    is_full_plate, _ = validate_brazilian_plate(plate_filter)
+    if is_full_plate:
+        return AccessLog.plate_key == plate_equivalence_key(normalize_plate(plate_filter))
+    return AccessLog.plate_string_detected.ilike(f"%{plate_filter}%")
+
+
+def _log_filters(
+    plate_filter: str | None,
+    status_filter: AccessStatus | None,
+    start_date: datetime | None,
+    end_date: datetime | None,
+) -> list[ColumnElement[bool]]:
+    """Condições dos filtros da listagem (placa, status e intervalo inclusivo de datas)."""
+    conditions = []
+    if plate_filter:
+        conditions.append(_plate_condition(plate_filter))
+    if status_filter:
+        conditions.append(AccessLog.status == status_filter)
+    if start_date:
+        conditions.append(AccessLog.timestamp >= start_date)
+    if end_date:
+        conditions.append(AccessLog.timestamp <= end_date)
+    return conditions
 
 
 class AccessLogRepository:
@@ -27,6 +69,270 @@ class AccessLogRepository:
         """
         return db.scalar(select(AccessLog).where(AccessLog.id == log_id))
 
+    @staticmethod
+    def get_by_event_id(db: Session, event_id: str) -> AccessLog | None:
+        """
+        Busca o log registrado com uma chave de idempotência.
+
+        A chave pode ser a do próprio log ou a de uma leitura repetida agregada a ele.
+
+        Args:
+            db: Sessão do banco de dados
+            event_id: Chave enviada pelo dispositivo
+
+        Returns:
+            AccessLog se encontrado, None caso contrário
+        """
+        return db.scalar(
+            select(AccessLog).where(AccessLog.event_id == event_id)
+        ) or AccessLogRepository.get_by_coalesced_event_id(db, event_id)
+
+    @staticmethod
+    def get_by_coalesced_event_id(db: Session, event_id: str) -> AccessLog | None:
+        """
+        Busca o log ao qual foi agregada a leitura repetida com esta chave.
+
+        Args:
+            db: Sessão do banco de dados
+            event_id: Chave enviada pelo dispositivo
+
+        Returns:
+            AccessLog se encontrado, None caso contrário
+        """
+        return db.scalar(
+            select(AccessLog)
+            .join(AccessLogEvent, AccessLogEvent.access_log_id == AccessLog.id)
+            .where(AccessLogEvent.event_id == event_id)
+        )
+
+    @staticmethod
+    def get_by_event_ids(db: Session, event_ids: Collection[str]) -> dict[str, AccessLog]:
+        """
+        Resolve várias chaves de idempotência com consultas `IN (...)`.
+
+        As chaves que não são de nenhum log são procuradas entre as leituras repetidas
+        agregadas (ver `get_by_event_id`).
+
+        Args:
+            db: Sessão do banco de dados
+            event_ids: Chaves enviadas pelo dispositivo
+
+        Returns:
+            Dicionário `event_id -> AccessLog` apenas com as encontradas
+        """
+        if not event_ids:
+            return {}
+        logs = db.scalars(select(AccessLog).where(AccessLog.event_id.in_(event_ids)))
+        found = {log.event_id: log for log in logs}
+        missing = [event_id for event_id in event_ids if event_id not in found]
+        if missing:
+            coalesced = db.execute(
+                select(AccessLogEvent.event_id, AccessLog)
+                .join(AccessLog, AccessLogEvent.access_log_id == AccessLog.id)
+                .where(AccessLogEvent.event_id.in_(missing))
+            )
+            found.update((event_id, log) for event_id, log in coalesced)
+        return found
+
+    @staticmethod
+    def get_existing_ids(db: Session, log_ids: Collection[UUID]) -> set[UUID]:
+        """
+        Verifica numa única consulta `IN (...)` quais IDs já estão gravados.
+
+        Args:
+            db: Sessão do banco de dados
+            log_ids: IDs a verificar
+
+        Returns:
+            Subconjunto de `log_ids` presente no banco
+        """
+        if not log_ids:
+            return set()
+        return set(db.scalars(select(AccessLog.id).where(AccessLog.id.in_(log_ids))))
+
+    @staticmethod
+    def iter_image_keys(
+        db: Session, after: UUID | None = None, limit: int = 500
+    ) -> list[tuple[UUID, str]]:
+        """
+        Lista as chaves de imagem dos logs, paginando pelo ID (keyset).
+
+        Args:
+            db: Sessão do banco de dados
+            after: Último ID da página anterior (None para começar)
+            limit: Tamanho da página
+
+        Returns:
+            Pares `(id, image_storage_key)` ordenados pelo ID
+        """
+        query = (
+            select(AccessLog.id, AccessLog.image_storage_key)
+            .where(AccessLog.image_storage_key.is_not(None))
+            .order_by(AccessLog.id)
+        )
+        if after is not None:
+            query = query.where(AccessLog.id > after)
+        return [tuple(row) for row in db.execute(query.limit(limit))]
+
+    @staticmethod
+    def replace_image_keys(db: Session, keys: dict[UUID, str]) -> None:
+        """
+        Troca a chave de imagem de vários logs e regista as novas referências (com commit).
+
+        Args:
+            db: Sessão do banco de dados
+            keys: Nova chave por ID de log
+        """
+        if not keys:
+            return
+        try:
+            db.execute(
+                update(AccessLog),
+                [{"id": log_id, "image_storage_key": key} for log_id, key in keys.items()],
+            )
+            ImageBlobRepository.add_references(db, keys.values())
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def replace_image_key(db: Session, old_key: str, new_key: str) -> int:
+        """
+        Troca uma imagem por outra em todos os logs que a usam (com commit).
+
+        A referência à imagem antiga não é retirada aqui: cabe ao chamador libertá-la
+        depois do commit, uma vez por log devolvido (ver `ImageStore.release`).
+
+        Args:
+            db: Sessão do banco de dados
+            old_key: Chave da imagem substituída
+            new_key: Chave da nova imagem
+
+        Returns:
+            Número de logs alterados
+        """
+        try:
+            result = db.execute(
+                update(AccessLog)
+                .where(AccessLog.image_storage_key == old_key)
+                .values(image_storage_key=new_key)
+            )
+            ImageBlobRepository.add_references(db, [new_key] * result.rowcount)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return result.rowcount
+
+    @staticmethod
+    def set_plate_crop(db: Session, log_id: UUID, crop_key: str) -> bool:
+        """
+        Regista o recorte da placa de um log que ainda não o tenha (com commit).
+
+        Args:
+            db: Sessão do banco de dados
+            log_id: ID do log
+            crop_key: Chave da imagem do recorte
+
+        Returns:
+            False se o log já não existir ou já tiver um recorte
+        """
+        try:
+            result = db.execute(
+                update(AccessLog)
+                .where(AccessLog.id == log_id, AccessLog.plate_crop_key.is_(None))
+                .values(plate_crop_key=crop_key)
+            )
+            if result.rowcount:
+                ImageBlobRepository.add_references(db, [crop_key])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return bool(result.rowcount)
+
+    @staticmethod
+    def get_expired_images(
+        db: Session,
+        column: str,
+        cutoff: datetime | None,
+        authorized_cutoff: datetime | None,
+        after: tuple[datetime, UUID] | None = None,
+        limit: int = 500,
+    ) -> list[tuple[UUID, datetime, str]]:
+        """
+        Lista os logs com imagens expiradas, paginando por data e ID (keyset).
+
+        Args:
+            db: Sessão do banco de dados
+            column: `image_storage_key` (quadros) ou `plate_crop_key` (recortes)
+            cutoff: Imagens de logs anteriores a este instante expiram (None: nunca)
+            authorized_cutoff: Limite para os logs `Authorized` (None: nunca)
+            after: `(timestamp, id)` do último log da página anterior
+            limit: Tamanho da página
+
+        Returns:
+            Triplos `(id, timestamp, chave)` ordenados por data
+        """
+        key = _IMAGE_COLUMNS[column]
+        authorized = AccessLog.status == AccessStatus.Authorized
+        conditions = []
+        if authorized_cutoff is not None:
+            conditions.append(and_(authorized, AccessLog.timestamp < authorized_cutoff))
+        if cutoff is not None:
+            conditions.append(and_(~authorized, AccessLog.timestamp < cutoff))
+        if not conditions:
+            return []
+        query = (
+            select(AccessLog.id, AccessLog.timestamp, key)
+            .where(key.is_not(None), or_(*conditions))
+            .order_by(AccessLog.timestamp, AccessLog.id)
+        )
+        if after is not None:
+            after_timestamp, after_id = after
+            query = query.where(
+                or_(
+                    AccessLog.timestamp > after_timestamp,
+                    and_(AccessLog.timestamp == after_timestamp, AccessLog.id > after_id),
+                )
+            )
+        return [tuple(row) for row in db.execute(query.limit(limit))]
+
+    @staticmethod
+    def clear_images(db: Session, column: str, images: list[tuple[UUID, str]]) -> list[str]:
+        """
+        Retira as imagens indicadas dos seus logs, numa transação (com commit).
+
+        Um log cuja chave tenha mudado entretanto (ex.: imagem recomprimida) fica como
+        está. As referências não são retiradas aqui: cabe ao chamador libertar as chaves
+        devolvidas depois do commit (ver `ImageStore.release`).
+
+        Args:
+            db: Sessão do banco de dados
+            column: `image_storage_key` (quadros) ou `plate_crop_key` (recortes)
+            images: Pares `(id, chave)` lidos por `get_expired_images`
+
+        Returns:
+            Chaves efetivamente retiradas (uma por log)
+        """
+        key = _IMAGE_COLUMNS[column]
+        cleared = []
+        try:
+            for log_id, image_key in images:
+                result = db.execute(
+                    update(AccessLog)
+                    .where(AccessLog.id == log_id, key == image_key)
+                    .values({key: None})
+                )
+                if result.rowcount:
+                    cleared.append(image_key)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return cleared
+
     @staticmethod
     def get_all(
         db: Session,
@@ -44,7 +350,8 @@ class AccessLogRepository:
             db: Sessão do banco de dados
             skip: Número de registros a pular (paginação)
             limit: Número máximo de registros a retornar
-            plate_filter: Filtrar por placa (busca parcial, case-insensitive)
+            plate_filter: Filtrar por placa (uma placa completa casa exatamente com os
+                formatos antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
             status_filter: Filtrar por status de acesso
             start_date: Data inicial para filtrar (inclusive)
             end_date: Data final para filtrar (inclusive)
@@ -55,20 +362,7 @@ class AccessLogRepository:
         query = select(AccessLog)
 
         # Aplicar filtros
-        conditions = []
-
-        if plate_filter:
-            conditions.append(AccessLog.plate_string_detected.ilike(f"%{plate_filter}%"))
-
-        if status_filter:
-            conditions.append(AccessLog.status == status_filter)
-
-        if start_date:
-            conditions.append(AccessLog.timestamp >= start_date)
-
-        if end_date:
-            conditions.append(AccessLog.timestamp <= end_date)
-
+        conditions = _log_filters(plate_filter, status_filter, start_date, end_date)
         if conditions:
             query = query.where(and_(*conditions))
 
@@ -77,6 +371,52 @@ class AccessLogRepository:
 
         return list(db.scalars(query))
 
+    @staticmethod
+    def iter_for_export(
+        db: Session,
+        plate_filter: str | None = None,
+        status_filter: AccessStatus | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        batch_size: int = 500,
+    ) -> Iterator[Row]:
+        """
+        Percorre os logs filtrados com um cursor do lado do servidor.
+
+        As linhas chegam em blocos de `batch_size` (`yield_per`), por isso a memória não
+        depende do número de logs. O cursor fica aberto até o iterador ser esgotado ou
+        fechado.
+
+        Args:
+            db: Sessão do banco de dados
+            plate_filter: Filtrar por placa (como em `get_all`)
+            status_filter: Filtrar por status de acesso
+            start_date: Data inicial para filtrar (inclusive)
+            end_date: Data final para filtrar (inclusive)
+            batch_size: Linhas lidas do cursor de cada vez
+
+        Returns:
+            Linhas com `id`, `timestamp`, `plate_string_detected`, `status`, `device_id`,
+            `image_storage_key` e `plate_crop_key`, por ordem cronológica
+        """
+        query = select(
+            AccessLog.id,
+            AccessLog.timestamp,
+            AccessLog.plate_string_detected,
+            AccessLog.status,
+            AccessLog.device_id,
+            AccessLog.image_storage_key,
+            AccessLog.plate_crop_key,
+        ).order_by(AccessLog.timestamp, AccessLog.id)
+        conditions = _log_filters(plate_filter, status_filter, start_date, end_date)
+        if conditions:
+            query = query.where(and_(*conditions))
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        try:
+            yield from result
+        finally:
+            result.close()
+
     @staticmethod
     def create(
         db: Session,
@@ -84,6 +424,10 @@ class AccessLogRepository:
         status: AccessStatus,
         image_storage_key: str,
         authorized_plate_id: UUID | None = None,
+        match_type: PlateMatchType | None = None,
+        match_distance: int | None = None,
+        event_id: str | None = None,
+        device_id: str | None = None,
     ) -> AccessLog:
         """
         Cria um novo registro de log de acesso.
@@ -94,23 +438,33 @@ class AccessLogRepository:
             status: Status do acesso (AccessStatus enum)
             image_storage_key: Caminho ou chave para a imagem armazenada
             authorized_plate_id: ID da placa autorizada, se houver
+            match_type: Tipo de correspondência com a whitelist, se houver
+            match_distance: Distância de edição da correspondência, se houver
+            event_id: Chave de idempotência enviada pelo dispositivo, se houver
+            device_id: Identificador da câmera que fez a leitura, se houver
 
         Returns:
             AccessLog criado
-        """
 
-        # Definir timestamp manualmente (necessário para SQLite)
-        now = datetime.now(UTC)
+        Raises:
+            IntegrityError: Se já existir um log com o mesmo `event_id`
+        """
 
         db_log = AccessLog(
-            plate_string_detected=plate_string_detected,
-            status=status,
-            image_storage_key=image_storage_key,
-            authorized_plate_id=authorized_plate_id,
-            timestamp=now,
+            **AccessLogRepository.new_row(
+                plate_string_detected=plate_string_detected,
+                status=status,
+                image_storage_key=image_storage_key,
+                authorized_plate_id=authorized_plate_id,
+                match_type=match_type,
+                match_distance=match_distance,
+                event_id=event_id,
+                device_id=device_id,
+            )
         )
         db.add(db_log)
         try:
+            ImageBlobRepository.add_references(db, [image_storage_key])
             db.commit()
             db.refresh(db_log)
         except Exception:
@@ -118,6 +472,158 @@ class AccessLogRepository:
             raise
         return db_log
 
+    @staticmethod
+    def new_row(
+        plate_string_detected: str,
+        status: AccessStatus,
+        image_storage_key: str,
+        authorized_plate_id: UUID | None = None,
+        match_type: PlateMatchType | None = None,
+        match_distance: int | None = None,
+        timestamp: datetime | None = None,
+        event_id: str | None = None,
+        device_id: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Monta os valores de um novo log de acesso, incluindo ID, timestamp e chave da placa.
+
+        Args:
+            plate_string_detected: String da placa detectada pelo OCR
+            status: Status do acesso (AccessStatus enum)
+            image_storage_key: Caminho ou chave para a imagem armazenada
+            authorized_plate_id: ID da placa autorizada, se houver
+            match_type: Tipo de correspondência com a whitelist, se houver
+            match_distance: Distância de edição da correspondência, se houver
+            timestamp: Instante do acesso (padrão: agora), ex.: captura no dispositivo
+            event_id: Chave de idempotência enviada pelo dispositivo, se houver
+            device_id: Identificador da câmera que fez a leitura, se houver
+
+        Returns:
+            Dicionário com os valores de todas as colunas de `access_logs`
+        """
+        return {
+            "id": uuid.uuid4(),
+            # Definir timestamp manualmente (necessário para SQLite)
+            "timestamp": timestamp or datetime.now(UTC),
+            "plate_string_detected": plate_string_detected,
+            "plate_key": plate_equivalence_key(normalize_plate(plate_string_detected)),
+            "status": status,
+            "image_storage_key": image_storage_key,
+            "authorized_plate_id": authorized_plate_id,
+            "match_type": match_type,
+            "match_distance": match_distance,
+            "event_id": event_id,
+            "device_id": device_id,
+            "read_count": 1,
+        }
+
+    @staticmethod
+    def create_many(db: Session, rows: Sequence[dict[str, Any]]) -> list[AccessLog]:
+        """
+        Grava vários logs de acesso numa única transação (INSERT multi-linha com RETURNING),
+        junto com as referências às suas imagens.
+
+        Args:
+            db: Sessão do banco de dados
+            rows: Valores montados por `new_row`
+
+        Returns:
+            AccessLogs criados, na mesma ordem de `rows`
+        """
+        if not rows:
+            return []
+        try:
+            logs = list(
+                db.scalars(
+                    insert(AccessLog).returning(AccessLog, sort_by_parameter_order=True),
+                    list(rows),
+                )
+            )
+            ImageBlobRepository.add_references(db, (row["image_storage_key"] for row in rows))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return logs
+
+    @staticmethod
+    def register_repeat_read(
+        db: Session,
+        log_id: UUID,
+        seen_at: datetime,
+        image_storage_key: str | None = None,
+        replaces: str | None = None,
+        event_id: str | None = None,
+    ) -> AccessLog | None:
+        """
+        Agrega uma leitura repetida a um log existente.
+
+        A referência à imagem substituída não é retirada aqui: cabe ao chamador
+        libertá-la depois do commit (ver `ImageStore.release`), se o log devolvido tiver
+        a nova imagem. A chave de idempotência da leitura fica associada ao log na
+        mesma transação.
+
+        Args:
+            db: Sessão do banco de dados
+            log_id: ID do log ao qual a leitura é agregada
+            seen_at: Instante da leitura
+            image_storage_key: Nova imagem do log, se a da leitura a substituir
+            replaces: Imagem que o chamador julga ser a atual; se o log tiver entretanto
+                outra (ex.: recomprimida), a imagem não é trocada
+            event_id: Chave de idempotência enviada com a leitura, se houver
+
+        Returns:
+            AccessLog atualizado, ou None se o log já não existir
+
+        Raises:
+            IntegrityError: Se a chave já estiver associada a um log
+        """
+        values: dict[str, Any] = {"read_count": AccessLog.read_count + 1, "last_seen_at": seen_at}
+        if image_storage_key is not None:
+            values["image_storage_key"] = (
+                case(
+                    (AccessLog.image_storage_key == replaces, image_storage_key),
+                    else_=AccessLog.image_storage_key,
+                )
+                if replaces is not None
+                else image_storage_key
+            )
+        try:
+            access_log = db.scalar(
+                update(AccessLog)
+                .where(AccessLog.id == log_id)
+                .values(**values)
+                .returning(AccessLog)
+            )
+            if access_log is not None and access_log.image_storage_key == image_storage_key:
+                ImageBlobRepository.add_references(db, [image_storage_key])
+            if access_log is not None and event_id is not None:
+                db.execute(insert(AccessLogEvent).values(event_id=event_id, access_log_id=log_id))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return access_log
+
+    @staticmethod
+    def detach_authorized_plates(db: Session, plate_ids: Collection[UUID]) -> None:
+        """
+        Remove o vínculo dos logs com placas autorizadas prestes a ser excluídas.
+
+        Não faz commit: deve ser chamado na mesma transação que exclui as placas.
+
+        Args:
+            db: Sessão do banco de dados
+            plate_ids: IDs das placas autorizadas
+        """
+        if not plate_ids:
+            return
+        db.execute(
+            update(AccessLog)
+            .where(AccessLog.authorized_plate_id.in_(plate_ids))
+            .values(authorized_plate_id=None)
+        )
+
     @staticmethod
     def count(
         db: Session,
@@ -131,7 +637,8 @@ class AccessLogRepository:
 
         Args:
             db: Sessão do banco de dados
-            plate_filter: Filtrar por placa (busca parcial, case-insensitive)
+            plate_filter: Filtrar por placa (uma placa completa casa exatamente com os
+                formatos antigo e Mercosul; outro valor é uma busca parcial, case-insensitive)
             status_filter: Filtrar por status de acesso
             start_date: Data inicial para filtrar (inclusive)
             end_date: Data final para filtrar (inclusive)
@@ -142,20 +649,7 @@ class AccessLogRepository:
         query = select(func.count(AccessLog.id))
 
         # Aplicar filtros
-        conditions = []
-
-        if plate_filter:
-            conditions.append(AccessLog.plate_string_detected.ilike(f"%{plate_filter}%"))
-
-        if status_filter:
-            conditions.append(AccessLog.status == status_filter)
-
-        if start_date:
-            conditions.append(AccessLog.timestamp >= start_date)
-
-        if end_date:
-            conditions.append(AccessLog.timestamp <= end_date)
-
+        conditions = _log_filters(plate_filter, status_filter, start_date, end_date)
         if conditions:
             query = query.where(and_(*conditions))
 
@@ -1,12 +1,37 @@
 """Repository para operações de acesso a dados de placas autorizadas."""
 
+import csv
+import io
+import uuid
+from collections.abc import Collection, Sequence
 from datetime import UTC, datetime
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import bindparam, delete, func, insert, literal, or_, select, tuple_, update
 from sqlalchemy.orm import Session
 
 from apps.api.src.api.v1.models.authorized_plate import AuthorizedPlate
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.repositories.whitelist_change_repository import (
+    WhitelistChangeRepository,
+)
+from apps.api.src.api.v1.schemas.authorized_plate import WhitelistSort
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangeOp
+from apps.api.src.api.v1.utils.plate import plate_equivalence_key
+from apps.api.src.api.v1.utils.validity import ValidityWindow
+
+# Valores por cláusula `IN (...)` (remoções e consultas por lotes de IDs)
+_IN_CLAUSE_BATCH_SIZE = 1000
+
+# Colunas da janela de validade (mesmos nomes dos campos de ValidityWindow)
+_VALIDITY_COLUMNS = ("valid_from", "valid_until", "allowed_weekdays", "daily_start", "daily_end")
+
+
+def _validity_values(window: ValidityWindow | None) -> dict:
+    """Valores das colunas de validade (todas None para entradas sem restrição)."""
+    if window is None:
+        return dict.fromkeys(_VALIDITY_COLUMNS)
+    return {column: getattr(window, column) for column in _VALIDITY_COLUMNS}
 
 
 class AuthorizedPlateRepository:
@@ -29,7 +54,11 @@ class AuthorizedPlateRepository:
     @staticmethod
     def get_by_normalized_plate(db: Session, normalized_plate: str) -> AuthorizedPlate | None:
         """
-        Busca uma placa autorizada pela versão normalizada.
+        Busca uma placa autorizada pela versão normalizada, em qualquer dos formatos.
+
+        A consulta usa o índice de `plate_key`, de modo que `ABC1234` encontra também
+        `ABC1C34` (e vice-versa). Se ambos os formatos estiverem cadastrados, é
+        preferida a entrada com a mesma forma normalizada.
 
         Args:
             db: Sessão do banco de dados
@@ -38,24 +67,359 @@ class AuthorizedPlateRepository:
         Returns:
             AuthorizedPlate se encontrada, None caso contrário
         """
-        return db.scalar(
-            select(AuthorizedPlate).where(AuthorizedPlate.normalized_plate == normalized_plate)
-        )
+        plates = db.scalars(
+            select(AuthorizedPlate).where(
+                AuthorizedPlate.plate_key == plate_equivalence_key(normalized_plate)
+            )
+        ).all()
+        for plate in plates:
+            if plate.normalized_plate == normalized_plate:
+                return plate
+        return plates[0] if plates else None
+
+    @staticmethod
+    def sort_key(plate: AuthorizedPlate, sort: WhitelistSort) -> tuple:
+        """Valores da chave de ordenação de uma placa (para montar o cursor)."""
+        if sort is WhitelistSort.plate:
+            return plate.normalized_plate, plate.id
+        return plate.created_at, plate.id
 
     @staticmethod
-    def get_all(db: Session, skip: int = 0, limit: int = 100) -> list[AuthorizedPlate]:
+    def get_all(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        plate_prefix: str | None = None,
+        description_filter: str | None = None,
+        sort: WhitelistSort = WhitelistSort.plate,
+        after: tuple | None = None,
+    ) -> list[AuthorizedPlate]:
         """
-        Lista placas autorizadas com paginação.
+        Lista placas autorizadas com filtros e paginação.
+
+        A ordenação é sempre total (`id` como desempate), de modo que as páginas são
+        estáveis entre requisições. Com `after`, a paginação é por chave (keyset):
+        `WHERE (chave, id) > after`, resolvido pelo índice, com custo constante em
+        qualquer página — ao contrário de `skip`, que percorre as linhas puladas.
 
         Args:
             db: Sessão do banco de dados
             skip: Número de registros a pular
             limit: Número máximo de registros a retornar
+            plate_prefix: Prefixo da placa normalizada (`LIKE 'ABC%'`, indexado)
+            description_filter: Filtro parcial e case-insensitive sobre a descrição
+            sort: Ordenação
+            after: Chave de ordenação (ver `sort_key`) do último item da página anterior
 
         Returns:
             Lista de placas autorizadas
         """
-        return list(db.scalars(select(AuthorizedPlate).offset(skip).limit(limit)))
+        if sort is WhitelistSort.plate:
+            key_columns = (AuthorizedPlate.normalized_plate, AuthorizedPlate.id)
+        else:
+            key_columns = (AuthorizedPlate.created_at, AuthorizedPlate.id)
+        descending = sort is WhitelistSort.created_at_desc
+
+        query = select(AuthorizedPlate)
+        if plate_prefix:
+            query = query.where(AuthorizedPlate.normalized_plate.like(f"{plate_prefix}%"))
+        if description_filter:
+            query = query.where(
+                AuthorizedPlate.description.icontains(description_filter, autoescape=True)
+            )
+        if after is not None:
+            key = tuple_(*key_columns)
+            bound = tuple_(
+                *(
+                    literal(value, column.type)
+                    for column, value in zip(key_columns, after, strict=True)
+                )
+            )
+            query = query.where(key < bound if descending else key > bound)
+        query = query.order_by(*(column.desc() if descending else column for column in key_columns))
+        return list(db.scalars(query.offset(skip).limit(limit)))
+
+    @staticmethod
+    def get_all_normalized(db: Session) -> list[tuple[str, UUID]]:
+        """
+        Lista todos os pares (placa normalizada, ID) da whitelist.
+
+        Seleciona apenas as duas colunas necessárias para montar índices em memória,
+        sem materializar entidades ORM.
+
+        Args:
+            db: Sessão do banco de dados
+
+        Returns:
+            Lista de tuplas (normalized_plate, id)
+        """
+        rows = db.execute(select(AuthorizedPlate.normalized_plate, AuthorizedPlate.id))
+        return [(normalized, plate_id) for normalized, plate_id in rows]
+
+    @staticmethod
+    def get_existing_keys(db: Session, plate_keys: Collection[str]) -> set[str]:
+        """
+        Retorna, dentre as chaves de equivalência informadas, as que já existem.
+
+        Args:
+            db: Sessão do banco de dados
+            plate_keys: Chaves de equivalência a verificar (ver `plate_equivalence_key`)
+
+        Returns:
+            Conjunto das chaves já cadastradas
+        """
+        if not plate_keys:
+            return set()
+        return set(
+            db.scalars(
+                select(AuthorizedPlate.plate_key).where(AuthorizedPlate.plate_key.in_(plate_keys))
+            )
+        )
+
+    @staticmethod
+    def get_by_plate_keys(db: Session, plate_keys: Collection[str]) -> dict[str, AuthorizedPlate]:
+        """
+        Resolve várias chaves de equivalência numa única consulta `IN (...)`.
+
+        Args:
+            db: Sessão do banco de dados
+            plate_keys: Chaves de equivalência a resolver (ver `plate_equivalence_key`)
+
+        Returns:
+            Dicionário `plate_key -> AuthorizedPlate` apenas com as encontradas
+        """
+        if not plate_keys:
+            return {}
+        plates = db.scalars(
+            select(AuthorizedPlate).where(AuthorizedPlate.plate_key.in_(plate_keys))
+        )
+        return {plate.plate_key: plate for plate in plates}
+
+    @staticmethod
+    def get_validity_windows(
+        db: Session, plate_ids: Collection[UUID] | None = None
+    ) -> dict[UUID, ValidityWindow]:
+        """
+        Lista as janelas de validade das entradas com restrições.
+
+        Args:
+            db: Sessão do banco de dados
+            plate_ids: Limitar a estes IDs (None para toda a whitelist)
+
+        Returns:
+            Dicionário `id -> ValidityWindow` (entradas sem restrição não aparecem)
+        """
+        columns = [getattr(AuthorizedPlate, column) for column in _VALIDITY_COLUMNS]
+        query = select(AuthorizedPlate.id, *columns).where(
+            or_(*(column.is_not(None) for column in columns))
+        )
+        if plate_ids is None:
+            batches = [query]
+        else:
+            ids = list(plate_ids)
+            batches = [
+                query.where(AuthorizedPlate.id.in_(ids[start : start + _IN_CLAUSE_BATCH_SIZE]))
+                for start in range(0, len(ids), _IN_CLAUSE_BATCH_SIZE)
+            ]
+        windows = {}
+        for batch in batches:
+            for row in db.execute(batch):
+                window = ValidityWindow.from_plate(row)
+                if window is not None:
+                    windows[row.id] = window
+        return windows
+
+    @staticmethod
+    def _new_plate_rows(
+        plates: Sequence[tuple[str, str, str | None, ValidityWindow | None]], now: datetime
+    ) -> list[dict]:
+        return [
+            {
+                "id": uuid.uuid4(),
+                "plate": plate,
+                "normalized_plate": normalized,
+                "plate_key": plate_equivalence_key(normalized),
+                "description": description,
+                "created_at": now,
+                "updated_at": now,
+                **_validity_values(window),
+            }
+            for plate, normalized, description, window in plates
+        ]
+
+    @staticmethod
+    def _copy_plates(db: Session, rows: Sequence[dict]) -> None:
+        """Insere linhas via `COPY ... FROM STDIN` (PostgreSQL + psycopg2)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                (
+                    row["id"],
+                    row["plate"],
+                    row["normalized_plate"],
+                    row["plate_key"],
+                    row["description"],
+                    row["created_at"].isoformat(),
+                    row["updated_at"].isoformat(),
+                )
+            )
+        buffer.seek(0)
+        dbapi_connection = db.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY authorized_plates "
+                "(id, plate, normalized_plate, plate_key, description, created_at, updated_at) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    @staticmethod
+    def bulk_create(
+        db: Session, plates: Sequence[tuple[str, str, str | None]]
+    ) -> list[tuple[str, UUID]]:
+        """
+        Cria várias placas autorizadas numa única instrução e num único commit.
+
+        Em PostgreSQL com psycopg2 usa `COPY`; nos demais bancos, um `INSERT` em modo
+        executemany sobre a tabela (o driver agrupa as linhas em lotes, sem passar pela
+        unidade de trabalho do ORM). As placas devem estar validadas e não duplicadas.
+
+        Args:
+            db: Sessão do banco de dados
+            plates: Tuplas (plate, normalized_plate, description)
+
+        Returns:
+            Lista de pares (normalized_plate, id) das placas criadas
+        """
+        if not plates:
+            return []
+        # Definir timestamps manualmente (necessário para SQLite)
+        rows = AuthorizedPlateRepository._new_plate_rows(
+            [(*plate, None) for plate in plates], datetime.now(UTC)
+        )
+        bind = db.get_bind()
+        try:
+            if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+                AuthorizedPlateRepository._copy_plates(db, rows)
+            else:
+                db.execute(insert(AuthorizedPlate.__table__), rows)
+            WhitelistChangeRepository.record(
+                db, WhitelistChangeOp.upsert, [(row["normalized_plate"], row["id"]) for row in rows]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return [(row["normalized_plate"], row["id"]) for row in rows]
+
+    @staticmethod
+    def get_all_for_sync(
+        db: Session,
+    ) -> list[tuple[UUID, str, str, str | None, ValidityWindow | None]]:
+        """
+        Lista as colunas comparadas na sincronização de toda a whitelist.
+
+        Args:
+            db: Sessão do banco de dados
+
+        Returns:
+            Lista de tuplas (id, normalized_plate, plate, description, janela de validade)
+        """
+        rows = db.execute(
+            select(
+                AuthorizedPlate.id,
+                AuthorizedPlate.normalized_plate,
+                AuthorizedPlate.plate,
+                AuthorizedPlate.description,
+                *(getattr(AuthorizedPlate, column) for column in _VALIDITY_COLUMNS),
+            )
+        )
+        return [
+            (
+                row.id,
+                row.normalized_plate,
+                row.plate,
+                row.description,
+                ValidityWindow.from_plate(row),
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def apply_sync(
+        db: Session,
+        creates: Sequence[tuple[str, str, str | None, ValidityWindow | None]],
+        updates: Sequence[tuple[UUID, str, str, str | None, ValidityWindow | None]],
+        deletes: Sequence[tuple[UUID, str]],
+    ) -> list[tuple[str, UUID]]:
+        """
+        Aplica inserções, atualizações e remoções numa única transação.
+
+        Cada tipo de operação é executado em modo executemany (remoções em lotes de
+        `IN (...)`); linhas que não constam de nenhuma lista não são tocadas. Os logs de
+        acesso das placas removidas são preservados, sem o vínculo com a placa.
+
+        Args:
+            db: Sessão do banco de dados
+            creates: Tuplas (plate, normalized_plate, description, janela) a inserir
+            updates: Tuplas (id, normalized_plate, plate, description, janela) a atualizar
+            deletes: Pares (id, normalized_plate) a remover
+
+        Returns:
+            Lista de pares (normalized_plate, id) das placas criadas
+        """
+        table = AuthorizedPlate.__table__
+        # Definir timestamps manualmente (necessário para SQLite)
+        now = datetime.now(UTC)
+        rows = AuthorizedPlateRepository._new_plate_rows(creates, now)
+        try:
+            if rows:
+                db.execute(insert(table), rows)
+            if updates:
+                db.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("target_id"))
+                    .values(
+                        plate=bindparam("new_plate"),
+                        description=bindparam("new_description"),
+                        updated_at=now,
+                        **{column: bindparam(f"new_{column}") for column in _VALIDITY_COLUMNS},
+                    ),
+                    [
+                        {
+                            "target_id": plate_id,
+                            "new_plate": plate,
+                            "new_description": description,
+                            **{
+                                f"new_{column}": value
+                                for column, value in _validity_values(window).items()
+                            },
+                        }
+                        for plate_id, _, plate, description, window in updates
+                    ],
+                )
+            for start in range(0, len(deletes), _IN_CLAUSE_BATCH_SIZE):
+                batch = [plate_id for plate_id, _ in deletes[start : start + _IN_CLAUSE_BATCH_SIZE]]
+                AccessLogRepository.detach_authorized_plates(db, batch)
+                db.execute(delete(table).where(table.c.id.in_(batch)))
+            # Atualizações podem mudar a janela de validade: também contam como upsert
+            WhitelistChangeRepository.record(
+                db,
+                WhitelistChangeOp.upsert,
+                [(row["normalized_plate"], row["id"]) for row in rows]
+                + [(normalized, plate_id) for plate_id, normalized, _, _, _ in updates],
+            )
+            WhitelistChangeRepository.record(
+                db,
+                WhitelistChangeOp.delete,
+                [(normalized, plate_id) for plate_id, normalized in deletes],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return [(row["normalized_plate"], row["id"]) for row in rows]
 
     @staticmethod
     def create(
@@ -63,6 +427,7 @@ class AuthorizedPlateRepository:
         plate: str,
         normalized_plate: str,
         description: str | None = None,
+        validity: ValidityWindow | None = None,
     ) -> AuthorizedPlate:
         """
         Cria uma nova placa autorizada.
@@ -72,6 +437,7 @@ class AuthorizedPlateRepository:
             plate: Placa no formato original
             normalized_plate: Placa normalizada
             description: Descrição opcional da placa
+            validity: Janela de validade (None para uma entrada permanente)
 
         Returns:
             AuthorizedPlate criada
@@ -82,12 +448,18 @@ class AuthorizedPlateRepository:
         db_plate = AuthorizedPlate(
             plate=plate,
             normalized_plate=normalized_plate,
+            plate_key=plate_equivalence_key(normalized_plate),
             description=description,
             created_at=now,
             updated_at=now,
+            **_validity_values(validity),
         )
         db.add(db_plate)
         try:
+            db.flush()
+            WhitelistChangeRepository.record(
+                db, WhitelistChangeOp.upsert, [(normalized_plate, db_plate.id)]
+            )
             db.commit()
             db.refresh(db_plate)
         except Exception:
@@ -102,6 +474,7 @@ class AuthorizedPlateRepository:
         plate_value: str,
         normalized_plate: str,
         description: str | None = None,
+        validity: ValidityWindow | None = None,
     ) -> AuthorizedPlate:
         """
         Atualiza uma placa autorizada existente.
@@ -112,17 +485,31 @@ class AuthorizedPlateRepository:
             plate_value: Nova placa no formato original
             normalized_plate: Nova placa normalizada
             description: Nova descrição opcional
+            validity: Nova janela de validade (None para uma entrada permanente)
 
         Returns:
             AuthorizedPlate atualizada
         """
+        previous_normalized = plate.normalized_plate
+        window_changed = ValidityWindow.from_plate(plate) != validity
         plate.plate = plate_value
         plate.normalized_plate = normalized_plate
+        plate.plate_key = plate_equivalence_key(normalized_plate)
         plate.description = description
+        for column, value in _validity_values(validity).items():
+            setattr(plate, column, value)
         # Atualizar timestamp manualmente (necessário para SQLite)
         plate.updated_at = datetime.now(UTC)
 
         try:
+            if previous_normalized != normalized_plate:
+                WhitelistChangeRepository.record(
+                    db, WhitelistChangeOp.delete, [(previous_normalized, plate.id)]
+                )
+            if previous_normalized != normalized_plate or window_changed:
+                WhitelistChangeRepository.record(
+                    db, WhitelistChangeOp.upsert, [(normalized_plate, plate.id)]
+                )
             db.commit()
             db.refresh(plate)
         except Exception:
@@ -146,12 +533,55 @@ class AuthorizedPlateRepository:
         if plate:
             db.delete(plate)
             try:
+                WhitelistChangeRepository.record(
+                    db, WhitelistChangeOp.delete, [(plate.normalized_plate, plate.id)]
+                )
                 db.commit()
             except Exception:
                 db.rollback()
                 raise
         return plate
 
+    @staticmethod
+    def delete_expired(db: Session, now: datetime, limit: int = _IN_CLAUSE_BATCH_SIZE) -> int:
+        """
+        Remove em lote as entradas cujo `valid_until` já passou.
+
+        Os logs de acesso que referenciam as entradas removidas são preservados, sem o
+        vínculo com a placa autorizada. Cada remoção gera uma alteração `delete` no
+        histórico de versões.
+
+        Args:
+            db: Sessão do banco de dados
+            now: Instante de referência
+            limit: Número máximo de entradas removidas nesta chamada
+
+        Returns:
+            Número de entradas removidas
+        """
+        expired = db.execute(
+            select(AuthorizedPlate.id, AuthorizedPlate.normalized_plate)
+            .where(AuthorizedPlate.valid_until <= now)
+            .order_by(AuthorizedPlate.valid_until)
+            .limit(limit)
+        ).all()
+        if not expired:
+            return 0
+        ids = [plate_id for plate_id, _ in expired]
+        try:
+            AccessLogRepository.detach_authorized_plates(db, ids)
+            db.execute(delete(AuthorizedPlate).where(AuthorizedPlate.id.in_(ids)))
+            WhitelistChangeRepository.record(
+                db,
+                WhitelistChangeOp.delete,
+                [(normalized, plate_id) for plate_id, normalized in expired],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(expired)
+
     @staticmethod
     def count(db: Session) -> int:
         """
@@ -0,0 +1,156 @@
+"""Repository para as contagens de referências das imagens endereçadas pelo conteúdo."""
+
+from collections import Counter
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.models.image_blob import ImageBlob
+from apps.api.src.api.v1.utils.image_keys import is_content_key
+
+
+def _count_content_keys(keys: Iterable[str | None]) -> Counter[str]:
+    return Counter(key for key in keys if key is not None and is_content_key(key))
+
+
+class ImageBlobRepository:
+    """Repository para operações de banco de dados das imagens partilhadas."""
+
+    @staticmethod
+    def _upsert(db: Session, counts: Counter[str]) -> None:
+        """Soma `counts` (negativos retiram) às contagens, criando as linhas em falta."""
+        # Ordem fixa das linhas: transações concorrentes bloqueiam-nas pela mesma ordem
+        rows = [{"storage_key": key, "ref_count": counts[key]} for key in sorted(counts)]
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(ImageBlob)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImageBlob.storage_key],
+            set_={"ref_count": ImageBlob.ref_count + stmt.excluded.ref_count},
+        )
+        db.execute(stmt, rows)
+
+    @staticmethod
+    def add_references(db: Session, keys: Iterable[str | None]) -> None:
+        """
+        Soma referências às imagens na transação corrente (sem commit).
+
+        Deve ser chamado pelo repository de logs antes do seu próprio commit, para que o
+        log e a referência à sua imagem sejam gravados atomicamente. Chaves antigas
+        (caminhos) são ignoradas.
+
+        Args:
+            db: Sessão do banco de dados
+            keys: Chaves das imagens referenciadas (uma por log; repetições somam)
+        """
+        counts = _count_content_keys(keys)
+        if counts:
+            ImageBlobRepository._upsert(db, counts)
+
+    @staticmethod
+    def pin(db: Session, key: str) -> None:
+        """
+        Soma uma referência provisória a uma imagem prestes a ser guardada, com commit.
+
+        Enquanto a referência existir, nenhuma libertação concorrente apaga o arquivo;
+        é retirada com `release` depois de gravado (ou não) o log que usa a imagem.
+
+        Args:
+            db: Sessão do banco de dados (sem alterações pendentes)
+            key: Chave da imagem
+        """
+        try:
+            ImageBlobRepository._upsert(db, Counter({key: 1}))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def release(
+        db: Session,
+        keys: Iterable[str | None],
+        delete_unused: Callable[[str], None] | None = None,
+    ) -> list[str]:
+        """
+        Retira referências às imagens e remove as que deixaram de ser usadas.
+
+        As linhas ficam bloqueadas até ao commit e `delete_unused` é chamado antes dele:
+        uma referência tomada em simultâneo (`pin`) espera pelo fim da remoção e a imagem
+        volta então a ser guardada, em vez de ficar um log a apontar para um arquivo
+        apagado. Sem nenhuma referência registrada, a imagem também é removida.
+
+        Args:
+            db: Sessão do banco de dados
+            keys: Chaves das imagens que deixaram de ser referenciadas (repetições somam;
+                uma chave com contagem 0 só é removida se não for usada)
+            delete_unused: Apaga o arquivo de uma imagem sem referências
+
+        Returns:
+            Chaves das imagens sem referências
+        """
+        counts = _count_content_keys(keys)
+        return ImageBlobRepository._settle(db, counts, delete_unused)
+
+    @staticmethod
+    def delete_if_unused(
+        db: Session, key: str, delete_unused: Callable[[str], None] | None = None
+    ) -> bool:
+        """
+        Remove uma imagem que não tenha referências (ver `release`).
+
+        Args:
+            db: Sessão do banco de dados
+            key: Chave da imagem
+            delete_unused: Apaga o arquivo da imagem, se não for usada
+
+        Returns:
+            True se a imagem foi removida
+        """
+        if not is_content_key(key):
+            return False
+        return bool(ImageBlobRepository._settle(db, Counter({key: 0}), delete_unused))
+
+    @staticmethod
+    def _settle(
+        db: Session, counts: Counter[str], delete_unused: Callable[[str], None] | None
+    ) -> list[str]:
+        if not counts:
+            return []
+        try:
+            # O upsert bloqueia as linhas (e cria as que faltem) até ao commit
+            ImageBlobRepository._upsert(db, Counter({key: -n for key, n in counts.items()}))
+            orphaned = list(
+                db.scalars(
+                    select(ImageBlob.storage_key)
+                    .where(ImageBlob.storage_key.in_(counts), ImageBlob.ref_count <= 0)
+                    .order_by(ImageBlob.storage_key)
+                    .with_for_update()
+                )
+            )
+            if orphaned:
+                if delete_unused is not None:
+                    for key in orphaned:
+                        delete_unused(key)
+                db.execute(delete(ImageBlob).where(ImageBlob.storage_key.in_(orphaned)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return orphaned
+
+    @staticmethod
+    def get_ref_count(db: Session, key: str) -> int:
+        """
+        Retorna o número de logs que referenciam uma imagem.
+
+        Args:
+            db: Sessão do banco de dados
+            key: Chave da imagem
+
+        Returns:
+            Contagem de referências (0 se a imagem não estiver registrada)
+        """
+        count = db.scalar(select(ImageBlob.ref_count).where(ImageBlob.storage_key == key))
+        return count or 0
@@ -0,0 +1,89 @@
+"""Repository para o histórico de versões da whitelist."""
+
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.models.whitelist_change import WhitelistChange
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangeOp
+
+
+class WhitelistChangeRepository:
+    """Repository para operações de banco de dados do histórico da whitelist."""
+
+    @staticmethod
+    def record(db: Session, op: WhitelistChangeOp, entries: Iterable[tuple[str, UUID]]) -> None:
+        """
+        Registra alterações da whitelist na transação corrente (sem commit).
+
+        Deve ser chamado pelo repository de placas antes do seu próprio commit, para que
+        a placa e a sua versão sejam gravadas atomicamente.
+
+        Em PostgreSQL, a tabela é bloqueada em modo `SHARE ROW EXCLUSIVE` até ao commit:
+        as escritas na whitelist passam a ser serializadas, de modo que as versões ficam
+        visíveis pela ordem em que foram geradas e nenhum leitor salta uma versão ainda
+        por confirmar. As escritas na whitelist são raras; leituras não são bloqueadas.
+
+        Args:
+            db: Sessão do banco de dados
+            op: Tipo de alteração
+            entries: Pares (normalized_plate, plate_id)
+        """
+        now = datetime.now(UTC)
+        rows = [
+            {"op": op, "normalized_plate": normalized, "plate_id": plate_id, "changed_at": now}
+            for normalized, plate_id in entries
+        ]
+        if not rows:
+            return
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("LOCK TABLE whitelist_changes IN SHARE ROW EXCLUSIVE MODE"))
+        db.execute(insert(WhitelistChange.__table__), rows)
+
+    @staticmethod
+    def get_current_version(db: Session) -> int:
+        """
+        Retorna a versão atual da whitelist.
+
+        Args:
+            db: Sessão do banco de dados
+
+        Returns:
+            Maior versão registrada (0 se ainda não houver alterações)
+        """
+        return db.scalar(select(func.max(WhitelistChange.version))) or 0
+
+    @staticmethod
+    def get_changes_since(
+        db: Session, since: int, limit: int | None = None
+    ) -> list[WhitelistChange]:
+        """
+        Lista a última alteração de cada placa posterior a uma versão.
+
+        Várias alterações da mesma placa colapsam na mais recente, de modo que um
+        dispositivo atrasado recebe apenas o estado final de cada placa.
+
+        Args:
+            db: Sessão do banco de dados
+            since: Versão já conhecida pelo cliente (exclusiva)
+            limit: Número máximo de alterações a retornar (None para todas)
+
+        Returns:
+            Lista de WhitelistChange ordenada por versão
+        """
+        latest = (
+            select(func.max(WhitelistChange.version))
+            .where(WhitelistChange.version > since)
+            .group_by(WhitelistChange.normalized_plate)
+        )
+        query = (
+            select(WhitelistChange)
+            .where(WhitelistChange.version.in_(latest))
+            .order_by(WhitelistChange.version)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return list(db.scalars(query))
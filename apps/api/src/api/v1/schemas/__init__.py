@@ -4,7 +4,7 @@ Este módulo contém os schemas Pydantic usados para validação de entrada
 e serialização de saída da API.
 """
 
-from apps.api.src.api.v1.schemas.access_log import AccessLogRead, AccessStatus
+from apps.api.src.api.v1.schemas.access_log import AccessLogRead, AccessStatus, PlateMatchType
 from apps.api.src.api.v1.schemas.authorized_plate import (
     AuthorizedPlateCreate,
     AuthorizedPlateRead,
@@ -36,6 +36,7 @@ __all__ = [
     "ConnectionResponse",
     "ConnectionStatus",
     "DisconnectResponse",
+    "PlateMatchType",
     "Token",
     "TokenPayload",
     "UserCreate",
@@ -10,6 +10,28 @@ class AccessStatus(str, Enum):
     Denied = "Denied"
 
 
+class ImageFormat(str, Enum):
+    """Formato de saída de uma imagem redimensionada."""
+
+    jpeg = "jpeg"
+    png = "png"
+    webp = "webp"
+
+
+class ArchiveFormat(str, Enum):
+    """Formato do arquivo de exportação de imagens."""
+
+    tar = "tar"
+    zip = "zip"
+
+
+class PlateMatchType(str, Enum):
+    """Como a placa lida foi associada à whitelist."""
+
+    exact = "exact"
+    fuzzy = "fuzzy"
+
+
 class AccessLogRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -19,9 +41,103 @@ class AccessLogRead(BaseModel):
         ..., description="Texto da placa detectado pelo OCR.", example="ABC1234"
     )
     status: AccessStatus = Field(..., description="Status do acesso (Autorizado/Negado).")
-    image_storage_key: str = Field(
-        ..., description="Caminho ou chave para recuperação da imagem armazenada."
+    image_storage_key: str | None = Field(
+        ...,
+        description=(
+            "Caminho ou chave para recuperação da imagem armazenada (nulo depois de a "
+            "imagem expirar)."
+        ),
     )
     authorized_plate_id: UUID | None = Field(
         None, description="ID da placa autorizada associada, se houver."
     )
+    match_type: PlateMatchType | None = Field(
+        None,
+        description=(
+            "Tipo de correspondência com a whitelist: `exact` (placa normalizada idêntica) "
+            "ou `fuzzy` (tolerante a erros de OCR). Nulo quando negado."
+        ),
+    )
+    match_distance: int | None = Field(
+        None,
+        description=(
+            "Distância de edição da correspondência, após mapear caracteres confundíveis "
+            "(O/0, I/1, B/8, S/5). 0 para correspondência exata."
+        ),
+    )
+    event_id: str | None = Field(
+        None,
+        description=(
+            "Chave de idempotência enviada pelo dispositivo (`Idempotency-Key` ou `event_id`)."
+        ),
+    )
+    device_id: str | None = Field(None, description="Câmera que fez a leitura, se informada.")
+    read_count: int = Field(
+        1, description="Leituras da mesma placa pela mesma câmera agregadas a este evento."
+    )
+    last_seen_at: datetime | None = Field(
+        None, description="Instante da última leitura agregada (nulo se houve só uma)."
+    )
+    plate_crop_key: str | None = Field(
+        None, description="Chave do recorte da placa, quando gerado depois da ingestão."
+    )
+    image_url: str | None = Field(
+        None,
+        description=(
+            "URL assinada e temporária da imagem (sem JWT). Só na listagem, para administradores."
+        ),
+    )
+
+
+class AccessLogAccepted(BaseModel):
+    """Evento aceito enquanto o banco estava indisponível (guardado no diário local)."""
+
+    id: UUID = Field(..., description="ID provisório; passa a ser o ID do log quando gravado.")
+    timestamp: datetime = Field(..., description="Data e hora do acesso.")
+    plate_string_detected: str = Field(..., description="Texto da placa detectado pelo OCR.")
+    image_storage_key: str = Field(
+        ..., description="Caminho ou chave para recuperação da imagem armazenada."
+    )
+    event_id: str | None = Field(None, description="Chave de idempotência do evento, se houver.")
+    device_id: str | None = Field(None, description="Câmera que fez a leitura, se informada.")
+    status: AccessStatus | None = Field(
+        None,
+        description=(
+            "Decisão tomada com a whitelist em memória (mantida no log gravado); "
+            "null se não estiver carregada, e então decidida na gravação."
+        ),
+    )
+    provisional: bool = Field(True, description="Sempre verdadeiro: o log ainda não foi gravado.")
+
+
+class BatchItemStatus(str, Enum):
+    """Resultado de um evento num lote de ingestão."""
+
+    created = "created"
+    duplicate = "duplicate"
+    rejected = "rejected"
+
+
+class AccessLogBatchItem(BaseModel):
+    """Resultado de um evento do manifesto de um lote de ingestão."""
+
+    line: int = Field(..., description="Número da linha no manifesto (1-based).")
+    file: str | None = Field(None, description="Imagem referenciada pelo evento.")
+    status: BatchItemStatus = Field(
+        ..., description="`created`, `duplicate` (`event_id` já registrado) ou `rejected`."
+    )
+    detail: str | None = Field(None, description="Motivo da rejeição, se houver.")
+    access_log: AccessLogRead | None = Field(
+        None, description="Registro criado ou, para `duplicate`, o registro original."
+    )
+
+
+class AccessLogBatchResult(BaseModel):
+    """Resumo de um lote de ingestão de eventos de acesso."""
+
+    created: int = Field(0, description="Eventos gravados.")
+    duplicates: int = Field(0, description="Eventos já registrados (mesmo `event_id`).")
+    rejected: int = Field(0, description="Eventos rejeitados.")
+    items: list[AccessLogBatchItem] = Field(
+        default_factory=list, description="Resultado de cada evento, pela ordem do manifesto."
+    )
@@ -1,10 +1,24 @@
-from datetime import datetime
+from datetime import datetime, time
+from enum import Enum
+from typing import Self
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from apps.api.src.api.v1.schemas.access_log import PlateMatchType
 from apps.api.src.api.v1.utils.plate import validate_brazilian_plate
 
+# Máximo de placas por requisição em POST /whitelist/check
+WHITELIST_CHECK_MAX_PLATES = 50
+
+
+class WhitelistSort(str, Enum):
+    """Ordenação da listagem da whitelist (sempre com `id` como desempate)."""
+
+    plate = "plate"
+    created_at = "created_at"
+    created_at_desc = "-created_at"
+
 
 class AuthorizedPlateBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -16,6 +30,34 @@ class AuthorizedPlateBase(BaseModel):
         description="Descrição opcional do veículo ou proprietário.",
         example="Carro do Diretor",
     )
+    valid_from: datetime | None = Field(
+        None,
+        description=(
+            "Início da validade (inclusivo). Sem fuso, é interpretado em `WHITELIST_TIMEZONE`."
+        ),
+    )
+    valid_until: datetime | None = Field(
+        None,
+        description=(
+            "Fim da validade (exclusivo). Sem fuso, é interpretado em `WHITELIST_TIMEZONE`. "
+            "Entradas expiradas são removidas periodicamente."
+        ),
+    )
+    weekdays: list[int] | None = Field(
+        None,
+        description="Dias da semana permitidos (0 = segunda … 6 = domingo). Omitido = todos.",
+        example=[0, 1, 2, 3, 4],
+    )
+    daily_start: time | None = Field(
+        None,
+        description=(
+            "Início da faixa horária diária (em `WHITELIST_TIMEZONE`). Exige `daily_end`; "
+            "se for maior que o fim, a faixa atravessa a meia-noite."
+        ),
+    )
+    daily_end: time | None = Field(
+        None, description="Fim da faixa horária diária (exclusivo). Exige `daily_start`."
+    )
 
     @field_validator("plate")
     @classmethod
@@ -26,6 +68,31 @@ class AuthorizedPlateBase(BaseModel):
             raise ValueError(error_msg)
         return v
 
+    @field_validator("weekdays")
+    @classmethod
+    def validate_weekdays(cls, v: list[int] | None) -> list[int] | None:
+        """Valida os dias da semana (0 a 6, pelo menos um)."""
+        if v is None:
+            return v
+        if not v or any(not 0 <= weekday <= 6 for weekday in v):  # noqa: PLR2004
+            msg = "weekdays deve conter dias entre 0 (segunda) e 6 (domingo)"
+            raise ValueError(msg)
+        return sorted(set(v))
+
+    @model_validator(mode="after")
+    def validate_validity_window(self) -> Self:
+        """Valida a coerência da janela de validade."""
+        if self.valid_from and self.valid_until and self.valid_until <= self.valid_from:
+            msg = "valid_until deve ser posterior a valid_from"
+            raise ValueError(msg)
+        if (self.daily_start is None) != (self.daily_end is None):
+            msg = "daily_start e daily_end devem ser informados juntos"
+            raise ValueError(msg)
+        if self.daily_start is not None and self.daily_start == self.daily_end:
+            msg = "daily_start e daily_end não podem ser iguais"
+            raise ValueError(msg)
+        return self
+
 
 class AuthorizedPlateCreate(AuthorizedPlateBase):
     """
@@ -51,3 +118,109 @@ class AuthorizedPlateRead(AuthorizedPlateBase):
     )
     created_at: datetime
     updated_at: datetime
+
+
+class WhitelistCacheStats(BaseModel):
+    """Estado e contadores do cache em memória da whitelist."""
+
+    enabled: bool = Field(..., description="Se o snapshot em memória está em uso.")
+    fuzzy_enabled: bool = Field(
+        False, description="Se a correspondência tolerante a erros de OCR está ativa."
+    )
+    size: int = Field(..., description="Número de placas no snapshot atual.")
+    ttl_seconds: int = Field(..., description="Idade máxima do snapshot antes de recarregar.")
+    age_seconds: float | None = Field(
+        None, description="Idade do snapshot atual em segundos (None se não carregado)."
+    )
+    hits: int = Field(..., description="Consultas respondidas pelo snapshot em memória.")
+    misses: int = Field(..., description="Consultas que exigiram recarregar o snapshot.")
+    reloads: int = Field(..., description="Cargas completas do snapshot a partir do banco.")
+    delta_syncs: int = Field(
+        0, description="Renovações feitas só com as alterações desde a última versão."
+    )
+    version: int | None = Field(
+        None, description="Versão da whitelist refletida no snapshot (None se não carregado)."
+    )
+
+
+class WhitelistBulkImportRowError(BaseModel):
+    """Linha rejeitada numa importação em massa."""
+
+    line: int = Field(..., description="Número da linha no arquivo (1-based).")
+    plate: str | None = Field(None, description="Placa lida na linha, se houver.")
+    error: str = Field(..., description="Motivo da rejeição.")
+
+
+class WhitelistBulkImportResult(BaseModel):
+    """Resumo de uma importação em massa da whitelist."""
+
+    total_rows: int = Field(0, description="Linhas de dados lidas (exclui cabeçalho e vazias).")
+    created: int = Field(0, description="Placas criadas.")
+    errors: list[WhitelistBulkImportRowError] = Field(
+        default_factory=list, description="Linhas rejeitadas, com o motivo."
+    )
+
+
+class WhitelistSyncRequest(BaseModel):
+    """Conjunto completo desejado para a whitelist (fonte externa de verdade)."""
+
+    plates: list[AuthorizedPlateBase] = Field(
+        ..., description="Todas as placas que devem constar da whitelist após a sincronização."
+    )
+    dry_run: bool = Field(
+        False, description="Se verdadeiro, apenas calcula as diferenças sem aplicá-las."
+    )
+    expected_count: int | None = Field(
+        None,
+        ge=0,
+        description=(
+            "Número de placas que o cliente pretende enviar; se diferir de `plates`, o "
+            "conjunto está truncado e a sincronização é recusada."
+        ),
+    )
+    allow_empty: bool = Field(
+        False,
+        description="Permite um conjunto vazio, isto é, remover toda a whitelist.",
+    )
+
+
+class WhitelistSyncResult(BaseModel):
+    """Contagens de uma sincronização da whitelist."""
+
+    created: int = Field(..., description="Placas inseridas.")
+    updated: int = Field(..., description="Placas com `plate` ou `description` alterados.")
+    deleted: int = Field(..., description="Placas removidas por não constarem do conjunto.")
+    unchanged: int = Field(..., description="Placas mantidas sem qualquer escrita.")
+    dry_run: bool = Field(..., description="Se as alterações foram apenas calculadas.")
+
+
+class WhitelistCheckRequest(BaseModel):
+    """Placas candidatas a verificar contra a whitelist."""
+
+    plates: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=WHITELIST_CHECK_MAX_PLATES,
+        description=(
+            f"Placas a verificar (1 a {WHITELIST_CHECK_MAX_PLATES}), em qualquer formato; "
+            "são normalizadas antes da consulta."
+        ),
+        example=["ABC-1234", "A8C1234"],
+    )
+
+
+class WhitelistCheckResult(BaseModel):
+    """Resultado da verificação de uma placa."""
+
+    plate: str = Field(..., description="Placa como enviada.")
+    normalized_plate: str = Field(..., description="Placa normalizada usada na consulta.")
+    authorized: bool = Field(..., description="Se a placa está autorizada.")
+    authorized_plate_id: UUID | None = Field(
+        None, description="ID da placa autorizada correspondente, se houver."
+    )
+    match_type: PlateMatchType | None = Field(
+        None, description="Tipo de correspondência (`exact` ou `fuzzy`), se autorizada."
+    )
+    match_distance: int | None = Field(
+        None, description="Distância de edição da correspondência, se autorizada."
+    )
@@ -0,0 +1,65 @@
+from datetime import datetime, time
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+
+from apps.api.src.api.v1.utils.plate import plate_equivalence_key
+
+
+class WhitelistChangeOp(str, Enum):
+    """Tipo de alteração registrada no histórico de versões da whitelist."""
+
+    upsert = "upsert"
+    delete = "delete"
+
+
+class WhitelistChangeRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    version: int = Field(..., description="Versão da whitelist em que a alteração ocorreu.")
+    op: WhitelistChangeOp = Field(
+        ..., description="`upsert` (placa passou a ser autorizada) ou `delete` (tombstone)."
+    )
+    normalized_plate: str = Field(..., description="Placa normalizada afetada.")
+    plate_id: UUID = Field(..., description="ID da placa autorizada afetada.")
+    # Janela de validade de um `upsert` (todos None se a entrada não tiver restrições)
+    valid_from: datetime | None = Field(None, description="Início da validade (inclusivo).")
+    valid_until: datetime | None = Field(None, description="Fim da validade (exclusivo).")
+    weekdays: list[int] | None = Field(
+        None, description="Dias da semana permitidos (0 = segunda … 6 = domingo)."
+    )
+    daily_start: time | None = Field(
+        None, description="Início da faixa horária diária, em `WHITELIST_TIMEZONE`."
+    )
+    daily_end: time | None = Field(None, description="Fim da faixa horária diária (exclusivo).")
+
+    @computed_field(
+        description=(
+            "Chave de equivalência da placa (formato Mercosul): o dispositivo indexa a cópia "
+            "local por ela e procura as leituras com a mesma transformação."
+        )
+    )
+    @property
+    def plate_key(self) -> str:
+        return plate_equivalence_key(self.normalized_plate)
+
+
+class WhitelistChangesPage(BaseModel):
+    """Alterações da whitelist desde uma versão conhecida pelo dispositivo."""
+
+    since: int = Field(..., description="Versão informada na consulta.")
+    version: int = Field(
+        ...,
+        description=(
+            "Versão a usar como `since` na próxima consulta. Sem `has_more`, é a versão "
+            "atual da whitelist."
+        ),
+    )
+    has_more: bool = Field(
+        False, description="Se há mais alterações além do `limit` (consultar de novo já)."
+    )
+    changes: list[WhitelistChangeRead] = Field(
+        default_factory=list,
+        description="Última alteração de cada placa desde `since`, por ordem de versão.",
+    )
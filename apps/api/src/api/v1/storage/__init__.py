@@ -0,0 +1,20 @@
+"""Backends de armazenamento das imagens dos eventos de acesso.
+
+`local` guarda as imagens em `UPLOAD_DIR`; `s3` num bucket S3 ou compatível (MinIO,
+Ceph), partilhado por vários nós da API sem NFS. O backend S3 requer `boto3`
+(`pip install boto3`), que não faz parte de `requirements.txt`.
+"""
+
+from apps.api.src.api.v1.storage.backend import ImageBackend, StoredObject
+from apps.api.src.api.v1.storage.local import LocalImageBackend
+from apps.api.src.api.v1.storage.s3 import S3ImageBackend, s3_available
+from apps.api.src.api.v1.storage.write_through import WriteThroughBackend
+
+__all__ = [
+    "ImageBackend",
+    "LocalImageBackend",
+    "S3ImageBackend",
+    "StoredObject",
+    "WriteThroughBackend",
+    "s3_available",
+]
@@ -0,0 +1,45 @@
+"""Contrato comum dos backends de armazenamento de imagens."""
+
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Protocol, runtime_checkable
+
+
+class StoredObject(NamedTuple):
+    """Imagem presente num backend."""
+
+    key: str
+    size: int
+    # Caminho no disco deste nó, se houver uma cópia local
+    local_path: Path | None
+
+
+@runtime_checkable
+class ImageBackend(Protocol):
+    """Armazenamento de imagens endereçadas por chave (`ab/cd/<sha256><ext>`)."""
+
+    @property
+    def name(self) -> str: ...
+
+    def store(self, key: str, source: Path) -> bool:
+        """Guarda o arquivo `source` com a chave `key`; False se a chave já existia."""
+        ...
+
+    def head(self, key: str) -> StoredObject | None:
+        """Metadados da imagem, ou None se não existir."""
+        ...
+
+    def open(self, key: str) -> BinaryIO:
+        """Abre a imagem para leitura (FileNotFoundError se não existir)."""
+        ...
+
+    def local_path(self, key: str) -> Path | None:
+        """Caminho da cópia local da imagem, se existir neste nó."""
+        ...
+
+    def delete(self, key: str) -> None:
+        """Apaga a imagem (sem erro se já não existir)."""
+        ...
+
+    def close(self) -> None:
+        """Termina o trabalho pendente (ex.: envios em segundo plano)."""
+        ...
@@ -0,0 +1,92 @@
+"""Backend de imagens no sistema de arquivos local (`UPLOAD_DIR`)."""
+
+import errno
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from apps.api.src.api.v1.storage.backend import StoredObject
+
+# Área de receção no mesmo sistema de arquivos, para que a colocação final seja um link
+INCOMING_DIR = ".incoming"
+
+
+class LocalImageBackend:
+    """Imagens guardadas em `<root>/<chave>`."""
+
+    name = "local"
+
+    def __init__(self, root: Path) -> None:
+        """
+        Args:
+            root: Diretório base (`UPLOAD_DIR`)
+        """
+        self.root = root
+
+    def incoming_dir(self) -> Path:
+        """Diretório onde os uploads são colocados antes de receberem a chave final."""
+        incoming = self.root / INCOMING_DIR
+        incoming.mkdir(parents=True, exist_ok=True)
+        return incoming
+
+    def store(self, key: str, source: Path) -> bool:
+        """
+        Liga `source` ao lugar da chave (sem apagar `source`); copia se o link falhar.
+
+        Args:
+            key: Chave da imagem
+            source: Arquivo a guardar
+
+        Returns:
+            False se já existia uma imagem com a chave
+        """
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, path)
+        except FileExistsError:
+            return False
+        except OSError as e:
+            if e.errno not in {errno.EXDEV, errno.EPERM, errno.ENOTSUP}:
+                raise
+            return self._copy_into(source, path)
+        return True
+
+    def _copy_into(self, source: Path, path: Path) -> bool:
+        """Cópia para quando o link não é possível (ex.: origem noutro sistema de arquivos)."""
+        staged = self.incoming_dir() / f"{uuid.uuid4()}{path.suffix}"
+        try:
+            shutil.copyfile(source, staged)
+            os.link(staged, path)
+        except FileExistsError:
+            return False
+        finally:
+            staged.unlink(missing_ok=True)
+        return True
+
+    def head(self, key: str) -> StoredObject | None:
+        """Metadados da imagem, ou None se não existir."""
+        path = self.root / key
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, size, path)
+
+    def open(self, key: str) -> BinaryIO:
+        """Abre a imagem para leitura."""
+        return (self.root / key).open("rb")
+
+    def local_path(self, key: str) -> Path | None:
+        """Caminho da imagem, se existir."""
+        path = self.root / key
+        return path if path.is_file() else None
+
+    def delete(self, key: str) -> None:
+        """Apaga a imagem."""
+        (self.root / key).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Nada a terminar."""
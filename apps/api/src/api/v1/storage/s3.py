@@ -0,0 +1,124 @@
+"""Backend de imagens num bucket S3 ou compatível (MinIO, Ceph RGW).
+
+Um único cliente `boto3` por processo, com um pool de até `IMAGE_S3_MAX_CONNECTIONS`
+ligações HTTP reutilizadas por todas as threads. As credenciais seguem a cadeia
+padrão do boto3 (variáveis `AWS_ACCESS_KEY_ID`/`AWS_SECRET_ACCESS_KEY`, perfil, papel
+IAM); `IMAGE_S3_ENDPOINT_URL` aponta para um serviço compatível.
+"""
+
+import importlib.util
+import mimetypes
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from apps.api.src.api.v1.storage.backend import StoredObject
+
+_NOT_FOUND_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def s3_available() -> bool:
+    """True se o boto3 estiver instalado."""
+    return importlib.util.find_spec("boto3") is not None
+
+
+def create_s3_client(endpoint_url: str | None, region: str | None, max_connections: int) -> Any:
+    """
+    Cria o cliente S3 partilhado pelo processo.
+
+    Args:
+        endpoint_url: URL de um serviço compatível (None para a AWS)
+        region: Região do bucket
+        max_connections: Tamanho do pool de ligações HTTP
+
+    Returns:
+        Cliente `boto3` (thread-safe)
+    """
+    import boto3  # noqa: PLC0415
+    from botocore.config import Config  # noqa: PLC0415
+
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url or None,
+        region_name=region or None,
+        config=Config(
+            max_pool_connections=max_connections,
+            retries={"max_attempts": 3, "mode": "standard"},
+        ),
+    )
+
+
+class S3ImageBackend:
+    """Imagens guardadas como objetos `<prefixo><chave>` de um bucket."""
+
+    name = "s3"
+
+    def __init__(self, client: Any, bucket: str, prefix: str = "") -> None:
+        """
+        Args:
+            client: Cliente S3 (`create_s3_client`)
+            bucket: Nome do bucket
+            prefix: Prefixo dos objetos (ex.: `access-logs/`)
+        """
+        self._client = client
+        self.bucket = bucket
+        self.prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _is_not_found(self, error: Exception) -> bool:
+        response = getattr(error, "response", None) or {}
+        return str(response.get("Error", {}).get("Code")) in _NOT_FOUND_CODES
+
+    def store(self, key: str, source: Path) -> bool:
+        """
+        Envia `source` para o bucket, a menos que a chave já exista.
+
+        Args:
+            key: Chave da imagem
+            source: Arquivo a enviar
+
+        Returns:
+            False se já existia um objeto com a chave
+        """
+        if self.head(key) is not None:
+            return False
+        content_type, _ = mimetypes.guess_type(key)
+        self._client.upload_file(
+            str(source),
+            self.bucket,
+            self._object_key(key),
+            ExtraArgs={"ContentType": content_type or "application/octet-stream"},
+        )
+        return True
+
+    def head(self, key: str) -> StoredObject | None:
+        """Metadados do objeto, ou None se não existir."""
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client.exceptions.ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return StoredObject(key, response["ContentLength"], None)
+
+    def open(self, key: str) -> BinaryIO:
+        """Abre o objeto para leitura em fluxo."""
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client.exceptions.ClientError as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+        return response["Body"]
+
+    def local_path(self, key: str) -> Path | None:  # noqa: ARG002
+        """Objetos remotos não têm cópia local."""
+        return None
+
+    def delete(self, key: str) -> None:
+        """Apaga o objeto."""
+        self._client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def close(self) -> None:
+        """Nada a terminar (o pool de ligações é do cliente)."""
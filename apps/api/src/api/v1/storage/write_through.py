@@ -0,0 +1,249 @@
+"""Cache local com escrita em segundo plano para um backend remoto.
+
+Com `IMAGE_STORAGE_WRITE_THROUGH`, a imagem é guardada primeiro em `UPLOAD_DIR` (um
+link do upload, sem cópia) e a requisição responde logo; o envio para o backend remoto
+corre num pool de `IMAGE_STORAGE_UPLOAD_WORKERS` threads. As leituras usam a cópia
+local quando existe e o backend remoto nos restantes casos (ex.: imagens recebidas por
+outro nó ou cópias locais já removidas).
+
+Cada envio por fazer tem um marcador em `UPLOAD_DIR/.pending`, criado antes da cópia
+local e apagado depois da confirmação do backend remoto: um envio que esgote as
+tentativas, ou que se perca numa queda do processo, é retomado no arranque e a cada
+reconciliação periódica. Os workers do mesmo host partilham os marcadores e podem
+enviar a mesma imagem duas vezes, o que é inócuo (as chaves são por conteúdo).
+
+A reconciliação também limita a cópia local a `IMAGE_STORAGE_LOCAL_MAX_MB`: as
+imagens já enviadas mais antigas são apagadas localmente (continuam no backend remoto);
+as que têm marcador nunca são apagadas.
+"""
+
+import contextlib
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+
+from apps.api.src.api.v1.storage.backend import ImageBackend, StoredObject
+from apps.api.src.api.v1.storage.local import LocalImageBackend
+
+logger = logging.getLogger(__name__)
+
+_UPLOAD_ATTEMPTS = 3
+_RETRY_DELAY_SECONDS = 1.0
+# Cadência da reconciliação (envios pendentes e limite da cópia local)
+_RECONCILE_INTERVAL_SECONDS = 60.0
+# Após exceder o limite da cópia local, apagar até ficar abaixo desta fração
+_EVICT_TO_FRACTION = 0.9
+# Diretório dos marcadores de envios pendentes, em UPLOAD_DIR
+PENDING_DIR = ".pending"
+
+
+class WriteThroughBackend:
+    """Backend remoto com cópia local escrita de imediato e envio assíncrono."""
+
+    def __init__(
+        self,
+        local: LocalImageBackend,
+        remote: ImageBackend,
+        workers: int,
+        local_max_bytes: int = 0,
+        reconcile_interval: float = _RECONCILE_INTERVAL_SECONDS,
+    ) -> None:
+        """
+        Args:
+            local: Cache local (`UPLOAD_DIR`)
+            remote: Backend partilhado (ex.: S3)
+            workers: Envios simultâneos para o backend remoto
+            local_max_bytes: Limite da cópia local (0 = sem limite)
+            reconcile_interval: Segundos entre reconciliações (a primeira é imediata)
+        """
+        self.local = local
+        self.remote = remote
+        self.local_max_bytes = local_max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-upload")
+        self._pending: dict[str, Future[None]] = {}
+        self._lock = threading.Lock()
+        self._markers = local.root / PENDING_DIR
+        self._stop = threading.Event()
+        self._reconciler = threading.Thread(
+            target=self._reconcile_loop,
+            args=(reconcile_interval,),
+            name="image-upload-reconcile",
+            daemon=True,
+        )
+        self._reconciler.start()
+
+    @property
+    def name(self) -> str:
+        """Nome do backend remoto, com o sufixo da cache local."""
+        return f"{self.remote.name}+local"
+
+    def store(self, key: str, source: Path) -> bool:
+        """
+        Guarda a imagem localmente e agenda o envio para o backend remoto.
+
+        Args:
+            key: Chave da imagem
+            source: Arquivo a guardar
+
+        Returns:
+            False se a imagem já existia na cache local
+        """
+        # Marcador antes da cópia: a reconciliação nunca apaga uma cópia ainda por enviar
+        marked = self._mark(key)
+        try:
+            created = self.local.store(key, source)
+        except BaseException:
+            if marked:
+                self._unmark(key)
+            raise
+        if created:
+            self._schedule(key)
+        elif marked:
+            self._unmark(key)
+        return created
+
+    def _marker(self, key: str) -> Path:
+        return self._markers / hashlib.sha256(key.encode()).hexdigest()
+
+    def _mark(self, key: str) -> bool:
+        """Cria o marcador do envio; False se já existia (envio pendente de outro pedido)."""
+        self._markers.mkdir(parents=True, exist_ok=True)
+        try:
+            with self._marker(key).open("x", encoding="utf-8") as marker:
+                marker.write(key)
+        except FileExistsError:
+            return False
+        return True
+
+    def _unmark(self, key: str) -> None:
+        self._marker(key).unlink(missing_ok=True)
+
+    def _schedule(self, key: str) -> bool:
+        """Agenda o envio da imagem; False se já estiver agendado neste processo."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            future = self._executor.submit(self._upload, key)
+            self._pending[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return True
+
+    def _forget(self, key: str, future: Future[None]) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _upload(self, key: str) -> None:
+        for attempt in range(1, _UPLOAD_ATTEMPTS + 1):
+            path = self.local.local_path(key)
+            if path is None:
+                # Apagada antes de ser enviada
+                self._unmark(key)
+                return
+            try:
+                self.remote.store(key, path)
+            except Exception:
+                if attempt == _UPLOAD_ATTEMPTS:
+                    logger.exception(
+                        "Upload of image %s to %s failed; retrying on the next reconciliation",
+                        key,
+                        self.remote.name,
+                    )
+                    return
+                if self._stop.wait(_RETRY_DELAY_SECONDS * attempt):
+                    # Encerramento: o marcador fica para o próximo arranque
+                    return
+            else:
+                self._unmark(key)
+                return
+
+    def reconcile(self) -> int:
+        """
+        Reagenda os envios marcados como pendentes e aplica o limite da cópia local.
+
+        Returns:
+            Número de envios reagendados
+        """
+        keys = set()
+        with contextlib.suppress(FileNotFoundError):
+            for marker in self._markers.iterdir():
+                with contextlib.suppress(FileNotFoundError):
+                    keys.add(marker.read_text(encoding="utf-8"))
+        scheduled = sum(self._schedule(key) for key in keys)
+        if scheduled:
+            logger.info("Image upload reconciliation: %d uploads rescheduled", scheduled)
+        if self.local_max_bytes:
+            self._evict_local()
+        return scheduled
+
+    def _evict_local(self) -> None:
+        """Apaga as cópias locais já enviadas mais antigas se passarem do limite."""
+        entries = []
+        # Só chaves por conteúdo (`ab/cd/<sha256><ext>`); `.pending` e `.incoming` ficam
+        for path in self.local.root.glob("[!.]*/[!.]*/[!.]*"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.local_max_bytes:
+            return
+        target = self.local_max_bytes * _EVICT_TO_FRACTION
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= target:
+                break
+            key = path.relative_to(self.local.root).as_posix()
+            if self._marker(key).exists():
+                # Ainda não enviada: a única cópia é esta
+                continue
+            self.local.delete(key)
+            total -= size
+            removed += 1
+        logger.info("Image local copy: evicted %d files (%d bytes kept)", removed, total)
+
+    def _reconcile_loop(self, interval: float) -> None:
+        while True:
+            try:
+                self.reconcile()
+            except OSError:
+                logger.exception("Image upload reconciliation failed")
+            if self._stop.wait(interval):
+                return
+
+    def head(self, key: str) -> StoredObject | None:
+        """Metadados da cópia local ou, na falta dela, do objeto remoto."""
+        return self.local.head(key) or self.remote.head(key)
+
+    def open(self, key: str) -> BinaryIO:
+        """Abre a cópia local ou, na falta dela, o objeto remoto."""
+        try:
+            return self.local.open(key)
+        except FileNotFoundError:
+            return self.remote.open(key)
+
+    def local_path(self, key: str) -> Path | None:
+        """Caminho da cópia local, se existir neste nó."""
+        return self.local.local_path(key)
+
+    def delete(self, key: str) -> None:
+        """Apaga a imagem nos dois lados, depois de um eventual envio pendente."""
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            with contextlib.suppress(Exception):
+                future.result()
+        self.local.delete(key)
+        self._unmark(key)
+        self.remote.delete(key)
+
+    def close(self) -> None:
+        """Espera pelos envios em curso (os que falharem ficam marcados para o próximo arranque)."""
+        self._stop.set()
+        self._reconciler.join()
+        self._executor.shutdown(wait=True)
+        self.remote.close()
@@ -4,11 +4,15 @@ Este módulo contém funções utilitárias reutilizáveis em toda a aplicação
 """
 
 from apps.api.src.api.v1.utils.plate import (
+    canonicalize_plate,
     normalize_plate,
+    plate_edit_distance,
     validate_brazilian_plate,
 )
 
 __all__ = [
+    "canonicalize_plate",
     "normalize_plate",
+    "plate_edit_distance",
     "validate_brazilian_plate",
 ]
@@ -0,0 +1,128 @@
+"""Escrita de arquivos zip e tar em fluxo, para respostas HTTP de tamanho arbitrário.
+
+Os bytes são devolvidos em blocos à medida que cada membro é escrito, sem arquivo
+temporário nem o arquivo inteiro em memória. O tar é escrito diretamente (cabeçalho PAX,
+dados, preenchimento), com memória constante. O zip usa `zipfile` sobre um destino sem
+`seek` (descritores de dados depois de cada membro); o formato obriga a guardar um
+registro por membro até ao diretório central, no fim.
+"""
+
+import tarfile
+import time
+import zipfile
+from collections.abc import Iterator
+from typing import BinaryIO, Protocol
+
+CHUNK_SIZE = 64 * 1024
+_TAR_BLOCK = tarfile.BLOCKSIZE
+_TAR_RECORD = tarfile.RECORDSIZE
+# Data mínima representável num zip
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class ArchiveStream(Protocol):
+    """Arquivo escrito em fluxo."""
+
+    media_type: str
+    suffix: str
+
+    def add(self, name: str, source: BinaryIO, size: int, mtime: float) -> Iterator[bytes]:
+        """Escreve o membro `name` com os `size` bytes de `source`, devolvendo os blocos."""
+        ...
+
+    def finish(self) -> Iterator[bytes]:
+        """Termina o arquivo, devolvendo os últimos blocos."""
+        ...
+
+
+def _read_exactly(source: BinaryIO, size: int) -> Iterator[bytes]:
+    remaining = size
+    while remaining:
+        chunk = source.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            msg = f"Source ended {remaining} bytes early"
+            raise OSError(msg)
+        remaining -= len(chunk)
+        yield chunk
+
+
+class TarStream:
+    """Tar (formato PAX) escrito membro a membro."""
+
+    media_type = "application/x-tar"
+    suffix = ".tar"
+
+    def __init__(self) -> None:
+        self._offset = 0
+
+    def add(self, name: str, source: BinaryIO, size: int, mtime: float) -> Iterator[bytes]:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        yield header
+        yield from _read_exactly(source, size)
+        padding = -size % _TAR_BLOCK
+        if padding:
+            yield b"\0" * padding
+        self._offset += len(header) + size + padding
+
+    def finish(self) -> Iterator[bytes]:
+        # Dois blocos vazios marcam o fim; completar o último registro, como o `tar`
+        end = 2 * _TAR_BLOCK
+        end += -(self._offset + end) % _TAR_RECORD
+        self._offset += end
+        yield b"\0" * end
+
+
+class _Sink:
+    """Destino sem `seek` do `zipfile`: acumula o que é escrito até ser recolhido."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """Zip escrito membro a membro (membros sem compressão: as imagens já vêm comprimidas)."""
+
+    media_type = "application/zip"
+    suffix = ".zip"
+
+    def __init__(self) -> None:
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+    def add(self, name: str, source: BinaryIO, size: int, mtime: float) -> Iterator[bytes]:
+        date_time = max(time.gmtime(mtime)[:6], _ZIP_EPOCH)
+        info = zipfile.ZipInfo(name, date_time=date_time)
+        info.file_size = size
+        with self._zip.open(info, "w") as dest:
+            for chunk in _read_exactly(source, size):
+                dest.write(chunk)
+                if data := self._sink.drain():
+                    yield data
+        if data := self._sink.drain():
+            yield data
+
+    def finish(self) -> Iterator[bytes]:
+        self._zip.close()
+        yield self._sink.drain()
+
+
+ARCHIVE_FORMATS: dict[str, type[TarStream] | type[ZipStream]] = {
+    "tar": TarStream,
+    "zip": ZipStream,
+}
@@ -0,0 +1,38 @@
+"""Cursores opacos para paginação por chave (keyset)."""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """
+    Codifica o estado de paginação num token opaco (JSON em base64url, sem padding).
+
+    Args:
+        payload: Dados serializáveis em JSON
+
+    Returns:
+        Token a devolver ao cliente
+    """
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any] | None:
+    """
+    Decodifica um token gerado por `encode_cursor`.
+
+    Args:
+        cursor: Token recebido do cliente
+
+    Returns:
+        Dados do cursor, ou None se o token não for um cursor válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
@@ -0,0 +1,104 @@
+"""Colocação de uploads no armazenamento sem cópias desnecessárias em Python.
+
+O Starlette guarda cada arquivo recebido num `SpooledTemporaryFile`: em memória até
+1 MB e, acima disso, num arquivo temporário anónimo (`O_TMPFILE` em Linux). Em vez
+de ler esse arquivo para a memória e escrevê-lo de novo, `place_upload` tenta, por
+ordem:
+
+1. copiar no kernel com `os.sendfile`, a partir do descritor do temporário;
+2. copiar em blocos grandes (`_COPY_BUFFER_SIZE`), que é também o caminho dos
+   uploads pequenos ainda em memória.
+
+Um hard link do temporário no destino não é possível: o kernel recusa `linkat` de um
+arquivo aberto com `O_TMPFILE | O_EXCL` (como faz o `tempfile`) ou já removido.
+"""
+
+import errno
+import os
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+
+_COPY_BUFFER_SIZE = 1024 * 1024
+_SENDFILE_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """O upload excede o tamanho máximo permitido."""
+
+
+def _backing_fd(fileobj: BinaryIO) -> int | None:
+    """Descritor do arquivo em disco por trás do upload, ou None se estiver em memória."""
+    if isinstance(fileobj, SpooledTemporaryFile):
+        # fileno() num spool em memória forçaria a escrita em disco. `_rolled` e `_file`
+        # são internos do `tempfile`: sem eles, o upload é copiado em blocos
+        rolled = getattr(fileobj, "_rolled", None)
+        fileobj = getattr(fileobj, "_file", None)
+        if rolled is not True or fileobj is None:
+            return None
+    try:
+        return fileobj.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _sendfile(fd: int, size: int, destination: Path) -> bool:
+    with destination.open("wb") as out:
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(
+                    out.fileno(), fd, offset, min(size - offset, _SENDFILE_CHUNK_SIZE)
+                )
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError as e:
+            if offset or e.errno not in {errno.EINVAL, errno.ENOSYS, errno.ENOTSUP}:
+                raise
+            return False
+    return True
+
+
+def _copy_chunks(fileobj: BinaryIO, destination: Path, max_bytes: int) -> int:
+    fileobj.seek(0)
+    written = 0
+    with destination.open("wb") as out:
+        while chunk := fileobj.read(_COPY_BUFFER_SIZE):
+            written += len(chunk)
+            if written > max_bytes:
+                msg = f"Upload excede {max_bytes} bytes"
+                raise UploadTooLargeError(msg)
+            out.write(chunk)
+    return written
+
+
+def place_upload(fileobj: BinaryIO, destination: Path, max_bytes: int) -> int:
+    """
+    Grava o conteúdo de um upload em `destination` pelo caminho mais barato disponível.
+
+    Args:
+        fileobj: Arquivo do upload (ex.: `UploadFile.file`)
+        destination: Caminho final (não deve existir)
+        max_bytes: Tamanho máximo aceito
+
+    Returns:
+        Número de bytes gravados
+
+    Raises:
+        UploadTooLargeError: Se o upload exceder `max_bytes` (nada fica no destino)
+    """
+    fd = _backing_fd(fileobj)
+    size = None if fd is None else os.fstat(fd).st_size
+    if size is not None and size > max_bytes:
+        msg = f"Upload excede {max_bytes} bytes"
+        raise UploadTooLargeError(msg)
+    try:
+        if fd is None or size is None:
+            return _copy_chunks(fileobj, destination, max_bytes)
+        if _sendfile(fd, size, destination):
+            return size
+        return _copy_chunks(fileobj, destination, max_bytes)
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
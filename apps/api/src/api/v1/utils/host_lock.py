@@ -0,0 +1,34 @@
+"""Exclusão entre os workers do mesmo host (ex.: tarefas periódicas de cada worker)."""
+
+import contextlib
+import fcntl
+from collections.abc import Iterator
+from pathlib import Path
+
+
+@contextlib.contextmanager
+def host_lock(lock_path: Path) -> Iterator[bool]:
+    """
+    `flock` exclusivo e não bloqueante num arquivo partilhado pelos workers do host.
+
+    O lock é do descritor aberto aqui: outro `host_lock` sobre o mesmo arquivo, mesmo
+    no próprio processo, não o obtém enquanto este estiver ativo. É libertado à saída
+    do bloco, ou pelo kernel se o processo morrer.
+
+    Args:
+        lock_path: Arquivo de lock (criado, com o diretório, se não existir)
+
+    Yields:
+        True se o lock foi obtido; False se outro worker o tiver
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
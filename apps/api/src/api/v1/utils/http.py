@@ -0,0 +1,24 @@
+"""Utilitários de HTTP (requisições condicionais)."""
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Verifica se o cabeçalho `If-None-Match` corresponde a uma ETag.
+
+    Segue a comparação fraca da RFC 9110: o prefixo `W/` é ignorado, a lista pode
+    conter várias ETags separadas por vírgula e `*` corresponde a qualquer uma.
+
+    Args:
+        if_none_match: Valor do cabeçalho `If-None-Match` (ou None)
+        etag: ETag atual do recurso, com aspas
+
+    Returns:
+        True se o cliente já tem a representação atual (responder 304)
+    """
+    if not if_none_match:
+        return False
+    wanted = etag.removeprefix("W/")
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == wanted for candidate in candidates
+    )
@@ -0,0 +1,59 @@
+"""Chaves de imagens endereçadas pelo conteúdo.
+
+Uma imagem guardada pelo seu SHA-256 tem a chave `ab/cd/<sha256><ext>`: os dois
+primeiros níveis de diretório vêm dos primeiros bytes do hash, o que mantém cada
+diretório com poucos milhares de entradas mesmo com milhões de imagens. Chaves
+antigas (`<UPLOAD_DIR>/<uuid4><ext>`) continuam válidas e são caminhos diretos.
+"""
+
+import re
+from pathlib import PurePosixPath
+
+_CONTENT_KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+_CONTENT_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,10})?$")
+_SUFFIX_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+def image_suffix(filename: str | None, default: str = ".jpg") -> str:
+    """
+    Extensão normalizada (minúsculas) de um nome de arquivo enviado.
+
+    Args:
+        filename: Nome original do arquivo
+        default: Extensão usada quando o nome não tem uma
+
+    Returns:
+        Extensão com ponto, ou "" se a do nome não for uma extensão simples
+    """
+    if not filename:
+        return default
+    suffix = PurePosixPath(filename.replace("\\", "/")).suffix.lower()
+    if not suffix:
+        return default
+    return suffix if _SUFFIX_RE.match(suffix) else ""
+
+
+def content_key(digest: str, suffix: str) -> str:
+    """Chave `ab/cd/<sha256><ext>` de uma imagem com o hash `digest`."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+
+def is_content_key(key: str) -> bool:
+    """True se a chave for de uma imagem endereçada pelo conteúdo."""
+    return _CONTENT_KEY_RE.match(key) is not None
+
+
+def content_key_for_name(name: str) -> str | None:
+    """
+    Chave de conteúdo correspondente ao nome de arquivo `<sha256><ext>`.
+
+    Args:
+        name: Nome do arquivo (último componente da chave)
+
+    Returns:
+        Chave `ab/cd/<sha256><ext>`, ou None se o nome não for um hash
+    """
+    match = _CONTENT_NAME_RE.match(name)
+    if match is None:
+        return None
+    return content_key(match.group(1), match.group(2) or "")
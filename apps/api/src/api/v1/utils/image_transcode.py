@@ -0,0 +1,171 @@
+"""Conversão de imagens: recorte, redução e recodificação (JPEG, PNG ou WebP).
+
+Usa Pillow quando instalado e, na falta dele, OpenCV (`requirements-ml.txt`). Nenhum
+dos dois faz parte de `requirements.txt`: sem eles, `transcode_available()` é falso e as
+funcionalidades que convertem imagens ficam desligadas. As funções são puras (caminho de
+entrada, caminho de saída), para poderem correr num pool de processos.
+"""
+
+import importlib.util
+from pathlib import Path
+from typing import NamedTuple
+
+FORMAT_SUFFIXES = {"jpeg": ".jpg", "png": ".png", "webp": ".webp"}
+SUFFIX_FORMATS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp"}
+DEFAULT_QUALITY = 80
+
+
+class PlateBox(NamedTuple):
+    """Região da placa no quadro original, em pixels."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @classmethod
+    def parse(cls, value: str) -> "PlateBox":
+        """
+        Lê uma região no formato `x,y,largura,altura`.
+
+        Raises:
+            ValueError: Se o valor não tiver quatro inteiros válidos
+        """
+        try:
+            # Número de partes errado também levanta ValueError no desempacotamento
+            x, y, width, height = (int(part) for part in value.split(","))
+        except ValueError:
+            msg = "plate_box deve ter o formato x,y,largura,altura"
+            raise ValueError(msg) from None
+        if x < 0 or y < 0 or width <= 0 or height <= 0:
+            msg = "plate_box deve ter coordenadas não negativas e dimensões positivas"
+            raise ValueError(msg)
+        return cls(x, y, width, height)
+
+    def clamp(self, width: int, height: int) -> tuple[int, int, int, int] | None:
+        """Limites `(esquerda, topo, direita, base)` dentro do quadro, ou None se fora dele."""
+        left, top = min(self.x, width), min(self.y, height)
+        right, bottom = min(self.x + self.width, width), min(self.y + self.height, height)
+        if right <= left or bottom <= top:
+            return None
+        return left, top, right, bottom
+
+
+def transcode_available() -> bool:
+    """True se Pillow ou OpenCV estiverem instalados."""
+    return any(importlib.util.find_spec(name) is not None for name in ("PIL", "cv2"))
+
+
+def target_size(
+    width: int, height: int, max_width: int | None, max_height: int | None
+) -> tuple[int, int]:
+    """Dimensões para caber em `max_width` x `max_height` mantendo a proporção, sem ampliar."""
+    scale = min(
+        1.0,
+        (max_width / width) if max_width else 1.0,
+        (max_height / height) if max_height else 1.0,
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def transcode(
+    source: Path,
+    dest: Path,
+    fmt: str,
+    *,
+    quality: int = DEFAULT_QUALITY,
+    max_width: int | None = None,
+    max_height: int | None = None,
+    box: PlateBox | None = None,
+) -> None:
+    """
+    Escreve em `dest` a imagem `source` recortada, reduzida e recodificada.
+
+    Args:
+        source: Imagem original
+        dest: Arquivo a escrever
+        fmt: `jpeg`, `png` ou `webp`
+        quality: Qualidade JPEG/WebP (1-100)
+        max_width: Largura máxima (None para não limitar)
+        max_height: Altura máxima (None para não limitar)
+        box: Região a recortar antes de reduzir
+
+    Raises:
+        RuntimeError: Se nem Pillow nem OpenCV estiverem instalados
+        OSError: Se a imagem não puder ser lida, estiver fora da região ou não puder ser
+            escrita
+    """
+    if importlib.util.find_spec("PIL") is not None:
+        _transcode_with_pillow(source, dest, fmt, quality, max_width, max_height, box)
+    elif importlib.util.find_spec("cv2") is not None:
+        _transcode_with_opencv(source, dest, fmt, quality, max_width, max_height, box)
+    else:
+        msg = "Image conversion requires Pillow or OpenCV"
+        raise RuntimeError(msg)
+
+
+def _transcode_with_pillow(
+    source: Path,
+    dest: Path,
+    fmt: str,
+    quality: int,
+    max_width: int | None,
+    max_height: int | None,
+    box: PlateBox | None,
+) -> None:
+    from PIL import Image  # noqa: PLC0415
+
+    with Image.open(source) as image:
+        if box is not None:
+            bounds = box.clamp(image.width, image.height)
+            if bounds is None:
+                msg = f"Plate box {box} outside of {source}"
+                raise OSError(msg)
+            image = image.crop(bounds)  # noqa: PLW2901
+        size = target_size(image.width, image.height, max_width, max_height)
+        if box is None:
+            # JPEG: descodificar já reduzido (DCT scaling), muito mais rápido para miniaturas
+            image.draft(None, size)
+        if image.size != size:
+            image = image.resize(size, Image.Resampling.LANCZOS)  # noqa: PLW2901
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")  # noqa: PLW2901
+        image.save(dest, format=fmt.upper(), quality=quality)
+
+
+def _transcode_with_opencv(
+    source: Path,
+    dest: Path,
+    fmt: str,
+    quality: int,
+    max_width: int | None,
+    max_height: int | None,
+    box: PlateBox | None,
+) -> None:
+    import cv2  # noqa: PLC0415
+
+    image = cv2.imread(str(source), cv2.IMREAD_COLOR)
+    if image is None:
+        msg = f"Could not decode {source}"
+        raise OSError(msg)
+    if box is not None:
+        bounds = box.clamp(image.shape[1], image.shape[0])
+        if bounds is None:
+            msg = f"Plate box {box} outside of {source}"
+            raise OSError(msg)
+        left, top, right, bottom = bounds
+        image = image[top:bottom, left:right]
+    height, width = image.shape[:2]
+    size = target_size(width, height, max_width, max_height)
+    if size != (width, height):
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    params = {
+        "jpeg": [cv2.IMWRITE_JPEG_QUALITY, quality],
+        "webp": [cv2.IMWRITE_WEBP_QUALITY, quality],
+        "png": [],
+    }[fmt]
+    ok, encoded = cv2.imencode(FORMAT_SUFFIXES[fmt], image, params)
+    if not ok:
+        msg = f"Could not encode {source} as {fmt}"
+        raise OSError(msg)
+    dest.write_bytes(encoded.tobytes())
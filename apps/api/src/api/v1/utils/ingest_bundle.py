@@ -0,0 +1,161 @@
+"""Leitura de lotes de eventos de acesso enviados por dispositivos de borda.
+
+Quando a ligação cai, o dispositivo acumula eventos e reenvia-os num único pedido:
+um manifesto NDJSON, com um objeto por evento
+
+    {"file": "0001.jpg", "plate": "ABC1D23", "captured_at": "2026-10-17T08:15:02-03:00"}
+
+e as imagens referenciadas por `file`, como partes do multipart ou dentro de um
+arquivo tar (opcionalmente comprimido). `captured_at` sem fuso é interpretado no fuso
+configurado da whitelist. Um `event_id` opcional por linha serve de chave de
+idempotência do evento.
+"""
+
+import json
+import mimetypes
+import tarfile
+from collections.abc import Collection, Iterator
+from datetime import datetime, tzinfo
+from typing import BinaryIO, NamedTuple
+
+
+class ManifestEntry(NamedTuple):
+    """Evento lido do manifesto (`error` preenchido se a linha for inválida)."""
+
+    line: int
+    file: str | None
+    plate: str | None
+    captured_at: datetime | None
+    error: str | None = None
+    event_id: str | None = None
+
+
+class ManifestTooLargeError(ValueError):
+    """O manifesto tem mais eventos do que o permitido por lote."""
+
+
+class ArchiveTooLargeError(ValueError):
+    """O arquivo tar descomprimido tem mais bytes ou membros do que o permitido."""
+
+
+def _clean(value: object) -> str | None:
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    return text or None
+
+
+def _parse_captured_at(value: object, tz: tzinfo) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=tz)
+
+
+def _parse_line(line_number: int, line: str, tz: tzinfo) -> ManifestEntry:
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError:
+        return ManifestEntry(line_number, None, None, None, "JSON inválido")
+    if not isinstance(item, dict):
+        return ManifestEntry(line_number, None, None, None, "Cada linha deve ser um objeto JSON")
+    file, plate = _clean(item.get("file")), _clean(item.get("plate"))
+    captured_at = _parse_captured_at(item.get("captured_at"), tz)
+    error = None
+    if file is None:
+        error = "Campo 'file' obrigatório"
+    elif plate is None:
+        error = "Campo 'plate' obrigatório"
+    elif captured_at is None:
+        error = "Campo 'captured_at' obrigatório (ISO 8601)"
+    return ManifestEntry(line_number, file, plate, captured_at, error, _clean(item.get("event_id")))
+
+
+def parse_manifest(fileobj: BinaryIO, tz: tzinfo, max_entries: int) -> list[ManifestEntry]:
+    """
+    Lê o manifesto NDJSON de um lote de eventos.
+
+    Linhas em branco são ignoradas; linhas inválidas são devolvidas com `error`.
+
+    Args:
+        fileobj: Arquivo do manifesto (UTF-8)
+        tz: Fuso aplicado a `captured_at` sem fuso
+        max_entries: Número máximo de eventos aceitos
+
+    Returns:
+        Eventos pela ordem do manifesto, com o número da linha física (1-based)
+
+    Raises:
+        ManifestTooLargeError: Se o manifesto tiver mais de `max_entries` eventos
+    """
+    entries: list[ManifestEntry] = []
+    for line_number, raw in enumerate(fileobj, start=1):
+        line = raw.decode("utf-8-sig" if line_number == 1 else "utf-8", errors="replace")
+        if not line.strip():
+            continue
+        if len(entries) >= max_entries:
+            msg = f"Manifesto excede {max_entries} eventos"
+            raise ManifestTooLargeError(msg)
+        entries.append(_parse_line(line_number, line, tz))
+    return entries
+
+
+def is_image_name(name: str) -> bool:
+    """True se a extensão do arquivo corresponder a um tipo de imagem."""
+    media_type, _ = mimetypes.guess_type(name)
+    return media_type is not None and media_type.startswith("image/")
+
+
+def member_name(name: str) -> str:
+    """Nome de um membro do tar comparável com o campo `file` do manifesto."""
+    return name.removeprefix("./")
+
+
+def iter_tar_images(
+    fileobj: BinaryIO, wanted: Collection[str], max_bytes: int, max_members: int
+) -> Iterator[tuple[str, int, BinaryIO]]:
+    """
+    Percorre um arquivo tar e devolve os membros referenciados no manifesto.
+
+    O conteúdo é lido diretamente do tar, sem extrair nada para o sistema de arquivos
+    (os nomes dos membros nunca são usados como caminhos). Os membros partilham a
+    posição de leitura do arquivo, por isso cada um deve ser consumido antes de
+    avançar para o seguinte.
+
+    Num tar comprimido, saltar um membro também o descomprime: o total declarado dos
+    membros percorridos é verificado antes de ler os dados de cada um, para que um
+    arquivo pequeno não se expanda sem limite (bomba de descompressão).
+
+    Args:
+        fileobj: Arquivo tar (`.tar`, `.tar.gz`, `.tar.bz2` ou `.tar.xz`)
+        wanted: Nomes referenciados no manifesto
+        max_bytes: Total máximo, descomprimido, dos membros percorridos
+        max_members: Número máximo de membros percorridos
+
+    Yields:
+        Tuplas `(nome, tamanho, conteúdo)` dos membros regulares pedidos
+
+    Raises:
+        tarfile.TarError: Se o arquivo não for um tar válido
+        ArchiveTooLargeError: Se os membros excederem `max_bytes` ou `max_members`
+    """
+    fileobj.seek(0)
+    total = 0
+    with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+        for count, member in enumerate(archive, start=1):
+            total += member.size
+            if total > max_bytes:
+                msg = f"Arquivo tar excede {max_bytes // (1024 * 1024)} MB descomprimido"
+                raise ArchiveTooLargeError(msg)
+            if count > max_members:
+                msg = f"Arquivo tar excede {max_members} membros"
+                raise ArchiveTooLargeError(msg)
+            name = member_name(member.name)
+            if not member.isfile() or name not in wanted:
+                continue
+            content = archive.extractfile(member)
+            if content is not None:
+                yield name, member.size, content
@@ -4,6 +4,15 @@ import re
 
 _PLATE_LENGTH = 7
 
+# Pares que o OCR de borda confunde com frequência; cada letra é levada ao dígito
+# correspondente para que ambas as leituras tenham a mesma forma canónica.
+_CONFUSABLE_TRANSLATION = str.maketrans({"O": "0", "I": "1", "B": "8", "S": "5"})
+
+# Posição (0-based) do caractere que a conversão para o padrão Mercosul troca: o
+# dígito passa à letra de mesma ordem (0 → A, 1 → B, …, 9 → J)
+_MERCOSUL_LETTER_INDEX = 4
+_MERCOSUL_DIGIT_TO_LETTER = str.maketrans("0123456789", "ABCDEFGHIJ")
+
 
 def normalize_plate(plate: str) -> str:
     """
@@ -68,3 +77,90 @@ def validate_brazilian_plate(plate: str) -> tuple[bool, str | None]:
         return True, None
 
     return False, "Placa não segue o formato brasileiro (ABC1234 ou ABC1D23)"
+
+
+def plate_equivalence_key(normalized_plate: str) -> str:
+    """
+    Chave de equivalência entre o formato antigo e o Mercosul da mesma placa.
+
+    Um veículo que migra de `ABC1234` para `ABC1C34` mantém a placa, exceto o
+    quinto caractere, em que o dígito é trocado pela letra correspondente
+    (0 → A … 9 → J). A chave é sempre a forma Mercosul, de modo que ambas as
+    leituras coincidem. Valores que não têm 7 caracteres são devolvidos sem mudança.
+
+    Args:
+        normalized_plate: Placa já normalizada (ver `normalize_plate`)
+
+    Returns:
+        Chave de equivalência da placa
+
+    Examples:
+        >>> plate_equivalence_key("ABC1234")
+        'ABC1C34'
+        >>> plate_equivalence_key("ABC1C34")
+        'ABC1C34'
+    """
+    if len(normalized_plate) != _PLATE_LENGTH:
+        return normalized_plate
+    i = _MERCOSUL_LETTER_INDEX
+    return (
+        normalized_plate[:i]
+        + normalized_plate[i].translate(_MERCOSUL_DIGIT_TO_LETTER)
+        + normalized_plate[i + 1 :]
+    )
+
+
+def canonicalize_plate(normalized_plate: str) -> str:
+    """
+    Converte uma placa normalizada para a forma canónica usada na comparação tolerante.
+
+    Caracteres que o OCR confunde (O/0, I/1, B/8, S/5) são mapeados para o mesmo
+    símbolo, de modo que leituras que diferem apenas nesses caracteres coincidem.
+
+    Args:
+        normalized_plate: Placa já normalizada (ver `normalize_plate`)
+
+    Returns:
+        Forma canónica da placa
+
+    Examples:
+        >>> canonicalize_plate("OBS1234")
+        '0851234'
+        >>> canonicalize_plate("0851234")
+        '0851234'
+    """
+    return normalized_plate.translate(_CONFUSABLE_TRANSLATION)
+
+
+def plate_edit_distance(a: str, b: str) -> int:
+    """
+    Distância de Levenshtein entre duas placas (inserções, remoções e substituições).
+
+    Args:
+        a: Primeira placa
+        b: Segunda placa
+
+    Returns:
+        Número mínimo de edições para transformar `a` em `b`
+
+    Examples:
+        >>> plate_edit_distance("ABC1234", "ABC1284")
+        1
+        >>> plate_edit_distance("ABC1234", "ABC123")
+        1
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        previous = current
+    return previous[-1]
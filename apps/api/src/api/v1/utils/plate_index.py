@@ -0,0 +1,95 @@
+"""Índice de vizinhança por remoções para busca tolerante a erros de OCR.
+
+Cada placa da whitelist é indexada pela sua forma canónica (`canonicalize_plate`) e
+por todas as variantes obtidas removendo até `max_distance` caracteres. Uma consulta
+gera as mesmas variantes da placa lida e só compara, por distância de edição, os
+candidatos que partilham alguma variante — nunca percorre a whitelist inteira.
+"""
+
+from uuid import UUID
+
+from apps.api.src.api.v1.utils.plate import canonicalize_plate, plate_edit_distance
+
+
+def _deletion_variants(key: str, max_distance: int) -> set[str]:
+    variants = {key}
+    frontier = {key}
+    for _ in range(max_distance):
+        frontier = {word[:i] + word[i + 1 :] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyPlateIndex:
+    """Índice em memória `forma canónica -> placas` com busca por distância de edição."""
+
+    def __init__(self, max_distance: int) -> None:
+        """
+        Inicializa um índice vazio.
+
+        Args:
+            max_distance: Distância de edição máxima aceita (após canonicalização)
+        """
+        self.max_distance = max_distance
+        self._plates: dict[str, dict[str, UUID]] = {}
+        self._variants: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(plates) for plates in self._plates.values())
+
+    def add(self, normalized_plate: str, plate_id: UUID) -> None:
+        """Indexa uma placa normalizada."""
+        key = canonicalize_plate(normalized_plate)
+        plates = self._plates.get(key)
+        if plates is None:
+            plates = self._plates[key] = {}
+            for variant in _deletion_variants(key, self.max_distance):
+                self._variants.setdefault(variant, set()).add(key)
+        plates[normalized_plate] = plate_id
+
+    def remove(self, normalized_plate: str) -> None:
+        """Remove uma placa normalizada do índice (no-op se ausente)."""
+        key = canonicalize_plate(normalized_plate)
+        plates = self._plates.get(key)
+        if plates is None or plates.pop(normalized_plate, None) is None or plates:
+            return
+        del self._plates[key]
+        for variant in _deletion_variants(key, self.max_distance):
+            keys = self._variants.get(variant)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._variants[variant]
+
+    def lookup(self, normalized_plate: str) -> tuple[UUID, int] | None:
+        """
+        Procura a placa da whitelist mais próxima da placa lida.
+
+        Args:
+            normalized_plate: Placa lida, já normalizada
+
+        Returns:
+            Tupla (plate_id, distância) do candidato mais próximo, ou None se não houver
+            candidato dentro de `max_distance` ou se o mais próximo for ambíguo
+            (placas distintas à mesma distância).
+        """
+        query = canonicalize_plate(normalized_plate)
+        candidates: set[str] = set()
+        for variant in _deletion_variants(query, self.max_distance):
+            candidates |= self._variants.get(variant, set())
+
+        best_distance: int | None = None
+        best_ids: set[UUID] = set()
+        for key in candidates:
+            distance = plate_edit_distance(query, key)
+            if distance > self.max_distance:
+                continue
+            if best_distance is None or distance < best_distance:
+                best_distance = distance
+                best_ids = set(self._plates[key].values())
+            elif distance == best_distance:
+                best_ids |= set(self._plates[key].values())
+
+        if best_distance is None or len(best_ids) != 1:
+            return None
+        return next(iter(best_ids)), best_distance
@@ -0,0 +1,225 @@
+"""Formato binário compacto do snapshot da whitelist.
+
+Pensado para dispositivos de borda: o arquivo pode ser mapeado em memória (`mmap`)
+e consultado por busca binária, sem parsing nem alocação por placa.
+
+Layout (little-endian):
+
+- cabeçalho de 32 bytes (`SNAPSHOT_HEADER`): magic `SWLS`, versão do formato (u16),
+  tamanho do registro (u16), versão da whitelist (u64), validade do arquivo (i64,
+  segundos Unix; 0 se nenhuma placa incluída expirar), número de registros (u32) e
+  CRC-32 da área de registros (u32);
+- registros de `RECORD_SIZE` bytes (chave de equivalência da placa em ASCII, ver
+  `plate_equivalence_key`), ordenados por bytes e sem repetições.
+
+Como os registros são chaves, o formato antigo e o Mercosul da mesma placa dão um só
+registro; o dispositivo tem de aplicar a mesma transformação à placa lida (quinto
+caractere: dígito → letra, 0 → A … 9 → J) antes de a procurar.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from apps.api.src.api.v1.utils.plate import plate_equivalence_key
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"SWLS"
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sHHQqII")
+RECORD_SIZE = 7
+
+
+class SnapshotFormatError(ValueError):
+    """Arquivo de snapshot inválido ou corrompido."""
+
+
+class SnapshotInfo(NamedTuple):
+    """Versão da whitelist e validade (segundos Unix, 0 = sem fim) de um snapshot."""
+
+    version: int
+    expires_at: int
+
+
+def encode_snapshot(plates: Iterable[str], version: int, expires_at: int = 0) -> bytes:
+    """
+    Serializa as chaves de equivalência de placas normalizadas no formato do snapshot.
+
+    Placas que não tenham exatamente `RECORD_SIZE` caracteres ASCII são ignoradas.
+
+    Args:
+        plates: Placas normalizadas (qualquer ordem; repetições são removidas)
+        version: Versão da whitelist representada
+        expires_at: Instante (segundos Unix) em que alguma placa incluída expira e o
+            snapshot deixa de valer; 0 se nenhuma expirar
+
+    Returns:
+        Conteúdo completo do arquivo (cabeçalho + registros)
+    """
+    records = set()
+    for plate in plates:
+        record = plate_equivalence_key(plate).encode("ascii", "ignore")
+        if len(record) != RECORD_SIZE or len(record) != len(plate):
+            logger.warning(
+                "Skipping plate %r in whitelist snapshot (not %d chars)", plate, RECORD_SIZE
+            )
+            continue
+        records.add(record)
+    body = b"".join(sorted(records))
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        RECORD_SIZE,
+        version,
+        expires_at,
+        len(records),
+        zlib.crc32(body),
+    )
+    return header + body
+
+
+def write_snapshot(path: Path, plates: Iterable[str], version: int, expires_at: int = 0) -> int:
+    """
+    Grava o snapshot de forma atômica (arquivo temporário + `os.replace`).
+
+    Leitores que já tenham o arquivo anterior aberto continuam a vê-lo inteiro.
+
+    Args:
+        path: Caminho de destino
+        plates: Placas normalizadas
+        version: Versão da whitelist representada
+        expires_at: Validade do snapshot (ver `encode_snapshot`)
+
+    Returns:
+        Número de placas gravadas
+    """
+    data = encode_snapshot(plates, version, expires_at)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        Path(tmp_name).replace(path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return (len(data) - SNAPSHOT_HEADER.size) // RECORD_SIZE
+
+
+def read_snapshot_info(path: Path) -> SnapshotInfo | None:
+    """
+    Lê apenas a versão da whitelist e a validade gravadas no cabeçalho.
+
+    Args:
+        path: Caminho do snapshot
+
+    Returns:
+        SnapshotInfo, ou None se o arquivo não existir ou for inválido
+    """
+    try:
+        with path.open("rb") as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) != SNAPSHOT_HEADER.size:
+        return None
+    magic, format_version, _, version, expires_at, _, _ = SNAPSHOT_HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return SnapshotInfo(version, expires_at)
+
+
+class PlateSnapshot:
+    """Leitor do snapshot mapeado em memória, com busca binária O(log n).
+
+    Implementação de referência para os dispositivos de borda (a placa lida é
+    procurada pela sua chave de equivalência, nos dois formatos):
+
+        with PlateSnapshot(Path("whitelist.snap")) as snapshot:
+            "ABC1234" in snapshot  # o mesmo que "ABC1C34" in snapshot
+    """
+
+    def __init__(self, path: Path, verify_checksum: bool = True) -> None:
+        """
+        Abre e valida o snapshot.
+
+        Args:
+            path: Caminho do snapshot
+            verify_checksum: Se deve validar o CRC-32 dos registros (lê o arquivo todo)
+
+        Raises:
+            SnapshotFormatError: Se o cabeçalho, o tamanho ou o checksum não conferirem
+        """
+        self.version = 0
+        self.expires_at = 0
+        self._count = 0
+        with path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size < SNAPSHOT_HEADER.size:
+                error = "Snapshot truncado"
+                raise SnapshotFormatError(error)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        error = self._validate(verify_checksum)
+        if error is not None:
+            self._mm.close()
+            raise SnapshotFormatError(error)
+
+    def _validate(self, verify_checksum: bool) -> str | None:
+        magic, format_version, record_size, version, expires_at, count, crc = (
+            SNAPSHOT_HEADER.unpack_from(self._mm)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            return "Magic inválido"
+        if format_version != SNAPSHOT_FORMAT_VERSION or record_size != RECORD_SIZE:
+            return f"Formato não suportado: v{format_version}"
+        if len(self._mm) != SNAPSHOT_HEADER.size + count * RECORD_SIZE:
+            return "Tamanho não confere com o número de registros"
+        if verify_checksum:
+            with memoryview(self._mm) as view, view[SNAPSHOT_HEADER.size :] as records:
+                actual = zlib.crc32(records)
+            if actual != crc:
+                return "Checksum inválido"
+        self.version = version
+        self.expires_at = expires_at
+        self._count = count
+        return None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, normalized_plate: object) -> bool:
+        if not isinstance(normalized_plate, str):
+            return False
+        key = plate_equivalence_key(normalized_plate).encode("ascii", "ignore")
+        if len(key) != RECORD_SIZE:
+            return False
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = SNAPSHOT_HEADER.size + mid * RECORD_SIZE
+            record = self._mm[offset : offset + RECORD_SIZE]
+            if record < key:
+                lo = mid + 1
+            elif record > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self) -> None:
+        """Libera o mapeamento em memória."""
+        self._mm.close()
+
+    def __enter__(self) -> "PlateSnapshot":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
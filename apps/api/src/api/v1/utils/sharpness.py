@@ -0,0 +1,34 @@
+"""Estimativa da nitidez de uma imagem, para escolher o melhor quadro de uma sequência.
+
+Com OpenCV instalado (`requirements-ml.txt`) usa a variância do Laplaciano sobre a
+imagem em tons de cinza reduzida a metade. Sem OpenCV, usa o tamanho do arquivo:
+para quadros da mesma câmera e da mesma cena, um JPEG desfocado tem menos detalhe de
+alta frequência e comprime para menos bytes. As duas medidas não são comparáveis
+entre si, mas um processo usa sempre a mesma.
+"""
+
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def image_sharpness(path: Path) -> float:
+    """
+    Medida relativa de nitidez de uma imagem (maior = mais nítida).
+
+    Args:
+        path: Arquivo de imagem
+
+    Returns:
+        Variância do Laplaciano (OpenCV) ou, sem OpenCV, o tamanho do arquivo em bytes
+    """
+    try:
+        import cv2  # noqa: PLC0415
+    except ImportError:
+        return float(path.stat().st_size)
+    image = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    if image is None:
+        logger.debug("Could not decode %s; using file size as sharpness", path)
+        return float(path.stat().st_size)
+    return float(cv2.Laplacian(image, cv2.CV_64F).var())
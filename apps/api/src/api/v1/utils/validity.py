@@ -0,0 +1,104 @@
+"""Janelas de validade de entradas da whitelist (visitantes, prestadores de serviço).
+
+Uma entrada pode ser restringida por período absoluto (`valid_from` / `valid_until`),
+por dias da semana e por faixa horária diária. Dias e horas são avaliados no fuso
+horário configurado (`WHITELIST_TIMEZONE`); uma faixa com início maior que o fim
+atravessa a meia-noite (ex.: das 22:00 às 06:00), considerando o dia da semana do instante
+avaliado.
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, time, tzinfo
+from typing import Any
+
+WEEKDAY_COUNT = 7
+
+
+def weekdays_to_mask(weekdays: list[int] | None) -> int | None:
+    """Converte dias da semana (0 = segunda … 6 = domingo) em máscara de bits."""
+    if weekdays is None:
+        return None
+    mask = 0
+    for weekday in weekdays:
+        mask |= 1 << weekday
+    return mask
+
+
+def mask_to_weekdays(mask: int | None) -> list[int] | None:
+    """Converte a máscara de bits em lista ordenada de dias da semana."""
+    if mask is None:
+        return None
+    return [weekday for weekday in range(WEEKDAY_COUNT) if mask >> weekday & 1]
+
+
+def _as_utc(moment: datetime | None) -> datetime | None:
+    # SQLite devolve datetimes sem fuso; são gravados sempre em UTC
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return moment.replace(tzinfo=UTC)
+
+
+@dataclass(frozen=True, slots=True)
+class ValidityWindow:
+    """Restrições de validade de uma entrada da whitelist (campos None não restringem)."""
+
+    valid_from: datetime | None = None
+    valid_until: datetime | None = None
+    allowed_weekdays: int | None = None
+    daily_start: time | None = None
+    daily_end: time | None = None
+
+    @classmethod
+    def from_plate(cls, plate: Any) -> "ValidityWindow | None":
+        """
+        Monta a janela a partir de um objeto com os atributos de validade.
+
+        Args:
+            plate: AuthorizedPlate (ou objeto/linha com os mesmos atributos)
+
+        Returns:
+            ValidityWindow, ou None se a entrada não tiver restrições
+        """
+        window = cls(
+            valid_from=_as_utc(plate.valid_from),
+            valid_until=_as_utc(plate.valid_until),
+            allowed_weekdays=plate.allowed_weekdays,
+            daily_start=plate.daily_start,
+            daily_end=plate.daily_end,
+        )
+        return None if window.is_unrestricted else window
+
+    @property
+    def is_unrestricted(self) -> bool:
+        """True se nenhuma restrição estiver definida."""
+        return (
+            self.valid_from is None
+            and self.valid_until is None
+            and self.allowed_weekdays is None
+            and (self.daily_start is None or self.daily_end is None)
+        )
+
+    def allows(self, moment: datetime, tz: tzinfo) -> bool:
+        """
+        Verifica se a entrada é válida num instante.
+
+        Args:
+            moment: Instante a avaliar (com fuso)
+            tz: Fuso horário em que dias da semana e horas são interpretados
+
+        Returns:
+            True se o instante estiver dentro de todas as restrições
+        """
+        if self.valid_from is not None and moment < self.valid_from:
+            return False
+        if self.valid_until is not None and moment >= self.valid_until:
+            return False
+        local = moment.astimezone(tz)
+        if self.allowed_weekdays is not None and not self.allowed_weekdays >> local.weekday() & 1:
+            return False
+        if self.daily_start is None or self.daily_end is None:
+            return True
+        now = local.time()
+        if self.daily_start <= self.daily_end:
+            return self.daily_start <= now < self.daily_end
+        return now >= self.daily_start or now < self.daily_end
@@ -0,0 +1,121 @@
+"""Leitura incremental de arquivos de importação em massa da whitelist.
+
+Suporta CSV (`plate,description`, com cabeçalho opcional) e NDJSON (um objeto
+`{"plate": ..., "description": ...}` por linha). O corpo é consumido em blocos e
+convertido em linhas à medida que chega, sem carregar o arquivo inteiro em memória.
+"""
+
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from enum import Enum
+from typing import NamedTuple
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+_CONTENT_TYPE_FORMATS = {
+    "text/csv": ImportFormat.csv,
+    "application/csv": ImportFormat.csv,
+    "application/x-ndjson": ImportFormat.ndjson,
+    "application/ndjson": ImportFormat.ndjson,
+    "application/jsonl": ImportFormat.ndjson,
+    "application/x-jsonlines": ImportFormat.ndjson,
+}
+
+
+class ImportRow(NamedTuple):
+    """Linha lida do arquivo de importação (`error` preenchido se não for possível ler)."""
+
+    line: int
+    plate: str | None
+    description: str | None
+    error: str | None = None
+
+
+def detect_import_format(content_type: str | None) -> ImportFormat | None:
+    """
+    Determina o formato de importação a partir do cabeçalho Content-Type.
+
+    Args:
+        content_type: Valor do cabeçalho (parâmetros como `charset` são ignorados)
+
+    Returns:
+        ImportFormat correspondente, ou None se o tipo não for suportado
+    """
+    if not content_type:
+        return None
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return _CONTENT_TYPE_FORMATS.get(media_type)
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Converte blocos de bytes UTF-8 em linhas de texto, sem o terminador."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _clean(value: object) -> str | None:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _parse_ndjson(line_number: int, line: str) -> ImportRow:
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError:
+        return ImportRow(line_number, None, None, "JSON inválido")
+    if not isinstance(item, dict):
+        return ImportRow(line_number, None, None, "Cada linha deve ser um objeto JSON")
+    return ImportRow(line_number, _clean(item.get("plate")), _clean(item.get("description")))
+
+
+async def iter_import_rows(
+    chunks: AsyncIterable[bytes], import_format: ImportFormat
+) -> AsyncIterator[ImportRow]:
+    """
+    Lê as linhas de um arquivo de importação da whitelist.
+
+    Linhas em branco são ignoradas. No CSV, uma primeira linha com a coluna `plate`
+    é tratada como cabeçalho e define a posição das colunas `plate` e `description`.
+
+    Args:
+        chunks: Corpo da requisição em blocos de bytes
+        import_format: Formato do arquivo
+
+    Yields:
+        ImportRow com o número da linha física (1-based)
+    """
+    plate_col, description_col = 0, 1
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        if import_format is ImportFormat.ndjson:
+            yield _parse_ndjson(line_number, line)
+            continue
+
+        fields = next(csv.reader([line]))
+        header = [field.strip().lower() for field in fields]
+        if line_number == 1 and "plate" in header:
+            plate_col = header.index("plate")
+            description_col = header.index("description") if "description" in header else -1
+            continue
+        plate = fields[plate_col] if plate_col < len(fields) else None
+        description = fields[description_col] if 0 <= description_col < len(fields) else None
+        yield ImportRow(line_number, _clean(plate), _clean(description))
@@ -1,6 +1,8 @@
 import logging
 import os
 import traceback
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from apps.api.src.api.v1.core.config import assert_production_secrets_valid
 
@@ -14,7 +16,32 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
 from apps.api.src.api.v1.api import api_router
+from apps.api.src.api.v1.core.access_log_writer import (
+    start_access_log_writer,
+    stop_access_log_writer,
+)
+from apps.api.src.api.v1.core.body_limit import IngestBodyLimitMiddleware
+from apps.api.src.api.v1.core.image_derivatives import close_image_derivatives
+from apps.api.src.api.v1.core.image_postprocess import (
+    start_image_postprocessor,
+    stop_image_postprocessor,
+)
+from apps.api.src.api.v1.core.image_retention import (
+    start_image_retention,
+    stop_image_retention,
+)
+from apps.api.src.api.v1.core.image_store import close_image_store, get_image_store
+from apps.api.src.api.v1.core.ingest_journal import (
+    start_journal_drainer,
+    stop_journal_drainer,
+)
 from apps.api.src.api.v1.core.limiter import limiter
+from apps.api.src.api.v1.core.whitelist_cache import warm_up_whitelist_cache
+from apps.api.src.api.v1.core.whitelist_sweeper import (
+    start_whitelist_sweeper,
+    stop_whitelist_sweeper,
+)
+from apps.api.src.api.v1.db.session import SessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +74,28 @@ Esta API fornece o backend para o sistema SISCAV, integrando dispositivos IoT (c
 *   PostgreSQL
 """
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Inicialização e encerramento da aplicação."""
+    # Falha no arranque se o backend das imagens estiver mal configurado
+    get_image_store()
+    warm_up_whitelist_cache(SessionLocal)
+    sweeper = start_whitelist_sweeper(SessionLocal)
+    access_log_writer = start_access_log_writer(SessionLocal)
+    journal_drainer = start_journal_drainer(SessionLocal)
+    postprocessor = start_image_postprocessor(SessionLocal)
+    retention = start_image_retention(SessionLocal)
+    yield
+    stop_image_retention(retention)
+    stop_image_postprocessor(postprocessor)
+    await stop_journal_drainer(journal_drainer)
+    await stop_access_log_writer(access_log_writer)
+    await stop_whitelist_sweeper(sweeper)
+    close_image_derivatives()
+    close_image_store()
+
+
 app = FastAPI(
     title="Sistema de Controle de Acesso Veicular (SISCAV) API",
     description=description,
@@ -68,6 +117,7 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    lifespan=lifespan,
 )
 
 # Configurar rate limiting global
@@ -75,6 +125,14 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
+# Rejeitar uploads de ingestão acima de MAX_FILE_SIZE_MB (lotes: INGEST_BATCH_MAX_BODY_MB)
+# antes de receber o corpo inteiro
+app.add_middleware(
+    IngestBodyLimitMiddleware,
+    paths=("/api/v1/access_logs/",),
+    batch_paths=("/api/v1/access_logs/batch",),
+)
+
 
 # Handler global para exceções não tratadas
 @app.exception_handler(Exception)
@@ -120,6 +178,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos de resposta que o JavaScript do frontend precisa de ler
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -0,0 +1,83 @@
+"""
+Apply the image retention policy once (e.g. from cron instead of the API process).
+
+Usage (from repo root with PYTHONPATH=.):
+    python scripts/apply_image_retention.py [--frame-days N] [--authorized-frame-days N]
+        [--crop-days N] [--archive-dir DIR]
+
+Images of access logs older than the configured periods (IMAGE_RETENTION_*) are
+removed, or appended to daily .tar.gz archives first when an archive directory is
+set. The access logs themselves are kept with a null image key. Work is done in
+small transactions at a bounded file rate, so the script can run next to the API
+and be interrupted and run again at any time.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add repo root to PYTHONPATH
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_retention import (
+    ImageArchive,
+    ImageRetentionJob,
+    RetentionPolicy,
+    build_image_retention,
+    retention_lock_path,
+)
+from apps.api.src.api.v1.core.image_store import close_image_store
+
+settings = get_settings()
+
+engine = create_engine(settings.database_url)
+SessionLocal = sessionmaker(bind=engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frame-days", type=int, help="Days to keep full frames (0 = forever)")
+    parser.add_argument(
+        "--authorized-frame-days", type=int, help="Days to keep frames of Authorized events"
+    )
+    parser.add_argument("--crop-days", type=int, help="Days to keep plate crops (0 = forever)")
+    parser.add_argument("--archive-dir", type=Path, help="Archive expired images into DIR")
+    args = parser.parse_args()
+
+    retention = build_image_retention()
+    policy = retention.policy
+    retention.policy = RetentionPolicy(
+        policy.frame_days if args.frame_days is None else args.frame_days,
+        policy.authorized_frame_days
+        if args.authorized_frame_days is None
+        else args.authorized_frame_days,
+        policy.crop_days if args.crop_days is None else args.crop_days,
+    )
+    if args.archive_dir is not None:
+        retention.archive = ImageArchive(args.archive_dir)
+    print(f"Database: {settings.database_url}")
+    print(f"Policy: {retention.policy}")
+    print(f"Archive: {retention.archive.root if retention.archive else 'disabled'}")
+
+    # Same lock as the API workers: never two runs at once on this host
+    job = ImageRetentionJob(SessionLocal, retention, 0, retention_lock_path())
+    try:
+        report = job.run_once()
+    finally:
+        close_image_store()
+    if report is None:
+        print("[FAIL] Not applied: another process holds the lock or the run failed (see log)")
+        sys.exit(1)
+
+    print(f"[OK] Frames removed: {report.frames}")
+    print(f"[OK] Plate crops removed: {report.crops}")
+    print(f"[OK] Images archived: {report.archived}")
+
+
+if __name__ == "__main__":
+    main()
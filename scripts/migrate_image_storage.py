@@ -0,0 +1,65 @@
+"""
+Move access log images to the content-addressed layout.
+
+Usage (from repo root with PYTHONPATH=.):
+    python scripts/migrate_image_storage.py [--batch-size 500]
+
+Every image still stored under an old key (<UPLOAD_DIR>/<uuid4><ext>) is linked
+into UPLOAD_DIR/ab/cd/<sha256><ext> (or uploaded under that key to the bucket
+when IMAGE_STORAGE_BACKEND=s3), the access log is updated and the reference
+is counted in image_blobs. Identical images end up stored once. The old file is
+removed only after its batch is committed, so the script can be interrupted and
+run again. Set IMAGE_STORAGE_LAYOUT=content so new uploads use the same layout.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add repo root to PYTHONPATH
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_store import (
+    LAYOUT_CONTENT,
+    ImageStore,
+    close_image_store,
+    get_image_store,
+)
+
+settings = get_settings()
+
+engine = create_engine(settings.database_url)
+SessionLocal = sessionmaker(bind=engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500, help="Access logs per transaction")
+    args = parser.parse_args()
+
+    # Configured backend (IMAGE_STORAGE_BACKEND): with s3 the images are uploaded to the bucket
+    backend = get_image_store().backend
+    store = ImageStore(Path(settings.upload_dir), LAYOUT_CONTENT, backend)
+    print(f"Database: {settings.database_url}")
+    print(f"Upload dir: {store.root}")
+    print(f"Image backend: {backend.name}")
+
+    db = SessionLocal()
+    try:
+        report = store.migrate_legacy_images(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+        close_image_store()
+
+    print(f"[OK] Images migrated: {report.migrated}")
+    if report.missing:
+        print(f"[WARN] Images missing on disk (old keys kept): {report.missing}")
+
+
+if __name__ == "__main__":
+    main()
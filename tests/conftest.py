@@ -1,11 +1,17 @@
 """Configuração compartilhada para testes de integração."""
 
+import atexit
 import os
+import shutil
+import tempfile
 import uuid
 
-# Antes de importar a app: garantir chave de ingestão e ambiente de teste
+# Antes de importar a app: garantir chave de ingestão, ambiente de teste e imagens fora do repo
 os.environ.setdefault("DEVICE_INGEST_KEY", "test-device-ingest-key")
 os.environ.setdefault("ENVIRONMENT", "development")
+if "UPLOAD_DIR" not in os.environ:
+    os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="siscav-test-uploads-")
+    atexit.register(shutil.rmtree, os.environ["UPLOAD_DIR"], ignore_errors=True)
 
 from collections.abc import Generator
 
@@ -15,6 +21,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_store import close_image_store
 from apps.api.src.api.v1.core.limiter import limiter
 from apps.api.src.api.v1.core.security import create_access_token, get_password_hash
 from apps.api.src.api.v1.db.base import Base
@@ -59,6 +67,19 @@ def _reset_login_rate_limiter() -> None:
     limiter.reset()
 
 
+@pytest.fixture(autouse=True)
+def _isolated_upload_dir(tmp_path_factory: pytest.TempPathFactory) -> Generator[None]:
+    """Imagens gravadas pelos testes num diretório temporário, nunca em `./uploads`."""
+    settings = get_settings()
+    original = settings.upload_dir
+    settings.upload_dir = str(tmp_path_factory.mktemp("uploads"))
+    try:
+        yield
+    finally:
+        close_image_store()
+        settings.upload_dir = original
+
+
 @pytest.fixture
 def client() -> TestClient:
     """Fixture para criar um cliente de teste."""
@@ -1,10 +1,24 @@
 """E2E flow: authorized and denied access log ingest with image on disk."""
 
+import csv
+import io
+import json
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
 
-from tests.conftest import TEST_DEVICE_INGEST_KEY
+from apps.api.src.api.v1.controllers import access_log_controller
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.image_derivatives import DerivativeSpec, ImageDerivatives
+from apps.api.src.api.v1.core.image_postprocess import ImagePostprocessor
+from apps.api.src.api.v1.core.ingest_journal import get_ingest_journal
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from tests.conftest import TEST_DEVICE_INGEST_KEY, TestingSessionLocal
 
 _DEVICE = {"X-Device-Key": TEST_DEVICE_INGEST_KEY}
 
@@ -50,3 +64,544 @@ def test_access_log_authorized_and_denied_flow(client: TestClient, auth_token: s
     saved_path = Path(log["image_storage_key"])
     assert saved_path.exists()
     saved_path.unlink()
+
+
+def test_access_log_ingest_rejects_oversized_body(client: TestClient, monkeypatch):
+    """Corpo acima de MAX_FILE_SIZE_MB → 413, pelo Content-Length ou pela contagem em streaming."""
+    monkeypatch.setattr(get_settings(), "max_file_size_mb", 1)
+    upload_dir = Path(get_settings().upload_dir)
+    before = set(upload_dir.iterdir()) if upload_dir.exists() else set()
+    files = {"file": ("big.jpg", b"x" * (2 * 1024 * 1024), "image/jpeg")}
+
+    response = client.post(
+        "/api/v1/access_logs/", files=files, data={"plate": "ABC-1234"}, headers=_DEVICE
+    )
+    assert response.status_code == 413
+
+    def chunked_body():
+        yield (
+            b'--b\r\nContent-Disposition: form-data; name="file"; filename="big.jpg"\r\n'
+            b"Content-Type: image/jpeg\r\n\r\n"
+        )
+        yield b"x" * (1024 * 1024)
+        yield b"x" * (1024 * 1024)
+
+    response = client.post(
+        "/api/v1/access_logs/",
+        content=chunked_body(),
+        headers={**_DEVICE, "Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert (set(upload_dir.iterdir()) if upload_dir.exists() else set()) == before
+
+
+def _manifest(*events: dict | str) -> bytes:
+    return "\n".join(e if isinstance(e, str) else json.dumps(e) for e in events).encode()
+
+
+def test_access_log_batch_multipart(
+    client: TestClient, auth_token: str, monkeypatch, tmp_path: Path
+):
+    """Lote multipart: autorização no instante de captura e resultado por evento."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    client.post(
+        "/api/v1/whitelist/",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"plate": "BAT-1A11", "valid_until": "2026-01-01T00:00:00Z"},
+    )
+    manifest = _manifest(
+        {"file": "a.jpg", "plate": "BAT-1A11", "captured_at": "2025-12-31T10:00:00Z"},
+        {"file": "b.jpg", "plate": "BAT1A11", "captured_at": "2026-02-01T10:00:00Z"},
+        "not json",
+        {"file": "missing.jpg", "plate": "XYZ9999", "captured_at": "2026-02-01T10:00:00Z"},
+        {"file": "a.jpg", "plate": "XYZ9999", "captured_at": "2026-02-01T10:00:00Z"},
+    )
+    files = [
+        ("manifest", ("manifest.ndjson", manifest, "application/x-ndjson")),
+        ("files", ("a.jpg", b"image-a", "image/jpeg")),
+        ("files", ("b.jpg", b"image-b", "image/jpeg")),
+    ]
+
+    response = client.post("/api/v1/access_logs/batch", files=files, headers=_DEVICE)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["rejected"]) == (2, 3)
+    items = body["items"]
+    assert [item["status"] for item in items] == [
+        "created",
+        "created",
+        "rejected",
+        "rejected",
+        "rejected",
+    ]
+    assert items[0]["access_log"]["status"] == "Authorized"
+    assert items[0]["access_log"]["timestamp"].startswith("2025-12-31T10:00:00")
+    assert items[1]["access_log"]["status"] == "Denied"
+    assert items[2]["line"] == 3
+    assert items[3]["detail"] == "Imagem não enviada"
+    assert Path(items[0]["access_log"]["image_storage_key"]).read_bytes() == b"image-a"
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_access_log_batch_tar_archive(client: TestClient, monkeypatch, tmp_path: Path):
+    """Lote com as imagens num arquivo tar comprimido."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path / "uploads"))
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+        for name, content in (("./c.jpg", b"image-c"), ("notes.txt", b"text")):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    manifest = _manifest(
+        {"file": "c.jpg", "plate": "TAR1B22", "captured_at": "2026-02-01T10:00:00"},
+        {"file": "notes.txt", "plate": "TAR1B22", "captured_at": "2026-02-01T10:00:00"},
+    )
+    files = [
+        ("manifest", ("manifest.ndjson", manifest, "application/x-ndjson")),
+        ("archive", ("backlog.tar.gz", archive.getvalue(), "application/gzip")),
+    ]
+
+    response = client.post("/api/v1/access_logs/batch", files=files, headers=_DEVICE)
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items[0]["status"] == "created"
+    assert Path(items[0]["access_log"]["image_storage_key"]).read_bytes() == b"image-c"
+    assert items[1]["detail"] == "Arquivo deve ser uma imagem"
+
+    invalid = client.post(
+        "/api/v1/access_logs/batch",
+        files=[files[0], ("archive", ("x.tar", b"not a tar", "application/x-tar"))],
+        headers=_DEVICE,
+    )
+    assert invalid.status_code == 400
+
+
+def test_access_log_batch_limits(client: TestClient, monkeypatch):
+    """Manifesto com eventos demais e corpo acima do limite de lote → 413."""
+    monkeypatch.setattr(get_settings(), "ingest_batch_max_items", 1)
+    event = {"file": "a.jpg", "plate": "ABC1234", "captured_at": "2026-02-01T10:00:00Z"}
+    files = [("manifest", ("m.ndjson", _manifest(event, event), "application/x-ndjson"))]
+    response = client.post("/api/v1/access_logs/batch", files=files, headers=_DEVICE)
+    assert response.status_code == 413
+
+    monkeypatch.setattr(get_settings(), "ingest_batch_max_body_mb", 1)
+    files = [
+        ("manifest", ("m.ndjson", _manifest(event), "application/x-ndjson")),
+        ("files", ("a.jpg", b"x" * (2 * 1024 * 1024), "image/jpeg")),
+    ]
+    response = client.post("/api/v1/access_logs/batch", files=files, headers=_DEVICE)
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("Lote muito grande")
+
+    response = client.post("/api/v1/access_logs/batch", files=files[:1])
+    assert response.status_code in (401, 403)
+
+
+def test_access_log_batch_rejects_ambiguous_or_expanding_uploads(
+    client: TestClient, monkeypatch, tmp_path: Path
+):
+    """O mesmo nome em duas partes `files` → 400; tar que se expande além do lote → 413."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    event = {"file": "a.jpg", "plate": "DUP1A11", "captured_at": "2026-02-01T10:00:00Z"}
+    manifest = ("manifest", ("m.ndjson", _manifest(event), "application/x-ndjson"))
+    files = [
+        manifest,
+        ("files", ("a.jpg", b"image-1", "image/jpeg")),
+        ("files", ("other/a.jpg", b"image-2", "image/jpeg")),
+    ]
+    response = client.post("/api/v1/access_logs/batch", files=files, headers=_DEVICE)
+    assert response.status_code == 400
+    assert "a.jpg" in response.json()["detail"]
+
+    monkeypatch.setattr(get_settings(), "ingest_batch_max_body_mb", 1)
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+        info = tarfile.TarInfo("padding.bin")
+        info.size = 2 * 1024 * 1024
+        tar.addfile(info, io.BytesIO(bytes(info.size)))
+        image = tarfile.TarInfo("a.jpg")
+        image.size = 5
+        tar.addfile(image, io.BytesIO(b"image"))
+    files = [manifest, ("archive", ("backlog.tar.gz", archive.getvalue(), "application/gzip"))]
+    response = client.post("/api/v1/access_logs/batch", files=files, headers=_DEVICE)
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_access_log_idempotency_key(client: TestClient, monkeypatch, tmp_path: Path):
+    """Reenvios com Idempotency-Key (ou event_id) devolvem o registro original."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    files = {"file": ("car.jpg", b"image", "image/jpeg")}
+    headers = {**_DEVICE, "Idempotency-Key": "flow-gate:0001"}
+
+    first = client.post(
+        "/api/v1/access_logs/", files=files, data={"plate": "IDE1A11"}, headers=headers
+    )
+    retry = client.post(
+        "/api/v1/access_logs/",
+        files=files,
+        data={"plate": "IDE1A11", "event_id": "flow-gate:0001"},
+        headers=_DEVICE,
+    )
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert first.json()["event_id"] == "flow-gate:0001"
+    assert len(list(tmp_path.iterdir())) == 1
+
+    mismatch = client.post(
+        "/api/v1/access_logs/",
+        files=files,
+        data={"plate": "IDE1A11", "event_id": "other"},
+        headers=headers,
+    )
+    assert mismatch.status_code == 400
+
+    manifest = _manifest(
+        {
+            "file": "a.jpg",
+            "plate": "IDE1A11",
+            "captured_at": "2026-02-01T10:00:00Z",
+            "event_id": "flow-gate:0001",
+        },
+        {
+            "file": "b.jpg",
+            "plate": "IDE1A11",
+            "captured_at": "2026-02-01T10:00:01Z",
+            "event_id": "flow-gate:0002",
+        },
+        {
+            "file": "c.jpg",
+            "plate": "IDE1A11",
+            "captured_at": "2026-02-01T10:00:02Z",
+            "event_id": "flow-gate:0002",
+        },
+    )
+    batch_files = [
+        ("manifest", ("manifest.ndjson", manifest, "application/x-ndjson")),
+        *[("files", (name, b"image", "image/jpeg")) for name in ("a.jpg", "b.jpg", "c.jpg")],
+    ]
+    body = client.post("/api/v1/access_logs/batch", files=batch_files, headers=_DEVICE).json()
+
+    assert (body["created"], body["duplicates"], body["rejected"]) == (1, 1, 1)
+    assert body["items"][0]["access_log"] == first.json()
+    assert body["items"][2]["detail"] == "event_id repetido no lote"
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_access_log_repeat_reads_coalesced(client: TestClient, monkeypatch, tmp_path: Path):
+    """Com X-Device-Id, leituras repetidas na janela devolvem o mesmo evento."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "ingest_dedup_window_seconds", 30)
+    files = {"file": ("car.jpg", b"image", "image/jpeg")}
+    headers = {**_DEVICE, "X-Device-Id": "flow-cam-1"}
+
+    logs = [
+        client.post(
+            "/api/v1/access_logs/", files=files, data={"plate": "REP1A11"}, headers=headers
+        ).json()
+        for _ in range(3)
+    ]
+
+    assert logs[0]["id"] == logs[2]["id"]
+    assert logs[2]["read_count"] == 3
+    assert logs[0]["device_id"] == "flow-cam-1"
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_access_log_database_outage_is_journaled(client: TestClient, monkeypatch, tmp_path: Path):
+    """Com o banco indisponível, a ingestão responde 202 e o evento fica no diário."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "ingest_journal_enabled", True)
+    monkeypatch.setattr(settings, "ingest_journal_path", str(tmp_path / "journal.ndjson"))
+
+    def database_down(*_args, **_kwargs):
+        statement = "INSERT INTO access_logs"
+        raise OperationalError(statement, {}, ConnectionRefusedError("down"))
+
+    monkeypatch.setattr(AccessLogRepository, "create", staticmethod(database_down))
+    response = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"image", "image/jpeg")},
+        data={"plate": "JNL1A11"},
+        headers=_DEVICE,
+    )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["provisional"] is True
+    assert body["plate_string_detected"] == "JNL1A11"
+    journal = get_ingest_journal()
+    assert journal.pending()
+    assert body["id"] in journal.path.read_text()
+    journal.close()
+
+
+def test_access_log_content_addressed_images(
+    client: TestClient, admin_auth_token: str, monkeypatch, tmp_path: Path
+):
+    """No layout por conteúdo, imagens idênticas são guardadas uma vez e servidas pelo hash."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "image_storage_layout", "content")
+
+    keys = [
+        client.post(
+            "/api/v1/access_logs/",
+            files={"file": ("car.jpg", b"same frame", "image/jpeg")},
+            data={"plate": plate},
+            headers=_DEVICE,
+        ).json()["image_storage_key"]
+        for plate in ("CAS1A11", "CAS2B22")
+    ]
+
+    assert keys[0] == keys[1]
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == [tmp_path / keys[0]]
+    image = client.get(
+        f"/api/v1/access_logs/images/{Path(keys[0]).name}",
+        headers={"Authorization": f"Bearer {admin_auth_token}"},
+    )
+    assert image.status_code == 200
+    assert image.content == b"same frame"
+
+
+def test_access_log_image_caching_and_range(
+    client: TestClient, admin_auth_token: str, monkeypatch, tmp_path: Path
+):
+    """Imagens com ETag forte e Cache-Control; If-None-Match responde 304 e Range 206."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "image_storage_layout", "content")
+    key = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"0123456789", "image/jpeg")},
+        data={"plate": "ETG1A23"},
+        headers=_DEVICE,
+    ).json()["image_storage_key"]
+    url = f"/api/v1/access_logs/images/{Path(key).name}"
+    auth = {"Authorization": f"Bearer {admin_auth_token}"}
+
+    full = client.get(url, headers=auth)
+    assert full.status_code == 200
+    assert full.headers["etag"] == f'"{Path(key).stem}"'
+    assert full.headers["cache-control"] == "private, max-age=86400, immutable"
+    assert full.headers["accept-ranges"] == "bytes"
+
+    cached = client.get(url, headers={**auth, "If-None-Match": full.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == full.headers["etag"]
+
+    part = client.get(url, headers={**auth, "Range": "bytes=2-5"})
+    assert part.status_code == 206
+    assert part.content == b"2345"
+
+
+def test_access_log_signed_image_urls(
+    client: TestClient, admin_auth_token: str, auth_token: str, monkeypatch, tmp_path: Path
+):
+    """Administradores recebem URLs assinadas; a imagem é servida sem JWT."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "image_storage_layout", "content")
+    key = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"signed frame", "image/jpeg")},
+        data={"plate": "SIG1A23"},
+        headers=_DEVICE,
+    ).json()["image_storage_key"]
+
+    def listed(token: str) -> dict:
+        response = client.get(
+            "/api/v1/access_logs/",
+            params={"plate": "SIG1A23"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        return response.json()[0]
+
+    assert listed(auth_token)["image_url"] is None
+    url = listed(admin_auth_token)["image_url"]
+    assert url.startswith(f"/api/v1/access_logs/signed-images/{Path(key).name}?")
+
+    image = client.get(url)
+    assert image.status_code == 200
+    assert image.content == b"signed frame"
+    assert client.get(url.replace("signature=", "signature=0")).status_code == 403
+
+    monkeypatch.setattr(settings, "image_delivery_mode", "x-accel-redirect")
+    offloaded = client.get(url)
+    assert offloaded.status_code == 200
+    assert offloaded.content == b""
+    assert offloaded.headers["x-accel-redirect"] == f"/protected-images/{key}"
+    assert offloaded.headers["etag"] == f'"{Path(key).stem}"'
+
+
+def _fake_render(_source: Path, dest: Path, spec: DerivativeSpec) -> None:
+    dest.write_bytes(f"thumb {spec.width}".encode())
+
+
+def test_access_log_image_thumbnails(
+    client: TestClient, admin_auth_token: str, monkeypatch, tmp_path: Path
+):
+    """Com `w`/`format` a imagem é redimensionada uma vez e servida do cache."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "image_storage_layout", "content")
+    key = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"full frame", "image/jpeg")},
+        data={"plate": "THB1A23"},
+        headers=_DEVICE,
+    ).json()["image_storage_key"]
+    url = f"/api/v1/access_logs/images/{Path(key).name}"
+    auth = {"Authorization": f"Bearer {admin_auth_token}"}
+
+    monkeypatch.setattr(access_log_controller, "transcode_available", lambda: False)
+    assert client.get(url, params={"w": 320}, headers=auth).status_code == 503
+
+    derivatives = ImageDerivatives(tmp_path / "cache", 10_000, ThreadPoolExecutor(1), _fake_render)
+    monkeypatch.setattr(access_log_controller, "transcode_available", lambda: True)
+    monkeypatch.setattr(access_log_controller, "get_image_derivatives", lambda: derivatives)
+
+    thumb = client.get(url, params={"w": 320, "format": "webp"}, headers=auth)
+    assert thumb.status_code == 200
+    assert thumb.content == b"thumb 320"
+    assert thumb.headers["content-type"] == "image/webp"
+    assert thumb.headers["etag"] == f'"{Path(key).stem}-320x0-webp"'
+    cached = client.get(
+        url,
+        params={"w": 320, "format": "webp"},
+        headers={**auth, "If-None-Match": thumb.headers["etag"]},
+    )
+    assert cached.status_code == 304
+    assert client.get(url, params={"w": 0}, headers=auth).status_code == 422
+    derivatives.close()
+
+
+def _fake_transcode(source: Path, dest: Path, fmt: str, *, box=None, **_kwargs) -> None:
+    dest.write_bytes(b"plate" if box else source.read_bytes()[:5] + fmt.encode())
+
+
+def test_access_log_postprocessing(client: TestClient, monkeypatch, tmp_path: Path):
+    """Com `IMAGE_POSTPROCESS_ENABLED`, a imagem é recomprimida e a placa recortada."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "image_storage_layout", "content")
+    postprocessor = ImagePostprocessor(
+        TestingSessionLocal, ThreadPoolExecutor(1), "webp", 80, 1920, convert=_fake_transcode
+    )
+    monkeypatch.setattr(access_log_controller, "get_image_postprocessor", lambda: postprocessor)
+
+    invalid = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"a large camera frame", "image/jpeg")},
+        data={"plate": "PPC1A23", "plate_box": "10,20,-5,8"},
+        headers=_DEVICE,
+    )
+    assert invalid.status_code == 400
+    response = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"a large camera frame", "image/jpeg")},
+        data={"plate": "PPC1A23", "plate_box": "10,20,100,30"},
+        headers=_DEVICE,
+    )
+    assert response.status_code == 200
+    postprocessor.close()
+
+    db = TestingSessionLocal()
+    try:
+        log = AccessLogRepository.get_by_id(db, response.json()["id"])
+        assert log.image_storage_key != response.json()["image_storage_key"]
+        assert (tmp_path / log.image_storage_key).read_bytes() == b"a larwebp"
+        assert (tmp_path / log.plate_crop_key).read_bytes() == b"plate"
+        assert not (tmp_path / response.json()["image_storage_key"]).exists()
+    finally:
+        db.close()
+
+
+def test_access_log_image_export(
+    client: TestClient, admin_auth_token: str, auth_token: str, monkeypatch, tmp_path: Path
+):
+    """Exportação: arquivo com as imagens do período e um manifesto CSV, só para admin."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    ids = []
+    for plate, content in (("EXP1A23", b"first frame"), ("EXP2B34", b"second frame")):
+        response = client.post(
+            "/api/v1/access_logs/",
+            files={"file": ("car.jpg", content, "image/jpeg")},
+            data={"plate": plate},
+            headers=_DEVICE,
+        )
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    (tmp_path / response.json()["image_storage_key"]).unlink()
+
+    forbidden = client.get(
+        "/api/v1/access_logs/export",
+        params={"plate": "EXP"},
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert forbidden.status_code == 403
+
+    admin = {"Authorization": f"Bearer {admin_auth_token}"}
+    response = client.get("/api/v1/access_logs/export", params={"plate": "EXP"}, headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-tar"
+    assert response.headers["content-disposition"].endswith('.tar"')
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as tar:
+        names = tar.getnames()
+        manifest = tar.extractfile("manifest.csv").read().decode()
+        image = tar.extractfile(names[0]).read()
+    assert len(names) == 2
+    assert names[0].startswith("images/")
+    assert names[0].endswith(f"_EXP1A23_{ids[0]}.jpg")
+    assert image == b"first frame"
+    rows = list(csv.DictReader(io.StringIO(manifest)))
+    assert [row["id"] for row in rows] == ids
+    assert [row["image_status"] for row in rows] == ["ok", "missing"]
+    assert rows[0]["image_file"] == names[0]
+    assert rows[1]["image_file"] == ""
+
+    response = client.get(
+        "/api/v1/access_logs/export", params={"plate": "EXP1", "format": "zip"}, headers=admin
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        assert len(archive.namelist()) == 2
+        assert archive.read(archive.namelist()[0]) == b"first frame"
+
+
+def test_access_log_image_export_read_failure_aborts(
+    client: TestClient, admin_auth_token: str, monkeypatch, tmp_path: Path
+):
+    """Falha a meio de uma imagem aborta a exportação em vez de marcá-la `missing`."""
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    response = client.post(
+        "/api/v1/access_logs/",
+        files={"file": ("car.jpg", b"frame that breaks", "image/jpeg")},
+        data={"plate": "EXB1A23"},
+        headers=_DEVICE,
+    )
+    assert response.status_code == 200
+
+    class _Broken(io.BytesIO):
+        def read(self, _size: int = -1) -> bytes:
+            message = "disk went away"
+            raise OSError(message)
+
+    opened = []
+
+    def fake_open(_self, stack, key):
+        opened.append(key)
+        return stack.enter_context(_Broken()), 17
+
+    monkeypatch.setattr(access_log_controller.AccessLogController, "_open_export_image", fake_open)
+    admin = {"Authorization": f"Bearer {admin_auth_token}"}
+    with pytest.raises(OSError, match="disk went away"):
+        client.get("/api/v1/access_logs/export", params={"plate": "EXB"}, headers=admin)
+    assert opened == [response.json()["image_storage_key"]]
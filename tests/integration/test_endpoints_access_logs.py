@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import update
 from sqlalchemy.orm import Session
 
+from apps.api.src.api.v1.core.config import get_settings
 from apps.api.src.api.v1.models.access_log import AccessLog
 from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
 from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
@@ -253,7 +254,7 @@ class TestAccessLogsEndpoints:
         )
         db_session.commit()
 
-        upload_root = Path(__file__).resolve().parents[2] / "uploads"
+        upload_root = Path(get_settings().upload_dir)
         upload_root.mkdir(parents=True, exist_ok=True)
         image_path = upload_root / "integration_test_plate.jpg"
         image_path.write_bytes(b"\xff\xd8\xff fake jpeg")
@@ -1,9 +1,20 @@
 """Testes de integração para endpoints de whitelist."""
 
+import random
+import string
 import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
 
+from apps.api.src.api.v1.core import whitelist_snapshot
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.utils.plate import plate_equivalence_key
+from apps.api.src.api.v1.utils.plate_snapshot import PlateSnapshot
+from tests.conftest import TEST_DEVICE_INGEST_KEY
+
 
 class TestWhitelistEndpoints:
     """Testes para endpoints de whitelist."""
@@ -173,3 +184,362 @@ class TestWhitelistEndpoints:
         )
         assert response.status_code == 200
         assert len(response.json()) == 1
+
+    def test_list_whitelist_cursor_and_prefix(self, client: TestClient, auth_token: str):
+        """GET com `plate` filtra por prefixo; `X-Next-Cursor` leva à página seguinte."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        prefix = "Q" + "".join(random.choices(string.ascii_uppercase, k=2))
+        for n in range(3):
+            client.post("/api/v1/whitelist/", headers=headers, json={"plate": f"{prefix}-{n:04d}"})
+
+        first = client.get(
+            "/api/v1/whitelist/", headers=headers, params={"plate": prefix.lower(), "limit": 2}
+        )
+        assert first.status_code == 200, first.text
+        assert [p["normalized_plate"] for p in first.json()] == [f"{prefix}0000", f"{prefix}0001"]
+        cursor = first.headers["X-Next-Cursor"]
+
+        # Visível ao frontend noutra origem (CORS)
+        cross_origin = client.get(
+            "/api/v1/whitelist/",
+            headers={**headers, "Origin": "http://localhost:5173"},
+            params={"plate": prefix, "limit": 2},
+        )
+        assert "x-next-cursor" in cross_origin.headers["Access-Control-Expose-Headers"].lower()
+
+        second = client.get(
+            "/api/v1/whitelist/",
+            headers=headers,
+            params={"plate": prefix, "limit": 2, "cursor": cursor},
+        )
+        assert [p["normalized_plate"] for p in second.json()] == [f"{prefix}0002"]
+        assert "X-Next-Cursor" not in second.headers
+
+        bad = client.get("/api/v1/whitelist/", headers=headers, params={"cursor": "???"})
+        assert bad.status_code == 400
+
+    def test_check_plates_batch(self, client: TestClient, auth_token: str):
+        """POST /whitelist/check devolve o resultado de cada placa, na ordem do pedido."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        plate = f"CHK-{base:04d}"
+        created = client.post("/api/v1/whitelist/", headers=headers, json={"plate": plate})
+
+        response = client.post(
+            "/api/v1/whitelist/check",
+            headers=headers,
+            json={"plates": [plate.lower(), "ZZZ-0000"]},
+        )
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert [item["authorized"] for item in data] == [True, False]
+        assert data[0]["authorized_plate_id"] == created.json()["id"]
+        assert data[0]["normalized_plate"] == plate.replace("-", "")
+
+    def test_create_plate_with_validity_window(self, client: TestClient, auth_token: str):
+        """Janela de validade é devolvida na leitura; janelas incoerentes → 422."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        plate = f"VIS-{base:04d}"
+
+        created = client.post(
+            "/api/v1/whitelist/",
+            headers=headers,
+            json={
+                "plate": plate,
+                "valid_until": "2000-01-01T00:00:00Z",
+                "weekdays": [4, 0, 0],
+                "daily_start": "22:00:00",
+                "daily_end": "06:00:00",
+            },
+        )
+        assert created.status_code == 200, created.text
+        assert created.json()["weekdays"] == [0, 4]
+        assert created.json()["daily_start"] == "22:00:00"
+        check = client.post("/api/v1/whitelist/check", headers=headers, json={"plates": [plate]})
+        assert check.json()[0]["authorized"] is False
+
+        for invalid in (
+            {"valid_from": "2030-01-02T00:00:00Z", "valid_until": "2030-01-01T00:00:00Z"},
+            {"daily_start": "08:00:00"},
+            {"weekdays": [7]},
+        ):
+            response = client.post(
+                "/api/v1/whitelist/", headers=headers, json={"plate": "ZZZ-9999", **invalid}
+            )
+            assert response.status_code == 422, invalid
+
+    def test_check_plates_batch_limits(self, client: TestClient, auth_token: str):
+        """Lista vazia ou acima do limite → 422; sem autenticação → 401."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        assert (
+            client.post("/api/v1/whitelist/check", json={"plates": ["ABC1234"]}).status_code == 401
+        )
+        empty = client.post("/api/v1/whitelist/check", headers=headers, json={"plates": []})
+        too_many = client.post(
+            "/api/v1/whitelist/check", headers=headers, json={"plates": ["ABC1234"] * 51}
+        )
+        assert empty.status_code == 422
+        assert too_many.status_code == 422
+
+    def test_changes_delta_sync(self, client: TestClient, auth_token: str):
+        """GET /whitelist/changes: inserções e tombstones desde `since`, com ETag/304."""
+        auth = {"Authorization": f"Bearer {auth_token}"}
+        device = {"X-Device-Key": TEST_DEVICE_INGEST_KEY}
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        start = client.get("/api/v1/whitelist/changes", headers=device).json()["version"]
+
+        created = client.post("/api/v1/whitelist/", headers=auth, json={"plate": f"DLT-{base:04d}"})
+        client.delete(f"/api/v1/whitelist/{created.json()['id']}", headers=auth)
+        client.post("/api/v1/whitelist/", headers=auth, json={"plate": f"DLT-{base + 1:04d}"})
+
+        response = client.get(f"/api/v1/whitelist/changes?since={start}", headers=device)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert [(c["normalized_plate"], c["op"]) for c in data["changes"]] == [
+            (f"DLT{base:04d}", "delete"),
+            (f"DLT{base + 1:04d}", "upsert"),
+        ]
+        assert data["version"] == start + 3
+        assert response.headers["ETag"] == f'"{start + 3}-{start}-1000"'
+
+        not_modified = client.get(
+            f"/api/v1/whitelist/changes?since={start}",
+            headers={**device, "If-None-Match": response.headers["ETag"]},
+        )
+        assert not_modified.status_code == 304
+
+        # A ETag de uma página não serve para outra (mesma versão, outros `since`/`limit`)
+        timed = client.post(
+            "/api/v1/whitelist/",
+            headers=auth,
+            json={
+                "plate": f"DLT-{base + 2:04d}",
+                "weekdays": [5, 6],
+                "valid_until": "2099-01-01T00:00:00Z",
+            },
+        )
+        assert timed.status_code == 200, timed.text
+        latest = client.get(f"/api/v1/whitelist/changes?since={start + 3}", headers=device)
+        [change] = latest.json()["changes"]
+        assert change["weekdays"] == [5, 6]
+        assert change["plate_key"] == plate_equivalence_key(f"DLT{base + 2:04d}")
+        assert change["plate_key"] != change["normalized_plate"]
+        assert change["valid_until"].startswith("2099-01-01")
+        assert data["changes"][1]["weekdays"] is None
+
+        page = client.get(
+            f"/api/v1/whitelist/changes?since={start}&limit=1",
+            headers={**device, "If-None-Match": response.headers["ETag"]},
+        )
+        assert page.status_code == 200
+        assert page.json()["has_more"] is True
+        assert page.json()["version"] == start + 2
+        assert page.headers["ETag"] != response.headers["ETag"]
+
+    def test_changes_requires_device_key_and_known_version(self, client: TestClient):
+        """Sem X-Device-Key → 401; `since` além da versão atual → 410."""
+        assert client.get("/api/v1/whitelist/changes").status_code == 401
+
+        response = client.get(
+            "/api/v1/whitelist/changes?since=999999999",
+            headers={"X-Device-Key": TEST_DEVICE_INGEST_KEY},
+        )
+        assert response.status_code == 410
+
+    def test_snapshot_download_and_conditional_get(
+        self,
+        client: TestClient,
+        auth_token: str,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """GET /whitelist/snapshot: arquivo binário com a whitelist, ETag e 304."""
+        monkeypatch.setenv("WHITELIST_SNAPSHOT_PATH", str(tmp_path / "whitelist.snap"))
+        get_settings.cache_clear()
+        device = {"X-Device-Key": TEST_DEVICE_INGEST_KEY}
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        plate = f"SNP{base:04d}"
+        expired = f"SNX{base:04d}"
+        client.post(
+            "/api/v1/whitelist/",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"plate": plate},
+        )
+        client.post(
+            "/api/v1/whitelist/",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"plate": expired, "valid_until": "2020-01-01T00:00:00Z"},
+        )
+
+        try:
+            response = client.get("/api/v1/whitelist/snapshot", headers=device)
+            assert response.status_code == 200, response.text
+            assert response.headers["content-type"] == "application/octet-stream"
+            downloaded = tmp_path / "downloaded.snap"
+            downloaded.write_bytes(response.content)
+            with PlateSnapshot(downloaded) as snapshot:
+                assert plate in snapshot
+                assert expired not in snapshot
+                assert response.headers["ETag"] == f'"{snapshot.version}-{snapshot.expires_at}"'
+
+            not_modified = client.get(
+                "/api/v1/whitelist/snapshot",
+                headers={**device, "If-None-Match": response.headers["ETag"]},
+            )
+            assert not_modified.status_code == 304
+            assert client.get("/api/v1/whitelist/snapshot").status_code == 401
+        finally:
+            monkeypatch.undo()
+            get_settings.cache_clear()
+
+    def test_snapshot_expires_with_its_first_valid_until(
+        self,
+        client: TestClient,
+        auth_token: str,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Uma placa que expira entre dois downloads sai do snapshot sem alterar a whitelist."""
+        monkeypatch.setenv("WHITELIST_SNAPSHOT_PATH", str(tmp_path / "whitelist.snap"))
+        get_settings.cache_clear()
+        device = {"X-Device-Key": TEST_DEVICE_INGEST_KEY}
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        visitor = f"VIS{base:04d}"
+        valid_until = datetime.now(UTC) + timedelta(hours=1)
+        client.post(
+            "/api/v1/whitelist/",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"plate": visitor, "valid_until": valid_until.isoformat()},
+        )
+
+        class _Later(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(hours=2)
+
+        try:
+            first = client.get("/api/v1/whitelist/snapshot", headers=device)
+            assert first.status_code == 200, first.text
+            snapshot_path = tmp_path / "first.snap"
+            snapshot_path.write_bytes(first.content)
+            with PlateSnapshot(snapshot_path) as snapshot:
+                assert visitor in snapshot
+                assert snapshot.expires_at <= valid_until.timestamp() + 1
+
+            monkeypatch.setattr(whitelist_snapshot, "datetime", _Later)
+            second = client.get(
+                "/api/v1/whitelist/snapshot",
+                headers={**device, "If-None-Match": first.headers["ETag"]},
+            )
+            assert second.status_code == 200
+            assert second.headers["ETag"] != first.headers["ETag"]
+            assert second.headers["X-Whitelist-Version"] == first.headers["X-Whitelist-Version"]
+            snapshot_path.write_bytes(second.content)
+            with PlateSnapshot(snapshot_path) as snapshot:
+                assert visitor not in snapshot
+        finally:
+            monkeypatch.undo()
+            get_settings.cache_clear()
+
+    def test_cache_stats_requires_admin(
+        self, client: TestClient, auth_token: str, admin_auth_token: str
+    ):
+        """GET /whitelist/cache/stats: não-admin 403, admin recebe os contadores."""
+        r_user = client.get(
+            "/api/v1/whitelist/cache/stats",
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+        assert r_user.status_code == 403
+
+        r_admin = client.get(
+            "/api/v1/whitelist/cache/stats",
+            headers={"Authorization": f"Bearer {admin_auth_token}"},
+        )
+        assert r_admin.status_code == 200
+        data = r_admin.json()
+        assert {"enabled", "size", "hits", "misses", "reloads"} <= set(data)
+
+    def test_bulk_import_csv_reports_row_errors(self, client: TestClient, auth_token: str):
+        """POST /whitelist/bulk (CSV) cria as válidas e reporta erros por linha."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        existing = f"BLK-{base:04d}"
+        client.post("/api/v1/whitelist/", headers=headers, json={"plate": existing})
+
+        body = "\n".join(
+            [
+                "plate,description",
+                f"BLK-{base + 1:04d},Apto 101",
+                "INVALID,bad",
+                f"BLK{base + 1:04d},repetida",
+                existing,
+                f"BLK-{base + 2:04d}",
+            ]
+        )
+        response = client.post(
+            "/api/v1/whitelist/bulk",
+            headers={**headers, "Content-Type": "text/csv"},
+            content=body.encode(),
+        )
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["total_rows"] == 5
+        assert data["created"] == 2
+        assert [e["line"] for e in data["errors"]] == [3, 4, 5]
+        assert data["errors"][2]["error"] == "Plate already exists in whitelist"
+
+    def test_bulk_import_ndjson(self, client: TestClient, auth_token: str):
+        """POST /whitelist/bulk aceita NDJSON."""
+        base = int(uuid.uuid4().hex[:4], 16) % 5000 + 1000
+        body = f'{{"plate": "NDJ{base:04d}", "description": "x"}}\n{{"plate": null}}\n'
+
+        response = client.post(
+            "/api/v1/whitelist/bulk",
+            headers={
+                "Authorization": f"Bearer {auth_token}",
+                "Content-Type": "application/x-ndjson",
+            },
+            content=body.encode(),
+        )
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["created"] == 1
+        assert data["errors"][0]["line"] == 2
+
+    def test_bulk_import_unsupported_content_type(self, client: TestClient, auth_token: str):
+        """Content-Type não suportado → 415."""
+        response = client.post(
+            "/api/v1/whitelist/bulk",
+            headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "application/json"},
+            content=b"[]",
+        )
+
+        assert response.status_code == 415
+
+    def test_sync_requires_admin_and_reports_counts(
+        self, client: TestClient, auth_token: str, admin_auth_token: str
+    ):
+        """PUT /whitelist/sync: não-admin 403; admin recebe as contagens (dry_run)."""
+        body = {"plates": [{"plate": "SYN-0001"}], "dry_run": True}
+
+        r_user = client.put(
+            "/api/v1/whitelist/sync",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json=body,
+        )
+        assert r_user.status_code == 403
+
+        r_admin = client.put(
+            "/api/v1/whitelist/sync",
+            headers={"Authorization": f"Bearer {admin_auth_token}"},
+            json=body,
+        )
+        assert r_admin.status_code == 200, r_admin.text
+        data = r_admin.json()
+        assert data["dry_run"] is True
+        assert {"created", "updated", "deleted", "unchanged"} <= set(data)
@@ -16,6 +16,7 @@ from apps.api.src.api.v1.controllers.auth_controller import AuthController
 from apps.api.src.api.v1.controllers.device_controller import DeviceController
 from apps.api.src.api.v1.controllers.gate_controller import GateController
 from apps.api.src.api.v1.controllers.plate_controller import PlateController
+from apps.api.src.api.v1.core.image_store import ImageStore
 from apps.api.src.api.v1.core.security import get_password_hash
 from apps.api.src.api.v1.db.base import Base
 from apps.api.src.api.v1.models.user import User
@@ -232,13 +233,13 @@ class TestAccessLogController:
         with patch(
             "apps.api.src.api.v1.controllers.access_log_controller.get_settings"
         ) as mock_settings:
-            mock_settings.return_value.upload_dir = str(upload_dir)
             mock_settings.return_value.max_file_size_mb = 10
-            controller = AccessLogController(db_session)
+            controller = AccessLogController(db_session, image_store=ImageStore(upload_dir))
             log = controller.create_access_log(plate="ABC-1234", file=file)
             assert log.status == AccessStatus.Authorized
             assert log.plate_string_detected == "ABC-1234"
             assert log.authorized_plate_id == plate.id
+            assert (upload_dir / log.image_storage_key).read_bytes() == file_content
 
     def test_create_access_log_denied(self, db_session, upload_dir):
         """Testa criação de log de acesso negado."""
@@ -252,12 +253,12 @@ class TestAccessLogController:
         with patch(
             "apps.api.src.api.v1.controllers.access_log_controller.get_settings"
         ) as mock_settings:
-            mock_settings.return_value.upload_dir = str(upload_dir)
             mock_settings.return_value.max_file_size_mb = 10
-            controller = AccessLogController(db_session)
+            controller = AccessLogController(db_session, image_store=ImageStore(upload_dir))
             log = controller.create_access_log(plate="XYZ-9999", file=file)
             assert log.status == AccessStatus.Denied
             assert log.authorized_plate_id is None
+            assert (upload_dir / log.image_storage_key).read_bytes() == file_content
 
     def test_create_access_log_invalid_file_type(self, db_session):
         """Testa criação de log com tipo de arquivo inválido."""
@@ -285,34 +286,25 @@ class TestAccessLogController:
         with patch(
             "apps.api.src.api.v1.controllers.access_log_controller.get_settings"
         ) as mock_settings:
-            mock_settings.return_value.upload_dir = str(upload_dir)
             mock_settings.return_value.max_file_size_mb = 10
-            controller = AccessLogController(db_session)
+            controller = AccessLogController(db_session, image_store=ImageStore(upload_dir))
             with pytest.raises(HTTPException) as exc_info:
                 controller.create_access_log(plate="ABC-1234", file=file)
             assert exc_info.value.status_code == 413
 
-    def test_get_image_path_not_found(self, db_session, upload_dir):
+    def test_get_image_not_found(self, db_session, upload_dir):
         """Testa busca de imagem inexistente."""
-        with patch(
-            "apps.api.src.api.v1.controllers.access_log_controller.get_settings"
-        ) as mock_settings:
-            mock_settings.return_value.upload_dir = str(upload_dir)
-            controller = AccessLogController(db_session)
-            with pytest.raises(HTTPException) as exc_info:
-                controller.get_image_path("nonexistent.jpg")
-            assert exc_info.value.status_code == 404
+        controller = AccessLogController(db_session, image_store=ImageStore(upload_dir))
+        with pytest.raises(HTTPException) as exc_info:
+            controller.get_image("nonexistent.jpg")
+        assert exc_info.value.status_code == 404
 
-    def test_get_image_path_path_traversal(self, db_session, upload_dir):
+    def test_get_image_path_traversal(self, db_session, upload_dir):
         """Testa prevenção de path traversal."""
-        with patch(
-            "apps.api.src.api.v1.controllers.access_log_controller.get_settings"
-        ) as mock_settings:
-            mock_settings.return_value.upload_dir = str(upload_dir)
-            controller = AccessLogController(db_session)
-            with pytest.raises(HTTPException) as exc_info:
-                controller.get_image_path("../../../etc/passwd")
-            assert exc_info.value.status_code == 400
+        controller = AccessLogController(db_session, image_store=ImageStore(upload_dir))
+        with pytest.raises(HTTPException) as exc_info:
+            controller.get_image("../../../etc/passwd")
+        assert exc_info.value.status_code == 400
 
     def test_get_all_with_filters(self, db_session):
         """Testa listagem de logs com filtros."""
@@ -1,5 +1,6 @@
 """Testes unitários para AccessLogController."""
 
+import asyncio
 import io
 from pathlib import Path
 
@@ -9,9 +10,11 @@ from sqlalchemy.orm import Session
 
 from apps.api.src.api.v1.controllers.access_log_controller import AccessLogController
 from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
 from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
 from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
-from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.schemas.access_log import AccessLogRead, AccessStatus, PlateMatchType
 
 
 class TestAccessLogController:
@@ -71,6 +74,50 @@ class TestAccessLogController:
         # Limpar
         Path(result.image_storage_key).unlink()
 
+    def test_create_access_log_records_exact_match(self, db_session: Session):
+        """Correspondência exata fica registrada com distância 0."""
+        AuthorizedPlateRepository.create(db_session, plate="ABC-1234", normalized_plate="ABC1234")
+        file = UploadFile(
+            filename="test.jpg",
+            file=io.BytesIO(b"fake image content"),
+            headers={"content-type": "image/jpeg"},
+        )
+
+        result = AccessLogController(db_session).create_access_log(plate="ABC-1234", file=file)
+
+        assert result.match_type == PlateMatchType.exact
+        assert result.match_distance == 0
+        Path(result.image_storage_key).unlink()
+
+    def test_create_access_log_fuzzy_match(
+        self, db_session: Session, monkeypatch: pytest.MonkeyPatch
+    ):
+        """No modo tolerante, leitura com O/0 trocado é autorizada como `fuzzy`."""
+        monkeypatch.setenv("WHITELIST_FUZZY_MATCH_ENABLED", "true")
+        get_settings.cache_clear()
+        get_whitelist_cache().invalidate()
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="OBS-1234", normalized_plate="OBS1234"
+        )
+        file = UploadFile(
+            filename="test.jpg",
+            file=io.BytesIO(b"fake image content"),
+            headers={"content-type": "image/jpeg"},
+        )
+
+        try:
+            result = AccessLogController(db_session).create_access_log(plate="0BS-1234", file=file)
+        finally:
+            monkeypatch.undo()
+            get_settings.cache_clear()
+            get_whitelist_cache().invalidate()
+
+        assert result.status == AccessStatus.Authorized
+        assert result.authorized_plate_id == plate.id
+        assert result.match_type == PlateMatchType.fuzzy
+        assert result.match_distance == 0
+        Path(result.image_storage_key).unlink()
+
     def test_create_access_log_invalid_file_type(self, db_session: Session):
         """Testa criação de log com arquivo inválido."""
         file = UploadFile(
@@ -107,43 +154,252 @@ class TestAccessLogController:
         with pytest.raises(HTTPException) as exc_info:
             controller.create_access_log(plate="ABC-1234", file=file)
 
-        assert exc_info.value.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert exc_info.value.status_code == status.HTTP_413_CONTENT_TOO_LARGE
 
         # Restaurar valor original
         monkeypatch.setattr(settings, "max_file_size_mb", original_max_size)
 
-    def test_get_image_path_success(self, db_session: Session):
-        """Testa obtenção de caminho de imagem existente."""
+    def test_create_access_log_async_streams_and_enforces_size(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """A versão assíncrona grava em blocos e remove o arquivo parcial ao exceder o limite."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "max_file_size_mb", 1)
+        controller = AccessLogController(db_session)
+        content = b"y" * (600 * 1024)
+
+        result = asyncio.run(
+            controller.create_access_log_async(
+                plate="ABC-1234",
+                file=UploadFile(
+                    filename="ok.jpg",
+                    file=io.BytesIO(content),
+                    headers={"content-type": "image/jpeg"},
+                ),
+            )
+        )
+        assert result.status == AccessStatus.Denied
+        assert Path(result.image_storage_key).read_bytes() == content
+
+        oversized = UploadFile(
+            filename="big.jpg",
+            file=io.BytesIO(content * 2),
+            headers={"content-type": "image/jpeg"},
+        )
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(controller.create_access_log_async(plate="ABC-1234", file=oversized))
+        assert exc_info.value.status_code == status.HTTP_413_CONTENT_TOO_LARGE
+        assert list(tmp_path.iterdir()) == [Path(result.image_storage_key)]
+
+    def test_create_access_log_replay_returns_original(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """Reenvio com o mesmo event_id devolve o original, pelo cache ou pelo índice único."""
+        monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+        controller = AccessLogController(db_session)
+        controller.recent_events.clear()
+
+        def upload() -> UploadFile:
+            return UploadFile(
+                filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+            )
+
+        original = controller.create_access_log("ABC-1234", upload(), event_id="gate-1:0001")
+        replayed = controller.create_access_log("ABC-1234", upload(), event_id="gate-1:0001")
+
+        assert replayed == original
+        assert controller.recent_events.hits == 1
+        assert len(list(tmp_path.iterdir())) == 1
+
+        # Fora do cache (outro worker, reinício): a violação do índice único resolve o reenvio
+        controller.recent_events.clear()
+        replayed = asyncio.run(
+            controller.create_access_log_async("ABC-1234", upload(), event_id="gate-1:0001")
+        )
+
+        assert replayed == original
+        assert original.event_id == "gate-1:0001"
+        assert AccessLogRepository.count(db_session) == 1
+        assert list(tmp_path.iterdir()) == [Path(original.image_storage_key)]
+
+    def test_shared_image_references_match_logs(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """Com imagens por conteúdo, só os logs gravados ficam a referenciar a imagem."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "image_storage_layout", "content")
+        controller = AccessLogController(db_session)
+        controller.recent_events.clear()
+
+        def upload() -> UploadFile:
+            return UploadFile(
+                filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+            )
+
+        first = controller.create_access_log("ABC-1234", upload(), event_id="gate-1:0002")
+        second = asyncio.run(controller.create_access_log_async("DEF-5678", upload()))
+        controller.recent_events.clear()
+        replayed = controller.create_access_log("ABC-1234", upload(), event_id="gate-1:0002")
+
+        assert replayed == first
+        assert first.image_storage_key == second.image_storage_key
+        assert ImageBlobRepository.get_ref_count(db_session, first.image_storage_key) == 2
+        assert (tmp_path / first.image_storage_key).read_bytes() == b"img"
+
+    def test_repeat_reads_are_coalesced_per_device(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """Leituras repetidas na janela incrementam o evento e só guardam a imagem mais nítida."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "ingest_dedup_window_seconds", 60)
+        monkeypatch.setattr(settings, "ingest_dedup_replace_sharper", True)
+        # Sem OpenCV nos testes: nitidez pelo tamanho do arquivo
+        monkeypatch.setattr(
+            "apps.api.src.api.v1.controllers.access_log_controller.image_sharpness",
+            lambda path: float(path.stat().st_size),
+        )
+        controller = AccessLogController(db_session)
+        controller.recent_reads.clear()
+
+        def read(content: bytes, device_id: str | None = "cam-1") -> AccessLogRead:
+            upload = UploadFile(
+                filename="frame.jpg",
+                file=io.BytesIO(content),
+                headers={"content-type": "image/jpeg"},
+            )
+            return controller.create_access_log("ABC-1234", upload, device_id=device_id)
+
+        first = read(b"blurry")
+        sharper = read(b"much sharper frame")
+        blurrier = read(b"blur")
+        other_camera = read(b"blurry", device_id="cam-2")
+        anonymous = read(b"blurry", device_id=None)
+
+        assert sharper.id == blurrier.id == first.id
+        assert blurrier.read_count == 3
+        assert blurrier.last_seen_at is not None
+        assert Path(blurrier.image_storage_key).read_bytes() == b"much sharper frame"
+        assert not Path(first.image_storage_key).exists()
+        assert len({first.id, other_camera.id, anonymous.id}) == 3
+        assert AccessLogRepository.count(db_session) == 3
+        assert len(list(tmp_path.iterdir())) == 3
+
+    def test_coalesced_read_replay_survives_cache_loss(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """O reenvio de uma leitura agregada devolve o mesmo evento depois de a cache a esquecer."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "ingest_dedup_window_seconds", 60)
+        controller = AccessLogController(db_session)
+        controller.recent_reads.clear()
+
+        def read(event_id: str) -> AccessLogRead:
+            upload = UploadFile(
+                filename="frame.jpg",
+                file=io.BytesIO(b"img"),
+                headers={"content-type": "image/jpeg"},
+            )
+            return controller.create_access_log(
+                "ABC-1234", upload, event_id=event_id, device_id="cam-1"
+            )
+
+        first = read("cam-1:0001")
+        coalesced = read("cam-1:0002")
+        controller.recent_events.clear()
+        replayed = read("cam-1:0002")
+        replayed_async = asyncio.run(
+            controller.create_access_log_async(
+                "ABC-1234",
+                UploadFile(
+                    filename="frame.jpg",
+                    file=io.BytesIO(b"img"),
+                    headers={"content-type": "image/jpeg"},
+                ),
+                event_id="cam-1:0002",
+                device_id="cam-1",
+            )
+        )
+
+        assert coalesced.id == first.id
+        assert replayed.id == replayed_async.id == first.id
+        assert AccessLogRepository.get_by_id(db_session, first.id).read_count == 2
+        assert AccessLogRepository.count(db_session) == 1
+
+    def test_repeat_read_discards_sharper_image_if_event_image_changed(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """Se a imagem do evento mudou entretanto (ex.: recomprimida), a da leitura é descartada."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "ingest_dedup_window_seconds", 60)
+        monkeypatch.setattr(settings, "ingest_dedup_replace_sharper", True)
+        monkeypatch.setattr(
+            "apps.api.src.api.v1.controllers.access_log_controller.image_sharpness",
+            lambda path: float(path.stat().st_size),
+        )
+        controller = AccessLogController(db_session)
+        controller.recent_reads.clear()
+
+        def read(content: bytes) -> AccessLogRead:
+            upload = UploadFile(
+                filename="frame.jpg",
+                file=io.BytesIO(content),
+                headers={"content-type": "image/jpeg"},
+            )
+            return controller.create_access_log("ABC-1234", upload, device_id="cam-1")
+
+        first = read(b"blurry")
+        (tmp_path / "recompressed.jpg").write_bytes(b"small")
+        AccessLogRepository.replace_image_key(
+            db_session, first.image_storage_key, "recompressed.jpg"
+        )
+        sharper = read(b"much sharper frame")
+
+        assert sharper.id == first.id
+        assert sharper.read_count == 2
+        assert sharper.image_storage_key == "recompressed.jpg"
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            [Path(first.image_storage_key).name, "recompressed.jpg"]
+        )
+
+    def test_get_image_success(self, db_session: Session):
+        """Testa localização de imagem existente."""
         # Criar arquivo de teste
-        test_dir = Path("uploads")
+        test_dir = Path(get_settings().upload_dir)
         test_dir.mkdir(exist_ok=True)
         test_file = test_dir / "test_image.jpg"
         test_file.write_bytes(b"test content")
 
         controller = AccessLogController(db_session)
-        result = controller.get_image_path("test_image.jpg")
+        result = controller.get_image("test_image.jpg")
 
-        assert result == test_file
-        assert result.exists()
+        assert result.local_path == test_file
+        assert result.size == len(b"test content")
+        with controller.open_image(result) as f:
+            assert f.read() == b"test content"
 
         # Limpar
         test_file.unlink()
 
-    def test_get_image_path_not_found(self, db_session: Session):
-        """Testa obtenção de caminho de imagem inexistente."""
+    def test_get_image_not_found(self, db_session: Session):
+        """Testa localização de imagem inexistente."""
         controller = AccessLogController(db_session)
 
         with pytest.raises(HTTPException) as exc_info:
-            controller.get_image_path("nonexistent.jpg")
+            controller.get_image("nonexistent.jpg")
 
         assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
 
-    def test_get_image_path_path_traversal(self, db_session: Session):
+    def test_get_image_path_traversal(self, db_session: Session):
         """Testa prevenção de path traversal."""
         controller = AccessLogController(db_session)
 
         with pytest.raises(HTTPException) as exc_info:
-            controller.get_image_path("../../../etc/passwd")
+            controller.get_image("../../../etc/passwd")
 
         assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
 
@@ -8,9 +8,13 @@ from sqlalchemy.orm import Session
 
 from apps.api.src.api.v1.controllers.plate_controller import PlateController
 from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
+from apps.api.src.api.v1.schemas.access_log import PlateMatchType
 from apps.api.src.api.v1.schemas.authorized_plate import (
+    AuthorizedPlateBase,
     AuthorizedPlateCreate,
     AuthorizedPlateRead,
+    WhitelistSort,
+    WhitelistSyncRequest,
 )
 
 
@@ -233,3 +237,143 @@ class TestPlateController:
         assert is_authorized1 is True
         assert is_authorized2 is True
         assert is_authorized3 is True
+
+    def test_legacy_and_mercosul_forms_are_the_same_vehicle(self, db_session: Session):
+        """A placa antiga autoriza a leitura Mercosul (e vice-versa) e bloqueia duplicados."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        controller = PlateController(db_session)
+
+        assert controller.check_authorization("ABC1C34") == (True, plate.id)
+        results = controller.check_authorization_batch(["ABC1C34", "ABC1D34"])
+        assert [r.authorized for r in results] == [True, False]
+        with pytest.raises(HTTPException) as exc_info:
+            controller.create(AuthorizedPlateCreate(plate="ABC1C34"))
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+
+    @pytest.mark.parametrize("sort", list(WhitelistSort))
+    def test_get_page_cursor_walks_every_plate_once(self, db_session: Session, sort: WhitelistSort):
+        """Seguir os cursores percorre toda a whitelist, sem repetições nem lacunas."""
+        for n in range(7):
+            AuthorizedPlateRepository.create(
+                db_session, plate=f"PAG-{n:04d}", normalized_plate=f"PAG{n:04d}"
+            )
+        controller = PlateController(db_session)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = controller.get_page(limit=3, sort=sort, cursor=cursor)
+            seen.extend(plate.normalized_plate for plate in page)
+            if cursor is None:
+                break
+
+        assert sorted(seen) == [f"PAG{n:04d}" for n in range(7)]
+        assert len(seen) == 7
+
+    def test_get_page_rejects_invalid_cursor(self, db_session: Session):
+        """Cursor ilegível ou de outra ordenação → 400."""
+        for n in range(2):
+            AuthorizedPlateRepository.create(
+                db_session, plate=f"PAG-{n:04d}", normalized_plate=f"PAG{n:04d}"
+            )
+        controller = PlateController(db_session)
+        _, cursor = controller.get_page(limit=1)
+
+        for bad in ("not-a-cursor", cursor):
+            with pytest.raises(HTTPException) as exc_info:
+                controller.get_page(limit=1, sort=WhitelistSort.created_at, cursor=bad)
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_check_authorization_batch(self, db_session: Session):
+        """Verificação em lote preserva a ordem e resolve placas repetidas."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+
+        controller = PlateController(db_session)
+        results = controller.check_authorization_batch(["abc-1234", "XYZ9999", "ABC1234"])
+
+        assert [r.authorized for r in results] == [True, False, True]
+        assert [r.normalized_plate for r in results] == ["ABC1234", "XYZ9999", "ABC1234"]
+        assert results[0].authorized_plate_id == plate.id
+        assert results[0].match_type == PlateMatchType.exact
+        assert results[1].authorized_plate_id is None
+        assert results[1].match_type is None
+
+    def test_sync_applies_minimal_diff(self, db_session: Session):
+        """sync insere, atualiza e remove só o necessário; inalteradas não são escritas."""
+        keep = AuthorizedPlateRepository.create(
+            db_session, plate="AAA-1111", normalized_plate="AAA1111", description="igual"
+        )
+        change = AuthorizedPlateRepository.create(
+            db_session, plate="BBB-2222", normalized_plate="BBB2222", description="antiga"
+        )
+        AuthorizedPlateRepository.create(db_session, plate="CCC-3333", normalized_plate="CCC3333")
+        keep_updated_at = keep.updated_at
+
+        controller = PlateController(db_session)
+        result = controller.sync(
+            WhitelistSyncRequest(
+                plates=[
+                    AuthorizedPlateBase(plate="AAA-1111", description="igual"),
+                    AuthorizedPlateBase(plate="BBB-2222", description="nova"),
+                    AuthorizedPlateBase(plate="DDD4444"),
+                ]
+            )
+        )
+
+        assert (result.created, result.updated, result.deleted, result.unchanged) == (1, 1, 1, 1)
+        db_session.expire_all()
+        assert (
+            AuthorizedPlateRepository.get_by_id(db_session, keep.id).updated_at == keep_updated_at
+        )
+        assert AuthorizedPlateRepository.get_by_id(db_session, change.id).description == "nova"
+        assert AuthorizedPlateRepository.get_by_normalized_plate(db_session, "CCC3333") is None
+        assert AuthorizedPlateRepository.get_by_normalized_plate(db_session, "DDD4444") is not None
+
+    def test_sync_dry_run_does_not_write(self, db_session: Session):
+        """dry_run devolve as contagens sem alterar o banco."""
+        AuthorizedPlateRepository.create(db_session, plate="AAA-1111", normalized_plate="AAA1111")
+
+        controller = PlateController(db_session)
+        result = controller.sync(
+            WhitelistSyncRequest(plates=[AuthorizedPlateBase(plate="DDD4444")], dry_run=True)
+        )
+
+        assert (result.created, result.deleted, result.dry_run) == (1, 1, True)
+        assert controller.count() == 1
+
+    def test_sync_rejects_repeated_plates(self, db_session: Session):
+        """A mesma placa (após normalização) duas vezes no conjunto → 400."""
+        controller = PlateController(db_session)
+
+        with pytest.raises(HTTPException) as exc_info:
+            controller.sync(
+                WhitelistSyncRequest(
+                    plates=[
+                        AuthorizedPlateBase(plate="ABC-1234"),
+                        AuthorizedPlateBase(plate="abc1234"),
+                    ]
+                )
+            )
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_sync_rejects_empty_or_truncated_set(self, db_session: Session):
+        """Conjunto vazio (sem allow_empty) ou diferente de expected_count → 400, sem escrita."""
+        AuthorizedPlateRepository.create(db_session, plate="AAA-1111", normalized_plate="AAA1111")
+        controller = PlateController(db_session)
+
+        for request in (
+            WhitelistSyncRequest(plates=[]),
+            WhitelistSyncRequest(plates=[AuthorizedPlateBase(plate="DDD4444")], expected_count=2),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                controller.sync(request)
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+        assert controller.count() == 1
+
+        result = controller.sync(WhitelistSyncRequest(plates=[], allow_empty=True))
+        assert result.deleted == 1
+        assert controller.count() == 0
@@ -0,0 +1,143 @@
+"""Testes unitários para o escritor agrupado de logs de acesso."""
+
+import asyncio
+import io
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.controllers.access_log_controller import AccessLogController
+from apps.api.src.api.v1.core.access_log_writer import (
+    AccessLogBatchWriter,
+    get_access_log_writer,
+    start_access_log_writer,
+    stop_access_log_writer,
+)
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def batch_sizes(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Regista o tamanho de cada lote gravado por `create_many`."""
+    sizes: list[int] = []
+    original = AccessLogRepository.create_many
+
+    def spy(db, rows):
+        sizes.append(len(rows))
+        return original(db, rows)
+
+    monkeypatch.setattr(AccessLogRepository, "create_many", staticmethod(spy))
+    return sizes
+
+
+@pytest.fixture
+def writer_enabled(monkeypatch: pytest.MonkeyPatch) -> Generator[None]:
+    monkeypatch.setenv("ACCESS_LOG_BATCH_ENABLED", "true")
+    monkeypatch.setenv("ACCESS_LOG_BATCH_MAX_DELAY_MS", "20")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def _event(plate: str, status: AccessStatus | None = AccessStatus.Denied) -> dict:
+    return {"plate_string_detected": plate, "status": status, "image_storage_key": f"{plate}.jpg"}
+
+
+class TestAccessLogBatchWriter:
+    """Testes para AccessLogBatchWriter."""
+
+    def test_groups_events_into_one_transaction(self, db_session: Session, batch_sizes):
+        """Eventos recebidos dentro da janela são gravados num único INSERT."""
+        writer = AccessLogBatchWriter(TestingSessionLocal, max_rows=10, max_delay_ms=200)
+        writer.start()
+        futures = [writer.submit(**_event(plate)) for plate in ("AAA1111", "BBB2222", "CCC3333")]
+        results = [future.result(timeout=5) for future in futures]
+        writer.stop()
+
+        assert batch_sizes == [3]
+        assert [r.plate_string_detected for r in results] == ["AAA1111", "BBB2222", "CCC3333"]
+        for result in results:
+            stored = AccessLogRepository.get_by_id(db_session, result.id)
+            assert stored is not None
+            assert stored.image_storage_key == f"{result.plate_string_detected}.jpg"
+
+    def test_max_rows_splits_batches_and_stop_drains(self, db_session: Session, batch_sizes):
+        """Um lote cheio é gravado de imediato; `stop` grava os eventos ainda na fila."""
+        writer = AccessLogBatchWriter(TestingSessionLocal, max_rows=2, max_delay_ms=1000)
+        writer.start()
+        futures = [writer.submit(**_event(plate)) for plate in ("DDD4444", "EEE5555", "FFF6666")]
+        futures[0].result(timeout=5)
+        writer.stop()
+
+        assert batch_sizes == [2, 1]
+        assert all(future.done() and future.exception() is None for future in futures)
+        assert AccessLogRepository.count(db_session) == 3
+
+    def test_invalid_event_fails_only_its_own_request(self, db_session: Session):
+        """Se o lote falha, as linhas são regravadas uma a uma."""
+        writer = AccessLogBatchWriter(TestingSessionLocal, max_rows=10, max_delay_ms=200)
+        writer.start()
+        ok_first = writer.submit(**_event("GGG7777"))
+        invalid = writer.submit(**_event("HHH8888", status=None))
+        ok_last = writer.submit(**_event("III9999"))
+        writer.stop()
+
+        assert ok_first.result().plate_string_detected == "GGG7777"
+        assert ok_last.result().plate_string_detected == "III9999"
+        with pytest.raises(IntegrityError):
+            invalid.result()
+        assert AccessLogRepository.count(db_session) == 2
+
+    def test_submit_after_stop_raises(self):
+        """Um escritor parado não aceita novos eventos."""
+        writer = AccessLogBatchWriter(TestingSessionLocal, max_rows=10, max_delay_ms=0)
+        writer.start()
+        writer.stop()
+
+        assert not writer.running
+        with pytest.raises(RuntimeError):
+            writer.submit(**_event("JJJ0000"))
+
+    def test_disabled_by_default(self, monkeypatch: pytest.MonkeyPatch):
+        """Sem ACCESS_LOG_BATCH_ENABLED o escritor não é iniciado."""
+        monkeypatch.delenv("ACCESS_LOG_BATCH_ENABLED", raising=False)
+        get_settings.cache_clear()
+
+        assert start_access_log_writer(TestingSessionLocal) is None
+        assert get_access_log_writer() is None
+
+    @pytest.mark.usefixtures("writer_enabled")
+    def test_async_ingest_awaits_batched_insert(
+        self, db_session: Session, batch_sizes, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ):
+        """Com o escritor ativo, a ingestão responde com o log já gravado pelo lote."""
+        monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+        writer = start_access_log_writer(TestingSessionLocal)
+        assert get_access_log_writer() is writer
+
+        async def ingest():
+            try:
+                return await AccessLogController(db_session).create_access_log_async(
+                    plate="KKK-1A23",
+                    file=UploadFile(
+                        filename="car.jpg",
+                        file=io.BytesIO(b"image"),
+                        headers={"content-type": "image/jpeg"},
+                    ),
+                )
+            finally:
+                await stop_access_log_writer(writer)
+
+        result = asyncio.run(ingest())
+
+        assert batch_sizes == [1]
+        assert result.status == AccessStatus.Denied
+        assert AccessLogRepository.get_by_id(db_session, result.id) is not None
+        assert get_access_log_writer() is None
@@ -0,0 +1,59 @@
+"""Testes unitários para a idempotência da ingestão."""
+
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.idempotency import RecentEventCache, clean_event_id
+from apps.api.src.api.v1.schemas.access_log import AccessLogRead, AccessStatus
+
+
+def _log(event_id: str | None) -> AccessLogRead:
+    return AccessLogRead(
+        id=uuid4(),
+        timestamp=datetime.now(UTC),
+        plate_string_detected="ABC1234",
+        status=AccessStatus.Denied,
+        image_storage_key="a.jpg",
+        event_id=event_id,
+    )
+
+
+def test_clean_event_id():
+    assert clean_event_id(None) is None
+    assert clean_event_id("   ") is None
+    assert clean_event_id(" gate-1:000042 ") == "gate-1:000042"
+    with pytest.raises(ValueError, match="128"):
+        clean_event_id("x" * 129)
+    with pytest.raises(ValueError, match="ASCII"):
+        clean_event_id("evento-ç")
+    with pytest.raises(ValueError, match="ASCII"):
+        clean_event_id("a\tb")
+
+
+def test_recent_event_cache_evicts_least_recently_used(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(get_settings(), "ingest_idempotency_cache_size", 2)
+    cache = RecentEventCache()
+    first, second, third = _log("e1"), _log("e2"), _log("e3")
+
+    cache.put(first)
+    cache.put(second)
+    assert cache.get("e1") == first
+    cache.put(third)
+    cache.put(_log(None))
+
+    assert cache.get("e2") is None
+    assert cache.get("e1") == first
+    assert cache.get("e3") == third
+    assert cache.get(None) is None
+    assert cache.hits == 3
+
+
+def test_recent_event_cache_disabled(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(get_settings(), "ingest_idempotency_cache_size", 0)
+    cache = RecentEventCache()
+    cache.put(_log("e1"))
+
+    assert cache.get("e1") is None
@@ -0,0 +1,145 @@
+"""Testes unitários para o cache de imagens redimensionadas."""
+
+import contextlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from apps.api.src.api.v1.core import image_derivatives
+from apps.api.src.api.v1.core.image_derivatives import DerivativeSpec, ImageDerivatives
+
+THUMB = DerivativeSpec(320, None, "webp")
+
+
+class _Renderer:
+    """Conversão falsa: escreve `size` bytes e conta as chamadas."""
+
+    def __init__(self, size: int = 100) -> None:
+        self.size = size
+        self.calls = 0
+        self.gate: threading.Event | None = None
+
+    def __call__(self, _source: Path, dest: Path, _spec: DerivativeSpec) -> None:
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.calls += 1
+        dest.write_bytes(b"x" * self.size)
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "frame.jpg"
+    path.write_bytes(b"frame")
+    return path
+
+
+def _derivatives(tmp_path: Path, render: _Renderer, max_bytes: int = 10_000):
+    return ImageDerivatives(tmp_path / "cache", max_bytes, ThreadPoolExecutor(2), render)
+
+
+def _opener(path: Path):
+    return lambda: contextlib.nullcontext(path)
+
+
+class TestImageDerivatives:
+    """Testes para ImageDerivatives."""
+
+    def test_derivative_is_rendered_once(self, tmp_path: Path, source: Path):
+        render = _Renderer()
+        derivatives = _derivatives(tmp_path, render)
+
+        first = derivatives.get("abc", ".jpg", THUMB, _opener(source))
+        second = derivatives.get("abc", ".jpg", THUMB, _opener(source))
+        other = derivatives.get("abc", ".jpg", DerivativeSpec(160, None, None), _opener(source))
+
+        assert first == second != other
+        assert first.suffix == ".webp"
+        assert other.suffix == ".jpg"
+        assert render.calls == 2
+        assert not [p for p in first.parent.iterdir() if p.name.startswith(".")]
+        derivatives.close()
+
+    def test_concurrent_requests_share_one_render(self, tmp_path: Path, source: Path):
+        render = _Renderer()
+        render.gate = threading.Event()
+        derivatives = _derivatives(tmp_path, render)
+        results: list[Path] = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    derivatives.get("abc", ".jpg", THUMB, _opener(source))
+                )
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        render.gate.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(results)) == 1
+        assert render.calls == 1
+        derivatives.close()
+
+    def test_least_recently_used_derivatives_are_evicted(self, tmp_path: Path, source: Path):
+        """Acima do orçamento, saem as derivadas usadas há mais tempo."""
+        derivatives = _derivatives(tmp_path, _Renderer(size=100), max_bytes=250)
+        old = derivatives.get("a", ".jpg", THUMB, _opener(source))
+        recent = derivatives.get("b", ".jpg", THUMB, _opener(source))
+        os.utime(old, (1, 1))
+        os.utime(recent, (2, 2))
+        derivatives.get("a", ".jpg", THUMB, _opener(source))
+
+        newest = derivatives.get("c", ".jpg", THUMB, _opener(source))
+
+        assert old.exists()
+        assert not recent.exists()
+        assert newest.exists()
+        derivatives.close()
+
+    def test_workers_sharing_the_cache_stay_within_budget(
+        self, tmp_path: Path, source: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Cada worker relê o disco: o total não passa do orçamento com vários escritores."""
+        monkeypatch.setattr(image_derivatives, "_RESCAN_INTERVAL_SECONDS", 0)
+        workers = [_derivatives(tmp_path, _Renderer(size=100), max_bytes=1000) for _ in range(4)]
+
+        for i in range(40):
+            workers[i % len(workers)].get(f"e{i}", ".jpg", THUMB, _opener(source))
+
+        cached = [p for p in (tmp_path / "cache").rglob("*") if p.is_file()]
+        assert sum(p.stat().st_size for p in cached) <= 1000
+        for worker in workers:
+            worker.close()
+
+    def test_abandoned_staged_files_are_swept(self, tmp_path: Path, source: Path):
+        """Temporários de conversões que excederam o tempo limite são apagados na varredura."""
+        stale = tmp_path / "cache" / "ab" / ".abandoned.webp"
+        stale.parent.mkdir(parents=True)
+        stale.write_bytes(b"partial")
+        os.utime(stale, (1, 1))
+        in_flight = stale.with_name(".in-flight.webp")
+        in_flight.write_bytes(b"partial")
+        derivatives = _derivatives(tmp_path, _Renderer())
+
+        derivatives.get("abc", ".jpg", THUMB, _opener(source))
+
+        assert not stale.exists()
+        assert in_flight.exists()
+        derivatives.close()
+
+    def test_failed_render_is_not_cached(self, tmp_path: Path, source: Path):
+        def broken(_source: Path, _dest: Path, _spec: DerivativeSpec) -> None:
+            msg = "cannot identify image file"
+            raise OSError(msg)
+
+        derivatives = ImageDerivatives(tmp_path / "cache", 1000, ThreadPoolExecutor(1), broken)
+
+        with pytest.raises(OSError, match="cannot identify"):
+            derivatives.get("abc", ".jpg", THUMB, _opener(source))
+        assert [p for p in (tmp_path / "cache").rglob("*") if p.is_file()] == []
+        derivatives.close()
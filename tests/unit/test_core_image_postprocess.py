@@ -0,0 +1,115 @@
+"""Testes unitários para a recompressão das imagens depois da ingestão."""
+
+import io
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.image_postprocess import ImagePostprocessor
+from apps.api.src.api.v1.core.image_store import LAYOUT_CONTENT, ImageStore
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.utils.image_transcode import PlateBox
+from tests.conftest import TestingSessionLocal
+
+FRAME = b"frame" * 100
+
+
+def _shrink(source: Path, dest: Path, fmt: str, *, box: PlateBox | None = None, **_kwargs) -> None:
+    """Conversão falsa: metade dos bytes, ou o recorte pedido."""
+    data = source.read_bytes()
+    dest.write_bytes(
+        f"crop {tuple(box)}".encode() if box else data[: len(data) // 2] + fmt.encode()
+    )
+
+
+def _grow(source: Path, dest: Path, _fmt: str, **_kwargs) -> None:
+    dest.write_bytes(source.read_bytes() * 2)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> ImageStore:
+    return ImageStore(tmp_path, LAYOUT_CONTENT)
+
+
+@pytest.fixture
+def executor() -> Iterator[ThreadPoolExecutor]:
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def _postprocessor(store: ImageStore, executor: ThreadPoolExecutor, convert=_shrink):
+    return ImagePostprocessor(
+        TestingSessionLocal, executor, "webp", 80, 1920, store=lambda: store, convert=convert
+    )
+
+
+def _log(db: Session, key: str):
+    return AccessLogRepository.create(
+        db, plate_string_detected="ABC1234", status=AccessStatus.Denied, image_storage_key=key
+    )
+
+
+class TestImagePostprocessor:
+    """Testes para ImagePostprocessor."""
+
+    def test_smaller_image_replaces_original_in_all_logs(
+        self, db_session: Session, store: ImageStore, executor: ThreadPoolExecutor
+    ):
+        """Os logs que partilham a imagem passam à nova; a original é apagada."""
+        original = store.put(io.BytesIO(FRAME), "a.jpg", len(FRAME))
+        first, second = _log(db_session, original.key), _log(db_session, original.key)
+
+        _postprocessor(store, executor).process(first.id, original.key, PlateBox(1, 2, 3, 4))
+
+        db_session.expire_all()
+        first, second = (
+            AccessLogRepository.get_by_id(db_session, log.id) for log in (first, second)
+        )
+        assert first.image_storage_key == second.image_storage_key != original.key
+        assert first.image_storage_key.endswith(".webp")
+        assert store.local_path(first.image_storage_key).stat().st_size < len(FRAME)
+        assert ImageBlobRepository.get_ref_count(db_session, first.image_storage_key) == 2
+        assert ImageBlobRepository.get_ref_count(db_session, original.key) == 0
+        assert store.local_path(original.key) is None
+        assert store.local_path(first.plate_crop_key).read_bytes() == b"crop (1, 2, 3, 4)"
+        assert second.plate_crop_key is None
+
+    def test_larger_result_keeps_original(
+        self, db_session: Session, store: ImageStore, executor: ThreadPoolExecutor
+    ):
+        original = store.put(io.BytesIO(FRAME), "a.jpg", len(FRAME))
+        log = _log(db_session, original.key)
+
+        _postprocessor(store, executor, convert=_grow).process(log.id, original.key)
+
+        db_session.expire_all()
+        assert AccessLogRepository.get_by_id(db_session, log.id).image_storage_key == original.key
+        assert [p.name for p in store.root.rglob("*.webp")] == []
+
+    def test_missing_image_is_skipped(self, db_session: Session, store: ImageStore, executor):
+        """Imagem já substituída por outro log: nada a fazer."""
+        log = _log(db_session, "ab/cd/gone.jpg")
+
+        _postprocessor(store, executor).process(log.id, "ab/cd/gone.jpg")
+
+        db_session.expire_all()
+        assert (
+            AccessLogRepository.get_by_id(db_session, log.id).image_storage_key == "ab/cd/gone.jpg"
+        )
+
+    def test_submit_runs_in_background(self, db_session: Session, store: ImageStore, executor):
+        original = store.put(io.BytesIO(FRAME), "a.jpg", len(FRAME))
+        log = _log(db_session, original.key)
+        postprocessor = _postprocessor(store, executor)
+
+        postprocessor.submit(log.id, original.key).result(timeout=5)
+        postprocessor.close()
+
+        db_session.expire_all()
+        assert AccessLogRepository.get_by_id(db_session, log.id).image_storage_key != original.key
+        assert postprocessor.submit(log.id, original.key) is None
@@ -0,0 +1,137 @@
+"""Testes unitários para a retenção das imagens."""
+
+import io
+import tarfile
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.image_retention import (
+    ImageArchive,
+    ImageRetention,
+    ImageRetentionJob,
+    RetentionPolicy,
+)
+from apps.api.src.api.v1.core.image_store import LAYOUT_CONTENT, ImageStore
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.utils.host_lock import host_lock
+from tests.conftest import TestingSessionLocal
+
+NOW = datetime(2026, 10, 18, 12, tzinfo=UTC)
+POLICY = RetentionPolicy(frame_days=30, authorized_frame_days=7, crop_days=365)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> ImageStore:
+    return ImageStore(tmp_path / "uploads", LAYOUT_CONTENT)
+
+
+def _image(store: ImageStore, content: bytes) -> str:
+    return store.put(io.BytesIO(content), "frame.jpg", 1024).key
+
+
+def _log(db: Session, key: str, days_ago: int, status: AccessStatus = AccessStatus.Denied):
+    row = AccessLogRepository.new_row(
+        plate_string_detected="ABC1234",
+        status=status,
+        image_storage_key=key,
+        timestamp=NOW - timedelta(days=days_ago),
+    )
+    (log,) = AccessLogRepository.create_many(db, [row])
+    return log.id
+
+
+def _retention(store: ImageStore, archive: ImageArchive | None = None) -> ImageRetention:
+    return ImageRetention(
+        POLICY, batch_size=1, max_files_per_second=10000, archive=archive, store=lambda: store
+    )
+
+
+def _key(db: Session, log_id, column: str = "image_storage_key"):
+    db.expire_all()
+    return getattr(AccessLogRepository.get_by_id(db, log_id), column)
+
+
+class TestImageRetention:
+    """Testes para ImageRetention."""
+
+    def test_applies_periods_by_status_and_kind(self, db_session: Session, store: ImageStore):
+        """Quadros antigos saem; `Authorized` sai antes; recortes têm prazo próprio."""
+        old = _log(db_session, _image(store, b"old"), days_ago=40)
+        authorized = _log(
+            db_session, _image(store, b"auth"), days_ago=10, status=AccessStatus.Authorized
+        )
+        recent = _log(db_session, _image(store, b"recent"), days_ago=10)
+        shared_key = _image(store, b"shared")
+        shared_old, shared_recent = (
+            _log(db_session, shared_key, 40),
+            _log(db_session, shared_key, 1),
+        )
+        crop_key = _image(store, b"crop")
+        AccessLogRepository.set_plate_crop(db_session, old, crop_key)
+        old_crop = _log(db_session, _image(store, b"frame"), days_ago=400)
+        AccessLogRepository.set_plate_crop(db_session, old_crop, _image(store, b"old crop"))
+
+        report = _retention(store).run(db_session, NOW)
+
+        assert report == (4, 1, 0)
+        for log_id in (old, authorized, shared_old, old_crop):
+            assert _key(db_session, log_id) is None
+        assert _key(db_session, recent) is not None
+        # Imagem partilhada com um log recente: só perde uma referência
+        assert _key(db_session, shared_recent) == shared_key
+        assert store.local_path(shared_key).read_bytes() == b"shared"
+        assert ImageBlobRepository.get_ref_count(db_session, shared_key) == 1
+        # O recorte de 40 dias fica; o de 400 dias sai
+        assert _key(db_session, old, "plate_crop_key") == crop_key
+        assert _key(db_session, old_crop, "plate_crop_key") is None
+        assert _retention(store).run(db_session, NOW) == (0, 0, 0)
+
+    def test_archives_into_daily_segments(
+        self, db_session: Session, store: ImageStore, tmp_path: Path
+    ):
+        archive = ImageArchive(tmp_path / "archive")
+        first = _log(db_session, _image(store, b"first"), days_ago=40)
+        _retention(store, archive).run(db_session, NOW)
+        second = _log(db_session, _image(store, b"second"), days_ago=40)
+        missing = _log(db_session, "ab/cd/gone.jpg", days_ago=40)
+
+        report = _retention(store, archive).run(db_session, NOW)
+
+        assert report == (2, 0, 1)
+        assert _key(db_session, missing) is None
+        path = archive.path((NOW - timedelta(days=40)).date())
+        assert path.name == "2026-09-08.tar.gz"
+        with tarfile.open(path, "r:gz", ignore_zeros=True) as tar:
+            contents = {member.name: tar.extractfile(member).read() for member in tar}
+        assert contents == {f"{first}.jpg": b"first", f"{second}.jpg": b"second"}
+
+    def test_stop_interrupts_run(self, db_session: Session, store: ImageStore):
+        log_id = _log(db_session, _image(store, b"old"), days_ago=40)
+        retention = _retention(store)
+        retention.stop_event.set()
+
+        assert retention.run(db_session, NOW) == (0, 0, 0)
+        assert _key(db_session, log_id) is not None
+
+
+class TestImageRetentionJob:
+    """Testes para ImageRetentionJob."""
+
+    def test_skips_when_another_worker_holds_the_lock(
+        self, db_session: Session, store: ImageStore, tmp_path: Path
+    ):
+        log_id = _log(db_session, _image(store, b"old"), days_ago=400)
+        job = ImageRetentionJob(TestingSessionLocal, _retention(store), 3600, tmp_path / "lock")
+
+        with host_lock(tmp_path / "lock") as acquired:
+            assert acquired
+            assert job.run_once() is None
+        assert _key(db_session, log_id) is not None
+
+        assert job.run_once() == (1, 0, 0)
+        assert _key(db_session, log_id) is None
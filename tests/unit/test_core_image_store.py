@@ -0,0 +1,149 @@
+"""Testes unitários para o armazenamento de imagens."""
+
+import io
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.core.image_store import LAYOUT_CONTENT, ImageStore
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.utils.file_placement import UploadTooLargeError
+
+MAX_BYTES = 1024
+
+
+def _log(db: Session, key: str):
+    return AccessLogRepository.create(
+        db, plate_string_detected="ABC1234", status=AccessStatus.Denied, image_storage_key=key
+    )
+
+
+class TestContentAddressedStore:
+    """Testes para ImageStore no layout por conteúdo."""
+
+    def test_identical_uploads_share_one_file(self, tmp_path: Path):
+        """O mesmo conteúdo fica num único arquivo sharded pelo hash."""
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+
+        first = store.put(io.BytesIO(b"frame"), "a.JPG", MAX_BYTES)
+        second = store.put(io.BytesIO(b"frame"), "b.jpg", MAX_BYTES)
+        other = store.put(io.BytesIO(b"other"), "c.jpg", MAX_BYTES)
+
+        assert first.key == second.key != other.key
+        assert (first.created, second.created, other.created) == (True, False, True)
+        digest = first.path.stem
+        assert first.path == tmp_path / digest[:2] / digest[2:4] / f"{digest}.jpg"
+        assert first.path.read_bytes() == b"frame"
+        assert store.locate(first.path.name) == first.key
+        assert list((tmp_path / ".incoming").iterdir()) == []
+
+    def test_oversized_upload_leaves_nothing(self, tmp_path: Path):
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+
+        with pytest.raises(UploadTooLargeError):
+            store.put(io.BytesIO(b"x" * (MAX_BYTES + 1)), "a.jpg", MAX_BYTES)
+        assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+    def test_file_removed_only_when_last_reference_is_released(
+        self, db_session: Session, tmp_path: Path
+    ):
+        """Cada log soma uma referência; o arquivo sai com a última."""
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+        image = store.put(io.BytesIO(b"frame"), "a.jpg", MAX_BYTES)
+        _log(db_session, image.key)
+        _log(db_session, image.key)
+        assert ImageBlobRepository.get_ref_count(db_session, image.key) == 2
+
+        store.discard(db_session, image.key)
+        store.release(db_session, [image.key])
+        assert image.path.exists()
+
+        store.release(db_session, [image.key])
+        assert not image.path.exists()
+        assert ImageBlobRepository.get_ref_count(db_session, image.key) == 0
+
+    def test_put_of_existing_image_survives_concurrent_release(
+        self, db_session: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        """O último log da imagem é libertado enquanto o mesmo conteúdo é reenviado."""
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+        first = store.put(io.BytesIO(b"frame"), "a.jpg", MAX_BYTES, db=db_session)
+        _log(db_session, first.key)
+        store.unpin(db_session, [first])
+        backend_store = store.backend.store
+
+        def store_during_release(key: str, source: Path) -> bool:
+            store.release(db_session, [first.key])
+            return backend_store(key, source)
+
+        monkeypatch.setattr(store.backend, "store", store_during_release)
+        second = store.put(io.BytesIO(b"frame"), "b.jpg", MAX_BYTES, db=db_session)
+
+        assert second.pinned
+        assert second.created is False
+        assert second.path.read_bytes() == b"frame"
+        _log(db_session, second.key)
+        store.unpin(db_session, [second])
+        assert ImageBlobRepository.get_ref_count(db_session, second.key) == 1
+        assert second.path.exists()
+
+    def test_discard_of_pinned_image_keeps_shared_file(self, db_session: Session, tmp_path: Path):
+        """Sem log gravado, `discard` retira a referência provisória e só apaga se não for usada."""
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+        kept = store.put(io.BytesIO(b"frame"), "a.jpg", MAX_BYTES, db=db_session)
+        _log(db_session, kept.key)
+        store.unpin(db_session, [kept])
+        shared = store.put(io.BytesIO(b"frame"), "b.jpg", MAX_BYTES, db=db_session)
+        lonely = store.put(io.BytesIO(b"other"), "c.jpg", MAX_BYTES, db=db_session)
+
+        store.discard(db_session, shared.key, pinned=True)
+        store.discard(db_session, lonely.key, pinned=True)
+
+        assert shared.path.exists()
+        assert ImageBlobRepository.get_ref_count(db_session, shared.key) == 1
+        assert not lonely.path.exists()
+        assert ImageBlobRepository.get_ref_count(db_session, lonely.key) == 0
+
+    def test_batch_insert_counts_repeated_images(self, db_session: Session, tmp_path: Path):
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+        image = store.put(io.BytesIO(b"frame"), "a.jpg", MAX_BYTES)
+        rows = [
+            AccessLogRepository.new_row(
+                plate_string_detected=plate, status=AccessStatus.Denied, image_storage_key=image.key
+            )
+            for plate in ("AAA1111", "BBB2222")
+        ]
+
+        AccessLogRepository.create_many(db_session, rows)
+
+        assert ImageBlobRepository.get_ref_count(db_session, image.key) == 2
+
+
+class TestLegacyMigration:
+    """Testes para a migração das chaves antigas."""
+
+    def test_migrates_flat_images_and_deduplicates(self, db_session: Session, tmp_path: Path):
+        flat = ImageStore(tmp_path)
+        first = flat.put(io.BytesIO(b"frame"), "a.jpg", MAX_BYTES)
+        second = flat.put(io.BytesIO(b"frame"), "b.jpg", MAX_BYTES)
+        logs = [_log(db_session, first.key), _log(db_session, second.key)]
+        missing = _log(db_session, str(tmp_path / "gone.jpg"))
+
+        store = ImageStore(tmp_path, LAYOUT_CONTENT)
+        report = store.migrate_legacy_images(db_session, batch_size=2)
+
+        assert (report.migrated, report.missing) == (2, 1)
+        keys = {AccessLogRepository.get_by_id(db_session, log.id).image_storage_key for log in logs}
+        assert len(keys) == 1
+        (key,) = keys
+        assert store.local_path(key).read_bytes() == b"frame"
+        assert ImageBlobRepository.get_ref_count(db_session, key) == 2
+        assert not first.path.exists()
+        assert not second.path.exists()
+        assert AccessLogRepository.get_by_id(db_session, missing.id).image_storage_key.endswith(
+            "gone.jpg"
+        )
+        assert store.migrate_legacy_images(db_session).migrated == 0
@@ -0,0 +1,238 @@
+"""Testes unitários para o diário local da ingestão."""
+
+import io
+import uuid
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.controllers.access_log_controller import AccessLogController
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.ingest_journal import (
+    IngestJournal,
+    JournalRecord,
+    get_ingest_journal,
+)
+from apps.api.src.api.v1.core.whitelist_cache import get_whitelist_cache
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
+from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
+from apps.api.src.api.v1.schemas.access_log import AccessLogAccepted, AccessStatus
+
+
+@pytest.fixture
+def journal(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Generator[IngestJournal]:
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "ingest_journal_enabled", True)
+    monkeypatch.setattr(settings, "ingest_journal_path", str(tmp_path / "journal.ndjson"))
+    journal = get_ingest_journal()
+    assert journal is not None
+    yield journal
+    journal.close()
+
+
+def _record(plate: str, event_id: str | None = None, image: str = "car.jpg") -> JournalRecord:
+    return JournalRecord(
+        id=uuid.uuid4(),
+        timestamp=datetime(2026, 10, 17, 11, 0, tzinfo=UTC),
+        plate_string_detected=plate,
+        image_storage_key=image,
+        event_id=event_id,
+    )
+
+
+def _database_down(*_args, **_kwargs):
+    statement = "INSERT INTO access_logs"
+    raise OperationalError(statement, {}, ConnectionRefusedError("down"))
+
+
+class TestIngestJournal:
+    """Testes para IngestJournal."""
+
+    def test_drain_records_logs_with_provisional_id(self, db_session: Session, journal):
+        """O log gravado mantém o ID provisório e o instante original do evento."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        authorized, denied = _record("ABC-1234", event_id="gate:1"), _record("ZZZ9999")
+        journal.append(authorized)
+        journal.append(denied)
+
+        assert journal.drain(db_session) == 2
+
+        stored = AccessLogRepository.get_by_id(db_session, authorized.id)
+        assert stored.status == AccessStatus.Authorized
+        assert stored.authorized_plate_id == plate.id
+        assert stored.event_id == "gate:1"
+        assert stored.timestamp.replace(tzinfo=UTC) == authorized.timestamp
+        assert AccessLogRepository.get_by_id(db_session, denied.id).status == AccessStatus.Denied
+        assert not journal.pending()
+        assert journal.drain(db_session) == 0
+
+    def test_drain_skips_records_already_in_database(
+        self, db_session: Session, journal, tmp_path: Path
+    ):
+        """IDs já gravados são ignorados; reenvios do mesmo event_id ficam só com o primeiro."""
+        first = _record("AAA1111", event_id="gate:7")
+        journal.append(first)
+        journal.drain(db_session)
+
+        replay_image = tmp_path / "replay.jpg"
+        replay_image.write_bytes(b"img")
+        journal.append(first)
+        journal.append(_record("AAA1111", event_id="gate:7", image=str(replay_image)))
+        journal.append(_record("BBB2222", event_id="gate:8"))
+        journal.append(_record("BBB2222", event_id="gate:8"))
+
+        assert journal.drain(db_session) == 1
+        assert AccessLogRepository.count(db_session) == 2
+        assert not replay_image.exists()
+
+    def test_unreadable_line_is_skipped(self, db_session: Session, journal):
+        """Uma linha truncada (queda a meio da escrita) não impede a drenagem."""
+        journal.append(_record("CCC3333"))
+        with journal.path.open("a") as f:
+            f.write('{"id": "trunc')
+
+        assert journal.drain(db_session) == 1
+        assert not journal.pending()
+
+    def test_failed_drain_keeps_records_for_next_attempt(
+        self, db_session: Session, journal, monkeypatch
+    ):
+        """Com o banco em baixo, o diário fica intacto e os novos eventos seguem noutro arquivo."""
+        journal.append(_record("DDD4444"))
+        with monkeypatch.context() as m:
+            m.setattr(AccessLogRepository, "create_many", staticmethod(_database_down))
+            with pytest.raises(OperationalError):
+                journal.drain(db_session)
+        db_session.rollback()
+
+        assert journal.draining_path.exists()
+        journal.append(_record("EEE5555"))
+        assert journal.path.exists()
+
+        assert journal.drain(db_session) == 1
+        assert journal.drain(db_session) == 1
+        assert AccessLogRepository.count(db_session) == 2
+        assert not journal.pending()
+
+
+class TestJournaledIngest:
+    """Ingestão com o banco indisponível."""
+
+    def test_database_outage_journals_event(self, db_session: Session, journal, monkeypatch):
+        """Sem banco, o evento vai para o diário e é gravado depois com o mesmo ID."""
+        controller = AccessLogController(db_session)
+        upload = UploadFile(
+            filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+        )
+        with monkeypatch.context() as m:
+            m.setattr(AccessLogRepository, "create", staticmethod(_database_down))
+            accepted = controller.create_access_log("FFF6666", upload, event_id="gate:9")
+        db_session.rollback()
+
+        assert isinstance(accepted, AccessLogAccepted)
+        assert accepted.provisional
+        assert Path(accepted.image_storage_key).exists()
+        assert datetime.now(UTC) - accepted.timestamp < timedelta(minutes=1)
+
+        journal.drain(db_session)
+        stored = AccessLogRepository.get_by_event_id(db_session, "gate:9")
+        assert stored.id == accepted.id
+        assert stored.image_storage_key == accepted.image_storage_key
+
+    def test_journaled_shared_image_keeps_one_reference(
+        self, db_session: Session, journal, monkeypatch
+    ):
+        """A referência provisória da imagem passa para o log gravado na drenagem."""
+        monkeypatch.setattr(get_settings(), "image_storage_layout", "content")
+        controller = AccessLogController(db_session)
+        upload = UploadFile(
+            filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+        )
+        with monkeypatch.context() as m:
+            m.setattr(AccessLogRepository, "create", staticmethod(_database_down))
+            accepted = controller.create_access_log("GGG7777", upload)
+        db_session.rollback()
+        key = accepted.image_storage_key
+        assert ImageBlobRepository.get_ref_count(db_session, key) == 1
+
+        journal.drain(db_session)
+
+        assert AccessLogRepository.get_by_id(db_session, accepted.id).image_storage_key == key
+        assert ImageBlobRepository.get_ref_count(db_session, key) == 1
+
+    def test_database_outage_decides_with_loaded_whitelist(
+        self, db_session: Session, journal, monkeypatch
+    ):
+        """Com a whitelist em memória, o 202 traz a decisão e o log gravado mantém-na."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "whitelist_cache_enabled", True)
+        monkeypatch.setattr(settings, "whitelist_cache_ttl_seconds", 3600)
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="HHH-8888", normalized_plate="HHH8888"
+        )
+        cache = get_whitelist_cache()
+        cache.load(db_session)
+        controller = AccessLogController(db_session)
+        upload = UploadFile(
+            filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+        )
+        try:
+            with monkeypatch.context() as m:
+                m.setattr(AccessLogRepository, "create", staticmethod(_database_down))
+                accepted = controller.create_access_log("HHH8888", upload)
+            db_session.rollback()
+            assert accepted.status == AccessStatus.Authorized
+            assert '"status": "Authorized"' in journal.path.read_text()
+
+            # Placa removida antes da drenagem: o portão já abriu, o log diz o mesmo
+            AuthorizedPlateRepository.delete(db_session, plate.id)
+            cache.invalidate()
+            journal.drain(db_session)
+        finally:
+            cache.invalidate()
+
+        stored = AccessLogRepository.get_by_id(db_session, accepted.id)
+        assert stored.status == AccessStatus.Authorized
+        assert stored.authorized_plate_id is None
+
+    def test_database_outage_without_loaded_whitelist_leaves_decision_open(
+        self, db_session: Session, journal, monkeypatch
+    ):
+        """Sem snapshot em memória, o 202 não traz status e a drenagem decide."""
+        monkeypatch.setattr(get_settings(), "whitelist_cache_enabled", False)
+        controller = AccessLogController(db_session)
+        upload = UploadFile(
+            filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+        )
+        with monkeypatch.context() as m:
+            m.setattr(AccessLogRepository, "create", staticmethod(_database_down))
+            accepted = controller.create_access_log("III9999", upload)
+        db_session.rollback()
+
+        assert accepted.status is None
+        journal.drain(db_session)
+        assert AccessLogRepository.get_by_id(db_session, accepted.id).status == AccessStatus.Denied
+
+    def test_database_outage_without_journal_raises(
+        self, db_session: Session, monkeypatch, tmp_path: Path
+    ):
+        """Com o diário desligado, a falha do banco propaga-se e a imagem é removida."""
+        monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+        monkeypatch.setattr(AccessLogRepository, "create", staticmethod(_database_down))
+        controller = AccessLogController(db_session)
+        upload = UploadFile(
+            filename="car.jpg", file=io.BytesIO(b"img"), headers={"content-type": "image/jpeg"}
+        )
+
+        with pytest.raises(OperationalError):
+            controller.create_access_log("GGG7777", upload)
+        assert list(tmp_path.iterdir()) == []
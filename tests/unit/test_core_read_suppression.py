@@ -0,0 +1,57 @@
+"""Testes unitários para a janela de supressão de leituras repetidas."""
+
+from uuid import uuid4
+
+import pytest
+
+from apps.api.src.api.v1.core import read_suppression
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.read_suppression import RecentReadWindow
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Relógio monotónico controlado pelo teste."""
+    now = [1000.0]
+    monkeypatch.setattr(read_suppression.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(get_settings(), "ingest_dedup_window_seconds", 10)
+    return now
+
+
+def test_window_slides_with_each_read(clock: list[float]):
+    window = RecentReadWindow()
+    log_id = uuid4()
+    window.remember("cam-1", "ABC1C34", log_id, "a.jpg")
+
+    clock[0] += 9
+    assert window.lookup("cam-1", "ABC1C34").log_id == log_id
+    assert window.lookup("cam-2", "ABC1C34") is None
+    window.remember("cam-1", "ABC1C34", log_id, "a.jpg")
+
+    clock[0] += 9
+    assert window.lookup("cam-1", "ABC1C34") is not None
+
+    clock[0] += 10
+    assert window.lookup("cam-1", "ABC1C34") is None
+    assert len(window) == 0
+
+
+def test_window_memory_is_bounded(clock: list[float], monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(get_settings(), "ingest_dedup_max_entries", 2)
+    window = RecentReadWindow()
+    for plate in ("AAA1A11", "BBB2B22", "CCC3C33"):
+        clock[0] += 1
+        window.remember("cam-1", plate, uuid4(), f"{plate}.jpg")
+
+    assert len(window) == 2
+    assert window.lookup("cam-1", "AAA1A11") is None
+    assert window.lookup("cam-1", "CCC3C33") is not None
+
+
+def test_window_disabled_by_default(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("INGEST_DEDUP_WINDOW_SECONDS", raising=False)
+    get_settings.cache_clear()
+    try:
+        assert not RecentReadWindow().enabled
+    finally:
+        get_settings.cache_clear()
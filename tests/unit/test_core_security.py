@@ -1,11 +1,14 @@
 """Testes unitários para módulo de segurança."""
 
+import time
 from datetime import timedelta
 from uuid import uuid4
 
 from apps.api.src.api.v1.core.security import (
     create_access_token,
     get_password_hash,
+    sign_image_url,
+    verify_image_signature,
     verify_password,
 )
 
@@ -87,3 +90,23 @@ class TestAccessToken:
         token = create_access_token(subject)
         assert isinstance(token, str)
         assert len(token) > 0
+
+
+class TestImageUrlSignature:
+    """Testes para as URLs assinadas de imagens."""
+
+    def test_signature_is_bound_to_file_and_expiry(self):
+        expires, signature = sign_image_url("car.jpg", 600)
+
+        assert time.time() + 600 <= expires <= time.time() + 1200
+        assert verify_image_signature("car.jpg", expires, signature)
+        assert not verify_image_signature("other.jpg", expires, signature)
+        assert not verify_image_signature("car.jpg", expires + 600, signature)
+
+    def test_expired_signature_is_rejected(self):
+        expires, signature = sign_image_url("car.jpg", 600)
+        assert not verify_image_signature("car.jpg", expires - 1200, signature)
+
+    def test_url_is_stable_within_a_window(self):
+        """URLs iguais durante a janela do TTL permitem a cache do navegador."""
+        assert sign_image_url("car.jpg", 3600) == sign_image_url("car.jpg", 3600)
@@ -0,0 +1,336 @@
+"""Testes unitários para o cache em memória da whitelist."""
+
+import sys
+import threading
+import uuid
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.controllers.plate_controller import PlateController
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.whitelist_cache import (
+    WhitelistCache,
+    WhitelistMatch,
+    get_whitelist_cache,
+)
+from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
+from apps.api.src.api.v1.schemas.access_log import PlateMatchType
+from apps.api.src.api.v1.schemas.authorized_plate import AuthorizedPlateCreate
+from apps.api.src.api.v1.utils.validity import ValidityWindow
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch: pytest.MonkeyPatch) -> Generator[WhitelistCache]:
+    """Ativa o cache e devolve a instância global com snapshot limpo."""
+    monkeypatch.setenv("WHITELIST_CACHE_ENABLED", "true")
+    monkeypatch.setenv("WHITELIST_CACHE_TTL_SECONDS", "3600")
+    get_settings.cache_clear()
+    cache = get_whitelist_cache()
+    cache.invalidate()
+    cache.hits = cache.misses = cache.reloads = cache.delta_syncs = 0
+    yield cache
+    cache.invalidate()
+    monkeypatch.undo()
+    get_settings.cache_clear()
+
+
+class TestWhitelistCache:
+    """Testes para WhitelistCache."""
+
+    def test_disabled_by_default_queries_database(self, db_session: Session):
+        """Com o cache desligado, a consulta vai ao banco e não mexe nos contadores."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        cache = WhitelistCache()
+
+        assert cache.enabled is False
+        assert cache.get_plate_id(db_session, "ABC1234") == plate.id
+        assert cache.hits == 0
+        assert cache.misses == 0
+        assert cache.size == 0
+
+    def test_first_lookup_loads_then_hits(self, db_session: Session, cache_enabled):
+        """Primeira consulta carrega o snapshot; as seguintes são hits."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == plate.id
+        assert cache_enabled.get_plate_id(db_session, "XYZ9999") is None
+
+        assert cache_enabled.misses == 1
+        assert cache_enabled.hits == 1
+        assert cache_enabled.size == 1
+
+    def test_snapshot_not_reloaded_within_ttl(self, db_session: Session, cache_enabled):
+        """Escritas fora do processo só aparecem após o TTL."""
+        cache_enabled.get_plate_id(db_session, "ABC1234")
+        AuthorizedPlateRepository.create(db_session, plate="ABC-1234", normalized_plate="ABC1234")
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") is None
+
+        cache_enabled.invalidate()
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") is not None
+
+    def test_ttl_expiry_applies_changes(
+        self, db_session: Session, cache_enabled, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Snapshot expirado é renovado com as alterações do histórico, sem carga completa."""
+        cache_enabled.get_plate_id(db_session, "ABC1234")
+        AuthorizedPlateRepository.create(db_session, plate="ABC-1234", normalized_plate="ABC1234")
+        monkeypatch.setenv("WHITELIST_CACHE_TTL_SECONDS", "1")
+        get_settings.cache_clear()
+        cache_enabled._loaded_at -= 5
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") is not None
+        assert cache_enabled.reloads == 1
+        assert cache_enabled.delta_syncs == 1
+        assert cache_enabled.stats()["version"] == 1
+
+    def test_expired_snapshot_applies_tombstones(self, db_session: Session, cache_enabled):
+        """Remoções feitas por outro processo chegam ao snapshot como tombstones."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == plate.id
+        AuthorizedPlateRepository.delete(db_session, plate.id)
+        cache_enabled._loaded_at -= 7200
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") is None
+        assert cache_enabled.size == 0
+
+    def test_controller_writes_update_snapshot(self, db_session: Session, cache_enabled):
+        """create/update/delete do PlateController atualizam o snapshot sem recarga."""
+        controller = PlateController(db_session)
+        controller.check_authorization("AAA-0000")
+        reloads = cache_enabled.reloads
+
+        created = controller.create(AuthorizedPlateCreate(plate="ABC-1234"))
+        assert controller.check_authorization("ABC-1234") == (True, created.id)
+
+        controller.update(created.id, AuthorizedPlateCreate(plate="DEF-5678"))
+        assert controller.check_authorization("ABC-1234") == (False, None)
+        assert controller.check_authorization("DEF-5678") == (True, created.id)
+
+        controller.delete(created.id)
+        assert controller.check_authorization("DEF-5678") == (False, None)
+        assert cache_enabled.reloads == reloads
+
+    @pytest.mark.usefixtures("cache_enabled")
+    @pytest.mark.parametrize("enabled", [True, False])
+    def test_validity_window_applied_without_extra_queries(
+        self, db_session: Session, enabled: bool, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Entradas fora da janela não autorizam, com o snapshot ligado ou desligado."""
+        monkeypatch.setenv("WHITELIST_CACHE_ENABLED", str(enabled).lower())
+        get_settings.cache_clear()
+        now = datetime.now(UTC)
+        controller = PlateController(db_session)
+        expired = controller.create(
+            AuthorizedPlateCreate(plate="ABC-1234", valid_until=now - timedelta(minutes=1))
+        )
+        current = controller.create(
+            AuthorizedPlateCreate(
+                plate="DEF-5678",
+                valid_from=now - timedelta(hours=1),
+                valid_until=now + timedelta(hours=1),
+            )
+        )
+
+        assert controller.check_authorization("ABC-1234") == (False, None)
+        assert controller.check_authorization("DEF-5678") == (True, current.id)
+        results = controller.check_authorization_batch(["ABC-1234", "DEF-5678"])
+        assert [r.authorized for r in results] == [False, True]
+
+        controller.update(expired.id, AuthorizedPlateCreate(plate="ABC-1234"))
+        assert controller.check_authorization("ABC-1234") == (True, expired.id)
+
+    def test_delta_sync_loads_windows(self, db_session: Session, cache_enabled):
+        """Janelas alteradas por outro processo chegam pelo histórico de versões."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == plate.id
+
+        AuthorizedPlateRepository.update(
+            db_session,
+            plate,
+            plate_value="ABC-1234",
+            normalized_plate="ABC1234",
+            validity=ValidityWindow(valid_until=datetime.now(UTC) - timedelta(seconds=1)),
+        )
+        cache_enabled._loaded_at -= 7200
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") is None
+        assert cache_enabled.delta_syncs == 1
+
+    def test_snapshot_keyed_by_equivalence_key(self, db_session: Session, cache_enabled):
+        """Formatos antigo e Mercosul coincidem; remover um formato mantém o outro."""
+        legacy = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        assert cache_enabled.get_plate_id(db_session, "ABC1C34") == legacy.id
+
+        mercosul = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1C34", normalized_plate="ABC1C34"
+        )
+        cache_enabled.upsert("ABC1C34", mercosul.id)
+        cache_enabled.discard("ABC1234", legacy.id)
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == mercosul.id
+
+    def test_snapshot_keeps_both_formats_of_a_key(self, db_session: Session, cache_enabled):
+        """Os dois formatos cadastrados ficam no snapshot; cada um sobrevive ao outro."""
+        past = datetime.now(UTC) - timedelta(days=1)
+        legacy = AuthorizedPlateRepository.create(
+            db_session,
+            plate="ABC-1234",
+            normalized_plate="ABC1234",
+            validity=ValidityWindow(valid_until=past),
+        )
+        mercosul = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1C34", normalized_plate="ABC1C34"
+        )
+
+        assert cache_enabled.load(db_session) == 2
+        assert cache_enabled.size == 2
+        # A forma lida vem primeiro; fora da janela, vale a outra entrada da chave
+        assert cache_enabled.get_plate_id(db_session, "ABC1C34") == mercosul.id
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == mercosul.id
+
+        cache_enabled.upsert("ABC1234", legacy.id)
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == legacy.id
+        cache_enabled.discard("ABC1234", legacy.id)
+
+        assert cache_enabled.get_plate_id(db_session, "ABC1234") == mercosul.id
+        assert cache_enabled.size == 1
+
+    def test_stats(self, db_session: Session, cache_enabled):
+        """stats() expõe tamanho e contadores."""
+        AuthorizedPlateRepository.create(db_session, plate="ABC-1234", normalized_plate="ABC1234")
+        cache_enabled.get_plate_id(db_session, "ABC1234")
+
+        stats = cache_enabled.stats()
+
+        assert stats["enabled"] is True
+        assert stats["size"] == 1
+        assert stats["ttl_seconds"] == 3600
+        assert stats["age_seconds"] is not None
+
+    def test_fuzzy_match_served_from_index(
+        self, db_session: Session, cache_enabled, monkeypatch: pytest.MonkeyPatch
+    ):
+        """No modo tolerante, leituras com erro de OCR casam com distância registrada."""
+        monkeypatch.setenv("WHITELIST_FUZZY_MATCH_ENABLED", "true")
+        monkeypatch.setenv("WHITELIST_FUZZY_MAX_DISTANCE", "1")
+        get_settings.cache_clear()
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="BRA-2E19", normalized_plate="BRA2E19"
+        )
+
+        exact = cache_enabled.match(db_session, "BRA2E19")
+        confusable = cache_enabled.match(db_session, "8RA2E19")
+        one_edit = cache_enabled.match(db_session, "BRA2E18")
+
+        assert exact == WhitelistMatch(plate.id, PlateMatchType.exact, 0)
+        assert confusable == WhitelistMatch(plate.id, PlateMatchType.fuzzy, 0)
+        assert one_edit == WhitelistMatch(plate.id, PlateMatchType.fuzzy, 1)
+        assert cache_enabled.match(db_session, "XYZ9999") is None
+
+    def test_fuzzy_match_defaults_to_confusables_only(
+        self, db_session: Session, cache_enabled, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Por padrão, só caracteres confundíveis são tolerados, não trocas arbitrárias."""
+        monkeypatch.setenv("WHITELIST_FUZZY_MATCH_ENABLED", "true")
+        monkeypatch.delenv("WHITELIST_FUZZY_MAX_DISTANCE", raising=False)
+        get_settings.cache_clear()
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="BRA-2E19", normalized_plate="BRA2E19"
+        )
+
+        assert cache_enabled.match(db_session, "8RA2E19") == WhitelistMatch(
+            plate.id, PlateMatchType.fuzzy, 0
+        )
+        assert cache_enabled.match(db_session, "BRA2E18") is None
+
+    def test_fuzzy_confusable_in_fifth_position(
+        self, db_session: Session, cache_enabled, monkeypatch: pytest.MonkeyPatch
+    ):
+        """B/8, I/1 e S/5 continuam confundíveis no caractere do formato Mercosul."""
+        monkeypatch.setenv("WHITELIST_FUZZY_MATCH_ENABLED", "true")
+        monkeypatch.delenv("WHITELIST_FUZZY_MAX_DISTANCE", raising=False)
+        get_settings.cache_clear()
+        digit = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1834", normalized_plate="ABC1834"
+        )
+        letter = AuthorizedPlateRepository.create(
+            db_session, plate="DEF-1S34", normalized_plate="DEF1S34"
+        )
+
+        assert cache_enabled.match(db_session, "ABC1B34") == WhitelistMatch(
+            digit.id, PlateMatchType.fuzzy, 0
+        )
+        assert cache_enabled.match(db_session, "DEF1534") == WhitelistMatch(
+            letter.id, PlateMatchType.fuzzy, 0
+        )
+        # A equivalência entre formatos continua pela correspondência exata
+        assert cache_enabled.match(db_session, "ABC1I34") == WhitelistMatch(
+            digit.id, PlateMatchType.exact, 0
+        )
+
+    def test_fuzzy_lookup_is_safe_during_concurrent_writes(
+        self, db_session: Session, cache_enabled, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Consultas tolerantes não falham enquanto outro thread altera o índice."""
+        monkeypatch.setenv("WHITELIST_FUZZY_MATCH_ENABLED", "true")
+        monkeypatch.setenv("WHITELIST_FUZZY_MAX_DISTANCE", "2")
+        get_settings.cache_clear()
+        AuthorizedPlateRepository.create(db_session, plate="BRA-2E19", normalized_plate="BRA2E19")
+        cache_enabled.match(db_session, "BRA2E19")
+        stop = threading.Event()
+        errors: list[BaseException] = []
+
+        def write() -> None:
+            # Placas vizinhas da leitura: entram e saem dos candidatos da consulta
+            while not stop.is_set():
+                for neighbour in ("BRA2E17", "BRA2F18", "BRA3E18"):
+                    plate_id = uuid.uuid4()
+                    cache_enabled.upsert(neighbour, plate_id)
+                    cache_enabled.discard(neighbour, plate_id)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(5000):
+                try:
+                    cache_enabled.match(db_session, "BRA2E18")
+                except (RuntimeError, KeyError) as e:
+                    errors.append(e)
+                    break
+        finally:
+            stop.set()
+            writer.join()
+            sys.setswitchinterval(switch_interval)
+        assert errors == []
+
+    @pytest.mark.usefixtures("cache_enabled")
+    def test_fuzzy_index_follows_controller_writes(
+        self, db_session: Session, monkeypatch: pytest.MonkeyPatch
+    ):
+        """O índice tolerante acompanha create/delete sem recarregar."""
+        monkeypatch.setenv("WHITELIST_FUZZY_MATCH_ENABLED", "true")
+        get_settings.cache_clear()
+        controller = PlateController(db_session)
+        controller.check_authorization("AAA-0000")
+
+        created = controller.create(AuthorizedPlateCreate(plate="ABC-1234"))
+        assert controller.check_authorization("A8C-1234") == (True, created.id)
+
+        controller.delete(created.id)
+        assert controller.check_authorization("A8C-1234") == (False, None)
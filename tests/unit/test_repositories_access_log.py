@@ -3,11 +3,15 @@
 from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
+import pytest
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
 from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
+from apps.api.src.api.v1.repositories.image_blob_repository import ImageBlobRepository
 from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.utils.image_keys import content_key
 
 
 class TestAccessLogRepository:
@@ -70,6 +74,21 @@ class TestAccessLogRepository:
         assert len(result) == 1
         assert result[0].plate_string_detected == "ABC-1234"
 
+    def test_full_plate_filter_matches_both_formats(self, db_session: Session):
+        """Uma placa completa encontra as leituras no formato antigo e no Mercosul."""
+        for detected in ("ABC-1234", "abc1c34", "ABC1D34"):
+            AccessLogRepository.create(
+                db_session,
+                plate_string_detected=detected,
+                status=AccessStatus.Denied,
+                image_storage_key=f"{detected}.jpg",
+            )
+
+        result = AccessLogRepository.get_all(db_session, plate_filter="ABC1C34")
+
+        assert sorted(log.plate_string_detected for log in result) == ["ABC-1234", "abc1c34"]
+        assert AccessLogRepository.count(db_session, plate_filter="abc-1234") == 2
+
     def test_get_all_with_status_filter(self, db_session: Session):
         """Testa listagem de logs com filtro de status."""
         AccessLogRepository.create(
@@ -181,3 +200,83 @@ class TestAccessLogRepository:
         )
 
         assert result.authorized_plate_id == plate.id
+
+    def test_create_many_returns_rows_in_order(self, db_session: Session):
+        """Testa gravação em lote com INSERT multi-linha."""
+        rows = [
+            AccessLogRepository.new_row(
+                plate_string_detected=plate,
+                status=AccessStatus.Denied,
+                image_storage_key=f"{plate}.jpg",
+            )
+            for plate in ("ABC1234", "ABC1C34", "XYZ9876")
+        ]
+
+        logs = AccessLogRepository.create_many(db_session, rows)
+
+        assert [log.id for log in logs] == [row["id"] for row in rows]
+        assert [log.plate_key for log in logs] == ["ABC1C34", "ABC1C34", "XYZ9I76"]
+        assert AccessLogRepository.count(db_session) == 3
+        assert AccessLogRepository.create_many(db_session, []) == []
+
+    def test_repeat_read_keeps_image_replaced_in_the_meantime(self, db_session: Session):
+        """A imagem da leitura só substitui a do log se esta for a esperada."""
+        old, recompressed, sharper = (content_key(c * 64, ".jpg") for c in "abc")
+        log = AccessLogRepository.create(
+            db_session,
+            plate_string_detected="ABC1234",
+            status=AccessStatus.Denied,
+            image_storage_key=old,
+        )
+        assert AccessLogRepository.replace_image_key(db_session, old, recompressed) == 1
+
+        updated = AccessLogRepository.register_repeat_read(
+            db_session, log.id, seen_at=datetime.now(UTC), image_storage_key=sharper, replaces=old
+        )
+
+        assert updated.image_storage_key == recompressed
+        assert updated.read_count == 2
+        assert ImageBlobRepository.get_ref_count(db_session, recompressed) == 1
+        assert ImageBlobRepository.get_ref_count(db_session, sharper) == 0
+
+    def test_repeat_read_event_id_resolves_to_the_log(self, db_session: Session):
+        """A chave de uma leitura agregada é gravada e resolve para o log agregado."""
+        log = AccessLogRepository.create(
+            db_session,
+            plate_string_detected="ABC1234",
+            status=AccessStatus.Denied,
+            image_storage_key="a.jpg",
+            event_id="cam-1:0001",
+        )
+
+        AccessLogRepository.register_repeat_read(
+            db_session, log.id, seen_at=datetime.now(UTC), event_id="cam-1:0002"
+        )
+
+        assert AccessLogRepository.get_by_event_id(db_session, "cam-1:0002").id == log.id
+        found = AccessLogRepository.get_by_event_ids(
+            db_session, {"cam-1:0001", "cam-1:0002", "cam-1:0003"}
+        )
+        assert {event_id: found_log.id for event_id, found_log in found.items()} == {
+            "cam-1:0001": log.id,
+            "cam-1:0002": log.id,
+        }
+        with pytest.raises(IntegrityError):
+            AccessLogRepository.register_repeat_read(
+                db_session, log.id, seen_at=datetime.now(UTC), event_id="cam-1:0002"
+            )
+        assert AccessLogRepository.get_by_id(db_session, log.id).read_count == 2
+
+    def test_set_plate_crop_only_once(self, db_session: Session):
+        log = AccessLogRepository.create(
+            db_session,
+            plate_string_detected="ABC1234",
+            status=AccessStatus.Denied,
+            image_storage_key="a.jpg",
+        )
+        first, second = (content_key(c * 64, ".jpg") for c in "de")
+
+        assert AccessLogRepository.set_plate_crop(db_session, log.id, first)
+        assert not AccessLogRepository.set_plate_crop(db_session, log.id, second)
+        assert AccessLogRepository.get_by_id(db_session, log.id).plate_crop_key == first
+        assert ImageBlobRepository.get_ref_count(db_session, first) == 1
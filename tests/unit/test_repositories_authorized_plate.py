@@ -1,11 +1,28 @@
 """Testes unitários para AuthorizedPlateRepository."""
 
+import fcntl
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
 from uuid import uuid4
 
+import pytest
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from apps.api.src.api.v1.core import whitelist_sweeper
+from apps.api.src.api.v1.core.config import get_settings
+from apps.api.src.api.v1.core.whitelist_sweeper import sweep_expired_plates
 from apps.api.src.api.v1.models.authorized_plate import AuthorizedPlate
+from apps.api.src.api.v1.repositories.access_log_repository import AccessLogRepository
 from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
+from apps.api.src.api.v1.repositories.whitelist_change_repository import (
+    WhitelistChangeRepository,
+)
+from apps.api.src.api.v1.schemas.access_log import AccessStatus
+from apps.api.src.api.v1.schemas.authorized_plate import WhitelistSort
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangeOp
+from apps.api.src.api.v1.utils.validity import ValidityWindow
+from tests.conftest import TestingSessionLocal
 
 
 class TestAuthorizedPlateRepository:
@@ -153,3 +170,123 @@ class TestAuthorizedPlateRepository:
         result = AuthorizedPlateRepository.delete(db_session, fake_id)
 
         assert result is None
+
+    def test_get_all_keyset_prefix_and_description(self, db_session: Session):
+        """Ordem estável, filtros por prefixo/descrição e continuação por chave."""
+        AuthorizedPlateRepository.bulk_create(
+            db_session,
+            [
+                ("ABD-0001", "ABD0001", "Bloco B"),
+                ("ABC-0002", "ABC0002", "bloco a"),
+                ("XYZ-0003", "XYZ0003", "Visitante 100%"),
+                ("ABC-0001", "ABC0001", "Bloco A"),
+            ],
+        )
+
+        ordered = AuthorizedPlateRepository.get_all(db_session)
+        assert [p.normalized_plate for p in ordered] == ["ABC0001", "ABC0002", "ABD0001", "XYZ0003"]
+
+        prefixed = AuthorizedPlateRepository.get_all(db_session, plate_prefix="ABC")
+        assert [p.normalized_plate for p in prefixed] == ["ABC0001", "ABC0002"]
+
+        described = AuthorizedPlateRepository.get_all(db_session, description_filter="BLOCO A")
+        assert [p.normalized_plate for p in described] == ["ABC0001", "ABC0002"]
+        escaped = AuthorizedPlateRepository.get_all(db_session, description_filter="0%")
+        assert [p.normalized_plate for p in escaped] == ["XYZ0003"]
+
+        after = AuthorizedPlateRepository.sort_key(ordered[1], WhitelistSort.plate)
+        rest = AuthorizedPlateRepository.get_all(db_session, after=after)
+        assert [p.normalized_plate for p in rest] == ["ABD0001", "XYZ0003"]
+
+        # bulk_create grava o mesmo created_at: o id desempata
+        newest = AuthorizedPlateRepository.get_all(db_session, sort=WhitelistSort.created_at_desc)
+        after = AuthorizedPlateRepository.sort_key(newest[0], WhitelistSort.created_at_desc)
+        rest = AuthorizedPlateRepository.get_all(
+            db_session, sort=WhitelistSort.created_at_desc, after=after
+        )
+        assert [p.id for p in rest] == [p.id for p in newest[1:]]
+
+    def test_sweep_expired_plates(self, db_session: Session):
+        """A remoção em lote apaga as expiradas, gera tombstones e preserva os logs."""
+        now = datetime.now(UTC)
+        expired = AuthorizedPlateRepository.create(
+            db_session,
+            plate="ABC-1234",
+            normalized_plate="ABC1234",
+            validity=ValidityWindow(valid_until=now - timedelta(minutes=5)),
+        )
+        future = AuthorizedPlateRepository.create(
+            db_session,
+            plate="DEF-5678",
+            normalized_plate="DEF5678",
+            validity=ValidityWindow(valid_until=now + timedelta(days=1)),
+        )
+        log = AccessLogRepository.create(
+            db_session,
+            plate_string_detected="ABC1234",
+            status=AccessStatus.Authorized,
+            image_storage_key="a.jpg",
+            authorized_plate_id=expired.id,
+        )
+        expired_id = expired.id
+        version = WhitelistChangeRepository.get_current_version(db_session)
+
+        assert sweep_expired_plates(db_session, now) == 1
+
+        assert AuthorizedPlateRepository.get_by_id(db_session, expired_id) is None
+        assert AuthorizedPlateRepository.get_by_id(db_session, future.id) is not None
+        db_session.refresh(log)
+        assert log.authorized_plate_id is None
+        changes = WhitelistChangeRepository.get_changes_since(db_session, version)
+        assert [(c.op, c.plate_id) for c in changes] == [(WhitelistChangeOp.delete, expired_id)]
+        assert sweep_expired_plates(db_session, now) == 0
+
+    def test_sweep_runs_in_one_worker_at_a_time(
+        self, db_session: Session, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ):
+        """Com o `flock` do host ocupado por outro worker, a varredura não corre."""
+        monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+        expired = AuthorizedPlateRepository.create(
+            db_session,
+            plate="ABC-1234",
+            normalized_plate="ABC1234",
+            validity=ValidityWindow(valid_until=datetime.now(UTC) - timedelta(minutes=5)),
+        )
+        expired_id = expired.id
+
+        with (tmp_path / ".whitelist-sweep.lock").open("a") as held:
+            fcntl.flock(held, fcntl.LOCK_EX)
+            whitelist_sweeper._sweep_once(TestingSessionLocal)
+            db_session.expire_all()
+            assert AuthorizedPlateRepository.get_by_id(db_session, expired_id) is not None
+
+        whitelist_sweeper._sweep_once(TestingSessionLocal)
+        db_session.expire_all()
+        assert AuthorizedPlateRepository.get_by_id(db_session, expired_id) is None
+
+    def test_apply_sync_delete_keeps_access_logs(self, db_session: Session):
+        """Remover numa sincronização uma placa já vista no portão preserva o log (com FKs)."""
+        db_session.execute(text("PRAGMA foreign_keys=ON"))
+        try:
+            plate = AuthorizedPlateRepository.create(
+                db_session, plate="ABC-1234", normalized_plate="ABC1234"
+            )
+            log = AccessLogRepository.create(
+                db_session,
+                plate_string_detected="ABC1234",
+                status=AccessStatus.Authorized,
+                image_storage_key="a.jpg",
+                authorized_plate_id=plate.id,
+            )
+            plate_id = plate.id
+
+            AuthorizedPlateRepository.apply_sync(
+                db_session, creates=[], updates=[], deletes=[(plate_id, "ABC1234")]
+            )
+
+            assert AuthorizedPlateRepository.get_by_id(db_session, plate_id) is None
+            db_session.refresh(log)
+            assert log.authorized_plate_id is None
+        finally:
+            db_session.rollback()
+            db_session.execute(text("PRAGMA foreign_keys=OFF"))
@@ -0,0 +1,62 @@
+"""Testes unitários para WhitelistChangeRepository."""
+
+from sqlalchemy.orm import Session
+
+from apps.api.src.api.v1.repositories.authorized_plate_repository import AuthorizedPlateRepository
+from apps.api.src.api.v1.repositories.whitelist_change_repository import (
+    WhitelistChangeRepository,
+)
+from apps.api.src.api.v1.schemas.whitelist_change import WhitelistChangeOp
+
+
+class TestWhitelistChangeRepository:
+    """Testes para WhitelistChangeRepository."""
+
+    def test_current_version_starts_at_zero(self, db_session: Session):
+        """Sem alterações, a versão é 0."""
+        assert WhitelistChangeRepository.get_current_version(db_session) == 0
+
+    def test_plate_writes_are_versioned(self, db_session: Session):
+        """create/update/delete geram versões crescentes, com tombstone na remoção."""
+        plate = AuthorizedPlateRepository.create(
+            db_session, plate="ABC-1234", normalized_plate="ABC1234"
+        )
+        AuthorizedPlateRepository.update(
+            db_session, plate, plate_value="ABC1234", normalized_plate="ABC1234"
+        )
+        assert WhitelistChangeRepository.get_current_version(db_session) == 1
+
+        AuthorizedPlateRepository.update(
+            db_session, plate, plate_value="DEF-5678", normalized_plate="DEF5678"
+        )
+        AuthorizedPlateRepository.delete(db_session, plate.id)
+
+        changes = WhitelistChangeRepository.get_changes_since(db_session, 0)
+        assert [(c.version, c.op, c.normalized_plate) for c in changes] == [
+            (2, WhitelistChangeOp.delete, "ABC1234"),
+            (4, WhitelistChangeOp.delete, "DEF5678"),
+        ]
+        assert all(c.plate_id == plate.id for c in changes)
+
+    def test_changes_since_collapses_and_limits(self, db_session: Session):
+        """Só a última alteração de cada placa posterior a `since`, até `limit`."""
+        created = AuthorizedPlateRepository.bulk_create(
+            db_session, [("AAA-1111", "AAA1111", None), ("BBB-2222", "BBB2222", None)]
+        )
+        AuthorizedPlateRepository.apply_sync(
+            db_session, creates=[("CCC-3333", "CCC3333", None, None)], updates=[], deletes=[]
+        )
+        AuthorizedPlateRepository.apply_sync(
+            db_session, creates=[], updates=[], deletes=[(created[0][1], "AAA1111")]
+        )
+
+        changes = WhitelistChangeRepository.get_changes_since(db_session, 0)
+        assert [(c.normalized_plate, c.op) for c in changes] == [
+            ("BBB2222", WhitelistChangeOp.upsert),
+            ("CCC3333", WhitelistChangeOp.upsert),
+            ("AAA1111", WhitelistChangeOp.delete),
+        ]
+        assert len(WhitelistChangeRepository.get_changes_since(db_session, 0, limit=1)) == 1
+        assert [c.version for c in WhitelistChangeRepository.get_changes_since(db_session, 3)] == [
+            4
+        ]
@@ -0,0 +1,228 @@
+"""Testes unitários para os backends de armazenamento de imagens."""
+
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from apps.api.src.api.v1.core.image_store import LAYOUT_CONTENT, ImageStore
+from apps.api.src.api.v1.storage import (
+    ImageBackend,
+    LocalImageBackend,
+    S3ImageBackend,
+    WriteThroughBackend,
+    write_through,
+)
+from apps.api.src.api.v1.storage.write_through import PENDING_DIR
+
+MAX_BYTES = 1024
+
+
+class _ClientError(Exception):
+    def __init__(self, code: str) -> None:
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class _FakeS3Client:
+    """Cliente S3 em memória com a parte da API do boto3 usada pelo backend."""
+
+    class exceptions:  # noqa: N801
+        ClientError = _ClientError
+
+    def __init__(self) -> None:
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.content_types: dict[str, str] = {}
+        self.uploads = 0
+        self.upload_gate: threading.Event | None = None
+
+    def upload_file(self, filename, bucket, key, ExtraArgs=None):  # noqa: N803
+        if self.upload_gate is not None:
+            self.upload_gate.wait(timeout=5)
+        self.uploads += 1
+        self.objects[bucket, key] = Path(filename).read_bytes()
+        self.content_types[key] = ExtraArgs["ContentType"]
+
+    def head_object(self, Bucket, Key):  # noqa: N803
+        if (Bucket, Key) not in self.objects:
+            code = "404"
+            raise _ClientError(code)
+        return {"ContentLength": len(self.objects[Bucket, Key])}
+
+    def get_object(self, Bucket, Key):  # noqa: N803
+        if (Bucket, Key) not in self.objects:
+            code = "NoSuchKey"
+            raise _ClientError(code)
+        return {"Body": io.BytesIO(self.objects[Bucket, Key])}
+
+    def delete_object(self, Bucket, Key):  # noqa: N803
+        self.objects.pop((Bucket, Key), None)
+
+
+def _wait_for_uploads(root: Path) -> None:
+    deadline = time.monotonic() + 5
+    while any((root / PENDING_DIR).iterdir()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestS3ImageBackend:
+    """Testes para S3ImageBackend."""
+
+    def test_store_head_open_delete(self, tmp_path: Path):
+        client = _FakeS3Client()
+        backend = S3ImageBackend(client, "images", prefix="/siscav/")
+        source = tmp_path / "a.jpg"
+        source.write_bytes(b"frame")
+        assert isinstance(backend, ImageBackend)
+
+        assert backend.store("ab/cd/a.jpg", source)
+        assert not backend.store("ab/cd/a.jpg", source)
+        assert client.uploads == 1
+        assert ("images", "siscav/ab/cd/a.jpg") in client.objects
+        assert client.content_types["siscav/ab/cd/a.jpg"] == "image/jpeg"
+        assert backend.head("ab/cd/a.jpg").size == 5
+        assert backend.open("ab/cd/a.jpg").read() == b"frame"
+        assert backend.local_path("ab/cd/a.jpg") is None
+
+        backend.delete("ab/cd/a.jpg")
+        assert backend.head("ab/cd/a.jpg") is None
+        with pytest.raises(FileNotFoundError):
+            backend.open("ab/cd/a.jpg")
+
+    def test_other_errors_propagate(self):
+        client = _FakeS3Client()
+
+        def denied(**_kwargs):
+            code = "AccessDenied"
+            raise _ClientError(code)
+
+        client.head_object = denied
+        with pytest.raises(_ClientError):
+            S3ImageBackend(client, "images").head("ab/cd/a.jpg")
+
+    def test_image_store_on_s3_shares_images_between_nodes(self, tmp_path: Path):
+        """Uma imagem recebida por um nó é lida por outro a partir do bucket."""
+        client = _FakeS3Client()
+        node_a = ImageStore(tmp_path / "a", LAYOUT_CONTENT, S3ImageBackend(client, "images"))
+        node_b = ImageStore(tmp_path / "b", LAYOUT_CONTENT, S3ImageBackend(client, "images"))
+
+        image = node_a.put(io.BytesIO(b"frame"), "car.jpg", MAX_BYTES)
+
+        assert image.created
+        assert image.path is None
+        assert node_b.head(image.key).size == 5
+        with node_b.fetch(image.key) as path:
+            assert path.read_bytes() == b"frame"
+        assert not path.exists()
+        assert [p for p in (tmp_path / "a").rglob("*") if p.is_file()] == []
+
+
+class TestWriteThroughBackend:
+    """Testes para WriteThroughBackend."""
+
+    def test_store_does_not_wait_for_remote_upload(self, tmp_path: Path):
+        client = _FakeS3Client()
+        client.upload_gate = threading.Event()
+        backend = WriteThroughBackend(
+            LocalImageBackend(tmp_path), S3ImageBackend(client, "images"), workers=2
+        )
+        store = ImageStore(tmp_path, LAYOUT_CONTENT, backend)
+
+        image = store.put(io.BytesIO(b"frame"), "car.jpg", MAX_BYTES)
+
+        assert image.path.read_bytes() == b"frame"
+        assert client.uploads == 0
+        assert store.head(image.key).local_path == image.path
+        client.upload_gate.set()
+        backend.close()
+        assert client.objects["images", image.key] == b"frame"
+
+    def test_reads_fall_back_to_remote(self, tmp_path: Path):
+        client = _FakeS3Client()
+        client.objects["images", "ab/cd/other.jpg"] = b"remote"
+        backend = WriteThroughBackend(
+            LocalImageBackend(tmp_path), S3ImageBackend(client, "images"), workers=1
+        )
+
+        assert backend.head("ab/cd/other.jpg").local_path is None
+        assert backend.open("ab/cd/other.jpg").read() == b"remote"
+        backend.close()
+
+    def test_delete_waits_for_pending_upload(self, tmp_path: Path):
+        client = _FakeS3Client()
+        client.upload_gate = threading.Event()
+        backend = WriteThroughBackend(
+            LocalImageBackend(tmp_path), S3ImageBackend(client, "images"), workers=1
+        )
+        source = tmp_path / "a.jpg"
+        source.write_bytes(b"frame")
+        backend.store("ab/cd/a.jpg", source)
+
+        threading.Timer(0.05, client.upload_gate.set).start()
+        backend.delete("ab/cd/a.jpg")
+
+        assert backend.head("ab/cd/a.jpg") is None
+        assert client.objects == {}
+        backend.close()
+
+    def test_failed_upload_is_resumed_after_restart(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Um envio que esgota as tentativas fica marcado e é retomado no arranque seguinte."""
+        monkeypatch.setattr(write_through, "_RETRY_DELAY_SECONDS", 0)
+        client = _FakeS3Client()
+
+        def unreachable(*_args, **_kwargs):
+            msg = "bucket unreachable"
+            raise ConnectionError(msg)
+
+        source = tmp_path / "a.jpg"
+        source.write_bytes(b"frame")
+        with monkeypatch.context() as m:
+            m.setattr(client, "upload_file", unreachable)
+            backend = WriteThroughBackend(
+                LocalImageBackend(tmp_path), S3ImageBackend(client, "images"), workers=1
+            )
+            backend.store("ab/cd/a.jpg", source)
+            backend.close()
+        assert client.objects == {}
+        assert len(list((tmp_path / PENDING_DIR).iterdir())) == 1
+
+        restarted = WriteThroughBackend(
+            LocalImageBackend(tmp_path), S3ImageBackend(client, "images"), workers=1
+        )
+        restarted.close()
+
+        assert client.objects["images", "ab/cd/a.jpg"] == b"frame"
+        assert list((tmp_path / PENDING_DIR).iterdir()) == []
+
+    def test_local_copy_is_bounded_to_uploaded_images(self, tmp_path: Path):
+        """Acima do limite saem as cópias locais já enviadas mais antigas, nunca as pendentes."""
+        client = _FakeS3Client()
+        backend = WriteThroughBackend(
+            LocalImageBackend(tmp_path),
+            S3ImageBackend(client, "images"),
+            workers=1,
+            local_max_bytes=16,
+            reconcile_interval=3600,
+        )
+        for name, mtime in (("old", 1), ("new", 2), ("pending", 0)):
+            if name == "pending":
+                _wait_for_uploads(tmp_path)
+                client.upload_gate = threading.Event()
+            source = tmp_path / f"{name}.jpg"
+            source.write_bytes(name[0].encode() * 6)
+            backend.store(f"ab/cd/{name}.jpg", source)
+            os.utime(source, (mtime, mtime))
+
+        backend.reconcile()
+
+        assert backend.local_path("ab/cd/pending.jpg") is not None
+        assert backend.local_path("ab/cd/new.jpg") is not None
+        assert backend.local_path("ab/cd/old.jpg") is None
+        assert backend.open("ab/cd/old.jpg").read() == b"oooooo"
+        client.upload_gate.set()
+        backend.close()
@@ -0,0 +1,49 @@
+"""Testes da escrita de arquivos zip e tar em fluxo."""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from apps.api.src.api.v1.utils.archive_stream import CHUNK_SIZE, TarStream, ZipStream
+
+_MEMBERS = {
+    "images/2026-10-17/a.jpg": b"x" * (CHUNK_SIZE * 2 + 7),
+    "crops/2026-10-17/b.jpg": b"",
+    "manifest.csv": "id,placa\n1,ÁBC1234\n".encode(),
+}
+
+
+def _write(stream: TarStream | ZipStream) -> bytes:
+    chunks = []
+    for name, data in _MEMBERS.items():
+        chunks.extend(stream.add(name, io.BytesIO(data), len(data), 1_760_000_000))
+    chunks.extend(stream.finish())
+    assert all(len(chunk) <= CHUNK_SIZE * 2 for chunk in chunks)
+    return b"".join(chunks)
+
+
+def test_tar_stream_round_trip():
+    data = _write(TarStream())
+    assert len(data) % tarfile.RECORDSIZE == 0
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        assert tar.getnames() == list(_MEMBERS)
+        for name, content in _MEMBERS.items():
+            assert tar.extractfile(name).read() == content
+        assert tar.getmember("manifest.csv").mtime == 1_760_000_000
+
+
+def test_zip_stream_round_trip():
+    data = _write(ZipStream())
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == list(_MEMBERS)
+        for name, content in _MEMBERS.items():
+            assert archive.read(name) == content
+
+
+@pytest.mark.parametrize("stream", [TarStream(), ZipStream()])
+def test_archive_stream_short_source(stream: TarStream | ZipStream):
+    with pytest.raises(OSError, match="early"):
+        list(stream.add("a.jpg", io.BytesIO(b"abc"), 10, 0))
@@ -0,0 +1,88 @@
+"""Testes unitários para a colocação de uploads no armazenamento."""
+
+import io
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from apps.api.src.api.v1.utils import file_placement
+from apps.api.src.api.v1.utils.file_placement import UploadTooLargeError, place_upload
+
+CONTENT = b"\xff\xd8" + b"x" * 4096
+
+
+@contextmanager
+def _spooled(rolled: bool) -> Iterator[tempfile.SpooledTemporaryFile]:
+    with tempfile.SpooledTemporaryFile(max_size=16 if rolled else 1024 * 1024) as spool:
+        spool.write(CONTENT)
+        spool.seek(0)
+        yield spool
+
+
+class TestPlaceUpload:
+    """Testes para place_upload."""
+
+    def test_in_memory_upload_is_copied(self, tmp_path: Path):
+        """Uploads ainda em memória são copiados em blocos."""
+        destination = tmp_path / "a.jpg"
+
+        with _spooled(rolled=False) as spool:
+            assert place_upload(spool, destination, 1 << 20) == len(CONTENT)
+        assert destination.read_bytes() == CONTENT
+
+    def test_spooled_file_on_disk_avoids_python_copy(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Com o spool em disco, o conteúdo é copiado no kernel (sendfile), não em Python."""
+        if not hasattr(os, "sendfile"):
+            pytest.skip("os.sendfile indisponível")
+
+        def fail_copy(*_args):
+            pytest.fail("copy through Python memory")
+
+        monkeypatch.setattr(file_placement, "_copy_chunks", fail_copy)
+        destination = tmp_path / "b.jpg"
+
+        with _spooled(rolled=True) as spool:
+            assert place_upload(spool, destination, 1 << 20) == len(CONTENT)
+        assert destination.read_bytes() == CONTENT
+
+    @pytest.mark.parametrize("rolled", [True, False])
+    def test_too_large_leaves_nothing(self, tmp_path: Path, rolled: bool):
+        """Acima do limite, nada fica no destino."""
+        destination = tmp_path / "d.jpg"
+
+        with _spooled(rolled=rolled) as spool, pytest.raises(UploadTooLargeError):
+            place_upload(spool, destination, 100)
+        assert not destination.exists()
+
+    def test_plain_file_object(self, tmp_path: Path):
+        """Objetos sem descritor (BytesIO) também são aceitos."""
+        destination = tmp_path / "e.jpg"
+
+        place_upload(io.BytesIO(CONTENT), destination, 1 << 20)
+        assert destination.read_bytes() == CONTENT
+
+    def test_placed_file_has_default_permissions(self, tmp_path: Path):
+        """O arquivo fica legível como um criado com `open()`, não com os 0600 do spool."""
+        umask = os.umask(0o022)
+        os.umask(umask)
+        destination = tmp_path / "f.jpg"
+
+        with _spooled(rolled=True) as spool:
+            place_upload(spool, destination, 1 << 20)
+        assert destination.stat().st_mode & 0o777 == 0o666 & ~umask
+
+    def test_spool_without_known_internals_is_copied(self, tmp_path: Path):
+        """Se o `tempfile` deixar de ter `_rolled`/`_file`, o upload é copiado em blocos."""
+        destination = tmp_path / "g.jpg"
+
+        with _spooled(rolled=True) as spool:
+            del spool._rolled
+            assert file_placement._backing_fd(spool) is None
+            place_upload(spool, destination, 1 << 20)
+        assert destination.read_bytes() == CONTENT
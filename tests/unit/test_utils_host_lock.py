@@ -0,0 +1,19 @@
+"""Testes unitários para o lock entre workers do host."""
+
+from pathlib import Path
+
+from apps.api.src.api.v1.utils.host_lock import host_lock
+
+
+class TestHostLock:
+    """Testes para host_lock."""
+
+    def test_only_one_holder_at_a_time(self, tmp_path: Path):
+        """Enquanto um bloco tem o lock, outro não o obtém; à saída fica livre."""
+        lock_path = tmp_path / "locks" / "job.lock"
+
+        with host_lock(lock_path) as first, host_lock(lock_path) as second:
+            assert first
+            assert not second
+        with host_lock(lock_path) as again:
+            assert again
@@ -0,0 +1,23 @@
+"""Testes unitários para utilitários de HTTP."""
+
+from apps.api.src.api.v1.utils.http import etag_matches
+
+
+class TestEtagMatches:
+    """Testes para etag_matches."""
+
+    def test_exact_and_weak_match(self):
+        """Comparação fraca: o prefixo W/ é ignorado."""
+        assert etag_matches('"42"', '"42"') is True
+        assert etag_matches('W/"42"', '"42"') is True
+        assert etag_matches('"41"', '"42"') is False
+
+    def test_list_and_wildcard(self):
+        """Lista separada por vírgulas e `*`."""
+        assert etag_matches('"1", "42"', '"42"') is True
+        assert etag_matches("*", '"42"') is True
+
+    def test_missing_header(self):
+        """Sem cabeçalho nunca corresponde."""
+        assert etag_matches(None, '"42"') is False
+        assert etag_matches("", '"42"') is False
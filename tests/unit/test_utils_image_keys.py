@@ -0,0 +1,34 @@
+"""Testes unitários para as chaves de imagens endereçadas pelo conteúdo."""
+
+from apps.api.src.api.v1.utils.image_keys import (
+    content_key,
+    content_key_for_name,
+    image_suffix,
+    is_content_key,
+)
+
+DIGEST = "ab" * 32
+
+
+def test_content_key_is_sharded_by_hash_prefix():
+    assert content_key(DIGEST, ".jpg") == f"ab/ab/{DIGEST}.jpg"
+    assert is_content_key(content_key(DIGEST, ".jpg"))
+    assert is_content_key(content_key(DIGEST, ""))
+
+
+def test_legacy_keys_are_not_content_keys():
+    assert not is_content_key("uploads/0b0e8f8e-7e7c-4c44-9a0e-2f4f8a9a0b11.jpg")
+    assert not is_content_key(f"uploads/ab/ab/{DIGEST}.jpg")
+    assert not is_content_key(f"../ab/{DIGEST}.jpg")
+
+
+def test_content_key_for_name():
+    assert content_key_for_name(f"{DIGEST}.png") == f"ab/ab/{DIGEST}.png"
+    assert content_key_for_name("0b0e8f8e-7e7c-4c44-9a0e-2f4f8a9a0b11.jpg") is None
+
+
+def test_image_suffix_is_normalized():
+    assert image_suffix("FOTO.JPG") == ".jpg"
+    assert image_suffix(None) == ".jpg"
+    assert image_suffix("frame") == ".jpg"
+    assert image_suffix("frame.j p g") == ""
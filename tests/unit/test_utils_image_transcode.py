@@ -0,0 +1,39 @@
+"""Testes unitários para os utilitários de conversão de imagens."""
+
+import pytest
+
+from apps.api.src.api.v1.utils.image_transcode import PlateBox, target_size
+
+
+class TestPlateBox:
+    """Testes para PlateBox."""
+
+    def test_parse(self):
+        assert PlateBox.parse("10, 20,300,80") == PlateBox(10, 20, 300, 80)
+
+    @pytest.mark.parametrize(
+        "value", ["", "1,2,3", "1,2,3,4,5", "a,b,c,d", "-1,0,10,10", "0,0,0,5"]
+    )
+    def test_parse_rejects_invalid_values(self, value: str):
+        with pytest.raises(ValueError, match="plate_box"):
+            PlateBox.parse(value)
+
+    def test_clamp_to_frame(self):
+        assert PlateBox(90, 40, 50, 50).clamp(100, 60) == (90, 40, 100, 60)
+        assert PlateBox(120, 0, 10, 10).clamp(100, 60) is None
+
+
+class TestTargetSize:
+    """Testes para target_size."""
+
+    @pytest.mark.parametrize(
+        ("size", "limits", "expected"),
+        [
+            ((4000, 3000), (320, None), (320, 240)),
+            ((4000, 3000), (320, 120), (160, 120)),
+            ((200, 100), (320, 320), (200, 100)),
+            ((4000, 10), (100, None), (100, 1)),
+        ],
+    )
+    def test_fits_without_upscaling(self, size, limits, expected):
+        assert target_size(*size, *limits) == expected
@@ -0,0 +1,109 @@
+"""Testes unitários para a leitura de lotes de ingestão."""
+
+import io
+import tarfile
+from datetime import UTC, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from apps.api.src.api.v1.utils.ingest_bundle import (
+    ArchiveTooLargeError,
+    ManifestTooLargeError,
+    is_image_name,
+    iter_tar_images,
+    parse_manifest,
+)
+
+_TZ = ZoneInfo("America/Sao_Paulo")
+
+
+def test_parse_manifest_reads_events_and_flags_invalid_lines():
+    manifest = io.BytesIO(
+        b'\xef\xbb\xbf{"file": "a.jpg", "plate": " ABC1234 ", "captured_at": "2026-02-01T10:00:00Z"}\n'
+        b"\n"
+        b'{"file": "b.jpg", "plate": "ABC1234", "captured_at": "2026-02-01T07:00:00"}\n'
+        b"[1, 2]\n"
+        b'{"file": "c.jpg", "captured_at": "2026-02-01T07:00:00"}\n'
+        b'{"file": "d.jpg", "plate": "ABC1234", "captured_at": "ontem"}\n'
+    )
+
+    entries = parse_manifest(manifest, _TZ, max_entries=10)
+
+    assert [entry.line for entry in entries] == [1, 3, 4, 5, 6]
+    assert entries[0].plate == "ABC1234"
+    assert entries[0].captured_at == datetime(2026, 2, 1, 10, tzinfo=UTC)
+    assert entries[1].captured_at == datetime(2026, 2, 1, 10, tzinfo=UTC)
+    assert entries[1].error is None
+    assert entries[2].error == "Cada linha deve ser um objeto JSON"
+    assert entries[3].error == "Campo 'plate' obrigatório"
+    assert entries[4].error == "Campo 'captured_at' obrigatório (ISO 8601)"
+
+
+def test_parse_manifest_rejects_too_many_events():
+    line = b'{"file": "a.jpg", "plate": "ABC1234", "captured_at": "2026-02-01T10:00:00Z"}\n'
+
+    with pytest.raises(ManifestTooLargeError):
+        parse_manifest(io.BytesIO(line * 3), _TZ, max_entries=2)
+
+
+def test_iter_tar_images_yields_only_wanted_regular_members():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in (("./a.jpg", b"aaa"), ("b.jpg", b"bb"), ("dir/c.jpg", b"c")):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        directory = tarfile.TarInfo("x.jpg")
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+
+    found = [
+        (name, size, content.read())
+        for name, size, content in iter_tar_images(
+            buffer, {"a.jpg", "dir/c.jpg", "x.jpg"}, max_bytes=1024, max_members=10
+        )
+    ]
+
+    assert found == [("a.jpg", 3, b"aaa"), ("dir/c.jpg", 1, b"c")]
+
+
+class _Zeros(io.RawIOBase):
+    """Fluxo infinito de zeros (conteúdo de um membro sem o guardar em memória)."""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        buffer[:] = bytes(len(buffer))
+        return len(buffer)
+
+
+def test_iter_tar_images_refuses_decompression_bomb():
+    """Um tar.gz pequeno que se expande além do limite é recusado antes de o descomprimir."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        info = tarfile.TarInfo("zeros.bin")
+        info.size = 64 * 1024 * 1024
+        tar.addfile(info, _Zeros())
+    assert len(buffer.getvalue()) < 1024 * 1024
+
+    with pytest.raises(ArchiveTooLargeError, match="MB"):
+        list(iter_tar_images(buffer, {"a.jpg"}, max_bytes=1024 * 1024, max_members=10))
+
+
+def test_iter_tar_images_refuses_too_many_members():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for n in range(5):
+            tar.addfile(tarfile.TarInfo(f"empty-{n}.jpg"), io.BytesIO())
+
+    with pytest.raises(ArchiveTooLargeError, match="membros"):
+        list(iter_tar_images(buffer, {"a.jpg"}, max_bytes=1024, max_members=3))
+
+
+def test_is_image_name():
+    assert is_image_name("frame.JPG")
+    assert is_image_name("frame.webp")
+    assert not is_image_name("notes.txt")
+    assert not is_image_name("frame")
@@ -1,6 +1,12 @@
 """Testes unitários para utilitários de placa."""
 
-from apps.api.src.api.v1.utils.plate import normalize_plate, validate_brazilian_plate
+from apps.api.src.api.v1.utils.plate import (
+    canonicalize_plate,
+    normalize_plate,
+    plate_edit_distance,
+    plate_equivalence_key,
+    validate_brazilian_plate,
+)
 
 
 class TestNormalizePlate:
@@ -80,3 +86,45 @@ class TestValidateBrazilianPlate:
 
         is_valid, _error = validate_brazilian_plate("abc 1234")
         assert is_valid is True
+
+
+class TestCanonicalizePlate:
+    """Testes para função canonicalize_plate."""
+
+    def test_confusable_characters_share_canonical_form(self):
+        """O/0, I/1, B/8 e S/5 produzem a mesma forma canónica."""
+        assert canonicalize_plate("OIBS123") == canonicalize_plate("0185123")
+
+    def test_other_characters_unchanged(self):
+        """Caracteres fora do mapa de confundíveis não são alterados."""
+        assert canonicalize_plate("XYZ9A72") == "XYZ9A72"
+
+
+class TestPlateEquivalenceKey:
+    """Testes para função plate_equivalence_key."""
+
+    def test_legacy_and_mercosul_share_key(self):
+        """O dígito da 5.ª posição vira a letra correspondente (0 → A … 9 → J)."""
+        assert plate_equivalence_key("ABC1234") == "ABC1C34"
+        assert plate_equivalence_key("ABC1C34") == "ABC1C34"
+        assert plate_equivalence_key("XYZ9012") == "XYZ9A12"
+        assert plate_equivalence_key("XYZ9912") == "XYZ9J12"
+
+    def test_other_lengths_unchanged(self):
+        """Valores fora do tamanho de placa não são alterados."""
+        assert plate_equivalence_key("ABC123") == "ABC123"
+
+
+class TestPlateEditDistance:
+    """Testes para função plate_edit_distance."""
+
+    def test_identical(self):
+        """Placas iguais têm distância zero."""
+        assert plate_edit_distance("ABC1234", "ABC1234") == 0
+
+    def test_substitution_insertion_deletion(self):
+        """Substituição, inserção e remoção custam uma edição cada."""
+        assert plate_edit_distance("ABC1234", "ABC1284") == 1
+        assert plate_edit_distance("ABC1234", "ABC12345") == 1
+        assert plate_edit_distance("ABC1234", "AC1234") == 1
+        assert plate_edit_distance("ABC1234", "XYZ1234") == 3
@@ -0,0 +1,73 @@
+"""Testes unitários para o índice tolerante de placas."""
+
+from uuid import uuid4
+
+from apps.api.src.api.v1.utils.plate_index import FuzzyPlateIndex
+
+
+class TestFuzzyPlateIndex:
+    """Testes para FuzzyPlateIndex."""
+
+    def test_confusable_read_matches_with_distance_zero(self):
+        """Leitura que difere só em caracteres confundíveis tem distância 0."""
+        plate_id = uuid4()
+        index = FuzzyPlateIndex(max_distance=1)
+        index.add("BRA2E19", plate_id)
+
+        assert index.lookup("8RA2E19") == (plate_id, 0)
+
+    def test_single_edit_within_max_distance(self):
+        """Um erro de OCR fora do mapa de confundíveis é aceito até max_distance."""
+        plate_id = uuid4()
+        index = FuzzyPlateIndex(max_distance=1)
+        index.add("ABC1234", plate_id)
+
+        assert index.lookup("ABC1284") == (plate_id, 1)
+        assert index.lookup("ABC123") == (plate_id, 1)
+        assert index.lookup("AXC1284") is None
+
+    def test_max_distance_zero_only_confusables(self):
+        """Com max_distance=0 apenas as confusões mapeadas são toleradas."""
+        plate_id = uuid4()
+        index = FuzzyPlateIndex(max_distance=0)
+        index.add("ABC1234", plate_id)
+
+        assert index.lookup("A8C1234") == (plate_id, 0)
+        assert index.lookup("ABC1284") is None
+
+    def test_confusables_in_fifth_position(self):
+        """B/8, I/1 e S/5 são confundíveis também no quinto caractere."""
+        digit_id, letter_id = uuid4(), uuid4()
+        index = FuzzyPlateIndex(max_distance=0)
+        index.add("ABC1834", digit_id)
+        index.add("DEF1S34", letter_id)
+
+        assert index.lookup("ABC1B34") == (digit_id, 0)
+        assert index.lookup("DEF1534") == (letter_id, 0)
+
+    def test_ambiguous_candidates_rejected(self):
+        """Duas placas distintas à mesma distância mínima não autorizam ninguém."""
+        index = FuzzyPlateIndex(max_distance=1)
+        index.add("ABC1234", uuid4())
+        index.add("ABC1236", uuid4())
+
+        assert index.lookup("ABC1235") is None
+
+    def test_closest_candidate_wins(self):
+        """O candidato mais próximo prevalece sobre os mais distantes."""
+        near_id = uuid4()
+        index = FuzzyPlateIndex(max_distance=2)
+        index.add("ABC1234", near_id)
+        index.add("ABC1299", uuid4())
+
+        assert index.lookup("ABC1235") == (near_id, 1)
+
+    def test_remove(self):
+        """Placas removidas deixam de ser encontradas."""
+        index = FuzzyPlateIndex(max_distance=1)
+        index.add("ABC1234", uuid4())
+        index.remove("ABC1234")
+        index.remove("XYZ9999")
+
+        assert index.lookup("ABC1234") is None
+        assert len(index) == 0
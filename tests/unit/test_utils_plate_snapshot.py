@@ -0,0 +1,90 @@
+"""Testes unitários para o formato binário do snapshot da whitelist."""
+
+from pathlib import Path
+
+import pytest
+
+from apps.api.src.api.v1.utils.plate_snapshot import (
+    RECORD_SIZE,
+    SNAPSHOT_HEADER,
+    PlateSnapshot,
+    SnapshotFormatError,
+    SnapshotInfo,
+    read_snapshot_info,
+    write_snapshot,
+)
+
+
+class TestPlateSnapshot:
+    """Testes para write_snapshot / PlateSnapshot."""
+
+    def test_roundtrip_binary_search(self, tmp_path: Path):
+        """Registros ordenados e sem repetições; busca binária encontra todos."""
+        path = tmp_path / "whitelist.snap"
+        plates = [f"ABC{n:04d}" for n in range(500, 0, -1)] + ["ABC0001", "BRA2E19"]
+
+        count = write_snapshot(path, plates, version=42)
+
+        assert count == 501
+        assert path.stat().st_size == SNAPSHOT_HEADER.size + 501 * RECORD_SIZE
+        assert read_snapshot_info(path) == SnapshotInfo(42, 0)
+        with PlateSnapshot(path) as snapshot:
+            assert len(snapshot) == 501
+            assert snapshot.version == 42
+            assert all(plate in snapshot for plate in plates)
+            assert "ABC0000" not in snapshot
+            assert "ZZZ9999" not in snapshot
+            assert "ABC" not in snapshot
+
+    def test_records_are_equivalence_keys(self, tmp_path: Path):
+        """Os dois formatos da mesma placa dão um registro; qualquer leitura o encontra."""
+        path = tmp_path / "whitelist.snap"
+
+        assert write_snapshot(path, ["ABC1234", "ABC1C34", "DEF5G78"], version=1) == 2
+        assert path.read_bytes()[SNAPSHOT_HEADER.size :] == b"ABC1C34DEF5G78"
+        with PlateSnapshot(path) as snapshot:
+            assert "ABC1234" in snapshot
+            assert "ABC1C34" in snapshot
+            assert "DEF5678" in snapshot
+
+    def test_expiry_in_header(self, tmp_path: Path):
+        """A validade gravada no cabeçalho é lida sem abrir os registros."""
+        path = tmp_path / "whitelist.snap"
+        write_snapshot(path, ["ABC1234"], version=7, expires_at=1_900_000_000)
+
+        assert read_snapshot_info(path) == SnapshotInfo(7, 1_900_000_000)
+        with PlateSnapshot(path) as snapshot:
+            assert snapshot.expires_at == 1_900_000_000
+
+    def test_invalid_plates_skipped(self, tmp_path: Path):
+        """Placas sem 7 caracteres ASCII não entram no snapshot."""
+        path = tmp_path / "whitelist.snap"
+
+        assert write_snapshot(path, ["ABC1234", "AB1234", "ÁBC1234"], version=1) == 1
+
+    def test_empty_snapshot(self, tmp_path: Path):
+        """Whitelist vazia gera só o cabeçalho."""
+        path = tmp_path / "whitelist.snap"
+        write_snapshot(path, [], version=0)
+
+        with PlateSnapshot(path) as snapshot:
+            assert len(snapshot) == 0
+            assert "ABC1234" not in snapshot
+
+    def test_corrupted_snapshot_rejected(self, tmp_path: Path):
+        """Checksum ou tamanho inválidos → SnapshotFormatError."""
+        path = tmp_path / "whitelist.snap"
+        write_snapshot(path, ["ABC1234", "DEF5678"], version=3)
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(SnapshotFormatError):
+            PlateSnapshot(path)
+        path.write_bytes(bytes(data[:-1]))
+        with pytest.raises(SnapshotFormatError):
+            PlateSnapshot(path)
+        path.write_bytes(b"SW")
+        with pytest.raises(SnapshotFormatError):
+            PlateSnapshot(path)
+        assert read_snapshot_info(tmp_path / "missing.snap") is None
@@ -0,0 +1,75 @@
+"""Testes unitários para as janelas de validade da whitelist."""
+
+from datetime import UTC, datetime, time, timedelta
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+from apps.api.src.api.v1.utils.validity import (
+    ValidityWindow,
+    mask_to_weekdays,
+    weekdays_to_mask,
+)
+
+SAO_PAULO = ZoneInfo("America/Sao_Paulo")
+# Segunda-feira, 12:00 em São Paulo (15:00 UTC)
+MONDAY_NOON = datetime(2026, 10, 19, 15, 0, tzinfo=UTC)
+
+
+class TestValidityWindow:
+    """Testes para ValidityWindow."""
+
+    def test_weekday_mask_round_trip(self):
+        """Dias da semana ↔ máscara de bits."""
+        assert weekdays_to_mask([0, 4, 6]) == 0b1010001
+        assert mask_to_weekdays(0b1010001) == [0, 4, 6]
+        assert weekdays_to_mask(None) is None
+        assert mask_to_weekdays(None) is None
+
+    def test_from_plate_without_restrictions_is_none(self):
+        """Entrada sem colunas de validade não gera janela."""
+        plate = SimpleNamespace(
+            valid_from=None,
+            valid_until=None,
+            allowed_weekdays=None,
+            daily_start=None,
+            daily_end=None,
+        )
+        assert ValidityWindow.from_plate(plate) is None
+
+    def test_from_plate_treats_naive_datetimes_as_utc(self):
+        """Datas sem fuso vindas do banco são UTC."""
+        plate = SimpleNamespace(
+            valid_from=None,
+            valid_until=datetime(2026, 10, 19, 15, 0),  # noqa: DTZ001
+            allowed_weekdays=None,
+            daily_start=None,
+            daily_end=None,
+        )
+        window = ValidityWindow.from_plate(plate)
+        assert window.valid_until == MONDAY_NOON
+
+    def test_absolute_period_is_half_open(self):
+        """valid_from é inclusivo e valid_until exclusivo."""
+        window = ValidityWindow(
+            valid_from=MONDAY_NOON, valid_until=MONDAY_NOON + timedelta(hours=1)
+        )
+        assert window.allows(MONDAY_NOON, SAO_PAULO)
+        assert not window.allows(MONDAY_NOON - timedelta(seconds=1), SAO_PAULO)
+        assert not window.allows(MONDAY_NOON + timedelta(hours=1), SAO_PAULO)
+
+    def test_weekdays_use_configured_timezone(self):
+        """Segunda 01:00 UTC ainda é domingo em São Paulo."""
+        weekdays_only = ValidityWindow(allowed_weekdays=weekdays_to_mask([0, 1, 2, 3, 4]))
+        sunday_night_local = datetime(2026, 10, 19, 1, 0, tzinfo=UTC)
+        assert not weekdays_only.allows(sunday_night_local, SAO_PAULO)
+        assert weekdays_only.allows(sunday_night_local, UTC)
+
+    def test_daily_hours_and_overnight_range(self):
+        """Faixa diária normal e faixa que atravessa a meia-noite."""
+        business = ValidityWindow(daily_start=time(8, 0), daily_end=time(18, 0))
+        night = ValidityWindow(daily_start=time(22, 0), daily_end=time(6, 0))
+        assert business.allows(MONDAY_NOON, SAO_PAULO)
+        assert not night.allows(MONDAY_NOON, SAO_PAULO)
+        late = MONDAY_NOON + timedelta(hours=11)  # 23:00 local
+        assert not business.allows(late, SAO_PAULO)
+        assert night.allows(late, SAO_PAULO)
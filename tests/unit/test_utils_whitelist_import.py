@@ -0,0 +1,75 @@
+"""Testes unitários para a leitura de arquivos de importação da whitelist."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+from apps.api.src.api.v1.utils.whitelist_import import (
+    ImportFormat,
+    ImportRow,
+    detect_import_format,
+    iter_import_rows,
+)
+
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def _read(data: bytes, import_format: ImportFormat, size: int = 3) -> list[ImportRow]:
+    async def collect() -> list[ImportRow]:
+        return [row async for row in iter_import_rows(_chunks(data, size), import_format)]
+
+    return asyncio.run(collect())
+
+
+class TestDetectImportFormat:
+    """Testes para detect_import_format."""
+
+    def test_known_types(self):
+        """CSV e NDJSON são reconhecidos, ignorando parâmetros."""
+        assert detect_import_format("text/csv; charset=utf-8") is ImportFormat.csv
+        assert detect_import_format("application/x-ndjson") is ImportFormat.ndjson
+
+    def test_unknown_type(self):
+        """Tipos não suportados devolvem None."""
+        assert detect_import_format("application/json") is None
+        assert detect_import_format(None) is None
+
+
+class TestIterImportRows:
+    """Testes para iter_import_rows."""
+
+    def test_csv_with_header_and_split_chunks(self):
+        """Cabeçalho define as colunas; linhas partidas entre blocos são remontadas."""
+        data = b"description,plate\r\nCarro A,ABC-1234\r\n\r\n,XYZ9A12\r\n"
+
+        rows = _read(data, ImportFormat.csv)
+
+        assert rows == [
+            ImportRow(2, "ABC-1234", "Carro A"),
+            ImportRow(4, "XYZ9A12", None),
+        ]
+
+    def test_csv_without_header(self):
+        """Sem cabeçalho, a primeira coluna é a placa e a segunda a descrição."""
+        rows = _read(b'ABC1234,"Frota, 01"\nDEF5678', ImportFormat.csv)
+
+        assert rows == [ImportRow(1, "ABC1234", "Frota, 01"), ImportRow(2, "DEF5678", None)]
+
+    def test_ndjson(self):
+        """Cada linha NDJSON vira uma linha; JSON inválido é reportado na linha."""
+        data = b'{"plate": "ABC1234", "description": "A"}\nnot json\n[1]\n'
+
+        rows = _read(data, ImportFormat.ndjson, size=7)
+
+        assert rows[0] == ImportRow(1, "ABC1234", "A")
+        assert rows[1].line == 2
+        assert rows[1].error is not None
+        assert rows[2].error is not None
+
+    def test_utf8_split_across_chunks(self):
+        """Caracteres multibyte divididos entre blocos são decodificados corretamente."""
+        rows = _read("ABC1234,Condomínio São João\n".encode(), ImportFormat.csv, size=1)
+
+        assert rows == [ImportRow(1, "ABC1234", "Condomínio São João")]